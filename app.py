@@ -8,45 +8,199 @@
 #     rendered via Jinja2 templates in templates/.
 #   - JSON API endpoints under /api/ are consumed by static/script.js:
 #       POST /api/ticket          — issue a new ticket (normal or priority)
-#       GET  /api/status/<id>     — check position & estimated wait
+#       POST /api/tickets/bulk    — issue many tickets in one call (all or nothing)
+#       GET  /api/status/<id>     — check position & estimated wait (ETag / 304)
+#       POST /api/status/batch    — positions for many ticket IDs at once
 #       POST /api/serve           — admin calls next customer from a queue
-#       GET  /api/queue           — get queue details for a given service
-#       GET  /api/queue-overview  — get current waiting counts by service
+#       POST /api/cancel          — customer gives up a waiting ticket
+#       POST /api/arrived         — desk confirms a called customer showed up
+#       POST /api/desks           — admin sets how many desks serve a queue
+#       POST /api/desk/register   — a desk declares the services it handles
+#       POST /api/desk/serve      — next customer for a desk (or several desks),
+#                                   queue chosen by the scheduler
+#       GET  /api/queue           — waiting tickets in serve order, paginated
+#                                   (?service=&office_id=&limit=&cursor=)
+#       GET  /api/search          — admin lookup of waiting tickets by name-word,
+#                                   ticket-ID or user prefix (?q=&office_id=&limit=)
+#       GET  /api/queue-overview  — live waiting counts by service
+#                                   (?office_id=... for one office, else all;
+#                                   ETag / 304)
+#       GET  /api/analytics       — avg-wait ranking + p50/p90/p99 and
+#                                   15m/1h/24h windows per queue (?office_id=)
+#       GET  /api/analytics/history — waits of every archived served ticket,
+#                                   grouped (?by=hour,service&office_id=&service=)
+#       GET  /api/stream/<id>     — Server-Sent Events: live position updates
+#       GET  /api/stream/office/<office_id> — SSE: live overview of one office
+#       GET  /metrics             — Prometheus text format (NOQ_METRICS=1 only)
 #   - Data models (Ticket, Customer, ServiceType) are in smartqueue/models.py.
-#   - No database; everything resets on server restart.
+#   - No database. By default everything resets on server restart; set
+#     NOQ_DATA_DIR to journal every change and recover it on startup
+#     (see smartqueue/journal.py).
+#   - NOQ_SHARDS=N splits offices across N worker processes, one core each;
+#     `manager` is then a router with the same API (see smartqueue/sharding.py).
+#   - NOQ_DB=path keeps the queues in a SQLite file instead of memory, so
+#     several server processes (gunicorn -w N app:app) share them
+#     (see smartqueue/sqlstore.py).
+#   - NOQ_ENGINE=bucket serves from bucketed queues, and NOQ_AGING (e.g.
+#     "0:1800,1:3600") promotes tickets waiting that many seconds at a level
+#     (see smartqueue/buckets.py).
+#   - Status and overview responses carry an ETag built from the queue
+#     versions; If-None-Match is answered with 304 before any work, and
+#     bodies are cached per version (see smartqueue/httpcache.py).
+#   - NOQ_TTL (e.g. "passport:7200,tax:3600") expires tickets left waiting
+#     that long, and NOQ_NO_SHOW_GRACE marks called customers not confirmed
+#     via /api/arrived within that many seconds as no-shows; a background
+#     thread advances the expiry timers every second (see smartqueue/timers.py).
+#   - Waiting tickets are indexed by ID, name-word and user prefixes for
+#     /api/search (see smartqueue/search.py); not available with NOQ_DB.
+#   - NOQ_ARCHIVE_DIR keeps every served ticket in columnar segment files
+#     for /api/analytics/history (see smartqueue/archive.py).
 # =============================================================================
 
-from flask import Flask, render_template, request, jsonify
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
 from smartqueue.queues import QueueManager
+from smartqueue.journal import recover
+from smartqueue.sharding import ShardedQueueManager
+from smartqueue.sqlstore import SQLiteQueueManager
+from smartqueue.buckets import parse_aging
+from smartqueue.timers import parse_ttl
+from smartqueue.events import ChangeFeed
+from smartqueue.scheduler import DeskScheduler
+from smartqueue.estimators import ServiceRateEstimator
+from smartqueue.ids import normalize_id
+from smartqueue.metrics import Metrics
+from smartqueue.archive import ServedArchive
+from smartqueue.httpcache import BodyCache, make_etag
+from smartqueue.analytics import archive_report, rank_services_by_avg_wait, wait_time_report
 
 app = Flask(__name__)
 
-# Global In-Memory Queue Manager
-manager = QueueManager()
+# Global In-Memory Queue Manager, shared by Flask's request threads: striped
+# locking lets requests on different queues run concurrently.
+# With NOQ_DATA_DIR set, state is recovered from (and journaled to) that
+# directory; NOQ_FSYNC picks the fsync policy (always / interval / never).
+# Wait estimates come from each queue's observed serving pace, and waiting
+# tickets are indexed for /api/search.
+DATA_DIR = os.environ.get('NOQ_DATA_DIR')
+SHARDS = int(os.environ.get('NOQ_SHARDS', '0'))
+DB_PATH = os.environ.get('NOQ_DB')
+ENGINE_OPTIONS = {'engine': os.environ.get('NOQ_ENGINE', 'heap'),
+                  'aging': parse_aging(os.environ.get('NOQ_AGING', ''))}
+NO_SHOW_GRACE = os.environ.get('NOQ_NO_SHOW_GRACE')
+EXPIRY_OPTIONS = {'ttl': parse_ttl(os.environ.get('NOQ_TTL', '')),
+                  'no_show_grace': float(NO_SHOW_GRACE) if NO_SHOW_GRACE else None}
+if DB_PATH:
+    # Shared by every worker process; SQLite is the durable copy.
+    if SHARDS or DATA_DIR:
+        raise ValueError("NOQ_DB cannot be combined with NOQ_SHARDS or NOQ_DATA_DIR")
+    manager = SQLiteQueueManager(DB_PATH)
+    atexit.register(manager.close)
+elif SHARDS:
+    # Each shard journals to its own subdirectory of NOQ_DATA_DIR, if set.
+    journal_options = {'fsync': os.environ.get('NOQ_FSYNC', 'interval')} if DATA_DIR else {}
+    manager = ShardedQueueManager(SHARDS, data_dir=DATA_DIR, estimator=ServiceRateEstimator(),
+                                  search=True, **ENGINE_OPTIONS, **EXPIRY_OPTIONS,
+                                  **journal_options)
+    atexit.register(manager.close)
+elif DATA_DIR:
+    manager, journal = recover(DATA_DIR, concurrency='striped',
+                               estimator=ServiceRateEstimator(), search=True,
+                               **ENGINE_OPTIONS, **EXPIRY_OPTIONS,
+                               fsync=os.environ.get('NOQ_FSYNC', 'interval'))
+    atexit.register(journal.close)
+else:
+    manager = QueueManager(concurrency='striped', estimator=ServiceRateEstimator(),
+                           search=True, **ENGINE_OPTIONS, **EXPIRY_OPTIONS)
+
+# Latency histograms and queue gauges for /metrics, opt-in with NOQ_METRICS=1.
+# When off, no request hook is registered and the manager's hooks stay idle.
+# Sharded (or on SQLite), operation timings live elsewhere; /metrics then
+# reports requests and queue depths only.
+metrics = Metrics() if os.environ.get('NOQ_METRICS') == '1' else None
+IN_PROCESS = not SHARDS and not DB_PATH
+if metrics is not None:
+    if IN_PROCESS:
+        metrics.instrument(manager)
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_start = time.perf_counter_ns()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop('request_start', None)
+        if start is not None:
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.observe_request(request.method, endpoint, response.status_code,
+                                    time.perf_counter_ns() - start)
+        return response
+
+# Push channel for /api/stream/*: one recomputation per change, fanned out
+feed = ChangeFeed(manager).attach()
+
+# Multi-service desks for /api/desk/*; needs the in-process manager
+scheduler = DeskScheduler(manager).attach() if IN_PROCESS else None
+
+# Served-ticket archive for /api/analytics/history; needs the in-process manager
+ARCHIVE_DIR = os.environ.get('NOQ_ARCHIVE_DIR')
+archive = ServedArchive(ARCHIVE_DIR).attach(manager) if ARCHIVE_DIR and IN_PROCESS else None
+if archive is not None:
+    atexit.register(archive.close)
 
-# Pre-populate with more diverse data for a better demo
-try:
-    print("Pre-populating queue with mock data...")
+# Serialized status/overview bodies per queue version. Sharded (or on
+# SQLite), versions live elsewhere and responses are computed every time.
+VERSIONED = IN_PROCESS
+bodies = BodyCache(int(os.environ.get('NOQ_BODY_CACHE', '4096')))
+
+# Expiry timers also fire without traffic: one tick per second
+if EXPIRY_OPTIONS['ttl'] or EXPIRY_OPTIONS['no_show_grace']:
+    def _expiry_tick():
+        while True:
+            time.sleep(1.0)
+            manager.expire_due()
+
+    threading.Thread(target=_expiry_tick, name="noq-expiry", daemon=True).start()
+
+# Seconds between SSE keep-alive comments on an idle stream
+STREAM_KEEPALIVE = 15
+
+# Largest batch accepted by /api/tickets/bulk and /api/status/batch
+MAX_BATCH = 1000
+
+# Most matches /api/search returns
+MAX_SEARCH_RESULTS = 100
+
+# Pre-populate with more diverse data for a better demo (fresh state only)
+if manager.counter == 0:
+    try:
+        print("Pre-populating queue with mock data...")
     
-    # Passport queue
-    manager.issue_ticket("u1", "Alice", "passport", priority_level=0)
-    manager.issue_ticket("u2", "Bob", "passport", priority_level=0)
-    manager.issue_ticket("u3", "Charlie", "passport", priority_level=5)  # Priority
+        # Passport queue
+        manager.issue_ticket("u1", "Alice", "passport", priority_level=0)
+        manager.issue_ticket("u2", "Bob", "passport", priority_level=0)
+        manager.issue_ticket("u3", "Charlie", "passport", priority_level=5)  # Priority
     
-    # Tax queue
-    manager.issue_ticket("u4", "Diana", "tax", priority_level=8)  # High Priority
-    manager.issue_ticket("u5", "Eve", "tax", priority_level=0)
+        # Tax queue
+        manager.issue_ticket("u4", "Diana", "tax", priority_level=8)  # High Priority
+        manager.issue_ticket("u5", "Eve", "tax", priority_level=0)
 
-    # Municipal queue
-    manager.issue_ticket("u6", "Frank", "municipal", priority_level=0)
+        # Municipal queue
+        manager.issue_ticket("u6", "Frank", "municipal", priority_level=0)
     
-    # Support queue
-    manager.issue_ticket("u7", "Grace", "support", priority_level=0)
-    manager.issue_ticket("u8", "Henry", "support", priority_level=0)
+        # Support queue
+        manager.issue_ticket("u7", "Grace", "support", priority_level=0)
+        manager.issue_ticket("u8", "Henry", "support", priority_level=0)
     
-    print("✅ 8 mock tickets created across different services.")
-except Exception as e:
-    print(f"⚠️ Pre-populating error: {e}")
+        print("✅ 8 mock tickets created across different services.")
+    except Exception as e:
+        print(f"⚠️ Pre-populating error: {e}")
 
 
 @app.route('/')
@@ -65,8 +219,9 @@ def admin():
 def create_ticket():
     data = request.json
     try:
-        # Use a unique ID for guests to allow multiple guest tickets
-        user_id = f"guest-{manager.counter}"
+        # Use a unique ID for guests to allow multiple guest tickets.
+        # (Not manager.counter: two concurrent requests could read the same value.)
+        user_id = f"guest-{uuid.uuid4().hex[:12]}"
         name = data.get('name', 'Guest')
         service = data.get('service', 'passport')
         priority = int(data.get('priority', 0))
@@ -88,20 +243,124 @@ def create_ticket():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/tickets/bulk', methods=['POST'])
+def create_tickets_bulk():
+    data = request.json or {}
+    entries = data.get('tickets', [])
+    if not entries or len(entries) > MAX_BATCH:
+        return jsonify({'success': False, 'error': f'Send between 1 and {MAX_BATCH} tickets'}), 400
+    try:
+        bulk = [
+            {
+                # Same guest scheme as /api/ticket unless the caller names the user
+                'user_id': entry.get('user_id') or f"guest-{uuid.uuid4().hex[:12]}",
+                'name': entry.get('name', 'Guest'),
+                'service': entry.get('service', 'passport'),
+                'priority_level': int(entry.get('priority', 0)),
+                'office_id': entry.get('office_id', 'default'),
+            }
+            for entry in entries
+        ]
+        results = manager.issue_tickets_bulk(bulk)
+        return jsonify({
+            'success': True,
+            'tickets': [
+                {
+                    'ticket_id': ticket.ticket_id,
+                    'service': ticket.service.value,
+                    'priority': ticket.priority_level,
+                    'position': position,
+                    'wait_time': wait
+                }
+                for ticket, position, wait in results
+            ]
+        })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/status/batch', methods=['POST'])
+def get_status_batch():
+    data = request.json or {}
+    ticket_ids = data.get('ticket_ids', [])
+    if not ticket_ids or len(ticket_ids) > MAX_BATCH:
+        return jsonify({'success': False, 'error': f'Send between 1 and {MAX_BATCH} ticket IDs'}), 400
+    if not all(isinstance(tid, str) for tid in ticket_ids):
+        return jsonify({'success': False, 'error': 'ticket_ids must be strings'}), 400
+    ticket_ids = [normalize_id(tid) for tid in ticket_ids]
+
+    positions = manager.get_positions(ticket_ids)
+    statuses = []
+    for tid in ticket_ids:
+        pos, wait = positions[tid]
+        if pos == -1:
+            statuses.append({'ticket_id': tid, 'status': 'not_found_or_served'})
+        else:
+            statuses.append({'ticket_id': tid, 'status': 'waiting', 'position': pos, 'wait_time': wait})
+
+    return jsonify({'success': True, 'statuses': statuses})
+
+
+def _not_modified(key, version):
+    """
+    304 if the client already holds this version, else the cached 200 body
+    of `key` at `version`; None when it still has to be computed.
+    """
+    etag = make_etag(version)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        body = bodies.get((*key, version))
+        if body is None:
+            return None
+        response = Response(body, mimetype=app.json.mimetype)
+    response.set_etag(etag)
+    return response
+
+
+def _versioned_json(key, version, payload, current_version):
+    """
+    Serialize a freshly computed payload with its ETag. It is cached only if
+    the version did not move while it was computed, so a cached body always
+    belongs to its version.
+    """
+    body = f"{app.json.dumps(payload)}\n".encode()
+    if current_version == version:
+        bodies.put((*key, version), body)
+    response = Response(body, mimetype=app.json.mimetype)
+    response.set_etag(make_etag(current_version))
+    return response
+
+
 @app.route('/api/status/<ticket_id>', methods=['GET'])
 def get_status(ticket_id):
+    # IDs are typed in by hand at the kiosk: accept lower case and O/I/L.
+    ticket_id = normalize_id(ticket_id)
+    ticket = manager.active_tickets_by_id.get(ticket_id) if VERSIONED else None
+    if ticket is not None:
+        queue = (ticket.office_id, ticket.service.value)
+        version = manager.queue_version(*queue)
+        cached = _not_modified(('status', ticket_id), version)
+        if cached is not None:
+            return cached
+
     pos, wait = manager.get_position(ticket_id)
     if pos == -1:
         return jsonify({'success': False, 'status': 'not_found_or_served'}), 404
         
     ticket = manager.active_tickets_by_id.get(ticket_id)
-    return jsonify({
+    payload = {
         'success': True,
         'position': pos,
         'wait_time': wait,
         'customer': ticket.customer.name,
         'service': ticket.service.value
-    })
+    }
+    if not VERSIONED:
+        return jsonify(payload)
+    return _versioned_json(('status', ticket_id), version, payload, manager.queue_version(*queue))
 
 
 @app.route('/api/serve', methods=['POST'])
@@ -125,48 +384,241 @@ def serve_next():
         return jsonify({'success': False, 'message': 'No customers waiting'}), 404
 
 
+@app.route('/api/desks', methods=['POST'])
+def set_desks():
+    data = request.json or {}
+    service = data.get('service', 'passport')
+    office = data.get('office_id', 'default')
+    try:
+        desks = int(data.get('desks', 1))
+        if desks < 1:
+            raise ValueError("desks must be at least 1")
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    manager.set_active_desks(office, service, desks)
+    return jsonify({'success': True, 'office_id': office, 'service': service, 'desks': desks})
+
+
+def _ticket_json(ticket):
+    return {'id': ticket.ticket_id, 'customer': ticket.customer.name,
+            'service': ticket.service.value, 'priority': ticket.priority_level}
+
+
+@app.route('/api/desk/register', methods=['POST'])
+def register_desk():
+    if scheduler is None:
+        return jsonify({'success': False, 'error': "Desk scheduling needs NOQ_SHARDS and NOQ_DB unset"}), 404
+    data = request.json or {}
+    desk_id = str(data.get('desk_id', ''))
+    office = data.get('office_id', 'default')
+    if not desk_id:
+        return jsonify({'success': False, 'error': "desk_id is required"}), 400
+    try:
+        desk = scheduler.register_desk(desk_id, data.get('services') or [], office,
+                                       data.get('weights'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, 'desk_id': desk_id, 'office_id': office,
+                    'services': list(desk.services)})
+
+
+@app.route('/api/desk/serve', methods=['POST'])
+def serve_for_desk():
+    """Body {"desk_id": ...} serves one desk; {"desk_ids": [...]} opens several at once."""
+    if scheduler is None:
+        return jsonify({'success': False, 'error': "Desk scheduling needs NOQ_SHARDS and NOQ_DB unset"}), 404
+    data = request.json or {}
+    try:
+        if 'desk_ids' in data:
+            desk_ids = data['desk_ids']
+            if not isinstance(desk_ids, list) or len(desk_ids) > MAX_BATCH:
+                raise ValueError(f"desk_ids must be a list of at most {MAX_BATCH} ids")
+            served = scheduler.serve_many([str(desk_id) for desk_id in desk_ids])
+            return jsonify({'success': True, 'served': [
+                {'desk_id': desk_id, 'ticket': _ticket_json(ticket) if ticket else None}
+                for desk_id, ticket in served]})
+        ticket = scheduler.serve_next_for_desk(str(data.get('desk_id', '')))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if ticket is None:
+        return jsonify({'success': False, 'message': 'No customers waiting'}), 404
+    return jsonify({'success': True, 'ticket': _ticket_json(ticket)})
+
+
+@app.route('/api/cancel', methods=['POST'])
+def cancel_ticket():
+    data = request.json or {}
+    ticket_id = normalize_id(str(data.get('ticket_id', '')))
+
+    ticket = manager.cancel_ticket(ticket_id)
+
+    if ticket:
+        return jsonify({
+            'success': True,
+            'ticket': {
+                'id': ticket.ticket_id,
+                'customer': ticket.customer.name,
+                'service': ticket.service.value
+            }
+        })
+    else:
+        return jsonify({'success': False, 'status': 'not_found_or_served'}), 404
+
+
+@app.route('/api/arrived', methods=['POST'])
+def confirm_arrival():
+    data = request.json or {}
+    ticket_id = data.get('ticket_id', '')
+    if not isinstance(ticket_id, str):
+        return jsonify({'success': False, 'error': 'ticket_id must be a string'}), 400
+    ticket_id = normalize_id(ticket_id)
+    if not manager.confirm_arrival(ticket_id):
+        return jsonify({'success': False, 'status': 'not_called'}), 404
+    return jsonify({'success': True, 'ticket_id': ticket_id})
+
+
 @app.route('/api/queue', methods=['GET'])
 def get_queue():
     service = request.args.get('service', 'passport')
+    office = request.args.get('office_id', 'default')
+    cursor = request.args.get('cursor')
     try:
-        queue = manager.get_queue(service)
+        limit = int(request.args.get('limit', 50))
+        queue, next_cursor = manager.get_queue(office, service, limit=limit, cursor=cursor)
+
+        # Positions are contiguous within a page: look up the first, count on.
+        first_position = manager.get_position(queue[0].ticket_id)[0] if queue else 0
         return jsonify({
             'success': True,
             'queue': [
                 {
                     'ticket_id': t.ticket_id,
                     'name': t.customer.name,
-                    'priority': t.priority_level
+                    'priority': t.priority_level,
+                    'position': first_position + i
                 }
-                for t in queue
-            ]
+                for i, t in enumerate(queue)
+            ],
+            'next_cursor': next_cursor
         })
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
-@app.route('/api/queue-overview', methods=['GET'])
-def get_queue_overview():
-    services = ['passport', 'tax', 'municipal', 'support']
-    queues = []
+@app.route('/api/search', methods=['GET'])
+def search_tickets():
+    if not hasattr(manager, 'search'):
+        return jsonify({'success': False, 'error': "Search needs NOQ_DB unset"}), 404
+    query = request.args.get('q', '')
+    try:
+        limit = int(request.args.get('limit', 10))
+        if not 1 <= limit <= MAX_SEARCH_RESULTS:
+            raise ValueError(f"limit must be between 1 and {MAX_SEARCH_RESULTS}")
+        matches = manager.search(query, office_id=request.args.get('office_id'), limit=limit)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({
+        'success': True,
+        'matches': [
+            {
+                'ticket_id': ticket.ticket_id,
+                'name': ticket.name,
+                'service': ticket.service.value,
+                'office_id': ticket.office_id,
+                'priority': ticket.priority_level,
+                'position': position,
+                'wait_time': wait
+            }
+            for ticket, position, wait in matches
+        ]
+    })
 
-    for service in services:
-        waiting_count = 0
 
-        for ticket in manager.active_tickets_by_id.values():
-            if ticket.service.value == service and ticket.status == "WAITING":
-                waiting_count += 1
+@app.route('/api/queue-overview', methods=['GET'])
+def get_queue_overview():
+    office = request.args.get('office_id')
+    if not VERSIONED:
+        return jsonify({'success': True, 'queues': manager.get_queue_overview(office)})
+    version = manager.office_version(office)
+    cached = _not_modified(('overview', office), version)
+    if cached is not None:
+        return cached
+    payload = {'success': True, 'queues': manager.get_queue_overview(office)}
+    return _versioned_json(('overview', office), version, payload, manager.office_version(office))
 
-        queues.append({
-            'service': service,
-            'waiting_count': waiting_count
-        })
 
+@app.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    office = request.args.get('office_id')
     return jsonify({
         'success': True,
-        'queues': queues
+        'ranking': [
+            {'service': service, 'avg_wait': avg}
+            for service, avg in rank_services_by_avg_wait(manager)
+        ],
+        'queues': wait_time_report(manager, office)
     })
 
 
+@app.route('/api/analytics/history', methods=['GET'])
+def get_analytics_history():
+    if archive is None:
+        return jsonify({'success': False,
+                        'error': "No archive (set NOQ_ARCHIVE_DIR, NOQ_SHARDS and NOQ_DB unset)"}), 404
+    by = [key for key in request.args.get('by', 'service').split(',') if key]
+    archive.flush()
+    try:
+        groups = archive_report(ARCHIVE_DIR, by, office_id=request.args.get('office_id'),
+                                service=request.args.get('service'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except ImportError:
+        return jsonify({'success': False, 'error': "Archive queries need NumPy"}), 501
+    return jsonify({'success': True, 'groups': groups})
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    if metrics is None:
+        return jsonify({'success': False, 'error': "Metrics are disabled (set NOQ_METRICS=1)"}), 404
+    return Response(metrics.render(manager), mimetype='text/plain; version=0.0.4')
+
+
+def _sse_stream(subscription, is_final):
+    """Relay a ChangeFeed subscription as text/event-stream until is_final(message)."""
+    def generate():
+        try:
+            while True:
+                message = subscription.get(timeout=STREAM_KEEPALIVE)
+                if message is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(message)}\n\n"
+                if is_final(message):
+                    break
+        finally:
+            subscription.close()
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/api/stream/<ticket_id>', methods=['GET'])
+def stream_ticket(ticket_id):
+    ticket_id = normalize_id(ticket_id)
+    subscription = feed.subscribe_ticket(ticket_id)
+    if subscription is None:
+        return jsonify({'success': False, 'status': 'not_found_or_served'}), 404
+    return _sse_stream(subscription, lambda message: message['status'] != 'WAITING')
+
+
+@app.route('/api/stream/office/<office_id>', methods=['GET'])
+def stream_office(office_id):
+    return _sse_stream(feed.subscribe_office(office_id), lambda message: False)
+
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
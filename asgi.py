@@ -0,0 +1,535 @@
+# =============================================================================
+# asgi.py — asyncio front-end for NoQ: the /api/* contract of app.py as ASGI.
+#
+# Architecture overview:
+#   - `app` is a plain ASGI 3 application (no framework). Every idle
+#     customer on /api/stream/* is a suspended coroutine rather than a
+#     parked thread, so one process holds tens of thousands of them.
+#   - State is one QueueManager behind a QueueService (smartqueue/aio.py):
+#     mutations go through its single writer task, reads run on the loop
+#     between writer batches and so always see a consistent state.
+#   - Endpoints, request bodies, JSON replies and status codes match app.py
+#     (see its header for the list). The HTML pages and /metrics stay on the
+#     Flask server.
+#   - NOQ_DATA_DIR journals and recovers as in app.py. The journal's writes
+#     (and fsyncs, with NOQ_FSYNC=always) then run on the loop, inside the
+#     writer batch (or, for promotions applied by a read, between batches);
+#     snapshots run on a helper thread (see smartqueue/aio.py for the
+#     locking). NOQ_SHARDS is not supported here: router calls block.
+#   - NOQ_ENGINE and NOQ_AGING select the queue engine, and NOQ_TTL /
+#     NOQ_NO_SHOW_GRACE ticket expiry, as in app.py. Expiry timers are
+#     advanced by the writer task's mutations (and /api/arrived) only.
+#
+# Usage:
+#   python asgi.py [--host 127.0.0.1] [--port 8000]
+#       serves with uvicorn if it is installed, else with the small built-in
+#       HTTP/1.1 server below (keep-alive, chunked streaming, no TLS)
+#   uvicorn asgi:app    # or any other ASGI server, single worker
+# =============================================================================
+
+import argparse
+import asyncio
+import json
+import os
+import uuid
+from typing import Dict, Optional
+from urllib.parse import parse_qs, unquote
+
+from smartqueue.aio import QueueService
+from smartqueue.analytics import rank_services_by_avg_wait, wait_time_report
+from smartqueue.estimators import ServiceRateEstimator
+from smartqueue.buckets import parse_aging
+from smartqueue.timers import parse_ttl
+from smartqueue.ids import normalize_id
+from smartqueue.journal import recover
+from smartqueue.queues import QueueManager
+
+# Same limits as app.py
+STREAM_KEEPALIVE = 15
+MAX_BATCH = 1000
+MAX_SEARCH_RESULTS = 100
+
+DATA_DIR = os.environ.get('NOQ_DATA_DIR')
+ENGINE_OPTIONS = {'engine': os.environ.get('NOQ_ENGINE', 'heap'),
+                  'aging': parse_aging(os.environ.get('NOQ_AGING', ''))}
+NO_SHOW_GRACE = os.environ.get('NOQ_NO_SHOW_GRACE')
+EXPIRY_OPTIONS = {'ttl': parse_ttl(os.environ.get('NOQ_TTL', '')),
+                  'no_show_grace': float(NO_SHOW_GRACE) if NO_SHOW_GRACE else None}
+if DATA_DIR:
+    # "global": the journal snapshots on a helper thread inside quiesce()
+    manager, journal = recover(DATA_DIR, concurrency='global', estimator=ServiceRateEstimator(),
+                               search=True, **ENGINE_OPTIONS, **EXPIRY_OPTIONS,
+                               fsync=os.environ.get('NOQ_FSYNC', 'interval'))
+else:
+    manager = QueueManager(estimator=ServiceRateEstimator(), search=True, **ENGINE_OPTIONS,
+                           **EXPIRY_OPTIONS)
+
+service = QueueService(manager)
+_started: Optional[asyncio.Future] = None
+
+
+async def _ensure_started() -> None:
+    """Start the writer on first use, for servers that skip the lifespan protocol."""
+    global _started
+    if _started is None:
+        _started = asyncio.ensure_future(service.start())
+    await _started
+
+
+# --- request / response helpers ---
+
+class Request:
+    __slots__ = ("method", "path", "query", "body")
+
+    def __init__(self, scope: Dict, body: bytes):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query = {k: v[0] for k, v in parse_qs(scope.get('query_string', b'').decode()).items()}
+        self.body = body
+
+    def json(self) -> Dict:
+        if not self.body:
+            return {}
+        data = json.loads(self.body)
+        if not isinstance(data, dict):
+            raise ValueError("Expected a JSON object")
+        return data
+
+
+async def _send_json(send, payload: Dict, status: int = 200) -> None:
+    body = json.dumps(payload).encode()
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'),
+                            (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+# --- API endpoints (same contract as app.py) ---
+
+async def create_ticket(req: Request):
+    data = req.json()
+    try:
+        user_id = f"guest-{uuid.uuid4().hex[:12]}"
+        name = data.get('name', 'Guest')
+        service_name = data.get('service', 'passport')
+        priority = int(data.get('priority', 0))
+
+        ticket = await service.submit('issue_ticket', user_id, name, service_name,
+                                      priority_level=priority)
+        position, wait = manager.get_position(ticket.ticket_id)
+        return {
+            'success': True,
+            'ticket_id': ticket.ticket_id,
+            'service': ticket.service.value,
+            'priority': ticket.priority_level,
+            'position': position,
+            'wait_time': wait
+        }, 200
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+
+
+async def create_tickets_bulk(req: Request):
+    entries = req.json().get('tickets', [])
+    if not entries or len(entries) > MAX_BATCH:
+        return {'success': False, 'error': f'Send between 1 and {MAX_BATCH} tickets'}, 400
+    try:
+        bulk = [
+            {
+                'user_id': entry.get('user_id') or f"guest-{uuid.uuid4().hex[:12]}",
+                'name': entry.get('name', 'Guest'),
+                'service': entry.get('service', 'passport'),
+                'priority_level': int(entry.get('priority', 0)),
+                'office_id': entry.get('office_id', 'default'),
+            }
+            for entry in entries
+        ]
+        results = await service.submit('issue_tickets_bulk', bulk)
+        return {
+            'success': True,
+            'tickets': [
+                {
+                    'ticket_id': ticket.ticket_id,
+                    'service': ticket.service.value,
+                    'priority': ticket.priority_level,
+                    'position': position,
+                    'wait_time': wait
+                }
+                for ticket, position, wait in results
+            ]
+        }, 200
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+
+
+async def get_status_batch(req: Request):
+    ticket_ids = req.json().get('ticket_ids', [])
+    if not ticket_ids or len(ticket_ids) > MAX_BATCH:
+        return {'success': False, 'error': f'Send between 1 and {MAX_BATCH} ticket IDs'}, 400
+    if not all(isinstance(tid, str) for tid in ticket_ids):
+        return {'success': False, 'error': 'ticket_ids must be strings'}, 400
+    ticket_ids = [normalize_id(tid) for tid in ticket_ids]
+
+    positions = manager.get_positions(ticket_ids)
+    statuses = []
+    for tid in ticket_ids:
+        pos, wait = positions[tid]
+        if pos == -1:
+            statuses.append({'ticket_id': tid, 'status': 'not_found_or_served'})
+        else:
+            statuses.append({'ticket_id': tid, 'status': 'waiting', 'position': pos, 'wait_time': wait})
+    return {'success': True, 'statuses': statuses}, 200
+
+
+async def get_status(req: Request, ticket_id: str):
+    ticket_id = normalize_id(ticket_id)
+    pos, wait = manager.get_position(ticket_id)
+    if pos == -1:
+        return {'success': False, 'status': 'not_found_or_served'}, 404
+
+    ticket = manager.active_tickets_by_id.get(ticket_id)
+    return {
+        'success': True,
+        'position': pos,
+        'wait_time': wait,
+        'customer': ticket.customer.name,
+        'service': ticket.service.value
+    }, 200
+
+
+async def serve_next(req: Request):
+    data = req.json()
+    ticket = await service.submit('serve_next', data.get('office_id', 'default'),
+                                  data.get('service', 'passport'))
+    if ticket:
+        return {
+            'success': True,
+            'ticket': {
+                'id': ticket.ticket_id,
+                'customer': ticket.customer.name,
+                'priority': ticket.priority_level
+            }
+        }, 200
+    return {'success': False, 'message': 'No customers waiting'}, 404
+
+
+async def set_desks(req: Request):
+    data = req.json()
+    service_name = data.get('service', 'passport')
+    office = data.get('office_id', 'default')
+    try:
+        desks = int(data.get('desks', 1))
+        if desks < 1:
+            raise ValueError("desks must be at least 1")
+    except (TypeError, ValueError) as e:
+        return {'success': False, 'error': str(e)}, 400
+
+    await service.submit('set_active_desks', office, service_name, desks)
+    return {'success': True, 'office_id': office, 'service': service_name, 'desks': desks}, 200
+
+
+async def cancel_ticket(req: Request):
+    ticket_id = normalize_id(str(req.json().get('ticket_id', '')))
+    ticket = await service.submit('cancel_ticket', ticket_id)
+    if ticket:
+        return {
+            'success': True,
+            'ticket': {
+                'id': ticket.ticket_id,
+                'customer': ticket.customer.name,
+                'service': ticket.service.value
+            }
+        }, 200
+    return {'success': False, 'status': 'not_found_or_served'}, 404
+
+
+async def confirm_arrival(req: Request):
+    ticket_id = req.json().get('ticket_id', '')
+    if not isinstance(ticket_id, str):
+        return {'success': False, 'error': 'ticket_id must be a string'}, 400
+    ticket_id = normalize_id(ticket_id)
+    if not await service.submit('confirm_arrival', ticket_id):
+        return {'success': False, 'status': 'not_called'}, 404
+    return {'success': True, 'ticket_id': ticket_id}, 200
+
+
+async def get_queue(req: Request):
+    try:
+        limit = int(req.query.get('limit', 50))
+        queue, next_cursor = manager.get_queue(req.query.get('office_id', 'default'),
+                                               req.query.get('service', 'passport'),
+                                               limit=limit, cursor=req.query.get('cursor'))
+        first_position = manager.get_position(queue[0].ticket_id)[0] if queue else 0
+        return {
+            'success': True,
+            'queue': [
+                {
+                    'ticket_id': t.ticket_id,
+                    'name': t.customer.name,
+                    'priority': t.priority_level,
+                    'position': first_position + i
+                }
+                for i, t in enumerate(queue)
+            ],
+            'next_cursor': next_cursor
+        }, 200
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+
+
+async def search_tickets(req: Request):
+    try:
+        limit = int(req.query.get('limit', 10))
+        if not 1 <= limit <= MAX_SEARCH_RESULTS:
+            raise ValueError(f"limit must be between 1 and {MAX_SEARCH_RESULTS}")
+        matches = manager.search(req.query.get('q', ''), office_id=req.query.get('office_id'),
+                                 limit=limit)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    return {
+        'success': True,
+        'matches': [
+            {
+                'ticket_id': ticket.ticket_id,
+                'name': ticket.name,
+                'service': ticket.service.value,
+                'office_id': ticket.office_id,
+                'priority': ticket.priority_level,
+                'position': position,
+                'wait_time': wait
+            }
+            for ticket, position, wait in matches
+        ]
+    }, 200
+
+
+async def get_queue_overview(req: Request):
+    return {'success': True, 'queues': service.get_queue_overview(req.query.get('office_id'))}, 200
+
+
+async def get_analytics(req: Request):
+    return {
+        'success': True,
+        'ranking': [
+            {'service': name, 'avg_wait': avg}
+            for name, avg in rank_services_by_avg_wait(manager)
+        ],
+        'queues': wait_time_report(manager, req.query.get('office_id'))
+    }, 200
+
+
+ROUTES = {
+    ('POST', '/api/ticket'): create_ticket,
+    ('POST', '/api/tickets/bulk'): create_tickets_bulk,
+    ('POST', '/api/status/batch'): get_status_batch,
+    ('POST', '/api/serve'): serve_next,
+    ('POST', '/api/desks'): set_desks,
+    ('POST', '/api/cancel'): cancel_ticket,
+    ('POST', '/api/arrived'): confirm_arrival,
+    ('GET', '/api/queue'): get_queue,
+    ('GET', '/api/search'): search_tickets,
+    ('GET', '/api/queue-overview'): get_queue_overview,
+    ('GET', '/api/analytics'): get_analytics,
+}
+
+
+# --- Server-Sent Events ---
+
+async def _sse_stream(subscription, is_final, receive, send) -> None:
+    """Relay an AsyncSubscription as text/event-stream until is_final(message) or disconnect."""
+    await _read_body(receive)  # so the next receive() can only be the disconnect
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', b'text/event-stream'),
+                            (b'cache-control', b'no-cache'),
+                            (b'x-accel-buffering', b'no')]})
+    disconnected = asyncio.ensure_future(receive())
+    try:
+        while True:
+            message = asyncio.ensure_future(subscription.get(timeout=STREAM_KEEPALIVE))
+            await asyncio.wait((message, disconnected), return_when=asyncio.FIRST_COMPLETED)
+            if not message.done():
+                message.cancel()
+                return
+            message = message.result()
+            if message is None:
+                await send({'type': 'http.response.body', 'body': b": keep-alive\n\n",
+                            'more_body': True})
+                continue
+            await send({'type': 'http.response.body',
+                        'body': f"data: {json.dumps(message)}\n\n".encode(), 'more_body': True})
+            if is_final(message):
+                break
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        disconnected.cancel()
+        subscription.close()
+
+
+async def stream(path: str, receive, send) -> bool:
+    """Handles /api/stream/*; False if the path is not a stream."""
+    if path.startswith('/api/stream/office/'):
+        office_id = unquote(path[len('/api/stream/office/'):])
+        await _sse_stream(service.feed.subscribe_office(office_id), lambda message: False,
+                          receive, send)
+        return True
+    if path.startswith('/api/stream/'):
+        ticket_id = normalize_id(unquote(path[len('/api/stream/'):]))
+        subscription = service.feed.subscribe_ticket(ticket_id)
+        if subscription is None:
+            await _send_json(send, {'success': False, 'status': 'not_found_or_served'}, 404)
+        else:
+            await _sse_stream(subscription, lambda message: message['status'] != 'WAITING',
+                              receive, send)
+        return True
+    return False
+
+
+# --- ASGI entry point ---
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await _ensure_started()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await service.stop()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    await _ensure_started()
+    method, path = scope['method'], scope['path']
+    if method == 'GET' and await stream(path, receive, send):
+        return
+
+    req = Request(scope, await _read_body(receive))
+    handler = ROUTES.get((method, path))
+    try:
+        if handler is not None:
+            payload, status = await handler(req)
+        elif method == 'GET' and path.startswith('/api/status/'):
+            payload, status = await get_status(req, unquote(path[len('/api/status/'):]))
+        else:
+            payload, status = {'success': False, 'error': 'Not found'}, 404
+    except ValueError as e:  # malformed JSON body
+        payload, status = {'success': False, 'error': str(e)}, 400
+    except Exception as e:
+        payload, status = {'success': False, 'error': str(e)}, 500
+    await _send_json(send, payload, status)
+
+
+# --- built-in HTTP/1.1 server (used when uvicorn is not installed) ---
+
+_REASONS = {200: b"OK", 400: b"Bad Request", 404: b"Not Found", 500: b"Internal Server Error"}
+
+
+async def _handle_connection(asgi_app, reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> None:
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            method, target, version = request_line.decode('latin-1').split()
+            headers = []
+            length = 0
+            keep_alive = version == 'HTTP/1.1'
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                name, value = name.strip().lower(), value.strip()
+                headers.append((name.encode(), value.encode()))
+                if name == 'content-length':
+                    length = int(value)
+                elif name == 'connection' and value.lower() in ('close', 'keep-alive'):
+                    keep_alive = value.lower() == 'keep-alive'
+            body = await reader.readexactly(length) if length else b''
+
+            path, _, query = target.partition('?')
+            scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': version[5:],
+                     'method': method, 'path': unquote(path), 'raw_path': path.encode(),
+                     'query_string': query.encode(), 'headers': headers}
+            state = {'body_sent': False, 'chunked': False}
+
+            async def receive():
+                if not state['body_sent']:
+                    state['body_sent'] = True
+                    return {'type': 'http.request', 'body': body, 'more_body': False}
+                await reader.read()  # returns at EOF: the client went away
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status = message['status']
+                    lines = [b"HTTP/1.1 %d %s" % (status, _REASONS.get(status, b""))]
+                    names = set()
+                    for name, value in message.get('headers', []):
+                        names.add(name.lower())
+                        lines.append(name + b": " + value)
+                    if b'content-length' not in names:
+                        state['chunked'] = True
+                        lines.append(b"transfer-encoding: chunked")
+                    lines.append(b"connection: " + (b"keep-alive" if keep_alive else b"close"))
+                    writer.write(b"\r\n".join(lines) + b"\r\n\r\n")
+                else:
+                    data = message.get('body', b'')
+                    if state['chunked']:
+                        if data:
+                            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                        if not message.get('more_body'):
+                            writer.write(b"0\r\n\r\n")
+                    else:
+                        writer.write(data)
+                    await writer.drain()
+
+            await asgi_app(scope, receive, send)
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(asgi_app, host: str, port: int, backlog: int = 4096) -> None:
+    """Serve an ASGI app over plain HTTP/1.1 until cancelled."""
+    await _ensure_started()
+    server = await asyncio.start_server(
+        lambda r, w: _handle_connection(asgi_app, r, w), host, port, backlog=backlog)
+    print(f"NoQ asyncio server on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NoQ asyncio server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    try:
+        import uvicorn
+    except ImportError:
+        asyncio.run(serve(app, args.host, args.port))
+    else:
+        uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == '__main__':
+    main()
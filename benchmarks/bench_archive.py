@@ -0,0 +1,83 @@
+# =============================================================================
+# bench_archive.py — Append rate and grouped query time of the served archive.
+#
+# Appends N synthetic served tickets (20 offices, all services, office-hour
+# issue times over a year) to a ServedArchive in a temp directory, then
+# reports:
+#   - append throughput, including the segment flushes
+#   - archive_report grouped by (weekday, hour, service) over the memory-
+#     mapped segments, against the same aggregation as a Python loop over
+#     the rows
+#
+# Needs NumPy for the query side.
+#
+# Usage:
+#   python benchmarks/bench_archive.py            # 2,000,000 rows
+#   python benchmarks/bench_archive.py 5000000
+# =============================================================================
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.analytics import archive_report
+from smartqueue.archive import ServedArchive, open_segments
+
+START = 1_704_067_200.0  # Monday 2024-01-01 00:00 UTC
+
+
+def python_report(directory):
+    """The same grouping, one row at a time, for comparison."""
+    groups = defaultdict(list)
+    for rows, columns in open_segments(directory):
+        issued = columns["issued"].tolist()
+        waits = columns["wait"].tolist()
+        services = columns["service"].tolist()
+        for i in range(rows):
+            day, second = divmod(int(issued[i]), 86400)
+            groups[((day + 3) % 7, second // 3600, services[i])].append(waits[i])
+    report = []
+    for key in sorted(groups):
+        waits = sorted(groups[key])
+        report.append((key, len(waits), sum(waits) / len(waits), waits[int((len(waits) - 1) * 0.9)]))
+    return report
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    rng = random.Random(0)
+    directory = tempfile.mkdtemp()
+    try:
+        archive = ServedArchive(directory, flush_every=262_144)
+        offices = [f"office-{i}" for i in range(20)]
+        start = time.perf_counter()
+        for _ in range(rows):
+            issued = START + rng.randrange(365) * 86400 + rng.uniform(8 * 3600, 17 * 3600)
+            archive.append(offices[rng.randrange(20)], rng.randrange(4), rng.random() < 0.1,
+                           issued, issued + rng.expovariate(1 / 600))
+        archive.close()
+        elapsed = time.perf_counter() - start
+        print(f"append {rows:,} rows: {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+        start = time.perf_counter()
+        report = archive_report(directory, by=("weekday", "hour", "service"))
+        vectorized = time.perf_counter() - start
+        start = time.perf_counter()
+        expected = python_report(directory)
+        loop = time.perf_counter() - start
+        assert [entry['served'] for entry in report] == [count for _, count, _, _ in expected]
+        print(f"group by weekday, hour, service ({len(report)} groups): "
+              f"{vectorized * 1000:.0f} ms vectorized, {loop * 1000:.0f} ms Python loop "
+              f"({loop / vectorized:.0f}x)")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# =============================================================================
+# bench_buckets.py — Heap + deque vs bucketed queues (see smartqueue/buckets.py).
+#
+# Two views of the same question:
+#   - structure: raw push/pop of N ids on heapq (+ deque for level 0) vs one
+#     BucketQueue, no QueueManager around them, for each mix below
+#   - engine:    issue_ticket / serve_next through QueueManager with
+#     engine="heap" vs engine="bucket", at a given depth, for a FIFO mix (all
+#     level 0), a mixed one (1 in 4 priority) and an all-priority one; plus
+#     engine="bucket" with aging on level 0 to show the cost of the age check
+# Timed as steady state: the queue is filled to DEPTH, then every round
+# issues and serves the same number of tickets so the depth stays put.
+#
+# Usage:
+#   python benchmarks/bench_buckets.py            # depth 100,000
+#   python benchmarks/bench_buckets.py 10000
+# =============================================================================
+
+import gc
+import heapq
+import os
+import random
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.buckets import BucketQueue
+from smartqueue.queues import QueueManager
+
+DEFAULT_DEPTH = 100_000
+ROUNDS = 5
+BATCH = 20_000
+LEVELS = 8
+
+MIXES = {
+    "fifo": lambda rng: 0,
+    "mixed": lambda rng: rng.randint(1, LEVELS - 1) if rng.random() < 0.25 else 0,
+    "priority": lambda rng: rng.randint(1, LEVELS - 1),
+}
+
+
+def bench_structures(count: int, mix: str):
+    rng = random.Random(7)
+    levels = [MIXES[mix](rng) for _ in range(count)]
+    ids = [f"T{i}" for i in range(count)]
+    live = set(ids)
+
+    start = time.perf_counter()
+    heap, dq = [], deque()
+    for seq, (tid, level) in enumerate(zip(ids, levels)):
+        if level:
+            heapq.heappush(heap, (-level, seq, tid))
+        else:
+            dq.append(tid)
+    while heap:
+        heapq.heappop(heap)
+    while dq:
+        dq.popleft()
+    heap_ns = (time.perf_counter() - start) / count * 1e9
+
+    start = time.perf_counter()
+    bucket = BucketQueue()
+    for tid, level in zip(ids, levels):
+        bucket.push(level, tid, 0.0)
+    while bucket.pop(live)[0] is not None:
+        pass
+    bucket_ns = (time.perf_counter() - start) / count * 1e9
+    return heap_ns, bucket_ns
+
+
+def bench_engine(depth: int, mix: str, **options):
+    """Median ns per issue+serve pair at a steady depth."""
+    rng = random.Random(11)
+    level_of = MIXES[mix]
+    manager = QueueManager(**options)
+    manager.issue_tickets_bulk([{'user_id': f"f{i}", 'service': "tax",
+                                 'priority_level': level_of(rng)} for i in range(depth)])
+    samples = []
+    gc.disable()
+    try:
+        for r in range(ROUNDS):
+            levels = [level_of(rng) for _ in range(BATCH)]
+            start = time.perf_counter()
+            for i, level in enumerate(levels):
+                manager.issue_ticket(f"r{r}-{i}", "Bench", "tax", priority_level=level)
+                manager.serve_next("default", "tax")
+            samples.append((time.perf_counter() - start) / BATCH * 1e9)
+    finally:
+        gc.enable()
+    samples.sort()
+    return samples[len(samples) // 2]
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DEPTH
+    print(f"structure push+pop of {depth} ids (ns/id):")
+    print(f"{'mix':>9} {'heap':>9} {'bucket':>9}")
+    for mix in MIXES:
+        heap_ns, bucket_ns = bench_structures(depth, mix)
+        print(f"{mix:>9} {heap_ns:>9.0f} {bucket_ns:>9.0f}")
+    print()
+    print(f"QueueManager issue+serve at depth {depth} (ns/pair, median of {ROUNDS}):")
+    print(f"{'mix':>9} {'heap':>9} {'bucket':>9} {'bucket+aging':>13}")
+    for mix in MIXES:
+        heap = bench_engine(depth, mix)
+        bucket = bench_engine(depth, mix, engine="bucket")
+        aged = bench_engine(depth, mix, engine="bucket", aging={0: 3600})
+        print(f"{mix:>9} {heap:>9.0f} {bucket:>9.0f} {aged:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
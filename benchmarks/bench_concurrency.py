@@ -0,0 +1,69 @@
+# =============================================================================
+# bench_concurrency.py — Throughput of QueueManager's locking modes.
+#
+# Each thread drives a mix of issue_ticket / serve_next / get_position against
+# its own office, so the striped mode only contends on the shared maps while
+# the global mode serializes everything. Reports total ops/sec for
+# concurrency="global" vs "striped" at several thread counts ("none" at one
+# thread is the unlocked baseline).
+#
+# Note: under CPython's GIL pure-Python work cannot run in parallel, so the
+# gap shows lock overhead and convoying rather than multi-core speedup.
+#
+# Usage:
+#   python benchmarks/bench_concurrency.py [ops_per_thread]
+# =============================================================================
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.queues import QueueManager
+
+THREAD_COUNTS = [1, 2, 4, 8]
+DEFAULT_OPS = 20_000
+
+
+def worker(manager: QueueManager, office: str, ops: int, seed: int) -> None:
+    rng = random.Random(seed)
+    mine = []
+    for i in range(ops):
+        roll = rng.random()
+        if roll < 0.45:
+            ticket = manager.issue_ticket(f"{office}-{i}", "X", "passport",
+                                          priority_level=rng.choice([0, 0, 0, 5]),
+                                          office_id=office)
+            mine.append(ticket.ticket_id)
+        elif roll < 0.8:
+            manager.serve_next(office, "passport")
+        elif mine:
+            manager.get_position(mine[-1])
+
+
+def run(concurrency: str, threads: int, ops: int) -> float:
+    manager = QueueManager(concurrency=concurrency)
+    workers = [threading.Thread(target=worker, args=(manager, f"office-{t}", ops, t))
+               for t in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return threads * ops / (time.perf_counter() - start)
+
+
+def main():
+    ops = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_OPS
+    print(f"{'mode':<8} {'threads':>7} {'ops/sec':>12}")
+    print(f"{'none':<8} {1:>7} {run('none', 1, ops):>12,.0f}")
+    for threads in THREAD_COUNTS:
+        for mode in ("global", "striped"):
+            print(f"{mode:<8} {threads:>7} {run(mode, threads, ops):>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# =============================================================================
+# bench_conditional.py — Polling cost of status/overview with queue versions.
+#
+# Fills app.py's manager with N waiting tickets over four services, then
+# times REQUESTS polls of GET /api/status/<id> and GET /api/queue-overview,
+# dispatched through Flask inside a request context (the test client's WSGI
+# round trip alone costs more than either handler), in three ways:
+#   - computed:  versioning off (app.VERSIONED = False), every poll runs
+#                get_position / get_queue_overview and encodes JSON
+#   - cached:    nothing changed since the last poll; the body comes from
+#                the per-version LRU
+#   - 304:       the client sends its ETag back in If-None-Match
+# Every CHANGE_EVERY polls a ticket is issued to one queue, so a share of
+# the polls miss and recompute as they would in production.
+#
+# Usage:
+#   python benchmarks/bench_conditional.py            # 20,000 waiting tickets
+#   python benchmarks/bench_conditional.py 200000
+# =============================================================================
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import app as webapp
+
+REQUESTS = 20_000
+CHANGE_EVERY = 500
+SERVICES = ["passport", "tax", "support", "municipal"]
+
+
+def poll(paths, mode, rng):
+    etags = {}
+    timings = []
+    for i in range(REQUESTS):
+        if i % CHANGE_EVERY == 0:
+            webapp.manager.issue_ticket(f"bench-{mode}-{i}", "Bench", rng.choice(SERVICES))
+        path = rng.choice(paths)
+        headers = {'If-None-Match': etags[path]} if mode == "304" and path in etags else {}
+        with webapp.app.test_request_context(path, headers=headers):
+            start = time.perf_counter_ns()
+            response = webapp.app.full_dispatch_request()
+            timings.append(time.perf_counter_ns() - start)
+        if response.status_code not in (200, 304):
+            raise RuntimeError(f"{path}: {response.status_code}")
+        if 'ETag' in response.headers:
+            etags[path] = response.headers['ETag']
+    return statistics.median(timings) / 1000, sorted(timings)[int(len(timings) * 0.95)] / 1000
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rng = random.Random(1)
+    manager = webapp.manager
+    tickets = [manager.issue_ticket(f"bench-{i}", "Bench", rng.choice(SERVICES),
+                                    5 if rng.random() < 0.1 else 0).ticket_id
+               for i in range(depth)]
+    # A kiosk screen full of customers polling their own status, and admins
+    # polling the overview
+    paths = [f"/api/status/{tid}" for tid in rng.sample(tickets, 200)]
+    paths += ["/api/queue-overview?office_id=default", "/api/queue-overview"] * 20
+
+    print(f"{depth:,} waiting tickets, {REQUESTS:,} polls, a change every {CHANGE_EVERY}")
+    print(f"{'mode':<10} {'median us':>10} {'p95 us':>10}")
+    for mode in ("computed", "cached", "304"):
+        webapp.VERSIONED = mode != "computed"
+        median, p95 = poll(paths, mode, rng)
+        print(f"{mode:<10} {median:>10.1f} {p95:>10.1f}")
+    print(f"body cache: {len(webapp.bodies)} entries, {webapp.bodies.hits:,} hits, "
+          f"{webapp.bodies.misses:,} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# =============================================================================
+# bench_connections.py — Idle-connection capacity and latency: Flask vs asyncio.
+#
+# Starts each server in a subprocess on a free local port:
+#   - flask: app.py's app under its threaded development server (one thread
+#     per connection, which is how `python app.py` runs it)
+#   - asgi:  asgi.py (uvicorn if installed, else its built-in HTTP server)
+# then opens IDLE long-lived SSE connections to /api/stream/office/default,
+# OPEN_CONCURRENCY at a time, counts how many get their 200 within
+# CONNECT_TIMEOUT, and, with those still held open, times REQUESTS
+# GET /api/status/<id> calls (one new connection each, STATUS_CONCURRENCY in
+# flight). Reported per server: connections held, status p50/p99 and the
+# server's RSS and thread count at that point.
+#
+# Both ends need a file descriptor per connection; the script raises its soft
+# limit to the hard one, and the server inherits it (check `ulimit -Hn`).
+#
+# Usage:
+#   python benchmarks/bench_connections.py            # 5,000 idle connections
+#   python benchmarks/bench_connections.py 15000
+# =============================================================================
+
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+DEFAULT_IDLE = 5_000
+OPEN_CONCURRENCY = 200
+CONNECT_TIMEOUT = 10.0
+REQUESTS = 2_000
+STATUS_CONCURRENCY = 10
+
+SERVERS = {
+    "flask": "import logging, sys; logging.getLogger('werkzeug').setLevel(logging.ERROR); "
+             "import app; app.app.run(port=int(sys.argv[1]), threaded=True)",
+    "asgi": "import sys, asgi; sys.argv = ['asgi', '--port', sys.argv[1]]; asgi.main()",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_stats(pid: int):
+    """(RSS in MB, thread count) of a process, from /proc."""
+    fields = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            fields[key] = value.split()
+    return int(fields["VmRSS"][0]) / 1024, int(fields["Threads"][0])
+
+
+async def request(port: int, method: str, path: str, body: bytes = b""):
+    """One request on a fresh connection; returns (status, body)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                 f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                 .encode() + body)
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    if b"transfer-encoding: chunked" in head.lower():
+        payload = payload.split(b"\r\n", 1)[1].rsplit(b"\r\n0\r\n", 1)[0]
+    return int(head.split()[1]), payload
+
+
+async def open_idle(port: int):
+    """An SSE connection that got its 200, or None."""
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection("127.0.0.1", port), CONNECT_TIMEOUT)
+        writer.write(b"GET /api/stream/office/default HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        status = await asyncio.wait_for(reader.readline(), CONNECT_TIMEOUT)
+    except (OSError, asyncio.TimeoutError):
+        return None
+    if b" 200" not in status:
+        writer.close()
+        return None
+    return writer
+
+
+async def wait_until_up(port: int) -> None:
+    for _ in range(200):
+        try:
+            await request(port, "GET", "/api/queue-overview")
+            return
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+async def measure(port: int, pid: int, idle: int):
+    await wait_until_up(port)
+    status, payload = await request(port, "POST", "/api/ticket",
+                                    json.dumps({'name': "Bench", 'service': "tax"}).encode())
+    ticket_id = json.loads(payload)["ticket_id"]
+
+    held = []
+    gate = asyncio.Semaphore(OPEN_CONCURRENCY)
+
+    async def open_one():
+        async with gate:
+            writer = await open_idle(port)
+            if writer is not None:
+                held.append(writer)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(open_one() for _ in range(idle)))
+    open_seconds = time.perf_counter() - start
+
+    latencies = []
+    gate = asyncio.Semaphore(STATUS_CONCURRENCY)
+
+    async def status_one():
+        async with gate:
+            begin = time.perf_counter()
+            try:
+                code, _ = await asyncio.wait_for(
+                    request(port, "GET", f"/api/status/{ticket_id}"), CONNECT_TIMEOUT)
+            except (OSError, asyncio.TimeoutError):
+                return
+            if code == 200:
+                latencies.append(time.perf_counter() - begin)
+
+    await asyncio.gather(*(status_one() for _ in range(REQUESTS)))
+    rss, threads = server_stats(pid)
+    for writer in held:
+        writer.close()
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else float("nan")
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else float("nan")
+    return len(held), open_seconds, len(latencies), p50, p99, rss, threads
+
+
+def main():
+    idle = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_IDLE
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    print(f"idle connections requested: {idle} (fd limit {hard})")
+    print(f"{'server':>7} {'held':>7} {'open s':>7} {'ok reqs':>8} {'p50 ms':>8} "
+          f"{'p99 ms':>8} {'RSS MB':>7} {'threads':>8}")
+
+    for name, code in SERVERS.items():
+        port = free_port()
+        server = subprocess.Popen([sys.executable, "-c", code, str(port)], cwd=ROOT,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            held, seconds, ok, p50, p99, rss, threads = asyncio.run(measure(port, server.pid, idle))
+        finally:
+            server.kill()
+            server.wait()
+        print(f"{name:>7} {held:>7} {seconds:>7.1f} {ok:>8} {p50:>8.2f} {p99:>8.2f} "
+              f"{rss:>7.0f} {threads:>8}")
+
+
+if __name__ == "__main__":
+    main()
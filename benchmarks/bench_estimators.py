@@ -0,0 +1,121 @@
+# =============================================================================
+# bench_estimators.py — Accuracy of the wait estimators on a simulated day.
+#
+# Simulates one office day for a single (office, service) queue: Poisson
+# arrivals whose rate follows a morning/lunch/afternoon profile, exponential
+# service times, and a desk count that changes every couple of hours. Every
+# ticket is issued with the default expected_minutes (10) while the real
+# average service time is different, as it is in practice.
+#
+# Events are applied through QueueManager's internal helpers with simulated
+# timestamps (the same path journal replay uses). Each ticket's estimated
+# wait at issue time is compared with the wait it actually had, for the
+# default ExpectedMinutesEstimator and for ServiceRateEstimator.
+#
+# Usage:
+#   python benchmarks/bench_estimators.py            # 3 simulated days
+#   python benchmarks/bench_estimators.py 10         # custom number of days
+# =============================================================================
+
+import heapq
+import itertools
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.estimators import ExpectedMinutesEstimator, ServiceRateEstimator
+from smartqueue.models import Customer, ServiceType, Ticket
+from smartqueue.queues import QueueManager
+
+KEY = ("default", "passport")
+OPEN_MINUTES = 8 * 60
+MEAN_SERVICE = 7.0
+# (start minute, arrivals per minute, desks)
+PROFILE = [(0, 0.3, 2), (120, 0.55, 4), (240, 0.15, 1), (300, 0.4, 3), (420, 0.25, 2)]
+
+
+def profile_at(minute: float):
+    current = PROFILE[0]
+    for entry in PROFILE:
+        if minute >= entry[0]:
+            current = entry
+    return current
+
+
+def simulate_day(estimator, rng: random.Random, day: datetime):
+    """Returns [(estimated, actual)] wait minutes for every served ticket."""
+    manager = QueueManager(estimator=estimator)
+    at = lambda minute: day + timedelta(minutes=minute)
+
+    events = []  # (minute, order, kind, desk)
+    order = itertools.count()
+    t = 0.0
+    while True:
+        t += rng.expovariate(profile_at(t)[1])
+        if t >= OPEN_MINUTES:
+            break
+        heapq.heappush(events, (t, next(order), "arrive", -1))
+    max_desks = max(desks for _, _, desks in PROFILE)
+    for start, _, _ in PROFILE:
+        heapq.heappush(events, (start, next(order), "desks", -1))
+
+    busy = [False] * max_desks
+    estimates = {}
+    issued_minute = {}
+    samples = []
+    seq = 0
+
+    def start_service(now):
+        active = profile_at(now)[2]
+        for desk in range(active):
+            if not busy[desk] and manager.waiting_count.get(KEY, 0):
+                ticket = manager.active_tickets_by_id[manager._pop_next(KEY)]
+                manager._complete_serve(ticket, at(now).timestamp())
+                samples.append((estimates.pop(ticket.ticket_id),
+                                now - issued_minute.pop(ticket.ticket_id)))
+                busy[desk] = True
+                heapq.heappush(events, (now + rng.expovariate(1 / MEAN_SERVICE),
+                                        next(order), "done", desk))
+
+    while events:
+        now, _, kind, desk = heapq.heappop(events)
+        if kind == "arrive":
+            seq += 1
+            ticket = Ticket(ticket_id=f"T{seq}", customer=Customer(f"u{seq}", f"C{seq}"),
+                            service=ServiceType.PASSPORT, office_id=KEY[0],
+                            issued_at=at(now), expected_minutes=10, seq=seq)
+            issued_minute[ticket.ticket_id] = now
+            manager._enqueue(ticket)
+            estimates[ticket.ticket_id] = manager.get_position(ticket.ticket_id)[1]
+        elif kind == "desks":
+            manager.set_active_desks(KEY[0], KEY[1], profile_at(now)[2])
+        else:
+            busy[desk] = False
+        start_service(now)
+    return samples
+
+
+def report(name: str, samples) -> None:
+    errors = sorted(abs(est - actual) for est, actual in samples)
+    bias = sum(est - actual for est, actual in samples) / len(samples)
+    mae = sum(errors) / len(errors)
+    p90 = errors[int(0.9 * (len(errors) - 1))]
+    print(f"{name:>26} {len(samples):>8} {mae:>10.1f} {p90:>10.1f} {bias:>+10.1f}")
+
+
+def main(days: int) -> None:
+    print(f"{'estimator':>26} {'tickets':>8} {'MAE min':>10} {'p90 err':>10} {'bias':>10}")
+    for name, factory in (("ExpectedMinutesEstimator", ExpectedMinutesEstimator),
+                          ("ServiceRateEstimator", ServiceRateEstimator)):
+        samples = []
+        for d in range(days):
+            # Same seed per day: both estimators see identical days.
+            samples += simulate_day(factory(), random.Random(d), datetime(2026, 1, 5 + d, 9))
+        report(name, samples)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,84 @@
+# =============================================================================
+# bench_expiry.py — Ticket expiry on the timing wheel at 10^6 armed timers.
+#
+# On a ManualClock, issues N tickets (one every 10 ms, four services) into a
+# QueueManager with a 6-hour TTL on every service, so N timers are armed,
+# then reports:
+#   - issue_ticket (timer armed), cancel_ticket (timer disarmed) and
+#     serve_next (wheel advanced lazily) per call, against the same run on
+#     a manager without TTLs
+#   - one expire_due() that expires everything still waiting, per ticket,
+#     next to one pass of the scan the wheel replaces: checking every
+#     waiting ticket's deadline, which a scanner would repeat every tick
+#
+# Usage:
+#   python benchmarks/bench_expiry.py            # 1,000,000 tickets
+#   python benchmarks/bench_expiry.py 200000
+# =============================================================================
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.queues import QueueManager
+from smartqueue.utils import ManualClock
+
+START = 1_704_067_200.0
+SERVICES = ["passport", "tax", "municipal", "support"]
+TTL = 6 * 3600.0
+
+
+def fill(manager, clock, count):
+    start = time.perf_counter()
+    tickets = []
+    for i in range(count):
+        clock.now = START + i * 0.01
+        tickets.append(manager.issue_ticket(str(i), "Bench", SERVICES[i % 4]).ticket_id)
+    return tickets, (time.perf_counter() - start) / count * 1e6
+
+
+def mutations(manager, clock, tickets, ops):
+    """Per-call cancel_ticket and serve_next times (us) with the clock moving."""
+    start = time.perf_counter()
+    for ticket_id in tickets[1::20][:ops]:
+        manager.cancel_ticket(ticket_id)
+    cancel_us = (time.perf_counter() - start) / ops * 1e6
+    start = time.perf_counter()
+    for i in range(ops):
+        clock.now += 0.01
+        manager.serve_next("default", SERVICES[i % 4])
+    return cancel_us, (time.perf_counter() - start) / ops * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    ops = min(count // 10, 50_000)
+
+    results = {}
+    for label, options in (("without TTL", {}), ("with TTL", {'ttl': dict.fromkeys(SERVICES, TTL)})):
+        clock = ManualClock(START)
+        manager = QueueManager(clock=clock, **options)
+        tickets, issue_us = fill(manager, clock, count)
+        armed = len(manager.timers) if manager.timers is not None else 0
+        results[label] = (issue_us, *mutations(manager, clock, tickets, ops))
+        print(f"{label:<12} issue {results[label][0]:6.2f} us   cancel {results[label][1]:6.2f} us   "
+              f"serve {results[label][2]:6.2f} us   ({armed:,} timers armed after issue)")
+
+    clock.now += TTL + count * 0.01
+    start = time.perf_counter()
+    deadline_passed = [t for t in manager.active_tickets_by_id.values()
+                       if t.issued_ts + TTL <= clock.now]
+    scan = time.perf_counter() - start
+    start = time.perf_counter()
+    expired = manager.expire_due()
+    sweep = time.perf_counter() - start
+    assert expired == len(deadline_passed) and not manager.active_tickets_by_id
+    print(f"expire_due: {expired:,} tickets in {sweep:.2f}s ({sweep / expired * 1e6:.2f} us each, "
+          f"mostly the cancel path)")
+    print(f"one deadline scan of those tickets (per tick, without the wheel): {scan * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
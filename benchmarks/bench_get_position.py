@@ -0,0 +1,58 @@
+# =============================================================================
+# bench_get_position.py — Latency of QueueManager.get_position vs queue depth.
+#
+# Fills a single (office, service) queue with N waiting tickets (10% priority)
+# and times get_position for a random sample of them. With the order-statistic
+# index in index.py the per-call latency should stay flat from 10^2 to 10^6.
+#
+# Usage:
+#   python benchmarks/bench_get_position.py            # 10^2 .. 10^6
+#   python benchmarks/bench_get_position.py 1000 50000 # custom depths
+# =============================================================================
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.queues import QueueManager
+
+DEFAULT_DEPTHS = [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+SAMPLES = 2000
+
+
+def build_manager(depth: int, rng: random.Random) -> QueueManager:
+    manager = QueueManager()
+    for i in range(depth):
+        priority = rng.choice([3, 5, 8]) if rng.random() < 0.1 else 0
+        manager.issue_ticket(f"u{i}", f"C{i}", "passport", priority_level=priority)
+    return manager
+
+
+def bench(depth: int) -> float:
+    """Returns the median get_position latency in microseconds."""
+    rng = random.Random(depth)
+    manager = build_manager(depth, rng)
+    ids = list(manager.active_tickets_by_id)
+    sample = [rng.choice(ids) for _ in range(SAMPLES)]
+
+    timings = []
+    for tid in sample:
+        start = time.perf_counter()
+        manager.get_position(tid)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2] * 1e6
+
+
+def main():
+    depths = [int(arg) for arg in sys.argv[1:]] or DEFAULT_DEPTHS
+    print(f"{'waiting':>10}  {'median us':>10}")
+    for depth in depths:
+        print(f"{depth:>10}  {bench(depth):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
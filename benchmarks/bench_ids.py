@@ -0,0 +1,46 @@
+# =============================================================================
+# bench_ids.py — Ticket ID generation: uuid path vs SequentialIdGenerator.
+#
+# Times N calls of each generator: RandomIdGenerator (the old
+# utils.generate_id uuid4 path) and SequentialIdGenerator, spread over a few
+# offices. Also counts IDs that repeat an earlier one: for the random 32-bit
+# IDs that is how often issue_ticket would have had to re-draw.
+#
+# Usage:
+#   python benchmarks/bench_ids.py            # 1,000,000 IDs
+#   python benchmarks/bench_ids.py 200000
+# =============================================================================
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.ids import RandomIdGenerator, SequentialIdGenerator
+
+DEFAULT_COUNT = 1_000_000
+OFFICES = ["north", "south", "east", "west"]
+
+
+def time_generator(gen, count: int):
+    now = time.time()
+    offices = [OFFICES[i % len(OFFICES)] for i in range(count)]
+    start = time.perf_counter()
+    ids = [gen.next_id(office, now) for office in offices]
+    elapsed = time.perf_counter() - start
+    return elapsed / count * 1e9, ids
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT
+    print(f"{'generator':>24} {'ns/id':>8} {'duplicates':>11}  sample")
+    for name, gen in (("RandomIdGenerator", RandomIdGenerator()),
+                      ("SequentialIdGenerator", SequentialIdGenerator())):
+        ns, ids = time_generator(gen, count)
+        duplicates = count - len(set(ids))
+        print(f"{name:>24} {ns:>8.0f} {duplicates:>11}  {ids[-1]}")
+
+
+if __name__ == "__main__":
+    main()
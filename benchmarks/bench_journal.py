@@ -0,0 +1,90 @@
+# =============================================================================
+# bench_journal.py — Write overhead and recovery time of the durability journal.
+#
+# Runs the same mixed workload (60% issue, 30% serve, 10% cancel across a few
+# offices and services) three ways: in memory only, journaled with
+# fsync="never", and journaled with fsync="interval". Reports the per-op cost
+# of journaling, then times recover() from snapshot + journal tail.
+#
+# Usage:
+#   python benchmarks/bench_journal.py            # 1,000,000 operations
+#   python benchmarks/bench_journal.py 200000
+# =============================================================================
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.journal import recover
+from smartqueue.queues import QueueManager
+
+DEFAULT_OPS = 1_000_000
+OFFICES = ["north", "south", "east"]
+SERVICES = ["passport", "tax", "support", "municipal"]
+
+
+def workload(manager: QueueManager, ops: int, seed: int = 11) -> None:
+    rng = random.Random(seed)
+    waiting = []
+    for i in range(ops):
+        roll = rng.random()
+        if roll < 0.6 or not waiting:
+            ticket = manager.issue_ticket(f"u{i}", "Customer", rng.choice(SERVICES),
+                                          priority_level=rng.choice([0, 0, 0, 0, 3, 7]),
+                                          office_id=rng.choice(OFFICES))
+            waiting.append(ticket.ticket_id)
+        elif roll < 0.9:
+            manager.serve_next(rng.choice(OFFICES), rng.choice(SERVICES))
+        else:
+            manager.cancel_ticket(waiting[rng.randrange(len(waiting))])
+
+
+def timed(label: str, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed:8.2f} s")
+    return elapsed
+
+
+def main():
+    ops = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_OPS
+    print(f"{ops:,} operations\n")
+
+    base = timed("in-memory", lambda: workload(QueueManager(), ops))
+
+    for fsync in ("never", "interval"):
+        directory = tempfile.mkdtemp(prefix="noq-journal-")
+        try:
+            manager, journal = recover(directory, fsync=fsync, snapshot_every=ops // 4)
+
+            def run():
+                workload(manager, ops)
+                journal.close()
+
+            elapsed = timed(f"journaled (fsync={fsync})", run)
+            print(f"{'  overhead per op':<34} {(elapsed - base) / ops * 1e6:8.2f} us")
+
+            size = sum(os.path.getsize(os.path.join(directory, n)) for n in os.listdir(directory))
+            print(f"{'  on disk':<34} {size / 1e6:8.1f} MB")
+
+            result = {}
+
+            def restore():
+                result['manager'], result['journal'] = recover(directory)
+
+            timed("  recovery (snapshot + tail)", restore)
+            result['journal'].close()
+            assert len(result['manager'].active_tickets_by_id) == len(manager.active_tickets_by_id)
+        finally:
+            shutil.rmtree(directory)
+        print()
+
+
+if __name__ == "__main__":
+    main()
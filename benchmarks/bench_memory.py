@@ -0,0 +1,87 @@
+# =============================================================================
+# bench_memory.py — Memory per waiting ticket and allocations per operation.
+#
+# Fills one manager with N waiting tickets (3 offices, every service, 10%
+# priority) and reports, with tracemalloc:
+#   - bytes per waiting ticket held by QueueManager, excluding the caller's
+#     user_id/name strings (built before tracing starts)
+#   - live blocks per waiting ticket (small objects kept alive, counted by
+#     sys.getallocatedblocks)
+# Then measures issue_ticket and serve_next on the filled manager:
+#   - net live blocks per call (what stays allocated afterwards)
+#   - peak extra traced bytes while the calls run (transient garbage and
+#     column growth included)
+#
+# Usage:
+#   python benchmarks/bench_memory.py            # 10^5 and 10^6 tickets
+#   python benchmarks/bench_memory.py 250000     # custom sizes
+# =============================================================================
+
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.queues import QueueManager
+
+DEFAULT_SIZES = [10 ** 5, 10 ** 6]
+OFFICES = ["north", "south", "east"]
+SERVICES = ["passport", "tax", "support", "municipal"]
+OPS = 2000
+
+
+def make_requests(n: int, rng: random.Random, start: int = 0):
+    return [(f"user-{i}", f"Customer {i}", rng.choice(SERVICES),
+             rng.choice([3, 5, 8]) if rng.random() < 0.1 else 0,
+             rng.choice(OFFICES))
+            for i in range(start, start + n)]
+
+
+def bench(n: int):
+    rng = random.Random(n)
+    requests = make_requests(n, rng)
+    extra = make_requests(OPS, rng, start=n)
+    manager = QueueManager()
+
+    tracemalloc.start()
+    base_bytes = tracemalloc.get_traced_memory()[0]
+    base_blocks = sys.getallocatedblocks()
+    for user_id, name, service, priority, office in requests:
+        manager.issue_ticket(user_id, name, service, priority_level=priority, office_id=office)
+    per_ticket_bytes = (tracemalloc.get_traced_memory()[0] - base_bytes) / n
+    per_ticket_blocks = (sys.getallocatedblocks() - base_blocks) / n
+
+    # Per-call costs on the filled manager.
+    before = sys.getallocatedblocks()
+    tracemalloc.reset_peak()
+    current = tracemalloc.get_traced_memory()[0]
+    for user_id, name, service, priority, office in extra:
+        manager.issue_ticket(user_id, name, service, priority_level=priority, office_id=office)
+    issue_peak = tracemalloc.get_traced_memory()[1] - current
+    issue_blocks = (sys.getallocatedblocks() - before) / OPS
+
+    before = sys.getallocatedblocks()
+    tracemalloc.reset_peak()
+    current = tracemalloc.get_traced_memory()[0]
+    for i in range(OPS):
+        manager.serve_next(OFFICES[i % len(OFFICES)], SERVICES[i % len(SERVICES)])
+    serve_peak = tracemalloc.get_traced_memory()[1] - current
+    serve_blocks = (sys.getallocatedblocks() - before) / OPS
+    tracemalloc.stop()
+
+    return per_ticket_bytes, per_ticket_blocks, issue_blocks, issue_peak, serve_blocks, serve_peak
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'waiting':>10} {'B/ticket':>10} {'blocks/tkt':>11} "
+          f"{'issue blk':>10} {'issue peak':>11} {'serve blk':>10} {'serve peak':>11}")
+    for n in sizes:
+        b, blocks, ib, ip, sb, sp = bench(n)
+        print(f"{n:>10} {b:>10.0f} {blocks:>11.1f} {ib:>+10.2f} {ip:>11} {sb:>+10.2f} {sp:>11}")
+
+
+if __name__ == "__main__":
+    main()
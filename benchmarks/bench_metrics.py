@@ -0,0 +1,67 @@
+# =============================================================================
+# bench_metrics.py — Cost of metrics.instrument() on the issue_ticket path.
+#
+# Issues BATCH tickets into a plain QueueManager and into one instrumented by
+# Metrics, then serves them all (untimed) so both queues stay small. Batches
+# alternate between the two managers so drift (CPU frequency, caches) hits
+# both alike; GC is off while timing. Reports the median per-call time of
+# each and the overhead, for the default sampling rate and for timing every
+# call. The target is under 2% at the default; with metrics off the hooks
+# are a falsy attribute check, within this benchmark's noise (~0.5%).
+#
+# Usage:
+#   python benchmarks/bench_metrics.py             # 300 batches of 1,000
+#   python benchmarks/bench_metrics.py 100
+# =============================================================================
+
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.metrics import Metrics, SAMPLE_EVERY
+from smartqueue.queues import QueueManager
+
+DEFAULT_BATCHES = 300
+BATCH = 1_000
+SERVICES = ("passport", "tax", "support", "municipal")
+
+
+def issue_batch(manager) -> int:
+    """Nanoseconds to issue BATCH tickets over four queues; then drains them."""
+    issue = manager.issue_ticket
+    clock = time.perf_counter_ns
+    begin = clock()
+    for i in range(BATCH):
+        issue(f"u{i}", "X", SERVICES[i & 3], priority_level=(i % 10 == 0) * 3)
+    elapsed = clock() - begin
+    for service in SERVICES:
+        while manager.serve_next("default", service):
+            pass
+    return elapsed
+
+
+def main():
+    batches = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BATCHES
+    print(f"{'sample_every':>12} {'plain us':>9} {'metrics us':>11} {'overhead':>9}")
+    gc.disable()
+    try:
+        for every in (SAMPLE_EVERY, 1):
+            plain = QueueManager()
+            instrumented = Metrics(sample_every=every).instrument(QueueManager())
+            timings = {plain: [], instrumented: []}
+            for _ in range(batches):
+                for manager, samples in timings.items():
+                    samples.append(issue_batch(manager))
+            # Median batch: robust against the odd scheduler hiccup.
+            per_call = [sorted(t)[len(t) // 2] / BATCH / 1000 for t in timings.values()]
+            overhead = per_call[1] / per_call[0] - 1
+            print(f"{every:>12} {per_call[0]:>9.3f} {per_call[1]:>11.3f} {overhead:>+9.2%}")
+    finally:
+        gc.enable()
+
+
+if __name__ == "__main__":
+    main()
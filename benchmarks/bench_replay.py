@@ -0,0 +1,85 @@
+# =============================================================================
+# bench_replay.py — Replay a synthetic day of office traffic through the CLI
+# replay pipeline.
+#
+# Writes an NDJSON trace of one 10-hour day across several offices: Poisson
+# arrivals (issue), a status poll or two per waiting customer, some cancels,
+# and desk serves, then replays it as fast as possible with each engine and
+# reports ops/sec, per-op latency percentiles and peak RSS (which should not
+# grow with the trace length, only with the tickets waiting at once).
+#
+# Usage:
+#   python benchmarks/bench_replay.py             # 200,000 events
+#   python benchmarks/bench_replay.py 1000000
+# =============================================================================
+
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.models import ServiceType
+from smartqueue.replay import OPS, replay
+
+DEFAULT_EVENTS = 200_000
+OFFICES = 8
+DAY_SECONDS = 10 * 3600
+
+
+def write_trace(path: str, events: int) -> None:
+    rng = random.Random(42)
+    services = [s.value for s in ServiceType]
+    step = DAY_SECONDS / events
+    ts = 1_700_000_000.0
+    waiting = []
+    issued = 0
+    with open(path, "w") as f:
+        for _ in range(events):
+            ts += rng.expovariate(1 / step)
+            office = f"office-{rng.randrange(OFFICES)}"
+            r = rng.random()
+            if r < 0.35 or not waiting:
+                issued += 1
+                ticket = (f"T{issued}", office, rng.choice(services))
+                waiting.append(ticket)
+                event = {"ts": ts, "op": "issue", "ticket_id": ticket[0], "name": "Guest",
+                         "service": ticket[2], "office_id": office,
+                         "priority": rng.choice((0, 0, 0, 2))}
+            elif r < 0.65:
+                event = {"ts": ts, "op": "status", "ticket_id": rng.choice(waiting)[0]}
+            elif r < 0.68:
+                ticket = waiting.pop(rng.randrange(len(waiting)))
+                event = {"ts": ts, "op": "cancel", "ticket_id": ticket[0]}
+            else:
+                ticket = waiting.pop(0)
+                event = {"ts": ts, "op": "serve", "office_id": ticket[1], "service": ticket[2]}
+            f.write(json.dumps(event) + "\n")
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_EVENTS
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "day.ndjson")
+        write_trace(path, events)
+        print(f"trace: {events:,} events, {os.path.getsize(path) / 2**20:.1f} MiB")
+        for engine in ("heap", "bucket"):
+            _, stats = replay(path, engine=engine)
+            print(f"\nengine={engine}: {stats.wall_seconds:.2f} s, {stats.ops_per_second:,.0f} ops/sec")
+            print(f"{'op':>8} {'count':>9} {'p50 µs':>8} {'p90 µs':>8} {'p99 µs':>8}")
+            for op in OPS:
+                s = stats.ops[op].summary()
+                print(f"{op:>8} {s['count']:>9} {s['p50_us']:>8.1f} {s['p90_us']:>8.1f} {s['p99_us']:>8.1f}")
+    finally:
+        shutil.rmtree(directory)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\npeak RSS: {rss:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# =============================================================================
+# bench_scheduler.py — Max wait under three ways of choosing a desk's queue.
+#
+# Simulates one office in discrete ticks. Every tick, customers arrive at
+# each service (Poisson, uneven rates), then every desk serves one ticket
+# from the services it handles, picked by:
+#   - fixed:     the first non-empty service in the desk's list (an admin
+#                draining queues in a set order with serve_next)
+#   - longest:   the service with the most tickets waiting
+#   - scheduler: DeskScheduler.serve_many (smartqueue/scheduler.py)
+# Waits are measured in ticks (served tick - arrival tick); the same arrival
+# stream is replayed for every policy. Reported: mean, p95 and max wait
+# overall, and max wait per service.
+#
+# Usage:
+#   python benchmarks/bench_scheduler.py            # 20,000 ticks
+#   python benchmarks/bench_scheduler.py 5000
+# =============================================================================
+
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.queues import QueueManager
+from smartqueue.scheduler import DeskScheduler
+
+DEFAULT_TICKS = 20_000
+
+# Customers per tick; 2.15 in total against 3 desks (about 72% busy)
+ARRIVALS = {"passport": 1.2, "tax": 0.5, "municipal": 0.3, "support": 0.15}
+DESKS = {
+    "A": ["passport", "tax"],
+    "B": ["tax", "municipal", "support"],
+    "C": ["passport", "support", "municipal"],
+}
+
+
+def poisson(rng: random.Random, rate: float) -> int:
+    """Knuth's method; fine for the small rates used here."""
+    limit, k, p = math.exp(-rate), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limit:
+            return k
+        k += 1
+
+
+def arrival_stream(ticks: int):
+    rng = random.Random(2024)
+    return [[(service, poisson(rng, rate)) for service, rate in ARRIVALS.items()]
+            for _ in range(ticks)]
+
+
+def simulate(policy: str, stream):
+    manager = QueueManager()
+    scheduler = DeskScheduler(manager).attach()
+    for desk_id, services in DESKS.items():
+        scheduler.register_desk(desk_id, services)
+
+    arrived = {}
+    waits = {service: [] for service in ARRIVALS}
+    next_user = 0
+    for tick, arrivals in enumerate(stream):
+        for service, count in arrivals:
+            for _ in range(count):
+                ticket = manager.issue_ticket(f"u{next_user}", "Sim", service)
+                arrived[ticket.ticket_id] = tick
+                next_user += 1
+
+        if policy == "scheduler":
+            served = [ticket for _, ticket in scheduler.serve_many(DESKS)]
+        else:
+            served = []
+            for services in DESKS.values():
+                waiting = [s for s in services if manager.waiting_count.get(("default", s))]
+                if not waiting:
+                    continue
+                if policy == "longest":
+                    waiting.sort(key=lambda s: -manager.waiting_count[("default", s)])
+                served.append(manager.serve_next("default", waiting[0]))
+        for ticket in served:
+            if ticket is not None:
+                waits[ticket.service.value].append(tick - arrived.pop(ticket.ticket_id))
+
+    # Tickets still waiting at the end count with their wait so far
+    for ticket_id, tick in arrived.items():
+        ticket = manager.active_tickets_by_id[ticket_id]
+        waits[ticket.service.value].append(len(stream) - tick)
+    return waits
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TICKS
+    stream = arrival_stream(ticks)
+    print(f"{ticks} ticks, arrivals/tick {ARRIVALS}, desks {DESKS}")
+    print(f"{'policy':>10} {'mean':>6} {'p95':>6} {'max':>6}  "
+          + " ".join(f"{service[:8]:>8}" for service in ARRIVALS))
+    for policy in ("fixed", "longest", "scheduler"):
+        waits = simulate(policy, stream)
+        every = sorted(w for per_service in waits.values() for w in per_service)
+        mean = sum(every) / len(every)
+        p95 = every[int(len(every) * 0.95)]
+        per_service = " ".join(f"{max(waits[s], default=0):>8}" for s in ARRIVALS)
+        print(f"{policy:>10} {mean:>6.1f} {p95:>6} {every[-1]:>6}  {per_service}")
+
+
+if __name__ == "__main__":
+    main()
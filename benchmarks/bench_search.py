@@ -0,0 +1,96 @@
+# =============================================================================
+# bench_search.py — Admin prefix search at 10^5 waiting tickets.
+#
+# Fills one office with N waiting tickets (names drawn from a pool of first
+# and last names, so common surnames match thousands of tickets) and times
+# QueueManager.search for the top 10 by surname prefix, first + last name,
+# a half-typed ticket ID and a query with no match, against the linear scan
+# over active_tickets_by_id it replaces. Also reports what keeping the
+# index costs issue_ticket + serve_next.
+#
+# Usage:
+#   python benchmarks/bench_search.py            # 100,000 tickets
+#   python benchmarks/bench_search.py 20000
+# =============================================================================
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.models import ServiceType
+from smartqueue.queues import QueueManager
+from smartqueue.search import name_words
+
+DEFAULT_TICKETS = 100_000
+REPEAT = 200
+
+FIRST = ["Maria", "Jose", "Ann", "Luis", "Sofia", "Omar", "Ingrid", "Kari", "Lars", "Nora",
+         "Pedro", "Aisha", "Chen", "Yuki", "Ola", "Emma", "Noah", "Liam", "Mia", "Ali"]
+LAST = ["Garcia", "Hansen", "Johansen", "Olsen", "Larsen", "Andersen", "Pedersen", "Nilsen",
+        "Kristiansen", "Jensen", "Karlsen", "Johnsen", "Pettersen", "Eriksen", "Berg",
+        "Haugen", "Hagen", "Johannessen", "Andreassen", "Jacobsen", "Dahl", "Jørgensen",
+        "Halvorsen", "Henriksen", "Lund", "Sørensen", "Jakobsen", "Moen", "Gundersen", "Iversen"]
+
+
+def fill(manager, tickets: int):
+    rng = random.Random(42)
+    services = [s.value for s in ServiceType]
+    issued = []
+    for i in range(tickets):
+        name = f"{rng.choice(FIRST)} {rng.choice(LAST)}"
+        issued.append(manager.issue_ticket(f"u{i}", name, services[i % len(services)],
+                                           priority_level=rng.choice((0, 0, 0, 2))))
+    return issued
+
+
+def linear_search(manager, query: str, limit: int = 10):
+    """Baseline: every waiting ticket, by name-word or ID prefix."""
+    words = name_words(query)
+    found = []
+    for ticket in list(manager.active_tickets_by_id.values()):
+        names = name_words(ticket.name)
+        if ticket.ticket_id.startswith(query.upper()) or \
+                all(any(n.startswith(w) for n in names) for w in words):
+            found.append(ticket)
+            if len(found) == limit:
+                break
+    return [(t, *manager.get_position(t.ticket_id)) for t in found]
+
+
+def time_us(fn, repeat: int = REPEAT) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TICKETS
+    print(f"waiting tickets: {tickets:,}")
+
+    for search in (False, True):
+        manager = QueueManager(search=search)
+        start = time.perf_counter()
+        fill(manager, tickets)
+        for i in range(tickets // 10):
+            manager.serve_next("default", ServiceType.PASSPORT.value)
+        per_op = (time.perf_counter() - start) / (tickets + tickets // 10) * 1e6
+        print(f"issue/serve with search={search!s:<5}: {per_op:6.2f} µs per op")
+
+    sample_id = next(iter(manager.active_tickets_by_id))
+    queries = [("surname prefix", "hans"), ("first + last", "maria garc"),
+               ("ticket id prefix", sample_id[:-2].lower().replace("-", "")),
+               ("no match", "zzz")]
+    print(f"{'query':>18} {'matches':>8} {'indexed µs':>11} {'scan µs':>10}")
+    for label, query in queries:
+        matches = len(manager.search(query))
+        indexed = time_us(lambda: manager.search(query))
+        scan = time_us(lambda: linear_search(manager, query), repeat=3)
+        print(f"{label:>18} {matches:>8} {indexed:>11.1f} {scan:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
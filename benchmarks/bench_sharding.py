@@ -0,0 +1,89 @@
+# =============================================================================
+# bench_sharding.py — Throughput of ShardedQueueManager vs shard count.
+#
+# Client threads in this process drive the router, each against its own
+# offices, with two workloads:
+#   - single: issue_ticket / serve_next / get_position, one call per op; every
+#     op is an IPC round trip, so the router process sets the pace
+#   - bulk:   issue_tickets_bulk of BATCH tickets, then get_positions for
+#     them; the queue work lands in the workers and spreads over cores
+# Ticket counts per second are reported for an in-process QueueManager
+# (striped locks, same threads) and for 1, 2, 4, ... shards up to the core
+# count. Expect "bulk" to scale with cores; a single-core machine shows only
+# the IPC overhead.
+#
+# Usage:
+#   python benchmarks/bench_sharding.py            # 20,000 tickets per client
+#   python benchmarks/bench_sharding.py 5000
+# =============================================================================
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.queues import QueueManager
+from smartqueue.sharding import ShardedQueueManager
+
+DEFAULT_TICKETS = 20_000
+BATCH = 100
+CLIENTS_PER_SHARD = 2
+
+
+def single_client(manager, client: int, tickets: int) -> None:
+    office = f"office-{client}"
+    for i in range(tickets):
+        ticket = manager.issue_ticket(f"{client}-{i}", "X", "passport", office_id=office)
+        manager.get_position(ticket.ticket_id)
+        if i % 2:
+            manager.serve_next(office, "passport")
+
+
+def bulk_client(manager, client: int, tickets: int) -> None:
+    office = f"office-{client}"
+    for start in range(0, tickets, BATCH):
+        batch = [{'user_id': f"{client}-{i}", 'name': "X", 'office_id': office}
+                 for i in range(start, min(start + BATCH, tickets))]
+        results = manager.issue_tickets_bulk(batch)
+        manager.get_positions([t.ticket_id for t, _, _ in results])
+
+
+def run(manager, workload, clients: int, tickets: int) -> float:
+    threads = [threading.Thread(target=workload, args=(manager, c, tickets))
+               for c in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return clients * tickets / (time.perf_counter() - start)
+
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TICKETS
+    cores = os.cpu_count() or 1
+    counts = sorted({1, 2, 4, 8, 16, 32} & set(range(1, max(cores, 4) + 1)))
+    print(f"cores: {cores}")
+    print(f"{'setup':>16} {'clients':>8} {'single t/s':>11} {'bulk t/s':>10}")
+
+    for shards in [0] + counts:
+        clients = CLIENTS_PER_SHARD * max(shards, 1)
+        rates = []
+        for workload in (single_client, bulk_client):
+            if shards == 0:
+                manager = QueueManager(concurrency="striped")
+            else:
+                manager = ShardedQueueManager(shards, events=False)
+            try:
+                rates.append(run(manager, workload, clients, tickets))
+            finally:
+                if shards:
+                    manager.close()
+        label = "in-process" if shards == 0 else f"{shards} shards"
+        print(f"{label:>16} {clients:>8} {rates[0]:>11.0f} {rates[1]:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# =============================================================================
+# bench_simulation.py — Simulated weeks per second, and a desk-count sweep.
+#
+# Simulates one office for a week (weekdays 08:00-17:00, Poisson arrivals per
+# service, 10% of passport customers with priority) on a real QueueManager
+# driven by a ManualClock (see smartqueue/sim/). Reports:
+#   - wall-clock time of one simulated week and the tickets it pushed through
+#   - a sweep of passport desk counts, run serially and then on a process
+#     pool, with the passport wait distribution for each count
+#
+# Needs NumPy.
+#
+# Usage:
+#   python benchmarks/bench_simulation.py            # desks 6..12
+#   python benchmarks/bench_simulation.py 4 16
+# =============================================================================
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.sim import (EmpiricalService, ExponentialService, PoissonArrivals,
+                            Simulation, sweep)
+
+OFFICE_HOURS = ([0] * 8 + [1] * 9 + [0] * 7) * 5 + [0] * 48  # 168 hourly multipliers
+
+ARRIVALS = {
+    "passport": PoissonArrivals(60, OFFICE_HOURS),
+    "tax": PoissonArrivals(25, OFFICE_HOURS),
+    "municipal": PoissonArrivals(15, OFFICE_HOURS),
+    "support": PoissonArrivals(8, OFFICE_HOURS),
+}
+SERVICE_TIMES = {
+    "passport": ExponentialService(8),
+    "tax": ExponentialService(15),
+    "municipal": ExponentialService(10),
+    "support": EmpiricalService([5, 10, 20, 40]),
+}
+DESKS = {"passport": 9, "tax": 7, "municipal": 3, "support": 3}
+
+
+def main():
+    low = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    high = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    sim = Simulation(ARRIVALS, SERVICE_TIMES, DESKS, days=7, priority_share={"passport": 0.1})
+
+    result = sim.run()
+    tickets = sum(entry['served'] + entry['unserved']
+                  for service, entry in result.summary().items() if service != 'all')
+    print(f"one simulated week: {result.elapsed:.2f}s wall, {tickets} tickets "
+          f"({tickets / result.elapsed:,.0f} tickets/s)")
+
+    options = [dict(DESKS, passport=desks) for desks in range(low, high + 1)]
+    start = time.perf_counter()
+    for desks in options:
+        sim.with_desks(desks).run()
+    serial = time.perf_counter() - start
+    start = time.perf_counter()
+    results = sweep(sim, options)
+    parallel = time.perf_counter() - start
+    print(f"sweep of {len(options)} weeks: {serial:.2f}s serial, {parallel:.2f}s on "
+          f"{os.cpu_count()} processes")
+    print()
+    print(f"{'passport desks':>14} {'mean':>7} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7}"
+          "  (minutes)")
+    for desks, result in zip(options, results):
+        entry = result.summary()["passport"]
+        print(f"{desks['passport']:>14} {entry['mean']:>7.1f} {entry['p50']:>7.1f} "
+              f"{entry['p90']:>7.1f} {entry['p99']:>7.1f} {entry['max']:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# =============================================================================
+# bench_sqlstore.py — Throughput of SQLiteQueueManager vs worker processes.
+#
+# Forked worker processes open one database file, as gunicorn workers would,
+# and each runs the kiosk/desk mix against its own office: issue_ticket,
+# get_position, and serve_next after every other issue. Operations per
+# second (all workers together) are reported for 1, 4 and 8 processes, with
+# the in-memory QueueManager in one process as the reference point.
+# Writes are serialized by SQLite's single writer lock, so extra processes
+# add read parallelism and hide per-call Python overhead on multi-core
+# machines; on one core they only add contention.
+#
+# Usage:
+#   python benchmarks/bench_sqlstore.py            # 5,000 tickets per worker
+#   python benchmarks/bench_sqlstore.py 2000
+# =============================================================================
+
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.queues import QueueManager
+from smartqueue.sqlstore import SQLiteQueueManager
+
+DEFAULT_TICKETS = 5_000
+PROCESS_COUNTS = (1, 4, 8)
+
+
+def workload(manager, worker: int, tickets: int) -> int:
+    """Kiosk/desk mix for one office; returns the number of operations."""
+    office = f"office-{worker}"
+    ops = 0
+    for i in range(tickets):
+        ticket = manager.issue_ticket(f"{worker}-{i}", "X", "passport", office_id=office)
+        manager.get_position(ticket.ticket_id)
+        ops += 2
+        if i % 2:
+            manager.serve_next(office, "passport")
+            ops += 1
+    return ops
+
+
+def _worker(path: str, worker: int, tickets: int, start, results) -> None:
+    manager = SQLiteQueueManager(path)
+    start.wait()
+    results.put(workload(manager, worker, tickets))
+    manager.close()
+
+
+def run_processes(path: str, processes: int, tickets: int) -> float:
+    context = multiprocessing.get_context("fork")
+    start = context.Event()
+    results = context.Queue()
+    workers = [context.Process(target=_worker, args=(path, w, tickets, start, results))
+               for w in range(processes)]
+    for w in workers:
+        w.start()
+    began = time.perf_counter()
+    start.set()
+    ops = sum(results.get() for _ in workers)
+    elapsed = time.perf_counter() - began
+    for w in workers:
+        w.join()
+    return ops / elapsed
+
+
+def main():
+    tickets = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TICKETS
+    print(f"cores: {os.cpu_count()}, tickets per worker: {tickets:,}")
+    print(f"{'setup':>22} {'ops/s':>10}")
+
+    began = time.perf_counter()
+    ops = workload(QueueManager(), 0, tickets)
+    print(f"{'in-memory, 1 process':>22} {ops / (time.perf_counter() - began):>10.0f}")
+
+    for processes in PROCESS_COUNTS:
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "noq.db")
+            SQLiteQueueManager(path).close()  # schema in place before the workers start
+            rate = run_processes(path, processes, tickets)
+        finally:
+            shutil.rmtree(directory)
+        label = f"sqlite, {processes} process{'es' if processes > 1 else ''}"
+        print(f"{label:>22} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
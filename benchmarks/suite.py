@@ -0,0 +1,274 @@
+# =============================================================================
+# suite.py — Benchmark suite for the queue engine and the HTTP API.
+#
+# Two groups of cases, each reported as per-call latency (median and p95,
+# microseconds) under a stable name so runs can be compared:
+#   engine.<op>.<mix>.d<depth>
+#       issue_ticket, serve_next, get_position and rank_services_by_avg_wait
+#       on one queue held at depth 10^2 .. 10^6, for three priority mixes:
+#         fifo      every ticket normal
+#         mixed     10% priority (levels 3/5/8), the demo's shape
+#         priority  half the tickets spread over levels 1-5
+#       Depth is held constant while sampling: every timed serve is followed
+#       by an untimed issue and vice versa.
+#   http.<endpoint>
+#       a kiosk/admin traffic mix against app.py through Flask's test client
+#       (issue, status, overview, queue page, serve, analytics), plus
+#       http.mix: the latency of one request of the mix on average
+#
+# Results go to JSON. --baseline compares against an earlier results file and
+# exits with status 1 if any shared case got slower by more than --tolerance
+# (median and p95 both, so one noisy percentile does not fail a run).
+#
+# Usage:
+#   python benchmarks/suite.py                          # full run, ~minutes
+#   python benchmarks/suite.py --quick                  # depths up to 10^4
+#   python benchmarks/suite.py --only engine.get_position
+#   python benchmarks/suite.py --output new.json --baseline old.json
+# =============================================================================
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from smartqueue.analytics import rank_services_by_avg_wait
+from smartqueue.queues import QueueManager
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+DEPTHS = [10 ** 2, 10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+QUICK_DEPTHS = [10 ** 2, 10 ** 3, 10 ** 4]
+SAMPLES = 2000
+HTTP_REQUESTS = 3000
+
+# mix -> list of (priority_level, weight)
+MIXES = {
+    "fifo": [(0, 1.0)],
+    "mixed": [(0, 0.9), (3, 0.04), (5, 0.03), (8, 0.03)],
+    "priority": [(0, 0.5)] + [(level, 0.1) for level in range(1, 6)],
+}
+
+# kiosk/admin traffic: endpoint -> weight
+HTTP_MIX = {
+    "issue": 0.30,
+    "status": 0.35,
+    "overview": 0.15,
+    "queue": 0.08,
+    "serve": 0.10,
+    "analytics": 0.02,
+}
+
+
+def summarize(samples_ns):
+    samples = sorted(samples_ns)
+    return {
+        "median_us": samples[len(samples) // 2] / 1000,
+        "p95_us": samples[int(len(samples) * 0.95)] / 1000,
+        "samples": len(samples),
+    }
+
+
+class DepthQueue:
+    """One (office, service) queue filled to `depth` with a given priority mix."""
+
+    def __init__(self, depth: int, mix: str, seed: int):
+        self.manager = QueueManager()
+        self.rng = random.Random(seed)
+        levels, weights = zip(*MIXES[mix])
+        self.levels, self.weights = levels, weights
+        self.next_user = 0
+        batch = []
+        for _ in range(depth):
+            batch.append(self.request())
+            if len(batch) == 10_000:
+                self.manager.issue_tickets_bulk(batch)
+                batch = []
+        if batch:
+            self.manager.issue_tickets_bulk(batch)
+
+    def request(self):
+        self.next_user += 1
+        return {'user_id': f"u{self.next_user}", 'name': "X", 'service': "passport",
+                'priority_level': self.rng.choices(self.levels, self.weights)[0]}
+
+    def issue(self):
+        req = self.request()
+        return self.manager.issue_ticket(req['user_id'], req['name'], "passport",
+                                         priority_level=req['priority_level'])
+
+    def serve(self):
+        return self.manager.serve_next("default", "passport")
+
+
+def bench_engine(depths, samples: int, only: str):
+    results = {}
+    clock = time.perf_counter_ns
+    for mix in MIXES:
+        for depth in depths:
+            names = {op: f"engine.{op}.{mix}.d{depth}" for op in
+                     ("issue_ticket", "serve_next", "get_position", "rank_services_by_avg_wait")}
+            if not any(name.startswith(only) for name in names.values()):
+                continue
+            queue = DepthQueue(depth, mix, seed=depth)
+
+            timings = []
+            for _ in range(samples):
+                start = clock()
+                queue.issue()
+                timings.append(clock() - start)
+                queue.serve()
+            results[names["issue_ticket"]] = summarize(timings)
+
+            timings = []
+            for _ in range(samples):
+                start = clock()
+                queue.serve()
+                timings.append(clock() - start)
+                queue.issue()
+            results[names["serve_next"]] = summarize(timings)
+
+            ids = list(queue.manager.active_tickets_by_id)
+            timings = []
+            for tid in queue.rng.choices(ids, k=samples):
+                start = clock()
+                queue.manager.get_position(tid)
+                timings.append(clock() - start)
+            results[names["get_position"]] = summarize(timings)
+
+            timings = []
+            for _ in range(samples):
+                start = clock()
+                rank_services_by_avg_wait(queue.manager)
+                timings.append(clock() - start)
+            results[names["rank_services_by_avg_wait"]] = summarize(timings)
+
+            for name in names.values():
+                if name.startswith(only):
+                    print(f"  {name:<52} {results[name]['median_us']:>9.2f} us")
+    return {name: result for name, result in results.items() if name.startswith(only)}
+
+
+def bench_http(requests: int, only: str):
+    if not "http".startswith(only) and not only.startswith("http"):
+        return {}
+    import app as webapp  # the real app module: its own manager and mock data
+
+    client = webapp.app.test_client()
+    rng = random.Random(7)
+    services = ["passport", "tax", "support", "municipal"]
+    endpoints, weights = zip(*HTTP_MIX.items())
+    issued = []
+    timings = {name: [] for name in endpoints}
+    mix_timings = []
+    clock = time.perf_counter_ns
+
+    for _ in range(requests):
+        name = rng.choices(endpoints, weights)[0]
+        service = rng.choice(services)
+        if name == "status" and not issued:
+            name = "issue"
+        start = clock()
+        if name == "issue":
+            response = client.post('/api/ticket', json={
+                'name': "Kiosk", 'service': service,
+                'priority': 5 if rng.random() < 0.1 else 0})
+            issued.append(response.get_json()['ticket_id'])
+        elif name == "status":
+            response = client.get(f"/api/status/{rng.choice(issued)}")
+        elif name == "overview":
+            response = client.get('/api/queue-overview?office_id=default')
+        elif name == "queue":
+            response = client.get(f"/api/queue?service={service}&limit=20")
+        elif name == "serve":
+            response = client.post('/api/serve', json={'service': service})
+        else:
+            response = client.get('/api/analytics')
+        elapsed = clock() - start
+        if response.status_code >= 500:
+            raise RuntimeError(f"{name} failed: {response.get_data(as_text=True)}")
+        timings[name].append(elapsed)
+        mix_timings.append(elapsed)
+
+    results = {f"http.{name}": summarize(t) for name, t in timings.items() if t}
+    results["http.mix"] = summarize(mix_timings)
+    for name, result in sorted(results.items()):
+        print(f"  {name:<52} {result['median_us']:>9.2f} us")
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(__file__) or ".").stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(current, baseline, tolerance: float):
+    """Returns the names of cases slower than baseline by more than tolerance."""
+    regressions = []
+    print(f"\n{'case':<52} {'base us':>9} {'now us':>9} {'change':>8}")
+    for name in sorted(set(current) & set(baseline)):
+        old, new = baseline[name], current[name]
+        change = new["median_us"] / old["median_us"] - 1 if old["median_us"] else 0.0
+        slower = all(new[k] > old[k] * (1 + tolerance) for k in ("median_us", "p95_us"))
+        flag = "  REGRESSION" if slower else ""
+        print(f"{name:<52} {old['median_us']:>9.2f} {new['median_us']:>9.2f} {change:>+8.1%}{flag}")
+        if slower:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quick", action="store_true", help="depths up to 10^4, fewer requests")
+    parser.add_argument("--only", default="", help="run cases whose name starts with this")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"))
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before a case counts as a regression")
+    args = parser.parse_args()
+
+    depths = QUICK_DEPTHS if args.quick else DEPTHS
+    requests = HTTP_REQUESTS // 3 if args.quick else HTTP_REQUESTS
+
+    print("engine:")
+    results = bench_engine(depths, SAMPLES, args.only)
+    print("http:")
+    results.update(bench_http(requests, args.only))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nwrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+        print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
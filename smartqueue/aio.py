@@ -0,0 +1,166 @@
+# =============================================================================
+# aio.py — asyncio adapter for QueueManager: one writer task, loop-local reads.
+#
+# QueueService owns a QueueManager for the lifetime of an event loop (see
+# asgi.py for the HTTP front-end built on it):
+#   - Mutations (issue, bulk issue, serve, cancel, desks) are submitted as
+#     (method, args) to a queue and applied by a single writer task, in
+#     arrival order. The writer drains whatever is pending, up to max_batch,
+#     and applies the whole batch without yielding to the loop, then bumps
+#     `version`.
+#   - Reads (positions, queue pages, overview) run directly on the loop
+#     thread. Since the writer never yields mid-batch, a read always sees the
+#     state between two batches: a consistent snapshot. Overviews are
+#     additionally cached per version, so a burst of dashboard polls between
+#     two writes costs one recomputation.
+#   - On a bucket engine with aging, a position or page read first applies
+#     due promotions, i.e. it mutates and reports "promote" outside the
+#     writer task. That is still serialized with the writer: both run on
+#     the loop thread and neither yields mid-call, so a read's promotions
+#     land between two batches, and the journal records them in that order.
+#     Promotions leave waiting counts alone, so the cached overviews stay
+#     valid.
+#   - Locking: without a journal the manager runs with concurrency="none"
+#     (everything touching it is on the loop thread). asgi.py recovers a
+#     journaled manager with concurrency="global" instead: due snapshots are
+#     then pickled on a helper thread inside quiesce() rather than
+#     stalling the loop, and the global lock keeps that thread from
+#     reading the manager mid-call; the loop thread only ever waits for a
+#     snapshot in progress.
+#   - Push updates reuse ChangeFeed (events.py) with AsyncSubscription
+#     mailboxes: a deque plus an asyncio.Event instead of a queue.Queue with
+#     its locks and conditions, so an idle subscriber is a few hundred bytes.
+#     The feed runs inside the writer's batch, on the loop thread.
+#
+# Everything here must be used from the loop that called start().
+# =============================================================================
+
+import asyncio
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from .events import ChangeFeed
+from .queues import QueueManager
+
+# QueueManager methods that go through the writer task
+MUTATIONS = frozenset({"issue_ticket", "issue_tickets_bulk", "serve_next",
+                       "cancel_ticket", "set_active_desks", "confirm_arrival",
+                       "expire_due"})
+
+
+class AsyncSubscription:
+    """One client's mailbox on the event loop. Call close() when the client goes away."""
+
+    __slots__ = ("_feed", "key", "_messages", "_ready", "closed")
+
+    def __init__(self, feed: ChangeFeed, key: Tuple[str, str], maxsize: int):
+        self._feed = feed
+        self.key = key
+        self._messages: deque = deque(maxlen=maxsize)
+        self._ready = asyncio.Event()
+        self.closed = False
+
+    def put(self, message: Dict) -> None:
+        """O(1) - Deliver, dropping the oldest message if the client is behind."""
+        self._messages.append(message)
+        self._ready.set()
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Next message, or None if nothing arrived within `timeout` seconds."""
+        if not self._messages:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        message = self._messages.popleft()
+        if not self._messages:
+            self._ready.clear()
+        return message
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self._feed._unsubscribe(self)
+
+
+class AsyncChangeFeed(ChangeFeed):
+    """ChangeFeed whose subscribers await messages on the event loop."""
+
+    subscription_class = AsyncSubscription
+
+
+class QueueService:
+    """
+    Serializes QueueManager mutations through one writer task.
+    Create, then `await start()` on the loop that will use it.
+    """
+
+    def __init__(self, manager: QueueManager, max_batch: int = 256):
+        self.manager = manager
+        self.max_batch = max_batch
+        # Bumped after every applied batch; keys the overview cache
+        self.version = 0
+        self.feed = AsyncChangeFeed(manager).attach()
+        self._pending: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        # office_id (None = all) -> overview as of _overviews_version
+        self._overviews: Dict[Optional[str], List[Dict]] = {}
+        self._overviews_version = 0
+
+    async def start(self) -> "QueueService":
+        self._pending = asyncio.Queue()
+        self._writer = asyncio.get_running_loop().create_task(self._write_loop())
+        return self
+
+    async def stop(self) -> None:
+        """Apply what is already queued, then stop the writer."""
+        if self._writer is None:
+            return
+        await self._pending.join()
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+
+    def submit(self, method: str, *args, **kwargs) -> "asyncio.Future":
+        """O(1) - Queue a mutation; the future resolves to its return value."""
+        if method not in MUTATIONS:
+            raise ValueError(f"Not a QueueManager mutation: {method}")
+        future = asyncio.get_running_loop().create_future()
+        self._pending.put_nowait((method, args, kwargs, future))
+        return future
+
+    async def _write_loop(self) -> None:
+        pending = self._pending
+        manager = self.manager
+        while True:
+            batch = [await pending.get()]
+            while len(batch) < self.max_batch and not pending.empty():
+                batch.append(pending.get_nowait())
+
+            for method, args, kwargs, future in batch:
+                try:
+                    result = getattr(manager, method)(*args, **kwargs)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+            self.version += 1
+            for _ in batch:
+                pending.task_done()
+
+    # --- reads (consistent between writer batches) ---
+
+    def get_queue_overview(self, office_id: Optional[str] = None) -> List[Dict]:
+        """O(1) if nothing changed since the last call for this office, else O(queues)."""
+        if self._overviews_version != self.version:
+            self._overviews.clear()
+            self._overviews_version = self.version
+        overview = self._overviews.get(office_id)
+        if overview is None:
+            overview = self._overviews[office_id] = self.manager.get_queue_overview(office_id)
+        return overview
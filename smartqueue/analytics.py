@@ -3,11 +3,27 @@
 #
 # Reads the served_count and total_wait_time_sum accumulators maintained by
 # QueueManager and returns services ranked by average wait time (descending).
+# wait_time_report adds per-(office, service) p50/p90/p99 and rolling
+# 15-minute / 1-hour / 24-hour windows from QueueManager.wait_stats.
 # Used by the /api/analytics endpoint in app.py and the CLI.
+#
+# archive_report queries the served-ticket archive (see archive.py) instead:
+# grouped counts, mean and percentile waits over every ticket ever served,
+# computed with NumPy over the memory-mapped segment columns (bincount for
+# sums, one lexsort for percentiles), never row by row in Python.
 # =============================================================================
 
-from typing import List, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
+from .archive import open_segments, read_offices
+from .models import SERVICE_CODES, SERVICE_TYPES, ServiceType
 from .queues import QueueManager
+from .utils import get_current_epoch
+
+# Grouping keys accepted by archive_report. hour and weekday are of the
+# issue time (Monday = 0), shifted by utc_offset.
+ARCHIVE_KEYS = ("office", "service", "priority", "hour", "weekday")
+_ARCHIVE_RADIX = {"office": 1 << 16, "service": 1 << 8, "priority": 1 << 16,
+                  "hour": 24, "weekday": 7}
 
 # AI-generated: This function was initially generated by GitHub Copilot from
 # the prompt "rank services by average wait time using served_count and
@@ -33,3 +49,129 @@ def rank_services_by_avg_wait(manager: QueueManager) -> List[Tuple[str, float]]:
     stats.sort(key=lambda x: x[1], reverse=True)
     
     return stats
+
+
+def wait_time_report(manager: QueueManager, office_id: Optional[str] = None) -> List[Dict]:
+    """
+    O(q) - Wait-time distribution per (office, service) queue that has served
+    anyone, q = number of such queues (each summary reads fixed-size rings).
+    Each entry has served, avg_wait, p50, p90, p99 (minutes) and a 'windows'
+    dict with the same figures over the last 15m / 1h / 24h.
+    """
+    # A sharded router has no clock of its own; its workers use wall time.
+    now = getattr(manager, 'clock', get_current_epoch)()
+    report = []
+    for (office, service), stats in sorted(list(manager.wait_stats.items())):
+        if stats.count == 0 or (office_id is not None and office != office_id):
+            continue
+        entry = {'office_id': office, 'service': service}
+        entry.update(stats.summary(now))
+        report.append(entry)
+    return report
+
+
+def archive_report(directory: str, by: Sequence[str] = ("service",),
+                   office_id: Optional[str] = None, service: Optional[str] = None,
+                   since: Optional[float] = None, until: Optional[float] = None,
+                   utc_offset: float = 0.0) -> List[Dict]:
+    """
+    O(n log n) - Wait statistics of archived (served) tickets grouped by
+    `by` (any of ARCHIVE_KEYS), for n rows passing the filters. since/until
+    bound the serve time (epoch seconds, until exclusive). Each entry has
+    the key values, served, avg_wait, p50, p90 and max_wait (minutes),
+    ordered by key. Needs NumPy.
+    """
+    import numpy as np
+
+    for key in by:
+        if key not in ARCHIVE_KEYS:
+            raise ValueError(f"Invalid archive key: {key}")
+    offices = read_offices(directory)
+    office_code = None
+    if office_id is not None:
+        if office_id not in offices:
+            return []
+        office_code = offices.index(office_id)
+    service_code = None
+    if service is not None:
+        try:
+            service_code = SERVICE_CODES[ServiceType(service)]
+        except ValueError:
+            raise ValueError(f"Invalid service type: {service}")
+
+    # Filter each memory-mapped segment, keeping only the columns needed.
+    needed = {"wait"} | {key for key in by if key in ("office", "service", "priority")}
+    if {"hour", "weekday"} & set(by):
+        needed.add("issued")
+    parts: Dict[str, list] = {name: [] for name in needed}
+    for rows, columns in open_segments(directory):
+        mask = None
+        for name, test in (("office", office_code), ("service", service_code)):
+            if test is not None:
+                hit = columns[name] == test
+                mask = hit if mask is None else mask & hit
+        if since is not None:
+            hit = columns["served"] >= since
+            mask = hit if mask is None else mask & hit
+        if until is not None:
+            hit = columns["served"] < until
+            mask = hit if mask is None else mask & hit
+        for name in needed:
+            parts[name].append(columns[name] if mask is None else columns[name][mask])
+    data = {name: np.concatenate(chunks) if chunks else np.empty(0) for name, chunks in parts.items()}
+    waits = data["wait"].astype(np.float32)
+    if not len(waits):
+        return []
+
+    # One int64 code per row: the group keys in mixed radix, first key most
+    # significant, so sorting by code orders groups by key.
+    code = np.zeros(len(waits), dtype=np.int64)
+    if "issued" in data:
+        local = np.floor(data["issued"] + utc_offset).astype(np.int64)
+    for key in by:
+        if key == "hour":
+            values = local // 3600 % 24
+        elif key == "weekday":
+            # 1970-01-01 was a Thursday
+            values = (local // 86400 + 3) % 7
+        else:
+            values = data[key].astype(np.int64)
+        code = code * _ARCHIVE_RADIX[key] + values
+
+    # Sort by (code, wait): groups become runs, percentiles index lookups.
+    # Non-negative float32 waits sort like their bit patterns, so when the
+    # codes fit in 31 bits both go into one int64 and a plain sort does it.
+    if len(code) and code.max() < 1 << 31 and waits.min() >= 0:
+        packed = (code << 32) | waits.view(np.uint32).astype(np.int64)
+        packed.sort()
+        code = packed >> 32
+        ordered = (packed & 0xFFFFFFFF).astype(np.uint32).view(np.float32)
+    else:
+        order = np.lexsort((waits, code))
+        code, ordered = code[order], waits[order]
+    ordered = ordered.astype(np.float64)
+    starts = np.flatnonzero(np.concatenate(([True], code[1:] != code[:-1])))
+    counts = np.diff(np.append(starts, len(code)))
+    sums = np.add.reduceat(ordered, starts)
+    p50 = ordered[starts + ((counts - 1) * 0.5).astype(np.int64)]
+    p90 = ordered[starts + ((counts - 1) * 0.9).astype(np.int64)]
+    peak = ordered[starts + counts - 1]
+
+    report = []
+    for g, group_code in enumerate(code[starts].tolist()):
+        group = []
+        for key in reversed(by):
+            group_code, value = divmod(group_code, _ARCHIVE_RADIX[key])
+            group.append(value)
+        entry = {}
+        for key, value in zip(by, reversed(group)):
+            if key == "office":
+                entry['office_id'] = offices[value]
+            elif key == "service":
+                entry['service'] = SERVICE_TYPES[value].value
+            else:
+                entry[key] = value
+        entry.update({'served': int(counts[g]), 'avg_wait': float(sums[g] / counts[g]),
+                      'p50': float(p50[g]), 'p90': float(p90[g]), 'max_wait': float(peak[g])})
+        report.append(entry)
+    return report
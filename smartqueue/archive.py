@@ -0,0 +1,192 @@
+# =============================================================================
+# archive.py — Append-only columnar archive of served tickets.
+#
+# QueueManager forgets a ticket once it is served; only running sums and
+# sketches remain. ServedArchive attaches as a listener (like the journal)
+# and keeps one row per served ticket:
+#     issued (f8, epoch s) | served (f8, epoch s) | wait (f4, minutes)
+#     office (u2, code)    | priority (u2)        | service (u1, code)
+# Rows are buffered in typed arrays (array module, no per-row objects) and
+# flushed every flush_every rows, and on flush()/close(), as one new segment
+# file. Segments are never modified after they are written:
+#     segment-00000001.col   header <magic:4s><version:u32><rows:u64>, then
+#                            each column's values back to back, in the
+#                            order above (widest first, so every column
+#                            starts aligned for a memory map)
+#     offices.json           office code -> office_id, rewritten when a new
+#                            office appears
+# A segment is written to a temp file and renamed into place, so readers
+# never see a partial one. Rows still buffered at a crash are lost; the
+# journal is the record of queue state, this is only for analytics.
+#
+# Writing needs only the standard library. Reading goes through
+# open_segments(), which memory-maps each segment's columns as NumPy arrays
+# (NumPy is needed for that side only); analytics.py builds grouped
+# queries on top.
+# =============================================================================
+
+import json
+import os
+import re
+import struct
+import sys
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from .models import Ticket, SERVICE_CODES
+
+MAGIC = b"NQA1"
+VERSION = 1
+_HEADER = struct.Struct("<4sIQ")
+
+# (name, array typecode, NumPy dtype), in on-disk order
+COLUMNS = (
+    ("issued", "d", "<f8"),
+    ("served", "d", "<f8"),
+    ("wait", "f", "<f4"),
+    ("office", "H", "<u2"),
+    ("priority", "H", "<u2"),
+    ("service", "B", "u1"),
+)
+
+_SEGMENT_RE = re.compile(r"segment-(\d{8})\.col$")
+MAX_OFFICES = 1 << 16
+
+
+class ServedArchive:
+    """
+    Buffers served tickets as columns and flushes them to segment files.
+    Attach it with attach(manager); it registers itself as a listener.
+    """
+
+    def __init__(self, directory: str, flush_every: int = 65_536):
+        self.directory = directory
+        self.flush_every = max(1, flush_every)
+        self.manager = None
+        self._lock = threading.Lock()
+        self._buffer = {name: array(typecode) for name, typecode, _ in COLUMNS}
+        self._buffered = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self.offices: List[str] = read_offices(directory)
+        self._office_codes: Dict[str, int] = {office: code for code, office in enumerate(self.offices)}
+        existing = segment_paths(directory)
+        self._next_segment = int(_SEGMENT_RE.search(existing[-1]).group(1)) + 1 if existing else 1
+
+    def attach(self, manager) -> "ServedArchive":
+        self.manager = manager
+        manager.listeners.append(self)
+        return self
+
+    def __call__(self, event: str, ticket: Ticket) -> None:
+        """Listener hook: O(1) append of every served ticket."""
+        if event == "serve":
+            self.append(ticket.office_id, SERVICE_CODES[ticket.service], ticket.priority_level,
+                        ticket.issued_ts, ticket.served_ts)
+
+    def append(self, office_id: str, service_code: int, priority: int, issued_ts: float,
+               served_ts: float) -> None:
+        """O(1) amortized - Buffer one row; flushes a segment every flush_every rows."""
+        with self._lock:
+            code = self._office_codes.get(office_id)
+            if code is None:
+                code = self._add_office(office_id)
+            buffer = self._buffer
+            buffer["issued"].append(issued_ts)
+            buffer["served"].append(served_ts)
+            buffer["wait"].append((served_ts - issued_ts) / 60.0)
+            buffer["office"].append(code)
+            buffer["priority"].append(priority)
+            buffer["service"].append(service_code)
+            self._buffered += 1
+            if self._buffered >= self.flush_every:
+                self._flush()
+
+    def _add_office(self, office_id: str) -> int:
+        if len(self.offices) >= MAX_OFFICES:
+            raise ValueError(f"Too many offices for the archive: {len(self.offices)}")
+        code = len(self.offices)
+        self.offices.append(office_id)
+        self._office_codes[office_id] = code
+        _write_atomic(os.path.join(self.directory, "offices.json"),
+                      json.dumps(self.offices).encode("utf-8"))
+        return code
+
+    def flush(self) -> Optional[str]:
+        """O(rows) - Write the buffered rows as a new segment; returns its path."""
+        with self._lock:
+            return self._flush()
+
+    def _flush(self) -> Optional[str]:
+        if not self._buffered:
+            return None
+        parts = [_HEADER.pack(MAGIC, VERSION, self._buffered)]
+        for name, typecode, _ in COLUMNS:
+            column = self._buffer[name]
+            if sys.byteorder != "little":
+                column.byteswap()
+            parts.append(column.tobytes())
+        path = os.path.join(self.directory, f"segment-{self._next_segment:08d}.col")
+        _write_atomic(path, b"".join(parts))
+        self._next_segment += 1
+        self._buffer = {name: array(typecode) for name, typecode, _ in COLUMNS}
+        self._buffered = 0
+        return path
+
+    def close(self) -> None:
+        self.flush()
+        if self.manager is not None and self in self.manager.listeners:
+            self.manager.listeners.remove(self)
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def read_offices(directory: str) -> List[str]:
+    """Office ids by code, as recorded in the archive."""
+    path = os.path.join(directory, "offices.json")
+    if not os.path.exists(path):
+        return []
+    with open(path, "rb") as f:
+        return json.loads(f.read())
+
+
+def segment_paths(directory: str) -> List[str]:
+    """Segment files of an archive, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if _SEGMENT_RE.match(name))
+    return [os.path.join(directory, name) for name in names]
+
+
+def open_segments(directory: str) -> List[Tuple[int, Dict]]:
+    """
+    O(segments) - Memory-map every segment: [(rows, {column: numpy array})].
+    Nothing is read until a column is used. Needs NumPy.
+    """
+    import numpy as np
+
+    segments = []
+    for path in segment_paths(directory):
+        with open(path, "rb") as f:
+            magic, version, rows = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not an archive segment: {path}")
+        columns = {}
+        offset = _HEADER.size
+        for name, _, dtype in COLUMNS:
+            if rows:
+                columns[name] = np.memmap(path, dtype=dtype, mode="r", offset=offset,
+                                          shape=(rows,))
+            else:
+                columns[name] = np.empty(0, dtype=dtype)
+            offset += rows * np.dtype(dtype).itemsize
+        segments.append((rows, columns))
+    return segments
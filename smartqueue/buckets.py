@@ -0,0 +1,158 @@
+# =============================================================================
+# buckets.py — Bucketed priority queue with time-based aging.
+#
+# An alternative to the heap + deque pair in queues.py, chosen per office
+# with QueueManager(engine=..., office_engines=...):
+#   - One FIFO deque of ticket_ids per priority level (level 0 = normal).
+#   - `mask` is a bitmap of levels whose deque is non-empty, so the level to
+#     serve next is mask.bit_length() - 1: push and pop are O(1) instead of
+#     the heap's O(log n).
+#
+# Aging: `aging` maps a level to the seconds a ticket may wait at that level
+# before it is promoted one level up ({0: 1800} moves normal tickets to
+# level 1 after 30 minutes). A deque is in order of arrival at its level,
+# and arrival epochs are kept non-decreasing along it, so only its head can
+# be due: age() checks one head per aging level (a per-level timer) and
+# moves due tickets to the tail of the next level, with no re-heapify. A
+# promoted ticket counts as arriving at its new level when it became due
+# (entered + wait, or the tail's arrival if later), so promotions do not
+# depend on how often age() runs, and replaying them from the journal lands
+# on the same state.
+#
+# Like the heap and deque, the buckets use lazy deletion: cancelled tickets
+# stay behind until popped, aged or compacted. Methods that drop such
+# entries return how many, for the caller's tombstone count.
+# =============================================================================
+
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+ENGINES = ("heap", "bucket")
+
+
+def parse_aging(spec: str) -> Dict[int, float]:
+    """Aging rules from "level:seconds,..." (e.g. NOQ_AGING="0:1800,1:3600")."""
+    aging = {}
+    for rule in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            level, wait = rule.split(":")
+            aging[int(level)] = float(wait)
+        except ValueError:
+            raise ValueError(f"Invalid aging rule: {rule}")
+    return aging
+
+
+class BucketQueue:
+    """One deque per priority level plus a bitmap of non-empty levels."""
+
+    __slots__ = ("levels", "entered", "mask", "aging", "_aging_levels")
+
+    def __init__(self, aging: Optional[Dict[int, float]] = None):
+        self.levels: Dict[int, deque] = {}     # level -> ticket_ids in arrival order
+        self.entered: Dict[int, deque] = {}    # aging level -> arrival epochs, same order
+        self.mask = 0                          # bit L set <=> levels[L] is non-empty
+        self.aging = dict(aging or {})
+        for level, wait in self.aging.items():
+            if level < 0 or wait <= 0:
+                raise ValueError(f"Invalid aging rule: level {level} after {wait}s")
+        self._aging_levels = sorted(self.aging)
+
+    def __len__(self) -> int:
+        """Stored entries, tombstones included."""
+        return sum(len(dq) for dq in self.levels.values())
+
+    def push(self, level: int, ticket_id: str, entered: float) -> None:
+        """O(1) - Append a ticket to its level's deque."""
+        dq = self.levels.get(level)
+        if dq is None:
+            dq = self.levels[level] = deque()
+            if level in self.aging:
+                self.entered[level] = deque()
+        dq.append(ticket_id)
+        self.mask |= 1 << level
+        entered_dq = self.entered.get(level)
+        if entered_dq is not None:
+            # Keep arrival epochs sorted so only the head can be due
+            if entered_dq and entered < entered_dq[-1]:
+                entered = entered_dq[-1]
+            entered_dq.append(entered)
+
+    def _popleft(self, level: int) -> Tuple[str, float]:
+        dq = self.levels[level]
+        ticket_id = dq.popleft()
+        entered = self.entered[level].popleft() if level in self.entered else 0.0
+        if not dq:
+            self.mask ^= 1 << level
+        return ticket_id, entered
+
+    def pop(self, live) -> Tuple[Optional[str], int]:
+        """
+        O(1) amortized - Pop the next live ticket_id: highest level first,
+        FIFO within a level. Returns (ticket_id or None, dead entries dropped).
+        """
+        dropped = 0
+        while self.mask:
+            level = self.mask.bit_length() - 1
+            dq = self.levels[level]
+            ticket_id = dq.popleft()
+            if level in self.entered:
+                self.entered[level].popleft()
+            if not dq:
+                self.mask ^= 1 << level
+            if ticket_id in live:
+                return ticket_id, dropped
+            dropped += 1
+        return None, dropped
+
+    def age(self, now: float, live) -> Tuple[List[Tuple[str, int]], int]:
+        """
+        O(a + p) - Promote every due ticket, for a aging levels and p
+        promotions. Lower levels go first, so a ticket overdue at several
+        levels climbs all of them in one call.
+        Returns ([(ticket_id, new_level)] in promotion order, dead entries dropped).
+        """
+        promoted = []
+        dropped = 0
+        for level in self._aging_levels:
+            dq = self.levels.get(level)
+            if not dq:
+                continue
+            entered = self.entered[level]
+            due = now - self.aging[level]
+            while dq and entered[0] <= due:
+                ticket_id, since = self._popleft(level)
+                if ticket_id not in live:
+                    dropped += 1
+                    continue
+                self.push(level + 1, ticket_id, since + self.aging[level])
+                promoted.append((ticket_id, level + 1))
+        return promoted, dropped
+
+    def promote(self, ticket_id: str, level: int, live) -> int:
+        """
+        O(1) amortized - Replay one promotion out of `level`: its first live
+        ticket must be ticket_id. Returns dead entries dropped on the way.
+        """
+        dropped = 0
+        while self.levels.get(level):
+            head, since = self._popleft(level)
+            if head in live:
+                if head != ticket_id:
+                    raise ValueError(f"Promoted {ticket_id} but level {level} head is {head}")
+                self.push(level + 1, ticket_id, since + self.aging[level])
+                return dropped
+            dropped += 1
+        raise ValueError(f"Promoted {ticket_id} but level {level} is empty")
+
+    def compact(self, live) -> None:
+        """O(n) - Drop every dead entry."""
+        for level in list(self.levels):
+            dq = self.levels[level]
+            if level in self.aging:
+                pairs = [(tid, t) for tid, t in zip(dq, self.entered[level]) if tid in live]
+                self.entered[level] = deque(t for _, t in pairs)
+                self.levels[level] = deque(tid for tid, _ in pairs)
+            else:
+                self.levels[level] = deque(tid for tid in dq if tid in live)
+            if not self.levels[level]:
+                self.mask &= ~(1 << level)
@@ -1,9 +1,12 @@
+import argparse
 import sys
 import time
 from datetime import datetime
 from .queues import QueueManager
 from .models import ServiceType
-from .analytics import rank_services_by_avg_wait
+from .analytics import rank_services_by_avg_wait, wait_time_report
+from .buckets import ENGINES, parse_aging
+from .replay import FORMATS, OPS, replay
 
 def print_header():
     print("\n" + "="*50)
@@ -15,11 +18,11 @@ def print_menu():
     print("2. [User] Take a Ticket (Priority / Urgent)")
     print("3. [User] Check Status & Wait Time")
     print("4. [Admin] Serve Next Customer")
-    print("5. [Admin] View Analytics (Avg Wait Time)")
+    print("5. [Admin] View Analytics (Avg Wait Time & Percentiles)")
     print("6. Exit")
     print("-" * 30)
 
-def main():
+def interactive():
     manager = QueueManager()
     print_header()
 
@@ -111,6 +114,16 @@ def main():
                 print("   No data yet.")
             for s, avg in stats:
                 print(f"   - {s}: {avg:.1f} mins")
+
+            report = wait_time_report(manager)
+            if report:
+                print("\n   Wait distribution (p50 / p90 / p99, mins):")
+            for q in report:
+                print(f"   - {q['office_id']}/{q['service']}: "
+                      f"{q['p50']:.1f} / {q['p90']:.1f} / {q['p99']:.1f}  ({q['served']} served)")
+                for name, w in q['windows'].items():
+                    print(f"       last {name:>3}: {w['served']} served, "
+                          f"avg {w['avg_wait']:.1f}, max {w['max_wait']:.1f}")
             print("")
 
         elif choice == "6":
@@ -119,5 +132,55 @@ def main():
         else:
             print("Invalid option. Try again.")
 
+def print_replay_report(manager, stats):
+    print(f"Replayed {stats.events:,} events ({stats.trace_seconds / 3600:.1f} h of trace) "
+          f"in {stats.wall_seconds:.2f} s: {stats.ops_per_second:,.0f} ops/sec")
+    print(f"\n{'op':>8} {'count':>9} {'ok':>9} {'rejected':>9} {'missed':>9}"
+          f" {'p50 µs':>8} {'p90 µs':>8} {'p99 µs':>8} {'max µs':>9}")
+    for op in OPS:
+        s = stats.ops[op].summary()
+        print(f"{op:>8} {s['count']:>9} {s['ok']:>9} {s['rejected']:>9} {s['missed']:>9}"
+              f" {s['p50_us']:>8.1f} {s['p90_us']:>8.1f} {s['p99_us']:>8.1f} {s['max_us']:>9.1f}")
+    if stats.diverged:
+        print(f"\n{stats.diverged} serves picked a different ticket than the trace")
+
+    print("\nFinal queues:")
+    for q in manager.get_queue_overview():
+        if q['waiting_count']:
+            print(f"   - {q['office_id']}/{q['service']}: {q['waiting_count']} waiting, "
+                  f"est. {q['waiting_minutes']} mins")
+    for s, avg in rank_services_by_avg_wait(manager):
+        print(f"   - {s}: {manager.served_count[s]} served, avg wait {avg:.1f} mins")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m smartqueue.cli",
+                                     description="NoQ terminal interface. Without a command, "
+                                                 "starts the interactive menu.")
+    commands = parser.add_subparsers(dest="command")
+    parser_replay = commands.add_parser("replay", help="replay an NDJSON or CSV event trace")
+    parser_replay.add_argument("trace", help="trace file, or - for stdin")
+    parser_replay.add_argument("--format", choices=FORMATS, default="auto",
+                               help="default: csv for a .csv file, else ndjson")
+    parser_replay.add_argument("--speed", type=float, default=None,
+                               help="play in real time scaled by this factor (60 = an hour a "
+                                    "minute); default: as fast as possible")
+    parser_replay.add_argument("--engine", choices=ENGINES, default="heap")
+    parser_replay.add_argument("--aging", default="", help='e.g. "0:1800,1:3600"')
+    args = parser.parse_args(argv)
+
+    if args.command != "replay":
+        interactive()
+        return 0
+    try:
+        manager, stats = replay(args.trace, args.format, args.speed,
+                                engine=args.engine, aging=parse_aging(args.aging))
+    except (OSError, ValueError) as e:
+        print(f"replay: {e}", file=sys.stderr)
+        return 1
+    print_replay_report(manager, stats)
+    return 0
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
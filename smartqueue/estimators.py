@@ -0,0 +1,88 @@
+# =============================================================================
+# estimators.py — Pluggable wait-time estimators for QueueManager.
+#
+# get_position finds how many tickets are ahead (and their expected_minutes)
+# from the QueueIndex; the estimator turns that into the minutes shown to the
+# customer. QueueManager(estimator=...) picks one:
+#   - ExpectedMinutesEstimator (default): sum of expected_minutes ahead, the
+#     original behaviour. Ignores desks and real serving speed.
+#   - ServiceRateEstimator: learns how fast each (office, service) queue is
+#     actually served. Every serve yields one sample of per-desk service time
+#     (time since the desk could last have started, times the active desk
+#     count), smoothed with an EWMA. ETA = tickets ahead * service time / desks,
+#     O(1) per query. Until a queue has samples it falls back to
+#     expected_minutes.
+#
+# Estimators see on_issue/on_serve from QueueManager's internal helpers, so
+# journal replay rebuilds them exactly like the rest of the state.
+# =============================================================================
+
+from typing import Dict, Optional, Tuple
+
+from .models import Ticket
+
+QueueKey = Tuple[str, str]
+
+
+class ExpectedMinutesEstimator:
+    """ETA = sum of expected_minutes of the tickets ahead."""
+
+    def on_issue(self, queue_key: QueueKey, ticket: Ticket) -> None:
+        pass
+
+    def on_serve(self, queue_key: QueueKey, ticket: Ticket, served_ts: float,
+                 still_waiting: int) -> None:
+        pass
+
+    def set_desks(self, queue_key: QueueKey, desks: int) -> None:
+        pass
+
+    def estimate(self, queue_key: QueueKey, ahead: int, ahead_minutes: int) -> int:
+        return ahead_minutes
+
+
+class ServiceRateEstimator(ExpectedMinutesEstimator):
+    """
+    EWMA of observed per-desk service time per queue, divided across the
+    queue's active desks.
+    """
+
+    def __init__(self, alpha: float = 0.2, max_sample_minutes: float = 240.0):
+        self.alpha = alpha
+        # Gaps longer than this (lunch, closed office) are not service times.
+        self.max_sample_minutes = max_sample_minutes
+        self.service_minutes: Dict[QueueKey, float] = {}
+        self.desks: Dict[QueueKey, int] = {}
+        # Epoch at which the queue's desks last became busy with a waiting customer
+        self._busy_since: Dict[QueueKey, Optional[float]] = {}
+
+    def on_issue(self, queue_key: QueueKey, ticket: Ticket) -> None:
+        """O(1) - An arrival to an idle queue starts the service clock."""
+        if self._busy_since.get(queue_key) is None:
+            self._busy_since[queue_key] = ticket.issued_ts
+
+    def on_serve(self, queue_key: QueueKey, ticket: Ticket, served_ts: float,
+                 still_waiting: int) -> None:
+        """O(1) - Fold the time since the previous serve into the EWMA."""
+        start = self._busy_since.get(queue_key)
+        if start is not None:
+            gap = (served_ts - start) / 60.0
+            if 0 < gap <= self.max_sample_minutes:
+                sample = gap * self.desks.get(queue_key, 1)
+                current = self.service_minutes.get(queue_key)
+                if current is None:
+                    self.service_minutes[queue_key] = sample
+                else:
+                    self.service_minutes[queue_key] = current + self.alpha * (sample - current)
+        # With nobody left waiting, the next gap starts at the next arrival.
+        self._busy_since[queue_key] = served_ts if still_waiting else None
+
+    def set_desks(self, queue_key: QueueKey, desks: int) -> None:
+        self.desks[queue_key] = max(1, desks)
+
+    def estimate(self, queue_key: QueueKey, ahead: int, ahead_minutes: int) -> int:
+        """O(1) - Tickets ahead times the learned per-ticket pace of the queue."""
+        service = self.service_minutes.get(queue_key)
+        if service is None:
+            return ahead_minutes
+        return round(ahead * service / self.desks.get(queue_key, 1))
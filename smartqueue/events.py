@@ -0,0 +1,193 @@
+# =============================================================================
+# events.py — Push notifications for ticket positions and queue overviews.
+#
+# ChangeFeed attaches to a QueueManager as a listener. Clients subscribe to
+# either one ticket or one office and receive a message whenever it changes,
+# which app.py streams out as Server-Sent Events (/api/stream/...):
+#   - ticket subscribers get {"position", "wait_time", "status"} updates
+#   - office subscribers get the office's get_queue_overview() rows
+#
+# Work per QueueManager event is done once, not once per client: each
+# watched ticket in the affected queue gets one O(log n) get_position, and
+# the office overview is read once; the result is fanned out to every
+# subscriber of that ticket/office. Tickets whose position cannot have
+# changed (ahead of the newcomer on issue) are not re-sent.
+#
+# Subscriber queues are bounded and keep only the newest messages: a slow
+# client sees the latest position, never an ever-growing backlog.
+# =============================================================================
+
+import queue
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+from .models import Ticket
+from .queues import QueueManager
+
+
+class Subscription:
+    """One client's mailbox. Call close() when the client goes away."""
+
+    def __init__(self, feed: "ChangeFeed", key: Tuple[str, str], maxsize: int):
+        self._feed = feed
+        self.key = key
+        self._messages: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.closed = False
+
+    def put(self, message: Dict) -> None:
+        """O(1) - Deliver, dropping the oldest message if the client is behind."""
+        while True:
+            try:
+                self._messages.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self._messages.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict]:
+        """Next message, or None if nothing arrived within `timeout` seconds."""
+        try:
+            return self._messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self._feed._unsubscribe(self)
+
+
+class ChangeFeed:
+    """
+    Turns QueueManager change events into per-ticket and per-office messages.
+    Attach with ChangeFeed(manager).attach().
+    """
+
+    # Mailbox type handed to subscribers (aio.py swaps in an asyncio one)
+    subscription_class = Subscription
+
+    def __init__(self, manager: QueueManager, mailbox_size: int = 16):
+        self.manager = manager
+        self.mailbox_size = mailbox_size
+        self._lock = threading.Lock()
+        # ("ticket", ticket_id) / ("office", office_id) -> subscriptions
+        self._subscribers: Dict[Tuple[str, str], Set[Subscription]] = {}
+        # (office_id, service) -> watched ticket_ids in that queue, and back
+        self._watched: Dict[Tuple[str, str], Set[str]] = {}
+        self._queue_of: Dict[str, Tuple[str, str]] = {}
+
+    def attach(self) -> "ChangeFeed":
+        self.manager.listeners.append(self)
+        return self
+
+    # --- subscriptions ---
+
+    def subscribe_ticket(self, ticket_id: str) -> Optional[Subscription]:
+        """
+        O(log n) - Watch one waiting ticket. The first message is its current
+        status. Returns None if the ticket is not waiting.
+        """
+        ticket = self.manager.active_tickets_by_id.get(ticket_id)
+        if ticket is None:
+            return None
+        sub = self._subscribe(("ticket", ticket_id))
+        queue_key = (ticket.office_id, ticket.service.value)
+        with self._lock:
+            self._watched.setdefault(queue_key, set()).add(ticket_id)
+            self._queue_of[ticket_id] = queue_key
+        sub.put(self._ticket_message(ticket))
+        return sub
+
+    def subscribe_office(self, office_id: str) -> Subscription:
+        """O(services) - Watch one office's overview; first message is the current one."""
+        sub = self._subscribe(("office", office_id))
+        sub.put(self._office_message(office_id))
+        return sub
+
+    def _subscribe(self, key: Tuple[str, str]) -> Subscription:
+        sub = self.subscription_class(self, key, self.mailbox_size)
+        with self._lock:
+            self._subscribers.setdefault(key, set()).add(sub)
+        return sub
+
+    def _unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.key)
+            if subs is None:
+                return
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.key]
+                if sub.key[0] == "ticket":
+                    self._forget_ticket(sub.key[1])
+
+    def _forget_ticket(self, ticket_id: str) -> None:
+        queue_key = self._queue_of.pop(ticket_id, None)
+        ids = self._watched.get(queue_key)
+        if ids is not None:
+            ids.discard(ticket_id)
+            if not ids:
+                del self._watched[queue_key]
+
+    # --- messages ---
+
+    def _ticket_message(self, ticket: Ticket) -> Dict:
+        if ticket.status == "WAITING":
+            position, wait = self.manager.get_position(ticket.ticket_id)
+        else:
+            position, wait = -1, 0
+        return {
+            'ticket_id': ticket.ticket_id,
+            'status': ticket.status,
+            'position': position,
+            'wait_time': wait,
+            'service': ticket.service.value,
+        }
+
+    def _office_message(self, office_id: str) -> Dict:
+        return {
+            'office_id': office_id,
+            'queues': self.manager.get_queue_overview(office_id),
+        }
+
+    def _fan_out(self, key: Tuple[str, str], message: Dict) -> None:
+        with self._lock:
+            subs = list(self._subscribers.get(key, ()))
+        for sub in subs:
+            sub.put(message)
+
+    # --- QueueManager listener ---
+
+    def __call__(self, event: str, ticket: Ticket) -> None:
+        """
+        O(w log n) for w watched tickets in the changed queue, plus one
+        overview read if anyone watches the office.
+        """
+        queue_key = (ticket.office_id, ticket.service.value)
+
+        with self._lock:
+            watched = list(self._watched.get(queue_key, ()))
+            office_watched = ("office", ticket.office_id) in self._subscribers
+
+        if watched:
+            # On issue, only tickets behind the newcomer move back.
+            new_position = None
+            if event == "issue":
+                new_position = self.manager.get_position(ticket.ticket_id)[0]
+
+            for tid in watched:
+                if tid == ticket.ticket_id:
+                    message = self._ticket_message(ticket)
+                else:
+                    other = self.manager.active_tickets_by_id.get(tid)
+                    if other is None:
+                        continue
+                    message = self._ticket_message(other)
+                    if new_position is not None and message['position'] < new_position:
+                        continue
+                self._fan_out(("ticket", tid), message)
+
+        if office_watched:
+            self._fan_out(("office", ticket.office_id), self._office_message(ticket.office_id))
@@ -0,0 +1,63 @@
+# =============================================================================
+# httpcache.py — Conditional responses from queue versions.
+#
+# QueueManager versions every queue (queue_version / office_version in
+# queues.py). A response that depends only on one queue, or on one office's
+# queues, is then fully described by (what was asked, version):
+#   - the ETag is the version, prefixed with a per-process token so a
+#     restarted server (whose versions start over) never matches an old tag;
+#     a client sending it back in If-None-Match gets 304 before anything is
+#     computed.
+#   - BodyCache keeps the serialized body per (route, resource, version) in a
+#     bounded LRU, so a repeated request on an unchanged queue from a client
+#     without the tag costs a dict lookup instead of a position query and a
+#     JSON encode. Entries of old versions are never hit again and age out.
+# =============================================================================
+
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+# Differs between processes and restarts, so ETags are never reused
+PROCESS_TOKEN = uuid.uuid4().hex[:8]
+
+
+def make_etag(version: int) -> str:
+    """O(1) - ETag value (unquoted) for a version in this process."""
+    return f"{PROCESS_TOKEN}-{version}"
+
+
+class BodyCache:
+    """Thread-safe LRU of serialized response bodies, at most `capacity` entries."""
+
+    def __init__(self, capacity: int = 4096):
+        if capacity < 1:
+            raise ValueError(f"Invalid cache capacity: {capacity}")
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._bodies: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """O(1) - The cached body, marked most recently used; None on a miss."""
+        with self._lock:
+            body = self._bodies.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._bodies.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Hashable, body: bytes) -> None:
+        """O(1) - Cache a body, evicting the least recently used beyond capacity."""
+        with self._lock:
+            self._bodies[key] = body
+            self._bodies.move_to_end(key)
+            if len(self._bodies) > self.capacity:
+                self._bodies.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._bodies)
@@ -0,0 +1,143 @@
+# =============================================================================
+# ids.py — Ticket ID generators for QueueManager.
+#
+# QueueManager(id_generator=...) picks how ticket IDs are minted:
+#   - SequentialIdGenerator (default): "<shard><office><day>-<seq>", e.g.
+#     "02D1BX-004K". All parts are Crockford base32 (digits plus A-Z without
+#     I, L, O, U), so IDs are short, case-insensitive to type and sort in
+#     issue order within an office and day:
+#       shard   optional fixed prefix, one per process when offices are
+#               split across processes; "" for a single process
+#       office  3 chars, a code assigned to each office on first use
+#       day     3 chars, UTC days since 2024-01-01
+#       seq     per-office counter, reset daily; 4 chars (IDs past the
+#               ~1M-th of a day get wider and stop sorting, but stay unique)
+#     Unique by construction within a shard: no RNG, no clock read (the
+#     caller passes the issue time it already has), no collision check.
+#   - RandomIdGenerator: the original 8 hex chars of a uuid4. 32 random bits
+#     collide by the birthday bound at tens of thousands of tickets, so
+#     QueueManager re-draws on a clash with a waiting ticket.
+#
+# Generators are pickled with the manager (journal snapshots). Journal replay
+# calls observe() for every issued ID so the counters resume past them.
+# =============================================================================
+
+from typing import Dict
+
+from .utils import generate_id
+
+CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {c: i for i, c in enumerate(CROCKFORD)}
+_DECODE.update({c.lower(): i for c, i in list(_DECODE.items())})
+_DECODE.update({"O": 0, "o": 0, "I": 1, "i": 1, "L": 1, "l": 1})
+
+OFFICE_WIDTH = 3
+DAY_WIDTH = 3
+SEQ_WIDTH = 4
+# 2024-01-01 in days since the Unix epoch
+DAY_EPOCH = 19723
+
+# Every 2-char base32 string, so a 4-char seq is two table lookups
+_PAIRS = [a + b for a in CROCKFORD for b in CROCKFORD]
+_SEQ_LIMIT = 32 ** SEQ_WIDTH
+
+
+def encode_base32(value: int, width: int) -> str:
+    """O(log value) - Crockford base32, zero-padded to at least `width` chars."""
+    chars = []
+    while value:
+        value, digit = divmod(value, 32)
+        chars.append(CROCKFORD[digit])
+    return "".join(reversed(chars)).rjust(width, "0")
+
+
+def decode_base32(text: str) -> int:
+    """O(len) - Inverse of encode_base32; accepts lower case and I/L/O look-alikes."""
+    value = 0
+    for char in text:
+        try:
+            value = value * 32 + _DECODE[char]
+        except KeyError:
+            raise ValueError(f"Invalid base32 character: {char!r}")
+    return value
+
+
+def normalize_id(ticket_id: str) -> str:
+    """O(len) - Canonical form of a typed-in ID: upper case, O -> 0, I/L -> 1."""
+    return ticket_id.strip().upper().replace("O", "0").replace("I", "1").replace("L", "1")
+
+
+class RandomIdGenerator:
+    """8 random hex chars per ticket (the original utils.generate_id)."""
+
+    def next_id(self, office_id: str, now: float) -> str:
+        return generate_id()
+
+    def observe(self, ticket_id: str, office_id: str) -> None:
+        pass
+
+
+class SequentialIdGenerator:
+    """
+    Monotonic "<shard><office><day>-<seq>" IDs, unique within the shard.
+    Not thread-safe: QueueManager calls it under its sequence lock.
+    """
+
+    def __init__(self, shard: str = ""):
+        self.shard = normalize_id(shard)
+        # office_id -> its 3-char code; codes are handed out in order
+        self.office_codes: Dict[str, str] = {}
+        self._next_office = 0
+        # office_id -> [day number, next seq, cached "<shard><office><day>-" prefix]
+        self._counters: Dict[str, list] = {}
+
+    def _office_code(self, office_id: str) -> str:
+        code = self.office_codes.get(office_id)
+        if code is None:
+            if self._next_office >= 32 ** OFFICE_WIDTH:
+                raise ValueError(f"Too many offices for one ID shard: {self._next_office}")
+            code = encode_base32(self._next_office, OFFICE_WIDTH)
+            self.office_codes[office_id] = code
+            self._next_office += 1
+        return code
+
+    def next_id(self, office_id: str, now: float) -> str:
+        """O(1) - Next ID for `office_id`, issued at epoch `now`."""
+        # Times before the day epoch (e.g. a simulation clock at 0) share day 0.
+        day = max(int(now // 86400) - DAY_EPOCH, 0)
+        counter = self._counters.get(office_id)
+        # A clock stepping back over midnight keeps counting on the later day.
+        if counter is None or counter[0] < day:
+            prefix = f"{self.shard}{self._office_code(office_id)}{encode_base32(day, DAY_WIDTH)}-"
+            counter = [day, 0, prefix]
+            self._counters[office_id] = counter
+        seq = counter[1]
+        counter[1] = seq + 1
+        if seq < _SEQ_LIMIT:
+            return counter[2] + _PAIRS[seq >> 10] + _PAIRS[seq & 1023]
+        return counter[2] + encode_base32(seq, SEQ_WIDTH)
+
+    def observe(self, ticket_id: str, office_id: str) -> None:
+        """
+        O(1) - Advance past an ID issued earlier (journal replay), adopting
+        its office code if the office is new to this generator.
+        """
+        head, sep, seq_text = ticket_id[len(self.shard):].partition("-")
+        if not ticket_id.startswith(self.shard) or not sep \
+                or len(head) != OFFICE_WIDTH + DAY_WIDTH:
+            return  # not one of ours (e.g. a random ID from before the switch)
+        try:
+            office = decode_base32(head[:OFFICE_WIDTH])
+            day = decode_base32(head[OFFICE_WIDTH:])
+            seq = decode_base32(seq_text)
+        except ValueError:
+            return
+
+        if office_id not in self.office_codes:
+            self.office_codes[office_id] = head[:OFFICE_WIDTH]
+            self._next_office = max(self._next_office, office + 1)
+        counter = self._counters.get(office_id)
+        if counter is None or counter[0] < day:
+            self._counters[office_id] = [day, seq + 1, f"{self.shard}{head}-"]
+        elif counter[0] == day and counter[1] <= seq:
+            counter[1] = seq + 1
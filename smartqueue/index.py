@@ -0,0 +1,265 @@
+# =============================================================================
+# index.py — Order-statistic index over the waiting tickets of one queue.
+#
+# QueueManager keeps one QueueIndex per (office, service) pair next to the
+# heap/deque pair in queues.py. The heap and deque decide who is served next;
+# the index answers "how many people (and how many expected minutes) are ahead
+# of this ticket?" without walking either structure.
+#
+# Layout:
+#   - One FenwickLane per priority level (level 0 = the normal FIFO deque).
+#     A lane is an append-only array in arrival order plus two Fenwick
+#     (binary indexed) trees holding live-ticket counts and expected minutes,
+#     so "sum of everything before slot i" is O(log n).
+#   - Lanes are ordered by level, highest first. Everyone in a higher lane is
+#     ahead of everyone in a lower lane, which matches the heap's
+#     (-priority, counter) order and "heap before deque" serving.
+#
+# Removed tickets (served or cancelled) leave a hole (None) in their lane; the
+# lane skips its dead head on every removal and is rebuilt once holes make up
+# most of the array, so memory stays proportional to the live tickets.
+#
+# Numbers are kept unboxed in typed arrays, and a ticket's (level, slot) is
+# packed into one int, so the index adds no per-ticket Python objects beyond
+# the slot_of entry. Priority levels must therefore fit in LEVEL_BITS bits.
+# =============================================================================
+
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# A lane is rebuilt once it holds at least this many dead slots and they make
+# up more than half of the array.
+LANE_COMPACT_MIN_DEAD = 1024
+
+# slot_of packs (level, slot) as slot << LEVEL_BITS | level
+LEVEL_BITS = 16
+LEVEL_MASK = (1 << LEVEL_BITS) - 1
+MAX_PRIORITY_LEVEL = LEVEL_MASK
+
+
+class FenwickLane:
+    """
+    Tickets of a single priority level, in arrival order.
+    Fenwick trees over the slots give O(log n) prefix counts and minutes.
+    """
+
+    __slots__ = ("ids", "seqs", "minutes", "head", "count", "total_minutes",
+                 "_count_tree", "_minutes_tree")
+
+    def __init__(self):
+        self.ids: List[Optional[str]] = []   # slot -> ticket_id (None once removed)
+        self.seqs = array("q")               # slot -> arrival counter
+        self.minutes = array("i")            # slot -> expected_minutes
+        self.head = 0                        # first slot that may still be live
+        self.count = 0                       # live tickets in the lane
+        self.total_minutes = 0               # expected minutes of live tickets
+        # 1-based Fenwick trees; index 0 is unused.
+        self._count_tree = array("q", [0])
+        self._minutes_tree = array("q", [0])
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _prefix(self, i: int) -> Tuple[int, int]:
+        """O(log n) - Live count and minutes over Fenwick indices 1..i."""
+        count = minutes = 0
+        count_tree = self._count_tree
+        minutes_tree = self._minutes_tree
+        while i > 0:
+            count += count_tree[i]
+            minutes += minutes_tree[i]
+            i &= i - 1
+        return count, minutes
+
+    def append(self, ticket_id: str, seq: int, minutes: int) -> int:
+        """
+        O(log n) - Add a ticket at the tail and return its slot.
+        A Fenwick tree grows by one node: the new node covers (i - lowbit(i), i],
+        which is the value itself plus two prefix sums we already know how to get.
+        """
+        slot = len(self.ids)
+        self.ids.append(ticket_id)
+        self.seqs.append(seq)
+        self.minutes.append(minutes)
+
+        i = slot + 1
+        low = i - (i & -i)
+        count_before, minutes_before = self._prefix(i - 1)
+        count_low, minutes_low = self._prefix(low)
+        self._count_tree.append(1 + count_before - count_low)
+        self._minutes_tree.append(minutes + minutes_before - minutes_low)
+
+        self.count += 1
+        self.total_minutes += minutes
+        return slot
+
+    def remove(self, slot: int) -> None:
+        """O(log n) - Drop the ticket at `slot` from all counts."""
+        minutes = self.minutes[slot]
+        self.ids[slot] = None
+        self.count -= 1
+        self.total_minutes -= minutes
+
+        i = slot + 1
+        size = len(self._count_tree)
+        count_tree = self._count_tree
+        minutes_tree = self._minutes_tree
+        while i < size:
+            count_tree[i] -= 1
+            minutes_tree[i] -= minutes
+            i += i & -i
+
+        # Skip over the dead head so the next removal at the front is cheap.
+        while self.head < len(self.ids) and self.ids[self.head] is None:
+            self.head += 1
+
+    def ahead(self, slot: int) -> Tuple[int, int]:
+        """O(log n) - Live count and minutes strictly before `slot`."""
+        return self._prefix(slot)
+
+    def live_entries(self):
+        """Yields (ticket_id, seq, minutes) for live slots in arrival order."""
+        ids, seqs, minutes = self.ids, self.seqs, self.minutes
+        for slot in range(self.head, len(ids)):
+            tid = ids[slot]
+            if tid is not None:
+                yield tid, seqs[slot], minutes[slot]
+
+    def needs_compaction(self) -> bool:
+        dead = len(self.ids) - self.count
+        return dead >= LANE_COMPACT_MIN_DEAD and dead * 2 > len(self.ids)
+
+
+class QueueIndex:
+    """
+    Order-statistic index for one (office, service) queue.
+    Answers position and minutes-ahead queries in O(L + log n), where L is the
+    number of distinct priority levels currently waiting (a handful in practice).
+    """
+
+    def __init__(self):
+        self.lanes: Dict[int, FenwickLane] = {}
+        # Levels with a lane, kept sorted ascending; iterated highest first.
+        self.levels: List[int] = []
+        # ticket_id -> slot << LEVEL_BITS | level
+        self.slot_of: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.slot_of)
+
+    def __contains__(self, ticket_id: str) -> bool:
+        return ticket_id in self.slot_of
+
+    @staticmethod
+    def level_for(priority_level: int) -> int:
+        """Normal tickets (priority <= 0) all share lane 0, like the deque."""
+        return priority_level if priority_level > 0 else 0
+
+    def add(self, ticket_id: str, priority_level: int, seq: int, minutes: int) -> None:
+        """O(log n) - Index a newly issued ticket."""
+        level = self.level_for(priority_level)
+        if level > MAX_PRIORITY_LEVEL:
+            raise ValueError(f"Invalid priority level: {priority_level}")
+        lane = self.lanes.get(level)
+        if lane is None:
+            lane = FenwickLane()
+            self.lanes[level] = lane
+            insort(self.levels, level)
+        self.slot_of[ticket_id] = lane.append(ticket_id, seq, minutes) << LEVEL_BITS | level
+
+    def remove(self, ticket_id: str) -> bool:
+        """O(log n) - Forget a served or cancelled ticket. Returns False if it was not indexed."""
+        loc = self.slot_of.pop(ticket_id, None)
+        if loc is None:
+            return False
+        level, slot = loc & LEVEL_MASK, loc >> LEVEL_BITS
+        lane = self.lanes[level]
+        lane.remove(slot)
+
+        if lane.count == 0:
+            # Empty lanes are dropped outright: cheaper than compacting them.
+            del self.lanes[level]
+            self.levels.pop(bisect_left(self.levels, level))
+        elif lane.needs_compaction():
+            self._rebuild_lane(level)
+        return True
+
+    def position(self, ticket_id: str) -> Optional[Tuple[int, int]]:
+        """
+        O(L + log n) - (tickets ahead, expected minutes ahead) for a ticket,
+        or None if it is not waiting in this queue.
+        """
+        loc = self.slot_of.get(ticket_id)
+        if loc is None:
+            return None
+        level, slot = loc & LEVEL_MASK, loc >> LEVEL_BITS
+
+        count = minutes = 0
+        # Every higher lane is served first.
+        for other in reversed(self.levels):
+            if other == level:
+                break
+            lane = self.lanes[other]
+            count += lane.count
+            minutes += lane.total_minutes
+
+        lane_count, lane_minutes = self.lanes[level].ahead(slot)
+        return count + lane_count, minutes + lane_minutes
+
+    def positions(self, ticket_ids: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        """
+        (tickets ahead, minutes ahead) for many tickets at once, skipping ids
+        not in this queue. Uses point queries while k (L + log n) is cheaper,
+        otherwise one ordered sweep of the lanes: O(min(k log n, n)).
+        """
+        wanted = {tid for tid in ticket_ids if tid in self.slot_of}
+        total = len(self.slot_of)
+        if len(wanted) * (len(self.levels) + total.bit_length()) < total:
+            return {tid: self.position(tid) for tid in wanted}
+
+        result: Dict[str, Tuple[int, int]] = {}
+        count = minutes = 0
+        for level in reversed(self.levels):
+            lane = self.lanes[level]
+            ids, lane_minutes = lane.ids, lane.minutes
+            for slot in range(lane.head, len(ids)):
+                tid = ids[slot]
+                if tid is None:
+                    continue
+                if tid in wanted:
+                    result[tid] = (count, minutes)
+                    if len(result) == len(wanted):
+                        return result
+                count += 1
+                minutes += lane_minutes[slot]
+        return result
+
+    def iter_from(self, after: Optional[Tuple[int, int]] = None) -> Iterator[Tuple[int, int, str]]:
+        """
+        Yields (level, seq, ticket_id) in exact serve order, lazily.
+        `after` is the (level, seq) of the last entry already seen; iteration
+        resumes right behind it with one O(log n) bisect, so a page of k
+        tickets costs O(L + log n + k) regardless of queue depth.
+        """
+        for level in reversed(self.levels):
+            lane = self.lanes[level]
+            start = lane.head
+            if after is not None:
+                after_level, after_seq = after
+                if level > after_level:
+                    continue
+                if level == after_level:
+                    start = bisect_right(lane.seqs, after_seq, lane.head)
+            ids, seqs = lane.ids, lane.seqs
+            for slot in range(start, len(ids)):
+                tid = ids[slot]
+                if tid is not None:
+                    yield level, seqs[slot], tid
+
+    def _rebuild_lane(self, level: int) -> None:
+        """O(k) - Copy the live tickets of a lane into a fresh one."""
+        fresh = FenwickLane()
+        for tid, seq, minutes in self.lanes[level].live_entries():
+            self.slot_of[tid] = fresh.append(tid, seq, minutes) << LEVEL_BITS | level
+        self.lanes[level] = fresh
@@ -0,0 +1,406 @@
+# =============================================================================
+# journal.py — Crash recovery for QueueManager: append-only journal + snapshots.
+#
+# The Journal attaches to a QueueManager as a listener and appends one compact
+# binary record per issue/serve/cancel/promote/expire (a no-show changes no
+# queue and is not journaled), plus one per desk count change (a desk
+# listener: the count feeds the wait estimates). Records are buffered and written in
+# groups (group commit); the fsync policy decides how often the OS is forced
+# to put them on disk:
+#   - "always":   fsync after every group write (no acknowledged loss)
+#   - "interval": fsync at most every fsync_interval seconds (default)
+#   - "never":    leave it to the OS page cache
+#
+# Every snapshot_every records the whole manager is pickled to a snapshot and
+# the journal rolls over to a new segment. On disk, generation G means:
+#   snapshot-G.pkl  — state after every record in segments < G
+#   journal-G.log   — records applied on top of snapshot-G
+# recover() loads the newest snapshot and replays the segments after it.
+#
+# A snapshot is never taken from inside the listener call: an operation may
+# have applied several changes and still be reporting them, so the events
+# after the snapshot would be replayed on top of a state that has them.
+# Without locks the snapshot waits for the manager's settle hook, run once
+# the batch of events is out. With a concurrent QueueManager the journal is
+# called from many threads: a lock serializes appends, and snapshots run on
+# a helper thread inside manager.quiesce() so they never capture a
+# half-applied mutation.
+#
+# Record frame: <length:u32><crc32:u32><op:u8><payload>. Replay stops at the
+# first truncated or corrupt frame (a torn write at crash time).
+# =============================================================================
+
+import os
+import pickle
+import re
+import struct
+import threading
+import time
+import zlib
+from typing import Iterator, List, Optional, Tuple
+
+from .models import SERVICE_CODES, ServiceType, Ticket
+from .locks import make_locks
+from .queues import QueueManager
+
+OP_ISSUE = 1
+OP_SERVE = 2
+OP_CANCEL = 3
+OP_PROMOTE = 4
+OP_EXPIRE = 5
+OP_DESKS = 6
+
+# Events that change queue state; others reach the listener and are skipped
+JOURNALED_EVENTS = frozenset({"issue", "serve", "cancel", "promote", "expire"})
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+_FRAME = struct.Struct("<IIB")        # payload length, crc32(op + payload), op
+_ISSUE = struct.Struct("<qiid")       # seq, priority, expected_minutes, issued_at
+_SERVE = struct.Struct("<d")          # served_at
+_PROMOTE = struct.Struct("<qi")       # new seq, new priority
+_DESKS = struct.Struct("<i")          # active desks
+_STR_LEN = struct.Struct("<H")
+
+_SEGMENT_RE = re.compile(r"journal-(\d{8})\.log$")
+_SNAPSHOT_RE = re.compile(r"snapshot-(\d{8})\.pkl$")
+
+
+class JournalError(Exception):
+    """Raised when the journal does not match the state it is replayed onto."""
+
+
+def _pack_str(value: str) -> bytes:
+    raw = value.encode("utf-8")
+    return _STR_LEN.pack(len(raw)) + raw
+
+
+def _unpack_strs(payload: bytes, offset: int, count: int) -> Tuple[List[str], int]:
+    values = []
+    for _ in range(count):
+        (length,) = _STR_LEN.unpack_from(payload, offset)
+        offset += _STR_LEN.size
+        values.append(payload[offset:offset + length].decode("utf-8"))
+        offset += length
+    return values, offset
+
+
+def encode_record(event: str, ticket: Ticket) -> bytes:
+    """O(1) - One framed binary record for a QueueManager event."""
+    if event == "issue":
+        op = OP_ISSUE
+        payload = _ISSUE.pack(ticket.seq, ticket.priority_level, ticket.expected_minutes,
+                              ticket.issued_ts)
+        payload += b"".join(_pack_str(v) for v in (
+            ticket.ticket_id, ticket.user_id, ticket.name,
+            ticket.service.value, ticket.office_id))
+    elif event == "serve":
+        op = OP_SERVE
+        payload = _SERVE.pack(ticket.served_ts) + _pack_str(ticket.ticket_id)
+    elif event == "cancel":
+        op = OP_CANCEL
+        payload = _pack_str(ticket.ticket_id)
+    elif event == "promote":
+        op = OP_PROMOTE
+        payload = _PROMOTE.pack(ticket.seq, ticket.priority_level) + _pack_str(ticket.ticket_id)
+    elif event == "expire":
+        op = OP_EXPIRE
+        payload = _pack_str(ticket.ticket_id)
+    else:
+        raise ValueError(f"Unknown journal event: {event}")
+
+    return _frame(op, payload)
+
+
+def encode_desks(queue_key: Tuple[str, str], desks: int) -> bytes:
+    """O(1) - One framed binary record for a set_active_desks call."""
+    office_id, service = queue_key
+    return _frame(OP_DESKS, _DESKS.pack(desks) + _pack_str(office_id) + _pack_str(service))
+
+
+def _frame(op: int, payload: bytes) -> bytes:
+    crc = zlib.crc32(bytes((op,)) + payload)
+    return _FRAME.pack(len(payload), crc, op) + payload
+
+
+def read_records(path: str) -> Iterator[Tuple[int, bytes, int]]:
+    """Yields (op, payload, end_offset) for every intact record of a segment file."""
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset + _FRAME.size <= len(data):
+        length, crc, op = _FRAME.unpack_from(data, offset)
+        start = offset + _FRAME.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(bytes((op,)) + payload) != crc:
+            return  # torn tail
+        offset = start + length
+        yield op, payload, offset
+
+
+def apply_record(manager: QueueManager, op: int, payload: bytes) -> None:
+    """
+    O(log n) - Re-apply one journal record through QueueManager's internal
+    helpers, so no listener (including a journal) sees it a second time.
+    """
+    if op == OP_ISSUE:
+        seq, priority, expected, issued_ts = _ISSUE.unpack_from(payload, 0)
+        (ticket_id, user_id, name, service, office_id), _ = _unpack_strs(payload, _ISSUE.size, 5)
+        ticket = manager.store.create(ticket_id, user_id, name, SERVICE_CODES[ServiceType(service)],
+                                      office_id, issued_ts, expected, priority, seq)
+        manager.counter = max(manager.counter, seq)
+        manager.id_generator.observe(ticket_id, office_id)
+        manager._enqueue(ticket)
+    elif op == OP_SERVE:
+        (served_ts,) = _SERVE.unpack_from(payload, 0)
+        (ticket_id,), _ = _unpack_strs(payload, _SERVE.size, 1)
+        ticket = manager.active_tickets_by_id.get(ticket_id)
+        if ticket is None:
+            raise JournalError(f"Serve of unknown ticket {ticket_id}")
+        popped = manager._pop_next((ticket.office_id, ticket.service.value))
+        if popped != ticket_id:
+            raise JournalError(f"Journal served {ticket_id} but queue head is {popped}")
+        manager._complete_serve(ticket, served_ts)
+    elif op == OP_CANCEL:
+        (ticket_id,), _ = _unpack_strs(payload, 0, 1)
+        ticket = manager.active_tickets_by_id.get(ticket_id)
+        if ticket is None:
+            raise JournalError(f"Cancel of unknown ticket {ticket_id}")
+        manager._cancel(ticket)
+    elif op == OP_PROMOTE:
+        seq, level = _PROMOTE.unpack_from(payload, 0)
+        (ticket_id,), _ = _unpack_strs(payload, _PROMOTE.size, 1)
+        ticket = manager.active_tickets_by_id.get(ticket_id)
+        queue_key = None if ticket is None else (ticket.office_id, ticket.service.value)
+        bucket = manager.bucket_queues.get(queue_key)
+        if bucket is None:
+            raise JournalError(f"Promotion of {ticket_id} outside a bucket queue")
+        try:
+            dropped = bucket.promote(ticket_id, level - 1, manager.active_tickets_by_id)
+        except ValueError as e:
+            raise JournalError(str(e))
+        manager.tombstones[queue_key] -= dropped
+        manager._promote(ticket, level, seq)
+    elif op == OP_EXPIRE:
+        (ticket_id,), _ = _unpack_strs(payload, 0, 1)
+        ticket = manager.active_tickets_by_id.get(ticket_id)
+        if ticket is None:
+            raise JournalError(f"Expiry of unknown ticket {ticket_id}")
+        manager._cancel(ticket, "EXPIRED")
+        queue_key = (ticket.office_id, ticket.service.value)
+        manager.expired_count[queue_key] = manager.expired_count.get(queue_key, 0) + 1
+    elif op == OP_DESKS:
+        (desks,) = _DESKS.unpack_from(payload, 0)
+        queue_key, _ = _unpack_strs(payload, _DESKS.size, 2)
+        manager._set_desks(tuple(queue_key), desks)
+    else:
+        raise JournalError(f"Unknown journal op {op}")
+
+
+def _generations(directory: str, pattern) -> List[int]:
+    found = []
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            found.append(int(match.group(1)))
+    return sorted(found)
+
+
+class Journal:
+    """
+    Append-only, group-committed journal of QueueManager events.
+    Attach it with attach(manager); it registers itself as a listener.
+    """
+
+    def __init__(self, directory: str, fsync: str = "interval", group_commit: int = 64,
+                 fsync_interval: float = 1.0, snapshot_every: int = 100_000,
+                 generation: int = 0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync policy: {fsync}")
+        self.directory = directory
+        self.fsync = fsync
+        self.group_commit = max(1, group_commit)
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+
+        self.generation = generation
+        self.manager: Optional[QueueManager] = None
+        self._buffer = bytearray()
+        self._buffered = 0
+        self._since_snapshot = 0
+        self._last_fsync = time.monotonic()
+        self._lock = threading.RLock()
+        self._snapshot_pending = False
+        self._closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(self._segment_path(generation), "ab")
+
+    def _segment_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"journal-{generation:08d}.log")
+
+    def _snapshot_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"snapshot-{generation:08d}.pkl")
+
+    def attach(self, manager: QueueManager) -> "Journal":
+        self.manager = manager
+        manager.listeners.append(self)
+        manager.desk_listeners.append(self.record_desks)
+        manager.settle_hooks.append(self.settle)
+        return self
+
+    def __call__(self, event: str, ticket: Ticket) -> None:
+        """Listener hook: O(1) encode + buffer, one write per group."""
+        if event not in JOURNALED_EVENTS:
+            return
+        self._append(encode_record(event, ticket))
+
+    def record_desks(self, queue_key: Tuple[str, str], desks: int) -> None:
+        """Desk listener hook: journal a desk count like any other change."""
+        self._append(encode_desks(queue_key, desks))
+
+    def _append(self, record: bytes) -> None:
+        with self._lock:
+            self._buffer += record
+            self._buffered += 1
+            self._since_snapshot += 1
+            if self._buffered >= self.group_commit:
+                self.flush()
+            if (not self.snapshot_every or self._since_snapshot < self.snapshot_every
+                    or self._snapshot_pending):
+                return
+            self._snapshot_pending = True
+            if self.manager.concurrency == "none":
+                return  # taken in settle(), after the rest of this batch
+        # The caller holds queue locks: snapshot from another thread once
+        # every in-flight mutation has finished.
+        threading.Thread(target=self._snapshot_quiesced, daemon=True).start()
+
+    def settle(self) -> None:
+        """Settle hook: take a due snapshot once the manager is consistent (lock-free managers only)."""
+        if self._snapshot_pending and not self._closed and self.manager.concurrency == "none":
+            self.snapshot()
+
+    def _snapshot_quiesced(self) -> None:
+        with self.manager.quiesce():
+            if not self._closed:
+                self.snapshot()
+
+    def flush(self, force_fsync: bool = False) -> None:
+        """Write the buffered group, then fsync according to the policy."""
+        with self._lock:
+            self._flush(force_fsync)
+
+    def _flush(self, force_fsync: bool) -> None:
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._file.flush()
+            self._buffer.clear()
+            self._buffered = 0
+
+        now = time.monotonic()
+        if force_fsync or self.fsync == "always" or (
+                self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def snapshot(self) -> None:
+        """
+        O(n) - Pickle the attached manager and roll over to a new segment.
+        The snapshot is written to a temp file and renamed into place, so a
+        crash mid-snapshot leaves the previous generation intact.
+        """
+        if self.manager is None:
+            raise JournalError("Journal is not attached to a QueueManager")
+        with self._lock:
+            self._snapshot()
+            self._snapshot_pending = False
+
+    def _snapshot(self) -> None:
+        self._flush(force_fsync=True)
+        self._file.close()
+
+        next_generation = self.generation + 1
+        path = self._snapshot_path(next_generation)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(self.manager, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        self.generation = next_generation
+        self._file = open(self._segment_path(next_generation), "ab")
+        self._since_snapshot = 0
+
+        # Older generations are fully covered by the new snapshot.
+        for generation in _generations(self.directory, _SEGMENT_RE):
+            if generation < next_generation:
+                os.remove(self._segment_path(generation))
+        for generation in _generations(self.directory, _SNAPSHOT_RE):
+            if generation < next_generation:
+                os.remove(self._snapshot_path(generation))
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush(force_fsync=self.fsync != "never")
+            self._file.close()
+            self._closed = True
+        if self.manager is not None and self in self.manager.listeners:
+            self.manager.listeners.remove(self)
+            self.manager.desk_listeners.remove(self.record_desks)
+            self.manager.settle_hooks.remove(self.settle)
+
+
+def recover(directory: str, concurrency: str = "none", estimator=None,
+            id_generator=None, engine: str = "heap", aging=None, office_engines=None,
+            clock=None, ttl=None, no_show_grace=None, search: bool = False,
+            **journal_options) -> Tuple[QueueManager, Journal]:
+    """
+    O(snapshot + tail) - Rebuild a QueueManager from the newest snapshot plus
+    the journal segments written after it, and return it with a Journal
+    attached that keeps appending to the latest segment. Replay itself is
+    single-threaded; `concurrency` applies to the returned manager.
+    `estimator`, `id_generator`, the queue engine settings (engine,
+    aging, office_engines) and expiry (ttl, no_show_grace) are used when
+    starting from scratch; a snapshot brings back the ones it was taken
+    with (and their state, armed timers included). search=True turns on
+    prefix search either way (see search.py). `clock`
+    replaces wall-clock time in the returned manager (replay uses the
+    journaled times either way).
+    """
+    os.makedirs(directory, exist_ok=True)
+    snapshots = _generations(directory, _SNAPSHOT_RE)
+    base = snapshots[-1] if snapshots else 0
+
+    if snapshots:
+        with open(os.path.join(directory, f"snapshot-{base:08d}.pkl"), "rb") as f:
+            manager = pickle.load(f)
+        manager.concurrency = concurrency
+        manager._locks = make_locks(concurrency, manager.lock_stripes)
+    else:
+        manager = QueueManager(concurrency=concurrency, estimator=estimator,
+                               id_generator=id_generator, engine=engine, aging=aging,
+                               office_engines=office_engines, ttl=ttl,
+                               no_show_grace=no_show_grace, clock=clock, search=search)
+
+    segments = [g for g in _generations(directory, _SEGMENT_RE) if g >= base]
+    for generation in segments:
+        path = os.path.join(directory, f"journal-{generation:08d}.log")
+        intact = 0
+        for op, payload, intact in read_records(path):
+            apply_record(manager, op, payload)
+        # Cut a torn tail off so new records are not appended behind it.
+        if os.path.getsize(path) > intact:
+            with open(path, "r+b") as f:
+                f.truncate(intact)
+
+    if search:
+        manager.enable_search()
+    if clock is not None and manager.clock is not clock:
+        manager.clock = clock
+        if manager.timers is not None:
+            manager.timers.reset(clock())
+    generation = segments[-1] if segments else base
+    journal = Journal(directory, generation=generation, **journal_options)
+    return manager, journal.attach(manager)
@@ -0,0 +1,126 @@
+# =============================================================================
+# locks.py — Concurrency modes for QueueManager.
+#
+# QueueManager(concurrency=...) picks one of these lock sets:
+#   - "none":    NullLocks. Every lock is a no-op; the single-threaded default
+#                (CLI, tests, one-request-at-a-time servers).
+#   - "global":  GlobalLocks. One re-entrant lock around everything; simple
+#                and the baseline the striped mode is benchmarked against.
+#   - "striped": StripedLocks. One re-entrant lock per (office, service) queue
+#                guards its heap, deque, index and counters, plus a fixed
+#                array of stripe locks for the shared maps (ticket ids, user
+#                slots, per-service stats), picked by hash(key).
+#
+# Lock order (never reversed): queue lock -> stripe lock. Anything that holds
+# several queue locks at once (bulk issue, quiesce) takes them in sorted key
+# order, and stripe, registry and sequence locks are leaves.
+#
+# quiesce() takes the registry lock (no new queues) and then every queue lock
+# in sorted order, which waits out in-flight mutations and yields a
+# consistent whole-manager view (journal snapshots).
+# =============================================================================
+
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Hashable, Iterable
+
+CONCURRENCY_MODES = ("none", "global", "striped")
+
+_NULL = nullcontext()
+
+
+class NullLocks:
+    """No-op locks for single-threaded use."""
+
+    registry = _NULL
+    sequence = _NULL
+
+    def queue(self, key: Hashable):
+        return _NULL
+
+    def stripe(self, key: Hashable):
+        return _NULL
+
+    def queues(self, keys: Iterable[Hashable]):
+        return _NULL
+
+    def quiesce(self):
+        return _NULL
+
+
+class GlobalLocks(NullLocks):
+    """Every lock is the same RLock: one operation at a time."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.registry = self._lock
+        self.sequence = self._lock
+
+    def queue(self, key: Hashable):
+        return self._lock
+
+    def stripe(self, key: Hashable):
+        return self._lock
+
+    def queues(self, keys: Iterable[Hashable]):
+        return self._lock
+
+    def quiesce(self):
+        return self._lock
+
+
+class StripedLocks(NullLocks):
+    """Per-queue locks plus striped locks for the shared maps."""
+
+    def __init__(self, stripes: int = 64):
+        self.registry = threading.Lock()
+        self.sequence = threading.Lock()
+        self._queues: Dict[Hashable, threading.RLock] = {}
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+
+    def queue(self, key: Hashable):
+        """O(1) - The lock for one (office, service) queue, created on first use."""
+        lock = self._queues.get(key)
+        if lock is None:
+            with self.registry:
+                lock = self._queues.setdefault(key, threading.RLock())
+        return lock
+
+    def stripe(self, key: Hashable):
+        """O(1) - The stripe lock guarding `key` in a shared map."""
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    @contextmanager
+    def queues(self, keys: Iterable[Hashable]):
+        """O(k log k) - Hold the locks of several queues, taken in sorted order."""
+        locks = [self.queue(key) for key in sorted(set(keys))]
+        for lock in locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    @contextmanager
+    def quiesce(self):
+        """O(queues) - Hold every queue lock: no mutation is in flight."""
+        with self.registry:
+            locks = [self._queues[key] for key in sorted(self._queues)]
+            for lock in locks:
+                lock.acquire()
+            try:
+                yield
+            finally:
+                for lock in reversed(locks):
+                    lock.release()
+
+
+def make_locks(concurrency: str, stripes: int = 64) -> NullLocks:
+    if concurrency == "none":
+        return NullLocks()
+    if concurrency == "global":
+        return GlobalLocks()
+    if concurrency == "striped":
+        return StripedLocks(stripes)
+    raise ValueError(f"Invalid concurrency mode: {concurrency}")
@@ -0,0 +1,218 @@
+# =============================================================================
+# metrics.py — Latency histograms and queue gauges in Prometheus text format.
+#
+# Metrics is opt-in and costs nothing measurable until it is attached:
+#   - instrument(manager) hands an in-process QueueManager one OpTimer per
+#     hot operation (issue, bulk issue, serve, cancel, position(s), queue
+#     page). The manager's hook is `timer = self.op_timers and ...`, a
+#     falsy attribute check while metrics are off.
+#   - Timing every call costs two clock reads plus the bookkeeping, about 7%
+#     of an issue_ticket, so only one call in `sample_every` (default 32) is
+#     timed and the rest pay for one next() on an itertools.cycle. The
+#     histogram then describes a sample: its quantiles and mean are
+#     unbiased, and its _count is about 1/sample_every of the calls (issued
+#     and served totals are exported exactly from the manager's counters).
+#   - observe_request() is fed by app.py's before/after-request hooks and
+#     counts requests per (method, endpoint, status) plus a latency histogram
+#     per endpoint; every request is timed, a few µs are noise at that level.
+#   - Queue gauges (depth, tombstones, heap and deque sizes, or the bucket
+#     queue's size for a queue on the bucket engine) are not tracked
+#     on the hot path at all; render() reads them off the manager at scrape
+#     time. A sharded router only offers depth, via its overview.
+#
+# Histogram buckets are powers of two in nanoseconds (1.024µs .. ~1.07s), so
+# observing a sample is one int.bit_length() and a list increment, no search.
+# Counts are plain ints bumped without a lock: under threads an increment can
+# very rarely be lost, which a monitoring counter can afford and a lock per
+# call cannot.
+# =============================================================================
+
+from itertools import cycle
+from time import perf_counter_ns
+from typing import Dict, List, Tuple
+
+# QueueManager methods that report to an OpTimer once instrumented
+OPERATIONS = ("issue_ticket", "issue_tickets_bulk", "serve_next", "cancel_ticket",
+              "get_position", "get_positions", "get_queue")
+
+# Default: time one call in this many
+SAMPLE_EVERY = 32
+
+# Bucket i counts samples with elapsed_ns.bit_length() == i, i.e. below 2**i ns
+MIN_BUCKET_BITS = 10   # le="1.024e-06"; faster samples fold into this bucket
+MAX_BUCKET_BITS = 30   # le="1.073741824"; slower samples only reach +Inf
+_SLOTS = 64
+
+
+class Histogram:
+    """Fixed power-of-two latency buckets in O(1) per sample."""
+
+    __slots__ = ("counts", "total_ns")
+
+    def __init__(self):
+        self.counts = [0] * _SLOTS
+        self.total_ns = 0
+
+    def observe_ns(self, elapsed_ns: int) -> None:
+        """O(1) - Record one sample."""
+        self.counts[elapsed_ns.bit_length()] += 1
+        self.total_ns += elapsed_ns
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def render(self, name: str, labels: str) -> List[str]:
+        """Prometheus `_bucket`/`_sum`/`_count` lines (cumulative buckets)."""
+        sep = "," if labels else ""
+        counts = list(self.counts)
+        lines = []
+        cumulative = sum(counts[:MIN_BUCKET_BITS])
+        for bits in range(MIN_BUCKET_BITS, MAX_BUCKET_BITS + 1):
+            cumulative += counts[bits]
+            le = repr((1 << bits) / 1e9)
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{le}"}} {cumulative}')
+        total = sum(counts)
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {total}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total_ns / 1e9!r}')
+        lines.append(f'{name}_count{{{labels}}} {total}')
+        return lines
+
+
+class OpTimer:
+    """Latency Histogram of every `every`-th call to one operation."""
+
+    __slots__ = ("ticks", "histogram")
+
+    def __init__(self, every: int = 1):
+        # The hook calls next(ticks); a C-level cycle keeps the unsampled
+        # calls down to one builtin call, and the truthy tick picks a sample.
+        self.ticks = cycle((0,) * (every - 1) + (1,))
+        self.histogram = Histogram()
+
+    def stop(self, start: int) -> None:
+        """O(1) - Record a sampled call that began at `start`."""
+        self.histogram.observe_ns(perf_counter_ns() - start)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metrics:
+    """Operation and request metrics for one process, rendered on demand."""
+
+    def __init__(self, sample_every: int = SAMPLE_EVERY):
+        if sample_every < 1:
+            raise ValueError(f"Invalid sample_every: {sample_every}")
+        self.sample_every = sample_every
+        # Map operation name -> OpTimer (fed by the instrumented manager)
+        self.operations: Dict[str, OpTimer] = {}
+        # Map (method, endpoint, status) -> request count
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        # Map endpoint -> Histogram of request durations
+        self.request_latency: Dict[str, Histogram] = {}
+
+    def instrument(self, manager):
+        """
+        O(1) - Start timing the hot operations of an in-process QueueManager.
+        Returns the manager.
+        """
+        if not hasattr(manager, "op_timers"):
+            raise TypeError(f"{type(manager).__name__} has no operation hooks to instrument")
+        for name in OPERATIONS:
+            self.operations.setdefault(name, OpTimer(self.sample_every))
+        manager.op_timers = self.operations
+        return manager
+
+    def observe_request(self, method: str, endpoint: str, status: int, elapsed_ns: int) -> None:
+        """O(1) - Count one HTTP request and record its duration."""
+        key = (method, endpoint, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        histogram = self.request_latency.get(endpoint)
+        if histogram is None:
+            histogram = self.request_latency.setdefault(endpoint, Histogram())
+        histogram.observe_ns(elapsed_ns)
+
+    def render(self, manager=None) -> str:
+        """
+        O(queues + series) - Everything in Prometheus text format (0.0.4).
+        Queue gauges are read from `manager` now if one is given.
+        """
+        lines: List[str] = []
+
+        lines.append(f"# HELP noq_operation_seconds QueueManager call latency "
+                     f"(1 in {self.sample_every} calls sampled).")
+        lines.append("# TYPE noq_operation_seconds histogram")
+        for name, timer in sorted(self.operations.items()):
+            lines.extend(timer.histogram.render("noq_operation_seconds", f'operation="{name}"'))
+
+        lines.append("# HELP noq_http_requests_total HTTP requests handled.")
+        lines.append("# TYPE noq_http_requests_total counter")
+        for (method, endpoint, status), count in sorted(self.requests.items()):
+            lines.append(f'noq_http_requests_total{{method="{method}",'
+                         f'endpoint="{_escape(endpoint)}",status="{status}"}} {count}')
+
+        lines.append("# HELP noq_http_request_seconds HTTP request duration.")
+        lines.append("# TYPE noq_http_request_seconds histogram")
+        for endpoint, histogram in sorted(self.request_latency.items()):
+            lines.extend(histogram.render("noq_http_request_seconds",
+                                          f'endpoint="{_escape(endpoint)}"'))
+
+        if manager is not None:
+            lines.extend(self._queue_gauges(manager))
+        return "\n".join(lines) + "\n"
+
+    def _queue_gauges(self, manager) -> List[str]:
+        lines = []
+        # In-process managers expose their internals; a sharded router only
+        # has the overview.
+        if not hasattr(manager, "tombstones"):
+            gauges = [("noq_queue_depth", "Tickets waiting.",
+                       {(row['office_id'], row['service']): row['waiting_count']
+                        for row in manager.get_queue_overview()})]
+        else:
+            # A bucket queue replaces its queue's heap and deque, which stay empty.
+            buckets = dict(list(manager.bucket_queues.items()))
+            gauges = [
+                ("noq_queue_depth", "Tickets waiting.", manager.waiting_count),
+                ("noq_queue_tombstones", "Cancelled entries awaiting compaction.",
+                 manager.tombstones),
+                ("noq_queue_heap_entries", "Priority heap entries, tombstones included.",
+                 {key: len(heap) for key, heap in list(manager.priority_heaps.items())
+                  if key not in buckets}),
+                ("noq_queue_deque_entries", "Normal deque entries, tombstones included.",
+                 {key: len(dq) for key, dq in list(manager.normal_queues.items())
+                  if key not in buckets}),
+                ("noq_queue_bucket_entries", "Bucket queue entries, tombstones included.",
+                 {key: len(bucket) for key, bucket in buckets.items()}),
+            ]
+
+        for name, help_text, values in gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for (office, service), value in sorted(list(values.items())):
+                lines.append(f'{name}{{office="{_escape(office)}",service="{service}"}} {value}')
+
+        lines.append("# HELP noq_tickets_issued_total Tickets issued.")
+        lines.append("# TYPE noq_tickets_issued_total counter")
+        lines.append(f"noq_tickets_issued_total {manager.counter - manager.promoted_count}")
+        lines.append("# HELP noq_tickets_promoted_total Tickets promoted by queue aging.")
+        lines.append("# TYPE noq_tickets_promoted_total counter")
+        lines.append(f"noq_tickets_promoted_total {manager.promoted_count}")
+        lines.append("# HELP noq_tickets_served_total Tickets served.")
+        lines.append("# TYPE noq_tickets_served_total counter")
+        for service, count in sorted(manager.served_count.items()):
+            lines.append(f'noq_tickets_served_total{{service="{service}"}} {count}')
+        if hasattr(manager, "expired_count"):
+            for name, help_text, values in (
+                    ("noq_tickets_expired_total", "Waiting tickets expired by their TTL.",
+                     manager.expired_count),
+                    ("noq_tickets_no_show_total", "Called customers who did not show up.",
+                     manager.no_show_count)):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for (office, service), value in sorted(list(values.items())):
+                    lines.append(f'{name}{{office="{_escape(office)}",service="{service}"}} {value}')
+        return lines
+
@@ -12,11 +12,19 @@
 #     >0 = priority (goes into a max-heap in QueueManager).
 #   - Ticket.__lt__ exists for natural sorting by issue time, but the heap
 #     in queues.py sorts by (-priority, counter) tuples instead.
+#   - A waiting Ticket is a thin view: its fields live in one row of the
+#     manager's columnar TicketStore (see store.py), as small integer codes
+#     and float epochs. A Ticket built directly, or one that has been served
+#     or cancelled, keeps its own copy of the row instead ("detached"), so it
+#     stays readable after the store reuses its slot.
+#   - customer, issued_at and served_at are built on access; the hot paths
+#     use user_id, issued_ts and served_ts instead.
 # =============================================================================
 
 from enum import Enum
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Optional
 
 class ServiceType(str, Enum):
     PASSPORT = "passport"
@@ -24,24 +32,115 @@ class ServiceType(str, Enum):
     SUPPORT = "support"
     MUNICIPAL = "municipal"
 
-@dataclass
+# Integer codes stored in TicketStore columns
+SERVICE_TYPES = tuple(ServiceType)
+SERVICE_CODES = {service: code for code, service in enumerate(SERVICE_TYPES)}
+STATUSES = ("WAITING", "SERVED", "CANCELLED", "EXPIRED", "NO_SHOW")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+@dataclass(slots=True)
 class Customer:
     user_id: str
     name: str
 
-@dataclass
+# Field order of a ticket row, shared by Ticket and TicketStore.columns
+F_TICKET_ID, F_USER_ID, F_NAME, F_SERVICE, F_OFFICE, F_ISSUED, F_MINUTES, \
+    F_PRIORITY, F_STATUS, F_SEQ, F_SERVED = range(11)
+
+
+def _field(index: int, column: str, writable: bool = False) -> property:
+    """Property over one raw field: the store column, or the detached row."""
+    def get(self):
+        row = self._row
+        if row is None:
+            value = getattr(self._store, column)[self._handle]
+            # Re-check: the ticket may have been detached (and its slot
+            # reused) between the two reads.
+            row = self._row
+            if row is None:
+                return value
+        return row[index]
+
+    def set(self, value):
+        row = self._row
+        if row is None:
+            getattr(self._store, column)[self._handle] = value
+        else:
+            row[index] = value
+
+    return property(get, set if writable else None)
+
+
 class Ticket:
-    ticket_id: str
-    customer: Customer
-    service: ServiceType
-    office_id: str
-    issued_at: datetime
-    expected_minutes: int
-    priority_level: int = 0 # 0 is normal, higher is more urgent
-    status: str = "WAITING" # WAITING, SERVED, CANCELLED
-    
+    __slots__ = ("_store", "_handle", "_row")
+
+    def __init__(self, ticket_id: str, customer: Customer, service: ServiceType,
+                 office_id: str, issued_at: datetime, expected_minutes: int,
+                 priority_level: int = 0, # 0 is normal, higher is more urgent
+                 status: str = "WAITING", # WAITING, SERVED, CANCELLED
+                 seq: int = 0, # Arrival order assigned by QueueManager (heap tie-breaker)
+                 served_at: Optional[datetime] = None):
+        self._store = None
+        self._handle = -1
+        self._row = [ticket_id, customer.user_id, customer.name,
+                     SERVICE_CODES[ServiceType(service)], office_id, issued_at.timestamp(),
+                     expected_minutes, priority_level, STATUS_CODES[status], seq,
+                     served_at.timestamp() if served_at else 0.0]
+
+    ticket_id = _field(F_TICKET_ID, "ids")
+    user_id = _field(F_USER_ID, "user_ids")
+    name = _field(F_NAME, "names")
+    office_id = _field(F_OFFICE, "offices")
+    issued_ts = _field(F_ISSUED, "issued")
+    expected_minutes = _field(F_MINUTES, "minutes")
+    priority_level = _field(F_PRIORITY, "priorities", writable=True)
+    seq = _field(F_SEQ, "seqs", writable=True)
+    served_ts = _field(F_SERVED, "served", writable=True)
+    _service_code = _field(F_SERVICE, "services")
+    _status_code = _field(F_STATUS, "statuses", writable=True)
+
+    @property
+    def service(self) -> ServiceType:
+        return SERVICE_TYPES[self._service_code]
+
+    @property
+    def status(self) -> str:
+        return STATUSES[self._status_code]
+
+    @status.setter
+    def status(self, value: str) -> None:
+        self._status_code = STATUS_CODES[value]
+
+    @property
+    def customer(self) -> Customer:
+        return Customer(self.user_id, self.name)
+
+    @property
+    def issued_at(self) -> datetime:
+        return datetime.fromtimestamp(self.issued_ts)
+
+    @property
+    def served_at(self) -> Optional[datetime]:
+        served_ts = self.served_ts
+        return datetime.fromtimestamp(served_ts) if served_ts else None
+
+    def copy(self) -> "Ticket":
+        """O(1) - A detached copy, safe to pickle on its own or send to another process."""
+        clone = Ticket.__new__(Ticket)
+        clone._store = None
+        clone._handle = -1
+        row = self._row
+        if row is None:
+            row = [column[self._handle] for column in self._store.columns]
+        clone._row = list(row)
+        return clone
+
+    def __repr__(self):
+        return (f"Ticket({self.ticket_id!r}, {self.service.value!r}, {self.office_id!r}, "
+                f"priority={self.priority_level}, status={self.status!r})")
+
     def __lt__(self, other):
-        # This is needed for the heap if we were putting Ticket objects directly into heap, 
+        # This is needed for the heap if we were putting Ticket objects directly into heap,
         # but we are putting tuples (-priority, counter, ticket_id).
         # Still useful for natural sorting if needed.
-        return self.issued_at < other.issued_at
+        return self.issued_ts < other.issued_ts
@@ -8,19 +8,103 @@
 #     Entries are (-priority, counter, ticket_id) so higher priority pops first.
 #
 # Lookup maps (active_tickets_by_id, active_ticket_by_user) keep all point
-# queries O(1). The counter field breaks ties in the heap for FIFO among
-# equal-priority tickets.
+# queries O(1). The counter field is a global arrival sequence: it breaks ties
+# in the heap for FIFO among equal-priority tickets.
+#
+# Ticket IDs come from the pluggable `id_generator` (see ids.py); the default
+# mints sequential per-office IDs that cannot collide.
+#
+# Waiting tickets' fields live in a columnar TicketStore (see store.py) as
+# codes and float epochs; active_tickets_by_id holds thin Ticket views onto
+# its rows, and a ticket is detached from the store when it leaves the queue.
+#
+# waiting_count / waiting_minutes are live per-(office, service) counters kept
+# in step with every issue and serve, so the admin overview never scans tickets.
+#
+# Cancellation is lazy: cancel_ticket drops the ticket from the lookup maps
+# and leaves its heap/deque entry behind as a tombstone, which serve_next
+# skips. Tombstones are counted per queue and the heap/deque is compacted once
+# they make up more than compact_threshold of its entries.
+#
+# Thread safety is opt-in: QueueManager(concurrency="striped") gives every
+# (office, service) queue its own lock and guards the shared maps with
+# striped locks (see locks.py), so reads and serves on different queues run
+# concurrently. "global" uses one lock; "none" (default) uses no locks.
+#
+# Every public mutation is reported to `listeners` as (event, ticket), which
+# is how the durability journal (journal.py) sees issue/serve/cancel. Once
+# all of a mutation's events are out, `settle_hooks` run: the manager is
+# consistent again there, so the journal takes its snapshots from them. A
+# listener may read the manager, and a read can age a queue and report
+# promotions from inside the outer report; the hooks wait for the
+# outermost one to finish (a per-thread depth count).
+#
+# queue_indexes holds one order-statistic QueueIndex per (office, service)
+# (see index.py) so get_position no longer walks the heap and deque. The
+# pluggable `estimator` (see estimators.py) turns "k tickets ahead" into the
+# estimated minutes it reports.
+#
+# Issue and serve times come from `clock` (wall-clock epoch by default), so
+# a simulation can run days of arrivals without waiting (see sim/).
 #
 # Serving order: priority heap is drained first, then the normal deque.
 # Analytics accumulators (served_count, total_wait_time_sum) are updated on
-# each serve and consumed by analytics.py.
+# each serve and consumed by analytics.py, as are the per-queue wait_stats
+# (streaming percentiles and rolling windows, see sketches.py).
+#
+# Offices can instead run the "bucket" engine (see buckets.py), chosen with
+# engine= / office_engines=: a BucketQueue per queue replaces the heap and
+# deque, serving in the same order with O(1) push and pop, and supports
+# aging: tickets waiting longer than aging[level] seconds are promoted one
+# level. Due promotions are applied under the queue lock before every serve,
+# position and page read (and by age_queues), each bumping the counter for
+# the ticket's new place in line and reported to listeners as "promote".
+#
+# Tickets can expire (see timers.py): with ttl={service: seconds}, a ticket
+# still waiting that long after issue is retired as EXPIRED (like a cancel,
+# reported as "expire"); with no_show_grace, a served ticket whose customer
+# is not confirmed at the desk (confirm_arrival) within that many seconds is
+# marked NO_SHOW (reported as "no_show"). One TimingWheel holds both kinds
+# of timer, keyed by ticket_id, armed on issue/serve and disarmed when the
+# ticket leaves. It is advanced at the start of every mutation and by
+# expire_due() (e.g. from a background tick); reads never advance it, since
+# listeners read while holding a queue lock.
+#
+# Desk counts (set_active_desks) are reported to `desk_listeners` as
+# (queue_key, desks), so the journal can restore them with the queues.
+#
+# queue_versions counts the changes to each queue (issue, serve, cancel,
+# promotion, desk count), with per-office and overall totals alongside, so
+# an unchanged answer can be recognised without recomputing it: app.py
+# turns them into ETags and caches response bodies per version.
+#
+# With search=True (or after enable_search()), search_indexes keeps one
+# SearchIndex per office over the waiting tickets' IDs, name words and user
+# ids (see search.py), maintained in _enqueue/_retire like the lookup maps,
+# so search() finds "garc" or a half-read ticket ID without a scan.
 # =============================================================================
 
 import heapq
+import threading
 from collections import deque
-from typing import Dict, List, Tuple, Optional
-from .models import Ticket, Customer, ServiceType
-from .utils import generate_id, get_current_time
+from itertools import islice
+from time import perf_counter_ns
+from typing import Callable, Dict, List, Tuple, Optional
+from .models import Ticket, ServiceType, SERVICE_CODES
+from .store import TicketStore
+from .index import QueueIndex, MAX_PRIORITY_LEVEL
+from .locks import make_locks
+from .sketches import WaitStats
+from .estimators import ExpectedMinutesEstimator
+from .ids import SequentialIdGenerator
+from .buckets import BucketQueue, ENGINES
+from .timers import TimingWheel
+from .search import SearchIndex
+from .utils import get_current_epoch
+
+# Queues with fewer tombstones than this are never compacted; rebuilding a
+# handful of entries costs more than skipping them in serve_next.
+COMPACT_MIN_TOMBSTONES = 64
 
 class QueueManager:
     """
@@ -28,9 +112,34 @@ class QueueManager:
     Manages queues, priority heaps, and fast lookups.
     """
 
-    def __init__(self):
+    def __init__(self, compact_threshold: float = 0.5, concurrency: str = "none",
+                 lock_stripes: int = 64, estimator=None, id_generator=None,
+                 engine: str = "heap", aging: Optional[Dict[int, float]] = None,
+                 office_engines: Optional[Dict[str, str]] = None,
+                 clock: Optional[Callable[[], float]] = None,
+                 ttl: Optional[Dict[str, float]] = None, no_show_grace: Optional[float] = None,
+                 timer_tick: float = 1.0, search: bool = False):
+        for choice in [engine, *(office_engines or {}).values()]:
+            if choice not in ENGINES:
+                raise ValueError(f"Invalid queue engine: {choice}")
+        for level, wait in (aging or {}).items():
+            if not 0 <= level < MAX_PRIORITY_LEVEL or wait <= 0:
+                raise ValueError(f"Invalid aging rule: level {level} after {wait}s")
+        for service, limit in (ttl or {}).items():
+            try:
+                ServiceType(service)
+            except ValueError:
+                raise ValueError(f"Invalid service type: {service}")
+            if limit <= 0:
+                raise ValueError(f"Invalid TTL for {service}: {limit}s")
+        if no_show_grace is not None and no_show_grace <= 0:
+            raise ValueError(f"Invalid no-show grace: {no_show_grace}s")
+
+        # Columnar rows of every waiting ticket (see store.py)
+        self.store = TicketStore()
+
         # O(1) Lookups
-        # Map ticket_id -> Ticket object
+        # Map ticket_id -> Ticket view onto its store row
         self.active_tickets_by_id: Dict[str, Ticket] = {}
         
         # Map (office_id, user_id, service) -> ticket_id. Ensures 1 active ticket per user/service.
@@ -44,53 +153,383 @@ class QueueManager:
         # Map (office_id, service) -> list[(-priority, counter, ticket_id)]
         self.priority_heaps: Dict[Tuple[str, str], List] = {}
 
-        # Global counter for stable heap ordering
+        # O(1) bucketed queues replacing the heap and deque of "bucket" offices
+        # Map (office_id, service) -> BucketQueue
+        self.bucket_queues: Dict[Tuple[str, str], BucketQueue] = {}
+        # Engine per office ("heap" or "bucket"), and the bucket aging rules
+        # (level -> seconds before promotion to level + 1)
+        self.engine = engine
+        self.office_engines: Dict[str, str] = dict(office_engines or {})
+        self.aging: Dict[int, float] = dict(aging or {})
+
+        # O(log n) position queries: Map (office_id, service) -> QueueIndex
+        self.queue_indexes: Dict[Tuple[str, str], QueueIndex] = {}
+
+        # Monotonic change counters: Map (office_id, service) -> version,
+        # office_id -> sum over its queues, and the sum over all queues
+        self.queue_versions: Dict[Tuple[str, str], int] = {}
+        self.office_versions: Dict[str, int] = {}
+        self.version = 0
+
+        # O(1) live counters: Map (office_id, service) -> waiting tickets / expected minutes
+        self.waiting_count: Dict[Tuple[str, str], int] = {}
+        self.waiting_minutes: Dict[Tuple[str, str], int] = {}
+
+        # Dead (cancelled) entries still sitting in a heap or deque
+        # Map (office_id, service) -> tombstone count
+        self.tombstones: Dict[Tuple[str, str], int] = {}
+        # Compact a queue once tombstones exceed this fraction of its entries
+        self.compact_threshold = compact_threshold
+
+        # Global arrival counter, bumped for every ticket (stable heap ordering)
+        # and for every promotion (arrival at the new level)
         self.counter = 0
+        self.promoted_count = 0
 
         # Stats tracking for analytics
         self.served_count: Dict[str, int] = {}
         self.total_wait_time_sum: Dict[str, float] = {} # Sum of wait times in minutes
 
+        # O(1)-update wait percentiles and rolling windows
+        # Map (office_id, service) -> WaitStats
+        self.wait_stats: Dict[Tuple[str, str], WaitStats] = {}
+
+        # Mints ticket IDs (see ids.py); called under the sequence lock
+        self.id_generator = id_generator if id_generator is not None else SequentialIdGenerator()
+
+        # Wait-time estimator fed on every issue/serve (see estimators.py)
+        self.estimator = estimator if estimator is not None else ExpectedMinutesEstimator()
+
+        # Callbacks fired as listener(event, ticket) after every
+        # "issue", "serve", "cancel" and "promote" (e.g. the journal in journal.py)
+        self.listeners: List[Callable[[str, Ticket], None]] = []
+        # Callbacks fired as desk_listener(queue_key, desks) on every
+        # set_active_desks (the journal persists desk counts this way)
+        self.desk_listeners: List[Callable[[Tuple[str, str], int], None]] = []
+        # Callbacks fired with no arguments after each batch of events, once
+        # the manager matches everything reported so far
+        self.settle_hooks: List[Callable[[], None]] = []
+        # Per-thread nesting of _notify_all (listeners that read can report
+        # promotions); settle hooks run at depth 0 only
+        self._notify_depth = threading.local()
+
+        # Expiry: service -> seconds a ticket may wait, seconds a called
+        # customer has to show up, and the wheel timing both (see timers.py);
+        # no wheel at all when neither is set
+        self.ttl: Dict[str, float] = dict(ttl or {})
+        self.no_show_grace = no_show_grace
+        # Served tickets still inside their grace period: ticket_id -> Ticket
+        self.called: Dict[str, Ticket] = {}
+        # Map (office_id, service) -> tickets expired / customers not shown
+        self.expired_count: Dict[Tuple[str, str], int] = {}
+        self.no_show_count: Dict[Tuple[str, str], int] = {}
+
+        # Prefix search over waiting tickets: Map office_id -> SearchIndex,
+        # each guarded by the stripe lock of ("search", office_id); None
+        # when search is off
+        self.search_indexes: Optional[Dict[str, SearchIndex]] = {} if search else None
+
+        # Locking strategy: "none", "global" or "striped" (see locks.py)
+        self.concurrency = concurrency
+        self.lock_stripes = lock_stripes
+        self._locks = make_locks(concurrency, lock_stripes)
+
+        # Source of epoch seconds for issue/serve times and aging (see
+        # utils.ManualClock for simulations); wall-clock time by default
+        self.clock = clock if clock is not None else get_current_epoch
+        self.timers = (TimingWheel(self.clock(), timer_tick)
+                       if self.ttl or no_show_grace is not None else None)
+
+        # Map operation -> OpTimer while metrics.py instruments this manager;
+        # None (no timing at all) otherwise
+        self.op_timers = None
+
+    def __getstate__(self):
+        # Snapshots carry queue state only; listeners, metrics and the clock
+        # are re-attached on load.
+        state = self.__dict__.copy()
+        state['listeners'] = []
+        state['desk_listeners'] = []
+        state['settle_hooks'] = []
+        state['op_timers'] = None
+        state['clock'] = None
+        del state['_locks']
+        del state['_notify_depth']
+        return state
+
+    def __setstate__(self, state):
+        # Snapshots taken before search existed have no search_indexes
+        self.search_indexes = None
+        self.desk_listeners = []
+        self.settle_hooks = []
+        self.__dict__.update(state)
+        self.op_timers = None
+        self.clock = get_current_epoch
+        self._locks = make_locks(self.concurrency, self.lock_stripes)
+        self._notify_depth = threading.local()
+
+    def quiesce(self):
+        """
+        Context manager that waits for in-flight mutations and holds off new
+        ones, for a consistent view of the whole manager (e.g. a snapshot).
+        """
+        return self._locks.quiesce()
+
+    def _notify(self, event: str, ticket: Ticket) -> None:
+        self._notify_all(event, (ticket,))
+
+    def _notify_all(self, event: str, tickets) -> None:
+        """
+        Report one event per ticket, then run the settle hooks. Callers that
+        apply several changes before reporting them send them all here, so
+        no hook sees a manager that is ahead of its events. A call made by a
+        listener (e.g. a read that ages) leaves the hooks to the outer one.
+        """
+        depth = self._notify_depth
+        depth.level = getattr(depth, "level", 0) + 1
+        try:
+            for ticket in tickets:
+                for listener in self.listeners:
+                    listener(event, ticket)
+        finally:
+            depth.level -= 1
+        self._settle()
+
+    def _settle(self) -> None:
+        """Run the settle hooks, unless this thread is still inside a listener call."""
+        if getattr(self._notify_depth, "level", 0):
+            return
+        for hook in self.settle_hooks:
+            hook()
+
     def issue_ticket(self, user_id: str, name: str, service: str, 
                      priority_level: int = 0, expected_minutes: int = 10, 
                      office_id: str = "default") -> Ticket:
         """
-        O(1) (Amortized) - Issues a new ticket.
+        O(log n) - Issues a new ticket.
         - Checks for existing ticket: O(1) dictionary lookup
         - Appends to deque: O(1) OR Pushes to heap: O(log k)
+        - Indexes the ticket for position queries: O(log n)
         """
+        timer = self.op_timers and self.op_timers["issue_ticket"]
+        start = timer and next(timer.ticks) and perf_counter_ns()
         try:
-            service_enum = ServiceType(service)
-        except ValueError:
-            raise ValueError(f"Invalid service type: {service}")
-
-        # Enforce usage limits: 1 ticket per user per (office, service)
-        user_key = (office_id, user_id, service_enum.value)
-        if user_key in self.active_ticket_by_user:
-            existing_id = self.active_ticket_by_user[user_key]
-            raise ValueError(f"User {user_id} already has an active ticket: {existing_id}")
-
-        # Create Ticket
-        ticket_id = generate_id()
-        customer = Customer(user_id=user_id, name=name)
-        ticket = Ticket(
-            ticket_id=ticket_id,
-            customer=customer,
-            service=service_enum,
-            office_id=office_id,
-            issued_at=get_current_time(),
-            expected_minutes=expected_minutes,
-            priority_level=priority_level,
-            status="WAITING"
-        )
+            if self.timers is not None:
+                self.expire_due()
+            try:
+                service_enum = ServiceType(service)
+            except ValueError:
+                raise ValueError(f"Invalid service type: {service}")
+            if priority_level > MAX_PRIORITY_LEVEL:
+                raise ValueError(f"Invalid priority level: {priority_level}")
+
+            office_id = self.store.intern(office_id)
+            queue_key = (office_id, service_enum.value)
+            self._ensure_queue(queue_key)
+
+            # A user slot belongs to exactly one queue, so the queue lock makes
+            # the uniqueness check and the insert below atomic.
+            with self._locks.queue(queue_key):
+                # Enforce usage limits: 1 ticket per user per (office, service)
+                user_key = (office_id, user_id, service_enum.value)
+                if user_key in self.active_ticket_by_user:
+                    existing_id = self.active_ticket_by_user[user_key]
+                    raise ValueError(f"User {user_id} already has an active ticket: {existing_id}")
+
+                issued_ts = self.clock()
+                with self._locks.sequence:
+                    ticket_id = self._new_ticket_id(office_id, issued_ts)
+                    self.counter += 1
+                    ticket = self.store.create(ticket_id, user_id, name, SERVICE_CODES[service_enum],
+                                               office_id, issued_ts, expected_minutes,
+                                               priority_level, self.counter)
+                self._enqueue(ticket)
+                self._notify("issue", ticket)
+            return ticket
+        finally:
+            if start:
+                timer.stop(start)
+
+    def _new_ticket_id(self, office_id: str, issued_ts: float) -> str:
+        """
+        O(1) - Next ID from the generator. A random generator can clash with
+        a waiting ticket; re-draw rather than overwrite someone else's entry.
+        Caller holds the sequence lock.
+        """
+        ticket_id = self.id_generator.next_id(office_id, issued_ts)
+        while ticket_id in self.active_tickets_by_id:
+            ticket_id = self.id_generator.next_id(office_id, issued_ts)
+        return ticket_id
+
+    def _ensure_queue(self, queue_key: Tuple[str, str]) -> None:
+        """
+        O(1) - Create every per-queue structure on first use, in one step, so
+        readers iterating the per-queue maps never see them change size mid-loop.
+        """
+        if queue_key in self.queue_indexes:
+            return
+        with self._locks.registry:
+            if queue_key in self.queue_indexes:
+                return
+            self.priority_heaps.setdefault(queue_key, [])
+            self.normal_queues.setdefault(queue_key, deque())
+            self.waiting_count.setdefault(queue_key, 0)
+            self.waiting_minutes.setdefault(queue_key, 0)
+            self.tombstones.setdefault(queue_key, 0)
+            self.wait_stats.setdefault(queue_key, WaitStats())
+            self.queue_versions.setdefault(queue_key, 0)
+            self.office_versions.setdefault(queue_key[0], 0)
+            if self.office_engines.get(queue_key[0], self.engine) == "bucket":
+                self.bucket_queues.setdefault(queue_key, BucketQueue(self.aging))
+            # Published last: its presence means the queue is fully set up.
+            self.queue_indexes[queue_key] = QueueIndex()
+
+    def issue_tickets_bulk(self, requests: List[Dict]) -> List[Tuple[Ticket, int, int]]:
+        """
+        O(k log n) - Issue many tickets at once (group bookings, kiosk sync).
+        Each request is a dict with user_id, name, service and optionally
+        priority_level, expected_minutes and office_id.
+        - All-or-nothing: every service and user slot is validated before any
+          ticket is inserted, so a bad entry raises ValueError with no effect.
+        - Priority entries are added to each heap in one heapify when that is
+          cheaper than k separate pushes.
+        - Positions come from one get_positions call (one sweep per queue).
+        Returns [(ticket, position, est_minutes)] in request order.
+        """
+        timer = self.op_timers and self.op_timers["issue_tickets_bulk"]
+        start = timer and next(timer.ticks) and perf_counter_ns()
+        try:
+            if self.timers is not None:
+                self.expire_due()
+            parsed = []
+            seen = set()
+            for req in requests:
+                service = req.get('service', 'passport')
+                try:
+                    service_enum = ServiceType(service)
+                except ValueError:
+                    raise ValueError(f"Invalid service type: {service}")
+                user_id = req.get('user_id')
+                if not user_id:
+                    raise ValueError("Every bulk request needs a user_id")
+                office_id = self.store.intern(req.get('office_id', 'default'))
+                user_key = (office_id, user_id, service_enum.value)
+                if user_key in seen:
+                    raise ValueError(f"User {user_id} appears twice in the batch for {service_enum.value}")
+                seen.add(user_key)
+                if int(req.get('priority_level', 0)) > MAX_PRIORITY_LEVEL:
+                    raise ValueError(f"Invalid priority level: {req.get('priority_level')}")
+                fields = {
+                    'user_id': user_id,
+                    'name': req.get('name', 'Guest'),
+                    'priority_level': int(req.get('priority_level', 0)),
+                    'expected_minutes': int(req.get('expected_minutes', 10)),
+                }
+                parsed.append((fields, service_enum, office_id, user_key))
+
+            queue_keys = {(office_id, service_enum.value) for _, service_enum, office_id, _ in parsed}
+            for queue_key in queue_keys:
+                self._ensure_queue(queue_key)
+
+            with self._locks.queues(queue_keys):
+                for fields, _, _, user_key in parsed:
+                    if user_key in self.active_ticket_by_user:
+                        existing_id = self.active_ticket_by_user[user_key]
+                        raise ValueError(f"User {fields['user_id']} already has an active ticket: {existing_id}")
+
+                issued_ts = self.clock()
+                with self._locks.sequence:
+                    tickets = []
+                    pending = set()
+                    for fields, service_enum, office_id, _ in parsed:
+                        ticket_id = self._new_ticket_id(office_id, issued_ts)
+                        while ticket_id in pending:
+                            ticket_id = self._new_ticket_id(office_id, issued_ts)
+                        pending.add(ticket_id)
+                        self.counter += 1
+                        tickets.append(self.store.create(
+                            ticket_id, fields['user_id'], fields['name'], SERVICE_CODES[service_enum],
+                            office_id, issued_ts, fields['expected_minutes'],
+                            fields['priority_level'], self.counter))
+
+                new_entries: Dict[Tuple[str, str], List] = {}
+                for ticket in tickets:
+                    entry = self._enqueue(ticket, push_heap=False)
+                    if entry is not None:
+                        new_entries.setdefault((ticket.office_id, ticket.service.value), []).append(entry)
+
+                for queue_key, entries in new_entries.items():
+                    heap = self.priority_heaps[queue_key]
+                    size = len(heap) + len(entries)
+                    if len(entries) * size.bit_length() > size:
+                        heap.extend(entries)
+                        heapq.heapify(heap)  # O(n + k)
+                    else:
+                        for entry in entries:
+                            heapq.heappush(heap, entry)  # O(k log n)
+
+                # Reported before the positions are read: reading them ages
+                # the queues, and a promotion must not be journaled ahead of
+                # these issues.
+                self._notify_all("issue", tickets)
+                positions = self.get_positions([t.ticket_id for t in tickets])
+
+            return [(t, *positions[t.ticket_id]) for t in tickets]
+        finally:
+            if start:
+                timer.stop(start)
+
+    def _enqueue(self, ticket: Ticket, push_heap: bool = True) -> Optional[Tuple[int, int, str]]:
+        """
+        O(log n) - Place an already-built ticket into the lookups, index,
+        counters and its heap/deque. Shared by issue_ticket, bulk issue and
+        journal replay. Caller holds the queue lock. A detached Ticket (built
+        directly rather than by the store) is moved into the store first.
+        With push_heap=False a priority ticket's heap entry is returned for
+        the caller to add instead of being pushed (bucket queues always push).
+        """
+        ticket_id = ticket.ticket_id
+        office_id = ticket.office_id
+        priority_level = ticket.priority_level
+        expected_minutes = ticket.expected_minutes
+        service = ticket.service.value
+        user_key = (office_id, ticket.user_id, service)
 
         # Update O(1) Lookups
-        self.active_tickets_by_id[ticket_id] = ticket
-        self.active_ticket_by_user[user_key] = ticket_id
+        with self._locks.stripe(ticket_id):
+            self.active_tickets_by_id[ticket_id] = ticket
+        with self._locks.stripe(user_key):
+            self.active_ticket_by_user[user_key] = ticket_id
+        if self.search_indexes is not None:
+            with self._locks.stripe(("search", office_id)):
+                index = self.search_indexes.get(office_id)
+                if index is None:
+                    index = self.search_indexes[office_id] = SearchIndex()
+                index.add(ticket_id, ticket.name, ticket.user_id)
 
         # Add to Queue Structure
-        queue_key = (office_id, service_enum.value)
-        
+        queue_key = (office_id, service)
+        self._ensure_queue(queue_key)
+        limit = self.ttl.get(service)
+        with self._locks.sequence:
+            if ticket._row is not None:
+                self.store.adopt(ticket)
+            self._bump_version(queue_key)
+            if limit is not None:
+                self.timers.arm(ticket_id, ticket.issued_ts + limit)
+
+        self.queue_indexes[queue_key].add(ticket_id, priority_level, ticket.seq, expected_minutes)
+        self.waiting_count[queue_key] += 1
+        self.waiting_minutes[queue_key] += expected_minutes
+        self.estimator.on_issue(queue_key, ticket)
+
+        bucket = self.bucket_queues.get(queue_key)
+        if bucket is not None:
+            # Bucketed Queue -> Level deque (priority <= 0 shares level 0)
+            # O(1) append
+            bucket.push(QueueIndex.level_for(priority_level), ticket_id, ticket.issued_ts)
+            return None
+
         # AI-assisted: GitHub Copilot helped design the dual data-structure
         # approach below — using a heap for priority customers and a deque for
         # normal ones — and suggested the (-priority, counter) tuple pattern
@@ -98,22 +537,16 @@ class QueueManager:
         if priority_level > 0:
             # Priority Queue -> Heap
             # O(log n) push
-            if queue_key not in self.priority_heaps:
-                self.priority_heaps[queue_key] = []
-            
             # Use negative priority for Max-Heap behavior simulation with Min-Heap
-            self.counter += 1
-            entry = (-priority_level, self.counter, ticket_id)
+            entry = (-priority_level, ticket.seq, ticket_id)
+            if not push_heap:
+                return entry
             heapq.heappush(self.priority_heaps[queue_key], entry)
         else:
             # Normal Queue -> Deque
             # O(1) append
-            if queue_key not in self.normal_queues:
-                self.normal_queues[queue_key] = deque()
-            
             self.normal_queues[queue_key].append(ticket_id)
-
-        return ticket
+        return None
 
     # AI-assisted: The serve_next method's "drain priority heap first, then
     # fall back to normal deque" pattern was suggested by ChatGPT when we asked
@@ -124,12 +557,58 @@ class QueueManager:
         - Priority Queue (Heap) is checked first: O(log n) pop
         - Normal Queue (Deque) is checked second: O(1) popleft
         """
+        timer = self.op_timers and self.op_timers["serve_next"]
+        start = timer and next(timer.ticks) and perf_counter_ns()
         try:
-            service_enum = ServiceType(service)
-        except ValueError:
+            if self.timers is not None:
+                self.expire_due()
+            try:
+                service_enum = ServiceType(service)
+            except ValueError:
+                return None
+
+            queue_key = (office_id, service_enum.value)
+            with self._locks.queue(queue_key):
+                self._age(queue_key)
+                next_ticket_id = self._pop_next(queue_key)
+                if not next_ticket_id:
+                    return None # Queue empty
+
+                ticket = self.active_tickets_by_id[next_ticket_id]
+                self._complete_serve(ticket, self.clock())
+                if self.no_show_grace is not None:
+                    with self._locks.sequence:
+                        self.called[next_ticket_id] = ticket
+                        self.timers.arm(next_ticket_id, ticket.served_ts + self.no_show_grace)
+                self._notify("serve", ticket)
+            return ticket
+        finally:
+            if start:
+                timer.stop(start)
+
+    def peek_next(self, office_id: str, service: str) -> Optional[Ticket]:
+        """
+        O(L) - The ticket serve_next would serve now, without serving it
+        (first entry of the queue's QueueIndex; L = priority levels waiting).
+        """
+        queue_key = (office_id, service)
+        index = self.queue_indexes.get(queue_key)
+        if index is None:
             return None
+        with self._locks.queue(queue_key):
+            self._age(queue_key)
+            for _, _, tid in index.iter_from(None):
+                return self.active_tickets_by_id[tid]
+        return None
+
+    def _pop_next(self, queue_key: Tuple[str, str]) -> Optional[str]:
+        """O(log n) - Pop the next live ticket_id off the heap, then the deque. Caller holds the queue lock."""
+        bucket = self.bucket_queues.get(queue_key)
+        if bucket is not None:
+            next_ticket_id, dropped = bucket.pop(self.active_tickets_by_id)
+            self.tombstones[queue_key] -= dropped
+            return next_ticket_id
 
-        queue_key = (office_id, service_enum.value)
         next_ticket_id = None
 
         # 1. Try Priority Heap
@@ -139,6 +618,7 @@ class QueueManager:
                 if tid in self.active_tickets_by_id:
                     next_ticket_id = tid
                     break
+                self.tombstones[queue_key] -= 1
         
         # 2. Try Normal Deque if no priority customer found
         if not next_ticket_id and queue_key in self.normal_queues:
@@ -147,93 +627,480 @@ class QueueManager:
                 if tid in self.active_tickets_by_id:
                     next_ticket_id = tid
                     break
-        
-        if not next_ticket_id:
-            return None # Queue empty
+                self.tombstones[queue_key] -= 1
+
+        return next_ticket_id
 
-        # Process the served ticket
-        ticket = self.active_tickets_by_id[next_ticket_id]
+    def _complete_serve(self, ticket: Ticket, served_ts: float) -> None:
+        """O(log n) - Retire a popped ticket as SERVED (at epoch served_ts) and record its wait."""
+        service = ticket.service.value
         ticket.status = "SERVED"
-        
-        # Clean up Lookups O(1)
-        del self.active_tickets_by_id[next_ticket_id]
-        
-        user_key = (office_id, ticket.customer.user_id, service_enum.value)
-        if user_key in self.active_ticket_by_user:
-            del self.active_ticket_by_user[user_key]
+        ticket.served_ts = served_ts
+        self._retire(ticket)
 
         # Update Analytics
-        wait_duration = (get_current_time() - ticket.issued_at).total_seconds() / 60.0
+        wait_duration = (served_ts - ticket.issued_ts) / 60.0
         
-        if service not in self.served_count:
-            self.served_count[service] = 0
-            self.total_wait_time_sum[service] = 0.0
+        with self._locks.stripe(service):
+            if service not in self.served_count:
+                self.served_count[service] = 0
+                self.total_wait_time_sum[service] = 0.0
             
-        self.served_count[service] += 1
-        self.total_wait_time_sum[service] += wait_duration
+            self.served_count[service] += 1
+            self.total_wait_time_sum[service] += wait_duration
 
-        return ticket
+        queue_key = (ticket.office_id, service)
+        self.wait_stats[queue_key].add(wait_duration, served_ts)
+        self.estimator.on_serve(queue_key, ticket, served_ts, self.waiting_count[queue_key])
+
+    def _retire(self, ticket: Ticket) -> None:
+        """
+        O(log n) - Drop a ticket from the lookups, index and live counters,
+        and detach it from its store row.
+        """
+        ticket_id = ticket.ticket_id
+        office_id = ticket.office_id
+        service = ticket.service.value
+        queue_key = (office_id, service)
+
+        # Clean up Lookups O(1)
+        with self._locks.stripe(ticket_id):
+            del self.active_tickets_by_id[ticket_id]
+        user_key = (office_id, ticket.user_id, service)
+        with self._locks.stripe(user_key):
+            if self.active_ticket_by_user.get(user_key) == ticket_id:
+                del self.active_ticket_by_user[user_key]
+        if self.search_indexes is not None:
+            with self._locks.stripe(("search", office_id)):
+                self.search_indexes[office_id].remove(ticket_id)
+
+        self.queue_indexes[queue_key].remove(ticket_id)
+        self.waiting_count[queue_key] -= 1
+        self.waiting_minutes[queue_key] -= ticket.expected_minutes
+        with self._locks.sequence:
+            self.store.release(ticket)
+            self._bump_version(queue_key)
+            if self.timers is not None:
+                self.timers.disarm(ticket_id)
+
+    def cancel_ticket(self, ticket_id: str) -> Optional[Ticket]:
+        """
+        O(log n) - Cancel a waiting ticket.
+        - Lookup cleanup and counters: O(1)
+        - Heap/deque entry is left as a tombstone (lazy deletion): O(1)
+        - Index removal: O(log n)
+        - Compaction, when triggered: O(n), amortized O(1) over the cancels
+          that produced the tombstones
+        Returns the cancelled ticket, or None if it was not waiting.
+        """
+        timer = self.op_timers and self.op_timers["cancel_ticket"]
+        start = timer and next(timer.ticks) and perf_counter_ns()
+        try:
+            if self.timers is not None:
+                self.expire_due()
+            ticket = self.active_tickets_by_id.get(ticket_id)
+            if ticket is None:
+                return None
+
+            queue_key = (ticket.office_id, ticket.service.value)
+            with self._locks.queue(queue_key):
+                # Re-check under the lock: a desk may have served it meanwhile.
+                if ticket.status != "WAITING":
+                    return None
+                self._cancel(ticket)
+                self._notify("cancel", ticket)
+            return ticket
+        finally:
+            if start:
+                timer.stop(start)
+
+    def _cancel(self, ticket: Ticket, status: str = "CANCELLED") -> None:
+        """O(log n) - Retire a ticket as CANCELLED (or EXPIRED), leaving a tombstone behind."""
+        ticket.status = status
+        self._retire(ticket)
+
+        queue_key = (ticket.office_id, ticket.service.value)
+        self.tombstones[queue_key] = self.tombstones.get(queue_key, 0) + 1
+        self._maybe_compact(queue_key)
+
+    def confirm_arrival(self, ticket_id: str) -> bool:
+        """
+        O(1) - The called customer turned up at the desk: stop the no-show
+        timer. Returns False if the ticket is not (or no longer) being called.
+        """
+        with self._locks.sequence:
+            if self.called.pop(ticket_id, None) is None:
+                return False
+            self.timers.disarm(ticket_id)
+        return True
+
+    def expire_due(self, now: Optional[float] = None) -> int:
+        """
+        O(ticks / 64 + e log n) - Advance the timing wheel to epoch `now`
+        (default: the current time) and apply what fell due: waiting tickets
+        past their TTL expire, called customers past their grace become
+        no-shows (e of them). Mutations call this first; a background tick
+        can call it too. Must not be called while holding a queue lock.
+        Returns the number of tickets expired or marked as no-shows.
+        """
+        timers = self.timers
+        if timers is None:
+            return 0
+        now = self.clock() if now is None else now
+        if now < timers.current * timers.tick:
+            return 0  # still inside the last tick processed
+        with self._locks.sequence:
+            due = self.timers.advance(now)
+        handled = 0
+        for ticket_id in due:
+            ticket = self.active_tickets_by_id.get(ticket_id)
+            if ticket is not None:
+                queue_key = (ticket.office_id, ticket.service.value)
+                with self._locks.queue(queue_key):
+                    if ticket.status != "WAITING":
+                        continue  # served or cancelled meanwhile
+                    deadline = ticket.issued_ts + self.ttl.get(queue_key[1], float("inf"))
+                    if deadline > now:
+                        # The wheel started ahead of this clock (a replaced clock)
+                        with self._locks.sequence:
+                            self.timers.arm(ticket_id, deadline)
+                        continue
+                    self._cancel(ticket, "EXPIRED")
+                    self.expired_count[queue_key] = self.expired_count.get(queue_key, 0) + 1
+                    self._notify("expire", ticket)
+                handled += 1
+                continue
+
+            with self._locks.sequence:
+                ticket = self.called.get(ticket_id)
+                if ticket is None:
+                    continue
+                deadline = ticket.served_ts + self.no_show_grace
+                if deadline > now:
+                    self.timers.arm(ticket_id, deadline)
+                    continue
+                del self.called[ticket_id]
+                ticket.status = "NO_SHOW"
+                queue_key = (ticket.office_id, ticket.service.value)
+                self.no_show_count[queue_key] = self.no_show_count.get(queue_key, 0) + 1
+            self._notify("no_show", ticket)
+            handled += 1
+        return handled
+
+    def _maybe_compact(self, queue_key: Tuple[str, str]) -> None:
+        """
+        O(n) - Rebuild a queue's heap and deque without dead entries once
+        tombstones pass compact_threshold of the stored entries.
+        """
+        dead = self.tombstones.get(queue_key, 0)
+        if dead < COMPACT_MIN_TOMBSTONES:
+            return
+        bucket = self.bucket_queues.get(queue_key)
+        if bucket is not None:
+            if dead > self.compact_threshold * len(bucket):
+                bucket.compact(self.active_tickets_by_id)
+                self.tombstones[queue_key] = 0
+            return
+        heap = self.priority_heaps[queue_key]
+        normal_dq = self.normal_queues[queue_key]
+        if dead <= self.compact_threshold * (len(heap) + len(normal_dq)):
+            return
+
+        live = self.active_tickets_by_id
+        if heap:
+            heap[:] = [entry for entry in heap if entry[2] in live]
+            heapq.heapify(heap)
+        if normal_dq:
+            survivors = [tid for tid in normal_dq if tid in live]
+            normal_dq.clear()
+            normal_dq.extend(survivors)
+        self.tombstones[queue_key] = 0
+
+    def _age(self, queue_key: Tuple[str, str], now: Optional[float] = None) -> int:
+        """
+        O(a + p log n) - Promote every ticket of a bucket queue that has
+        waited past its level's aging limit (a aging levels, p promotions),
+        then report the promotions to listeners as one batch, so a journal
+        snapshot cannot land between them. O(1) for heap queues.
+        Caller holds the queue lock. Returns the number of promotions.
+        """
+        bucket = self.bucket_queues.get(queue_key)
+        if bucket is None or not bucket.aging:
+            return 0
+        promoted, dropped = bucket.age(self.clock() if now is None else now,
+                                       self.active_tickets_by_id)
+        self.tombstones[queue_key] -= dropped
+        tickets = []
+        for ticket_id, level in promoted:
+            ticket = self.active_tickets_by_id[ticket_id]
+            self._promote(ticket, level)
+            tickets.append(ticket)
+        if tickets:
+            self._notify_all("promote", tickets)
+        return len(tickets)
+
+    def _promote(self, ticket: Ticket, level: int, seq: Optional[int] = None) -> None:
+        """
+        O(log n) - Move a ticket the bucket queue has promoted to `level`
+        into that level's index lane, behind everyone already there.
+        Replay passes the journaled seq; otherwise a new one is drawn.
+        """
+        queue_key = (ticket.office_id, ticket.service.value)
+        with self._locks.sequence:
+            if seq is None:
+                self.counter += 1
+                seq = self.counter
+            else:
+                self.counter = max(self.counter, seq)
+            self.promoted_count += 1
+            self._bump_version(queue_key)
+        index = self.queue_indexes[queue_key]
+        index.remove(ticket.ticket_id)
+        ticket.priority_level = level
+        ticket.seq = seq
+        index.add(ticket.ticket_id, level, seq, ticket.expected_minutes)
+
+    def age_queues(self, now: Optional[float] = None) -> int:
+        """
+        O(queues + promotions) - Apply due promotions in every bucket queue
+        as of epoch `now` (default: the current time). Serves and position
+        reads already age their own queue; this is for a periodic sweep so
+        that, e.g., overview subscribers hear about promotions promptly.
+        Returns the number of tickets promoted.
+        """
+        promoted = 0
+        for queue_key in list(self.bucket_queues):
+            with self._locks.queue(queue_key):
+                promoted += self._age(queue_key, now)
+        return promoted
 
     def get_position(self, ticket_id: str) -> Tuple[int, int]:
         """
-        O(n) - Calculate position and estimated wait time.
-        We must iterate active structures to count people ahead.
+        O(L + log n) - Calculate position and estimated wait time.
+        The queue's QueueIndex sums the tickets (and expected minutes) ahead
+        with Fenwick prefix queries; L is the number of priority levels waiting.
+        The estimator converts that into minutes in O(1).
         Returns: (position_index_1_based, estimated_minutes)
         """
-        if ticket_id not in self.active_tickets_by_id:
-            return -1, 0
+        timer = self.op_timers and self.op_timers["get_position"]
+        start = timer and next(timer.ticks) and perf_counter_ns()
+        try:
+            my_ticket = self.active_tickets_by_id.get(ticket_id)
+            if my_ticket is None:
+                return -1, 0
+            queue_key = (my_ticket.office_id, my_ticket.service.value)
 
-        my_ticket = self.active_tickets_by_id[ticket_id]
-        queue_key = (my_ticket.office_id, my_ticket.service.value)
-        
-        position = 0
-        est_minutes = 0
+            with self._locks.queue(queue_key):
+                self._age(queue_key)
+                ahead = self.queue_indexes[queue_key].position(ticket_id)
+            if ahead is None:
+                return -1, 0
 
-        is_priority_me = my_ticket.priority_level > 0
-        my_heap_criteria = None
+            position, ahead_minutes = ahead
+            return position + 1, self.estimator.estimate(queue_key, position, ahead_minutes)
+        finally:
+            if start:
+                timer.stop(start)
 
-        heap_list = self.priority_heaps.get(queue_key, [])
-        
-        # 1. Analyze Heap (Priority Customers)
-        if heap_list:
-            if is_priority_me:
-                # Find myself first to get comparison criteria O(n)
-                for entry in heap_list:
-                    if entry[2] == ticket_id:
-                        my_heap_criteria = entry # (-p, c, id)
-                        break
-                
-                if my_heap_criteria:
-                    # Count everyone strictly smaller (better priority/earlier)
-                    for entry in heap_list:
-                        if entry[2] == ticket_id: continue
-                        if entry < my_heap_criteria:
-                             tid = entry[2]
-                             if tid in self.active_tickets_by_id:
-                                other_ticket = self.active_tickets_by_id[tid]
-                                position += 1
-                                est_minutes += other_ticket.expected_minutes
-            else:
-                # I am Normal. ALL valid priority customers are ahead of me.
-                for _, _, tid in heap_list:
-                    if tid in self.active_tickets_by_id:
-                        other_ticket = self.active_tickets_by_id[tid]
-                        position += 1
-                        est_minutes += other_ticket.expected_minutes
-
-        # 2. Analyze Deque (Normal Customers)
-        # Only relevant if I am normal. Priority customers skip line.
-        if not is_priority_me:
-            normal_dq = self.normal_queues.get(queue_key, deque())
-            found_self = False
-            for tid in normal_dq:
-                if tid == ticket_id:
-                    found_self = True
-                    break
-                
-                if tid in self.active_tickets_by_id:
-                    other_ticket = self.active_tickets_by_id[tid]
-                    position += 1
-                    est_minutes += other_ticket.expected_minutes
-            
-        return position + 1, est_minutes
+    def set_active_desks(self, office_id: str, service: str, desks: int) -> None:
+        """
+        O(1) - Tell the estimator how many desks are serving a queue, and
+        report the count to desk_listeners.
+        """
+        queue_key = (office_id, service)
+        with self._locks.queue(queue_key):
+            self._set_desks(queue_key, desks)
+            for listener in self.desk_listeners:
+                listener(queue_key, desks)
+            self._settle()
+
+    def _set_desks(self, queue_key: Tuple[str, str], desks: int) -> None:
+        """O(1) - Apply a desk count. Shared with journal replay."""
+        self.estimator.set_desks(queue_key, desks)
+        if queue_key in self.queue_indexes:
+            # Estimates of everyone waiting change with the desk count.
+            with self._locks.sequence:
+                self._bump_version(queue_key)
+
+    def _bump_version(self, queue_key: Tuple[str, str]) -> None:
+        """O(1) - Record a change to a queue. Caller holds the sequence lock."""
+        self.queue_versions[queue_key] += 1
+        self.office_versions[queue_key[0]] += 1
+        self.version += 1
+
+    def queue_version(self, office_id: str, service: str) -> int:
+        """
+        O(1) - Current version of a queue: equal versions mean equal
+        positions, estimates and page contents. Due promotions are applied
+        first, so aging shows up as a change. 0 for a queue never used.
+        """
+        queue_key = (office_id, service)
+        if queue_key not in self.queue_indexes:
+            return 0
+        with self._locks.queue(queue_key):
+            self._age(queue_key)
+            return self.queue_versions[queue_key]
+
+    def office_version(self, office_id: Optional[str] = None) -> int:
+        """
+        O(1) - Version of get_queue_overview(office_id): the sum of the
+        office's queue versions, or of every queue for office_id=None.
+        """
+        if office_id is None:
+            return self.version
+        return self.office_versions.get(office_id, 0)
+
+    def get_positions(self, ticket_ids: List[str]) -> Dict[str, Tuple[int, int]]:
+        """
+        O(min(k log n, n)) per queue - get_position for many tickets at once.
+        Tickets are grouped by queue and each group is resolved by
+        QueueIndex.positions: point lookups for a few ids, one ordered sweep
+        when many ids share a queue. Unknown or served ids map to (-1, 0).
+        """
+        timer = self.op_timers and self.op_timers["get_positions"]
+        start = timer and next(timer.ticks) and perf_counter_ns()
+        try:
+            by_queue: Dict[Tuple[str, str], List[str]] = {}
+            result: Dict[str, Tuple[int, int]] = {}
+            for tid in ticket_ids:
+                ticket = self.active_tickets_by_id.get(tid)
+                if ticket is None:
+                    result[tid] = (-1, 0)
+                else:
+                    by_queue.setdefault((ticket.office_id, ticket.service.value), []).append(tid)
+
+            for queue_key, ids in by_queue.items():
+                with self._locks.queue(queue_key):
+                    self._age(queue_key)
+                    found = self.queue_indexes[queue_key].positions(ids)
+                for tid in ids:
+                    ahead = found.get(tid)
+                    if ahead is None:
+                        result[tid] = (-1, 0)
+                    else:
+                        result[tid] = (ahead[0] + 1, self.estimator.estimate(queue_key, *ahead))
+            return result
+        finally:
+            if start:
+                timer.stop(start)
+
+    def enable_search(self) -> None:
+        """
+        O(n log n) - Turn on search(), indexing the tickets already waiting
+        (e.g. a manager recovered from a snapshot taken without search).
+        """
+        if self.search_indexes is not None:
+            return
+        with self.quiesce():
+            indexes: Dict[str, SearchIndex] = {}
+            for ticket in list(self.active_tickets_by_id.values()):
+                index = indexes.get(ticket.office_id)
+                if index is None:
+                    index = indexes[ticket.office_id] = SearchIndex()
+                index.add(ticket.ticket_id, ticket.name, ticket.user_id)
+            self.search_indexes = indexes
+
+    def search(self, query: str, office_id: Optional[str] = None,
+               limit: int = 10) -> List[Tuple[Ticket, int, int]]:
+        """
+        O(log n + m + k log n) - Waiting tickets whose ID, a word of whose
+        name, or whose user_id starts with `query` (see search.py for the
+        order), in one office or in all of them, at most `limit`.
+        m is the index entries read; the k results then get their positions
+        from one get_positions call.
+        Returns [(ticket, position, est_minutes)].
+        """
+        if self.search_indexes is None:
+            raise ValueError("Search is not enabled on this manager")
+        if limit < 1:
+            raise ValueError(f"Invalid limit: {limit}")
+        if office_id is None:
+            offices = sorted(list(self.search_indexes))
+        else:
+            offices = [office_id] if office_id in self.search_indexes else []
+
+        ids: List[str] = []
+        for office in offices:
+            with self._locks.stripe(("search", office)):
+                ids.extend(self.search_indexes[office].search(query, limit - len(ids)))
+            if len(ids) == limit:
+                break
+
+        positions = self.get_positions(ids)
+        results = []
+        for tid in ids:
+            ticket = self.active_tickets_by_id.get(tid)
+            position, wait = positions[tid]
+            if ticket is not None and position != -1:  # not served meanwhile
+                results.append((ticket, position, wait))
+        return results
+
+    def get_queue(self, office_id: str, service: str, limit: int = 50,
+                  cursor: Optional[str] = None) -> Tuple[List[Ticket], Optional[str]]:
+        """
+        O(L + log n + limit) - One page of waiting tickets in exact serve order
+        (highest priority first, FIFO within a level, normal tickets last).
+        Walks the queue's QueueIndex lazily instead of sorting the heap.
+        Returns (tickets, next_cursor); next_cursor is None on the last page.
+        """
+        timer = self.op_timers and self.op_timers["get_queue"]
+        start = timer and next(timer.ticks) and perf_counter_ns()
+        try:
+            try:
+                service_enum = ServiceType(service)
+            except ValueError:
+                raise ValueError(f"Invalid service type: {service}")
+            if limit < 1:
+                raise ValueError(f"Invalid limit: {limit}")
+
+            after = None
+            if cursor:
+                try:
+                    level, seq = cursor.split(":")
+                    after = (int(level), int(seq))
+                except ValueError:
+                    raise ValueError(f"Invalid cursor: {cursor}")
+
+            index = self.queue_indexes.get((office_id, service_enum.value))
+            if index is None:
+                return [], None
+
+            # Fetch one extra entry to know whether another page exists.
+            with self._locks.queue((office_id, service_enum.value)):
+                self._age((office_id, service_enum.value))
+                entries = list(islice(index.iter_from(after), limit + 1))
+                page = entries[:limit]
+                tickets = [self.active_tickets_by_id[tid] for _, _, tid in page]
+
+            next_cursor = None
+            if len(entries) > limit:
+                level, seq, _ = page[-1]
+                next_cursor = f"{level}:{seq}"
+            return tickets, next_cursor
+        finally:
+            if start:
+                timer.stop(start)
+
+    def get_queue_overview(self, office_id: Optional[str] = None) -> List[Dict]:
+        """
+        O(offices * services) - Waiting counts and expected minutes per queue.
+        Reads the live counters only; no ticket is visited.
+        office_id=None reports every office that has ever issued a ticket.
+        """
+        if office_id is None:
+            with self._locks.registry:
+                offices = sorted({office for office, _ in self.waiting_count})
+        else:
+            offices = [office_id]
+
+        overview = []
+        for office in offices:
+            for service_enum in ServiceType:
+                queue_key = (office, service_enum.value)
+                overview.append({
+                    'office_id': office,
+                    'service': service_enum.value,
+                    'waiting_count': self.waiting_count.get(queue_key, 0),
+                    'waiting_minutes': self.waiting_minutes.get(queue_key, 0),
+                })
+        return overview
@@ -0,0 +1,297 @@
+# =============================================================================
+# replay.py — Replay a logged event trace through a QueueManager.
+#
+# A trace is one event per line, NDJSON or CSV (with a header row):
+#     ts         epoch seconds of the event (non-decreasing)
+#     op         issue | serve | cancel | status
+#     ticket_id  the ticket's ID in the trace (issue: the ID it was given;
+#                cancel/status: the ticket asked about; serve: optional, the
+#                ticket that was served, used to spot divergence)
+#     user_id, name, service, priority, office_id
+#                as for issue_ticket (service and office_id also for serve)
+# Missing fields take issue_ticket's defaults; a missing user_id on issue
+# becomes the trace ticket_id, so replayed users stay distinct.
+#
+# The pipeline is a chain of generators, so memory does not grow with the
+# trace (only with the tickets waiting at a time):
+#     read_events(path)  -> raw dicts, one line at a time
+#     parse_events(...)  -> checked events (ValueError names the bad line)
+#     paced(..., speed)  -> optional: hold each event until its trace time,
+#                           divided by speed, has passed on the wall clock
+#     Replayer.run(...)  -> applies them and fills ReplayStats
+# The manager runs on a ManualClock set to each event's ts, so waits,
+# analytics and expiry follow trace time in both modes.
+#
+# The replayed manager mints its own ticket IDs; Replayer maps trace IDs to
+# them (and back) while the ticket waits. A replayed serve that picks a
+# different ticket than the trace recorded counts as diverged.
+#
+# ReplayStats keeps, per op, the count, the outcomes (ok / rejected by a
+# ValueError / empty queue or unknown ticket) and the latency of the
+# manager call, with p50/p90/p99 from P² sketches (see sketches.py).
+# =============================================================================
+
+import csv
+import json
+import sys
+import time
+from contextlib import contextmanager
+from time import perf_counter_ns
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from .queues import QueueManager
+from .sketches import P2Quantile, QUANTILES
+from .utils import ManualClock
+
+OPS = ("issue", "serve", "cancel", "status")
+FORMATS = ("auto", "ndjson", "csv")
+
+
+@contextmanager
+def _open_trace(path: str):
+    if path == "-":
+        yield sys.stdin
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            yield f
+
+
+def read_events(path: str, fmt: str = "auto") -> Iterator[Dict]:
+    """
+    O(1) memory - Raw events of a trace file ("-" for stdin), one line at a
+    time. fmt="auto" picks CSV for a .csv path, NDJSON otherwise.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Invalid trace format: {fmt}")
+    if fmt == "auto":
+        fmt = "csv" if path.lower().endswith(".csv") else "ndjson"
+    with _open_trace(path) as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                # Empty cells mean "not given"
+                yield {key: value for key, value in row.items() if value not in ("", None)}
+        else:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Line {line_no}: invalid JSON ({e.msg})")
+
+
+def parse_events(raw: Iterable[Dict]) -> Iterator[Dict]:
+    """O(1) per event - Check and normalise events; ValueError names the first bad one."""
+    last_ts = None
+    for n, event in enumerate(raw, 1):
+        op = event.get("op")
+        if op not in OPS:
+            raise ValueError(f"Event {n}: unknown op {op!r}")
+        try:
+            ts = float(event["ts"])
+            priority = int(event.get("priority", 0))
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"Event {n}: ts and priority must be numbers")
+        if last_ts is not None and ts < last_ts:
+            raise ValueError(f"Event {n}: ts goes back in time ({ts} < {last_ts})")
+        last_ts = ts
+        ticket_id = event.get("ticket_id")
+        if op in ("cancel", "status") and not ticket_id:
+            raise ValueError(f"Event {n}: {op} needs a ticket_id")
+        yield {
+            "ts": ts,
+            "op": op,
+            "ticket_id": str(ticket_id) if ticket_id is not None else None,
+            "user_id": str(event.get("user_id") or ticket_id or f"trace-{n}"),
+            "name": str(event.get("name", "Guest")),
+            "service": str(event.get("service", "passport")),
+            "priority": priority,
+            "office_id": str(event.get("office_id", "default")),
+        }
+
+
+def paced(events: Iterable[Dict], speed: float,
+          sleep: Callable[[float], None] = time.sleep,
+          now: Callable[[], float] = time.perf_counter) -> Iterator[Dict]:
+    """
+    Real-time-scaled playback: each event is released once (ts - first ts) /
+    speed seconds have passed since the first. speed=60 plays an hour in a
+    minute. Events already late are released at once.
+    """
+    if speed <= 0:
+        raise ValueError(f"Invalid replay speed: {speed}")
+    first_ts = wall_start = None
+    for event in events:
+        if first_ts is None:
+            first_ts, wall_start = event["ts"], now()
+        delay = wall_start + (event["ts"] - first_ts) / speed - now()
+        if delay > 0:
+            sleep(delay)
+        yield event
+
+
+class OpStats:
+    """Count, outcomes and latency sketch of one op."""
+
+    __slots__ = ("count", "ok", "rejected", "missed", "total_ns", "max_ns", "quantiles")
+
+    def __init__(self):
+        self.count = 0
+        self.ok = 0
+        self.rejected = 0   # ValueError from the manager (e.g. user already waiting)
+        self.missed = 0     # nothing to serve, or the ticket is not waiting
+        self.total_ns = 0
+        self.max_ns = 0
+        self.quantiles = [P2Quantile(q) for q in QUANTILES]
+
+    def observe(self, elapsed_ns: int) -> None:
+        """O(1) - Record one call's latency."""
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        for quantile in self.quantiles:
+            quantile.add(elapsed_ns)
+
+    def summary(self) -> Dict:
+        """Latencies in microseconds."""
+        summary = {'count': self.count, 'ok': self.ok, 'rejected': self.rejected,
+                   'missed': self.missed,
+                   'mean_us': self.total_ns / self.count / 1000 if self.count else 0.0,
+                   'max_us': self.max_ns / 1000}
+        for q, quantile in zip(QUANTILES, self.quantiles):
+            summary[f'p{round(q * 100)}_us'] = quantile.value() / 1000 if self.count else 0.0
+        return summary
+
+
+class ReplayStats:
+    """Per-op statistics of a replay, plus wall time and divergence."""
+
+    def __init__(self):
+        self.ops: Dict[str, OpStats] = {op: OpStats() for op in OPS}
+        self.diverged = 0
+        self.wall_seconds = 0.0
+        self.first_ts: Optional[float] = None
+        self.last_ts: Optional[float] = None
+
+    @property
+    def events(self) -> int:
+        return sum(stats.count for stats in self.ops.values())
+
+    @property
+    def ops_per_second(self) -> float:
+        return self.events / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def trace_seconds(self) -> float:
+        return self.last_ts - self.first_ts if self.first_ts is not None else 0.0
+
+
+class Replayer:
+    """Applies parsed trace events to a QueueManager running on a ManualClock."""
+
+    def __init__(self, manager: Optional[QueueManager] = None, **manager_options):
+        self.clock = ManualClock()
+        if manager is None:
+            manager = QueueManager(clock=self.clock, **manager_options)
+        else:
+            manager.clock = self.clock
+        self.manager = manager
+        self.stats = ReplayStats()
+        # Waiting tickets only: trace ID -> replayed ID, and back
+        self._replayed: Dict[str, str] = {}
+        self._traced: Dict[str, str] = {}
+
+    def apply(self, event: Dict) -> None:
+        """O(manager op) - Apply one event at its trace time and record it."""
+        ts = event["ts"]
+        if self.stats.first_ts is None:
+            self.stats.first_ts = ts
+            self.clock.now = ts
+        self.stats.last_ts = ts
+        if ts > self.clock.now:
+            self.clock.now = ts
+
+        op = event["op"]
+        stats = self.stats.ops[op]
+        manager = self.manager
+        if op == "issue":
+            start = perf_counter_ns()
+            try:
+                ticket = manager.issue_ticket(event["user_id"], event["name"], event["service"],
+                                              event["priority"], office_id=event["office_id"])
+            except ValueError:
+                stats.observe(perf_counter_ns() - start)
+                stats.rejected += 1
+                return
+            stats.observe(perf_counter_ns() - start)
+            stats.ok += 1
+            if event["ticket_id"] is not None:
+                self._replayed[event["ticket_id"]] = ticket.ticket_id
+                self._traced[ticket.ticket_id] = event["ticket_id"]
+
+        elif op == "serve":
+            start = perf_counter_ns()
+            ticket = manager.serve_next(event["office_id"], event["service"])
+            stats.observe(perf_counter_ns() - start)
+            if ticket is None:
+                stats.missed += 1
+                return
+            stats.ok += 1
+            trace_id = self._forget(ticket.ticket_id)
+            if event["ticket_id"] is not None and event["ticket_id"] != trace_id:
+                self.stats.diverged += 1
+
+        elif op == "cancel":
+            ticket_id = self._replayed.get(event["ticket_id"], event["ticket_id"])
+            start = perf_counter_ns()
+            ticket = manager.cancel_ticket(ticket_id)
+            stats.observe(perf_counter_ns() - start)
+            if ticket is None:
+                stats.missed += 1
+                return
+            stats.ok += 1
+            self._forget(ticket.ticket_id)
+
+        else:  # status
+            ticket_id = self._replayed.get(event["ticket_id"], event["ticket_id"])
+            start = perf_counter_ns()
+            position, _ = manager.get_position(ticket_id)
+            stats.observe(perf_counter_ns() - start)
+            if position == -1:
+                stats.missed += 1
+            else:
+                stats.ok += 1
+
+    def _forget(self, ticket_id: str) -> Optional[str]:
+        """O(1) - Drop a ticket that left the queue from the ID maps; returns its trace ID."""
+        trace_id = self._traced.pop(ticket_id, None)
+        if trace_id is not None:
+            self._replayed.pop(trace_id, None)
+        return trace_id
+
+    def run(self, events: Iterable[Dict]) -> ReplayStats:
+        """O(events) - Apply every event; wall time covers reading and pacing too."""
+        start = time.perf_counter()
+        try:
+            for event in events:
+                self.apply(event)
+        finally:
+            self.stats.wall_seconds += time.perf_counter() - start
+        return self.stats
+
+
+def replay(path: str, fmt: str = "auto", speed: Optional[float] = None,
+           **manager_options) -> Tuple[QueueManager, ReplayStats]:
+    """
+    Replay a trace file into a fresh QueueManager (built with
+    manager_options), as fast as possible or, with speed, in scaled real
+    time. Returns the manager in its final state and the statistics.
+    """
+    events = parse_events(read_events(path, fmt))
+    if speed is not None:
+        events = paced(events, speed)
+    replayer = Replayer(**manager_options)
+    stats = replayer.run(events)
+    return replayer.manager, stats
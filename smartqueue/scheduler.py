@@ -0,0 +1,238 @@
+# =============================================================================
+# scheduler.py — Desks that serve several services, with weighted fair choice.
+#
+# serve_next(office_id, service) leaves the choice of queue to whoever calls
+# it. DeskScheduler lets each desk register the services it handles and then
+# just ask for the next customer: serve_next_for_desk(desk_id).
+#
+# The choice is deficit round robin (DRR) over the desk's services:
+#   - A round starts when the desk has no queue with credit left. Every
+#     non-empty queue is granted a quantum of serves in proportion to its
+#     share of the waiting tickets and of the head waits (how long the next
+#     ticket has been waiting), times the desk's optional per-service weight.
+#     Quanta add up to one serve per non-empty queue, so a round is as long
+#     as plain round robin, but a long or stale queue gets more of it.
+#     Fractional credit carries over; an empty queue's credit is reset.
+#   - Within a round the desk serves, among queues with a whole serve of
+#     credit, the one whose head ticket is oldest. Each desk keeps a heap of
+#     (head timestamp, service) over those queues, so a decision is
+#     O(log services); starting a round is O(services).
+#
+# Head timestamps are cached per queue. The scheduler is a QueueManager
+# listener that only marks a changed queue dirty; the next decision
+# re-reads the heads of dirty queues (QueueManager.peek_next) and pushes the
+# new timestamps into the heaps of the desks covering them. Outdated heap
+# entries are skipped when they surface (lazy deletion). Because the
+# listener takes no lock, the scheduler's own lock is always taken before
+# any queue lock, and concurrent issues cannot deadlock against a decision.
+#
+# Works on an in-process QueueManager (not the sharded router).
+# =============================================================================
+
+import heapq
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import ServiceType, Ticket
+from .queues import QueueManager
+
+
+class Desk:
+    """One desk's services and DRR state."""
+
+    __slots__ = ("desk_id", "office_id", "services", "weights", "deficit", "eligible", "heap")
+
+    def __init__(self, desk_id: str, office_id: str, services: Tuple[str, ...],
+                 weights: Dict[str, float]):
+        self.desk_id = desk_id
+        self.office_id = office_id
+        self.services = services
+        self.weights = weights
+        self.deficit: Dict[str, float] = {service: 0.0 for service in services}
+        # Services with at least one whole serve of credit this round
+        self.eligible = set()
+        # (head issued_ts, service); entries go stale when the head changes
+        self.heap: List[Tuple[float, str]] = []
+
+
+class DeskScheduler:
+    """
+    Picks the queue each desk serves next. Create, attach(), register desks,
+    then call serve_next_for_desk / serve_many instead of serve_next.
+    """
+
+    def __init__(self, manager: QueueManager):
+        self.manager = manager
+        self.desks: Dict[str, Desk] = {}
+        # Map (office_id, service) -> desks that serve it
+        self._desks_by_queue: Dict[Tuple[str, str], List[Desk]] = {}
+        # Map (office_id, service) -> issued_ts of the ticket serve_next would
+        # serve; absent while the queue is empty
+        self.head_ts: Dict[Tuple[str, str], float] = {}
+        # Queues changed since their head was last read
+        self._dirty = set()
+        self._lock = threading.RLock()
+
+    def attach(self) -> "DeskScheduler":
+        self.manager.listeners.append(self)
+        return self
+
+    def detach(self) -> None:
+        if self in self.manager.listeners:
+            self.manager.listeners.remove(self)
+
+    def __call__(self, event: str, ticket: Ticket) -> None:
+        """Listener hook: O(1), mark the ticket's queue for a head re-read."""
+        self._dirty.add((ticket.office_id, ticket.service.value))
+
+    def register_desk(self, desk_id: str, services: Iterable[str], office_id: str = "default",
+                      weights: Optional[Dict[str, float]] = None) -> Desk:
+        """
+        O(services) - Register (or re-register) a desk for some services of
+        one office. `weights` optionally scales a service's share (default 1).
+        """
+        services = tuple(dict.fromkeys(services))
+        if not services:
+            raise ValueError(f"Desk {desk_id} must serve at least one service")
+        for service in services:
+            try:
+                ServiceType(service)
+            except ValueError:
+                raise ValueError(f"Invalid service type: {service}")
+        weights = {service: float((weights or {}).get(service, 1.0)) for service in services}
+        if any(weight <= 0 for weight in weights.values()):
+            raise ValueError(f"Service weights must be positive: {weights}")
+
+        with self._lock:
+            self.unregister_desk(desk_id)
+            desk = self.desks[desk_id] = Desk(desk_id, office_id, services, weights)
+            for service in services:
+                queue_key = (office_id, service)
+                self._desks_by_queue.setdefault(queue_key, []).append(desk)
+                self._dirty.add(queue_key)
+            return desk
+
+    def unregister_desk(self, desk_id: str) -> None:
+        """O(desks) - Forget a desk; unknown ids are ignored."""
+        with self._lock:
+            desk = self.desks.pop(desk_id, None)
+            if desk is None:
+                return
+            for service in desk.services:
+                self._desks_by_queue[(desk.office_id, service)].remove(desk)
+
+    def serve_next_for_desk(self, desk_id: str) -> Optional[Ticket]:
+        """
+        O(log services) amortized, plus O(L) per queue changed since the last
+        decision - Serve the next ticket for a desk, or None if none of its
+        queues has anyone waiting.
+        """
+        with self._lock:
+            desk = self.desks.get(desk_id)
+            if desk is None:
+                raise ValueError(f"Unknown desk: {desk_id}")
+            self._refresh()
+            return self._serve(desk)
+
+    def serve_many(self, desk_ids: Iterable[str]) -> List[Tuple[str, Optional[Ticket]]]:
+        """
+        One serve per desk in order (e.g. opening several desks at once),
+        under a single lock acquisition. Returns [(desk_id, ticket or None)].
+        """
+        with self._lock:
+            desks = []
+            for desk_id in desk_ids:
+                desk = self.desks.get(desk_id)
+                if desk is None:
+                    raise ValueError(f"Unknown desk: {desk_id}")
+                desks.append(desk)
+            served = []
+            for desk in desks:
+                self._refresh()
+                served.append((desk.desk_id, self._serve(desk)))
+            return served
+
+    def _refresh(self) -> None:
+        """O(L + desks log services) per dirty queue - Re-read changed heads."""
+        while self._dirty:
+            queue_key = self._dirty.pop()
+            head = self.manager.peek_next(*queue_key)
+            if head is None:
+                self.head_ts.pop(queue_key, None)
+                continue
+            ts = head.issued_ts
+            if self.head_ts.get(queue_key) == ts:
+                continue
+            self.head_ts[queue_key] = ts
+            for desk in self._desks_by_queue.get(queue_key, ()):
+                if queue_key[1] in desk.eligible:
+                    heapq.heappush(desk.heap, (ts, queue_key[1]))
+                    if len(desk.heap) > 4 * len(desk.services):
+                        self._rebuild_heap(desk)
+
+    def _rebuild_heap(self, desk: Desk) -> None:
+        """O(services) - Drop stale entries: one per eligible non-empty queue."""
+        desk.heap = [(self.head_ts[(desk.office_id, service)], service)
+                     for service in desk.eligible if (desk.office_id, service) in self.head_ts]
+        heapq.heapify(desk.heap)
+
+    def _serve(self, desk: Desk) -> Optional[Ticket]:
+        for _ in range(2):
+            heap = desk.heap
+            while heap:
+                ts, service = heap[0]
+                queue_key = (desk.office_id, service)
+                if service not in desk.eligible or self.head_ts.get(queue_key) != ts:
+                    heapq.heappop(heap)  # stale entry
+                    continue
+                ticket = self.manager.serve_next(desk.office_id, service)
+                self._refresh()
+                if ticket is None:
+                    desk.eligible.discard(service)
+                    continue
+                desk.deficit[service] -= 1
+                if desk.deficit[service] < 1:
+                    desk.eligible.discard(service)
+                return ticket
+            if not self._new_round(desk):
+                return None
+        return None
+
+    def _new_round(self, desk: Desk) -> bool:
+        """
+        O(services) - Grant every non-empty queue its quantum and rebuild the
+        desk's heap. Returns False if all of the desk's queues are empty.
+        """
+        now = self.manager.clock()
+        waiting = {}
+        for service in desk.services:
+            ts = self.head_ts.get((desk.office_id, service))
+            if ts is None:
+                desk.deficit[service] = 0.0
+            else:
+                depth = self.manager.waiting_count.get((desk.office_id, service), 0)
+                waiting[service] = (depth, max(now - ts, 0.0), ts)
+        if not waiting:
+            return False
+
+        total_depth = sum(depth for depth, _, _ in waiting.values()) or 1
+        total_wait = sum(wait for _, wait, _ in waiting.values())
+        shares = {}
+        for service, (depth, wait, _) in waiting.items():
+            share = depth / total_depth
+            share = (share + wait / total_wait) / 2 if total_wait else share
+            shares[service] = desk.weights[service] * share
+        scale = len(waiting) / sum(shares.values())
+
+        desk.eligible = set()
+        for service, share in shares.items():
+            desk.deficit[service] += share * scale
+            if desk.deficit[service] >= 1:
+                desk.eligible.add(service)
+        if not desk.eligible:
+            # Rounding left everyone just short: let the largest credit go.
+            best = max(shares, key=lambda service: desk.deficit[service])
+            desk.deficit[best] = 1.0
+            desk.eligible.add(best)
+        self._rebuild_heap(desk)
+        return True
@@ -0,0 +1,216 @@
+# =============================================================================
+# search.py — Prefix search over waiting tickets for the admin desk.
+#
+# active_tickets_by_id and active_ticket_by_user answer exact lookups only.
+# With QueueManager(search=True) every office also keeps a SearchIndex,
+# updated as tickets join and leave the queue, that finds waiting tickets
+# by a prefix of any word of the customer's name ("garc" -> "Maria Garcia"),
+# of the ticket ID (read out over the phone, dash optional) or of user_id.
+#
+# PrefixIndex maps each distinct key to the ticket ids under it (a dict
+# used as an insertion-ordered set) and keeps the distinct keys in a sorted
+# array cut into blocks of at most 2 * BLOCK_LOAD, with each block's last
+# key in `_maxes`:
+#   - add / remove under a key that already has ids (a common name word) is
+#     a dict operation. A new key is placed by bisecting _maxes and then its
+#     block: O(log k) comparisons plus an O(BLOCK_LOAD) memmove, instead of
+#     the O(k) shift of one flat sorted list.
+#   - scan(prefix): bisect to the first key >= prefix and walk forward while
+#     keys still start with it; O(log k + matches read). Every key starting
+#     with the prefix sorts between the prefix and the first key past it.
+# Keys carry a one-character namespace (ID, name word, user, whole name) so
+# one array serves all four. IDs are stored in normalize_id form without the dash,
+# names and user ids case-folded.
+#
+# A search returns at most `limit` ticket IDs: ID matches first (in ID,
+# i.e. issue, order), then name matches (alphabetically by word, in issue
+# order within one word), then user ids. With
+# several words, names starting with those words in that order ("maria
+# garc") come straight from the whole-name keys; after them, candidates
+# from the longest word must match every other word at the start of some
+# name word ("garcia maria").
+#
+# No lock of its own (the manager is pickled into journal snapshots):
+# QueueManager guards each office's index with one of its stripe locks.
+# =============================================================================
+
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Iterator, List, Tuple
+
+from .ids import normalize_id
+
+BLOCK_LOAD = 256
+
+_ID, _NAME, _USER, _FULL_NAME = "\x01", "\x02", "\x03", "\x04"
+_WORD_RE = re.compile(r"\w+")
+
+
+def name_words(text: str) -> List[str]:
+    """O(len) - Case-folded words of a name or query."""
+    return _WORD_RE.findall(text.casefold())
+
+
+def _id_key(text: str) -> str:
+    return normalize_id(text).replace("-", "").replace(" ", "")
+
+
+class PrefixIndex:
+    """Ticket ids under string keys; keys kept sorted in blocks and scanned by prefix."""
+
+    __slots__ = ("_postings", "_blocks", "_maxes")
+
+    def __init__(self):
+        # key -> {ticket_id: None}, an insertion-ordered set
+        self._postings: Dict[str, Dict[str, None]] = {}
+        self._blocks: List[List[str]] = []
+        self._maxes: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    def add(self, key: str, ticket_id: str) -> None:
+        """O(1) for a known key, O(log k + BLOCK_LOAD) for a new one (k = distinct keys)."""
+        postings = self._postings.get(key)
+        if postings is None:
+            postings = self._postings[key] = {}
+            self._insert_key(key)
+        postings[ticket_id] = None
+
+    def remove(self, key: str, ticket_id: str) -> bool:
+        """O(1), plus O(log k + BLOCK_LOAD) when the key's last id goes. Returns whether it was there."""
+        postings = self._postings.get(key)
+        if postings is None or ticket_id not in postings:
+            return False
+        del postings[ticket_id]
+        if not postings:
+            del self._postings[key]
+            self._remove_key(key)
+        return True
+
+    def _insert_key(self, key: str) -> None:
+        maxes = self._maxes
+        if not maxes:
+            self._blocks.append([key])
+            maxes.append(key)
+            return
+        i = bisect_left(maxes, key)
+        if i == len(maxes):
+            # Past every block: append to the last one
+            i -= 1
+            block = self._blocks[i]
+            block.append(key)
+            maxes[i] = key
+        else:
+            block = self._blocks[i]
+            insort(block, key)
+        if len(block) > 2 * BLOCK_LOAD:
+            self._blocks[i:i + 1] = [block[:BLOCK_LOAD], block[BLOCK_LOAD:]]
+            maxes[i:i + 1] = [block[BLOCK_LOAD - 1], block[-1]]
+
+    def _remove_key(self, key: str) -> None:
+        i = bisect_left(self._maxes, key)
+        block = self._blocks[i]
+        j = bisect_left(block, key)
+        del block[j]
+        if not block:
+            del self._blocks[i]
+            del self._maxes[i]
+        elif j == len(block):
+            self._maxes[i] = block[-1]
+
+    def scan(self, prefix: str) -> Iterator[Tuple[str, str]]:
+        """
+        O(log k) to start, O(1) per pair - (key, ticket_id) for every key
+        starting with `prefix`, keys in order, ids in insertion order.
+        """
+        maxes = self._maxes
+        i = bisect_left(maxes, prefix)
+        if i == len(maxes):
+            return
+        j = bisect_left(self._blocks[i], prefix)
+        postings = self._postings
+        for block in self._blocks[i:]:
+            for key in block[j:] if j else block:
+                if not key.startswith(prefix):
+                    return
+                for ticket_id in postings[key]:
+                    yield key, ticket_id
+            j = 0
+
+
+class SearchIndex:
+    """Waiting tickets of one office, searchable by ID, name-word and user prefix."""
+
+    __slots__ = ("keys", "_names")
+
+    def __init__(self):
+        self.keys = PrefixIndex()
+        # ticket_id -> (its keys, its name words), to remove it by id and
+        # to check multi-word queries
+        self._names: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, ticket_id: str, name: str, user_id: str) -> None:
+        """O(w) for the w keys of one ticket (ID, user, name words, whole name), plus O(log k + BLOCK_LOAD) per new key."""
+        words = tuple(name_words(name))
+        keys = (_ID + _id_key(ticket_id), _USER + user_id.casefold(),
+                *[_NAME + word for word in words])
+        if len(words) > 1:
+            keys += (_FULL_NAME + " ".join(words),)
+        self._names[ticket_id] = (keys, words)
+        for key in keys:
+            self.keys.add(key, ticket_id)
+
+    def remove(self, ticket_id: str) -> bool:
+        """O(w), plus O(log k + BLOCK_LOAD) per key left empty - Drop a ticket. Returns whether it was indexed."""
+        entry = self._names.pop(ticket_id, None)
+        if entry is None:
+            return False
+        for key in entry[0]:
+            self.keys.remove(key, ticket_id)
+        return True
+
+    def search(self, query: str, limit: int = 10) -> List[str]:
+        """
+        O(log k + m) - Up to `limit` ticket IDs matching `query`, m being
+        the index entries read (the matches, plus those a multi-word query
+        filters out). See the module header for the order.
+        """
+        words = name_words(query)
+        if not words or limit < 1:
+            return []
+        found: List[str] = []
+        seen = set()
+
+        def take(pairs: Iterator[Tuple[str, str]], accept=None) -> bool:
+            for _, ticket_id in pairs:
+                if ticket_id in seen or (accept is not None and not accept(ticket_id)):
+                    continue
+                seen.add(ticket_id)
+                found.append(ticket_id)
+                if len(found) == limit:
+                    return True
+            return False
+
+        id_key = _id_key(query)
+        if id_key and take(self.keys.scan(_ID + id_key)):
+            return found
+
+        if len(words) > 1 and take(self.keys.scan(_FULL_NAME + " ".join(words))):
+            return found
+
+        anchor = max(words, key=len)
+        others = [word for word in words if word is not anchor]
+        accept = None
+        if others:
+            def accept(ticket_id: str) -> bool:
+                names = self._names[ticket_id][1]
+                return all(any(name.startswith(word) for name in names) for word in others)
+        if take(self.keys.scan(_NAME + anchor), accept):
+            return found
+
+        take(self.keys.scan(_USER + query.strip().casefold()))
+        return found
@@ -0,0 +1,404 @@
+# =============================================================================
+# sharding.py — Office-sharded, multi-process QueueManager.
+#
+# All queue state is partitioned by office_id, so offices can live in
+# separate processes and use separate cores. ShardedQueueManager starts N
+# worker processes, each owning one plain QueueManager, and routes calls to
+# them over a pipe per worker:
+#   - calls that name an office (issue, serve, get_queue, ...) go to the
+#     shard picked by a consistent-hash ring over office_id (HashRing), so
+#     adding a shard moves only ~1/N of the offices
+#   - calls that name a ticket go straight to the shard encoded in the
+#     ticket ID: each worker mints IDs with SequentialIdGenerator(shard=c),
+#     c being the shard number as one Crockford base32 char (max 32 shards)
+#   - whole-system reads (overview of every office, analytics, search
+#     without an office) fan out to all shards in parallel and merge
+# The router mirrors the QueueManager API app.py uses, so the HTTP layer
+# does not care which one it has. Tickets cross the pipe as detached copies.
+#
+# Workers push their issue/serve/cancel events onto one queue; a router
+# thread replays them to `listeners`, so ChangeFeed works unchanged.
+# With a data_dir every worker journals to its own <data_dir>/shard-NN.
+#
+# Workers are forked (POSIX only) so they do not re-import the web app.
+# Changing the shard count moves offices between shards; their journals do
+# not move with them, so keep the count fixed for a given data_dir.
+# =============================================================================
+
+import bisect
+import hashlib
+import multiprocessing
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .ids import SequentialIdGenerator, decode_base32, encode_base32
+from .models import Ticket
+from .queues import QueueManager
+
+MAX_SHARDS = 32
+
+
+def _point(key: str) -> int:
+    # Stable across processes, unlike hash().
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hashing of office ids onto shards, with virtual nodes."""
+
+    def __init__(self, shards: Iterable[int], vnodes: int = 64):
+        points = sorted((_point(f"shard-{shard}#{v}"), shard)
+                        for shard in shards for v in range(vnodes))
+        self._hashes = [h for h, _ in points]
+        self._shards = [shard for _, shard in points]
+        self._cache: Dict[str, int] = {}
+
+    def shard_for(self, office_id: str) -> int:
+        """O(log(N * vnodes)) on first sight of an office, O(1) after."""
+        shard = self._cache.get(office_id)
+        if shard is None:
+            i = bisect.bisect(self._hashes, _point(office_id)) % len(self._hashes)
+            shard = self._cache[office_id] = self._shards[i]
+        return shard
+
+
+def shard_prefix(shard: int) -> str:
+    return encode_base32(shard, 1)
+
+
+def _detach(value):
+    """Detached copies of any Tickets in a result, so it pickles on its own."""
+    if isinstance(value, Ticket):
+        return value.copy()
+    if isinstance(value, (list, tuple)):
+        return type(value)(_detach(v) for v in value)
+    return value
+
+
+def _stats(manager: QueueManager) -> Dict:
+    return {
+        'counter': manager.counter,
+        'promoted_count': manager.promoted_count,
+        'served_count': manager.served_count,
+        'total_wait_time_sum': manager.total_wait_time_sum,
+        'wait_stats': manager.wait_stats,
+    }
+
+
+def _get_ticket(manager: QueueManager, ticket_id: str) -> Optional[Ticket]:
+    ticket = manager.active_tickets_by_id.get(ticket_id)
+    return None if ticket is None else ticket.copy()
+
+
+# Worker-side helpers callable by name next to QueueManager's own methods
+_WORKER_CALLS = {'stats': _stats, 'get_ticket': _get_ticket}
+
+
+def _worker_main(conn, events, shard: int, data_dir: Optional[str], manager_options: Dict,
+                 journal_options: Dict) -> None:
+    """Serve requests for one shard until the router closes the pipe."""
+    id_generator = SequentialIdGenerator(shard=shard_prefix(shard))
+    journal = None
+    if data_dir:
+        from .journal import recover
+        manager, journal = recover(os.path.join(data_dir, f"shard-{shard:02d}"),
+                                   id_generator=id_generator, **manager_options,
+                                   **journal_options)
+    else:
+        manager = QueueManager(id_generator=id_generator, **manager_options)
+    if events is not None:
+        manager.listeners.append(lambda event, ticket: events.put((event, ticket.copy())))
+
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        method, args, kwargs = request
+        try:
+            helper = _WORKER_CALLS.get(method)
+            if helper is not None:
+                result = helper(manager, *args, **kwargs)
+            else:
+                result = getattr(manager, method)(*args, **kwargs)
+            reply = (True, _detach(result))
+        except Exception as e:
+            reply = (False, e)
+        conn.send(reply)
+
+    if journal is not None:
+        journal.close()
+    if events is not None:
+        events.close()
+        events.join_thread()
+
+
+class _RemoteTickets:
+    """Read-only stand-in for active_tickets_by_id: .get() asks the owning shard."""
+
+    def __init__(self, router: "ShardedQueueManager"):
+        self._router = router
+
+    def get(self, ticket_id: str, default=None) -> Optional[Ticket]:
+        shard = self._router.shard_of_ticket(ticket_id)
+        if shard is None:
+            return default
+        ticket = self._router._call(shard, 'get_ticket', ticket_id)
+        return default if ticket is None else ticket
+
+    def __getitem__(self, ticket_id: str) -> Ticket:
+        ticket = self.get(ticket_id)
+        if ticket is None:
+            raise KeyError(ticket_id)
+        return ticket
+
+    def __contains__(self, ticket_id: str) -> bool:
+        return self.get(ticket_id) is not None
+
+
+class ShardedQueueManager:
+    """
+    QueueManager API over N worker processes, one office shard each.
+    Call close() to stop the workers.
+    """
+
+    def __init__(self, shards: Optional[int] = None, data_dir: Optional[str] = None,
+                 events: bool = True, vnodes: int = 64, estimator=None, engine: str = "heap",
+                 aging: Optional[Dict[int, float]] = None,
+                 office_engines: Optional[Dict[str, str]] = None,
+                 ttl: Optional[Dict[str, float]] = None, no_show_grace: Optional[float] = None,
+                 search: bool = False, **journal_options):
+        shards = shards or os.cpu_count() or 1
+        if not 1 <= shards <= MAX_SHARDS:
+            raise ValueError(f"Invalid shard count: {shards}")
+        if "fork" not in multiprocessing.get_all_start_methods():
+            raise ValueError("Sharded mode needs the 'fork' start method (POSIX)")
+        context = multiprocessing.get_context("fork")
+
+        self.shards = shards
+        self.ring = HashRing(range(shards), vnodes)
+        self.listeners: List[Callable[[str, Ticket], None]] = []
+        self.active_tickets_by_id = _RemoteTickets(self)
+        self.concurrency = "sharded"
+
+        manager_options = {'estimator': estimator, 'engine': engine, 'aging': aging,
+                           'office_engines': office_engines, 'ttl': ttl,
+                           'no_show_grace': no_show_grace, 'search': search}
+        self._events = context.Queue() if events else None
+        self._conns = []
+        self._locks = []
+        self._workers = []
+        for shard in range(shards):
+            parent, child = context.Pipe()
+            worker = context.Process(
+                target=_worker_main, name=f"noq-shard-{shard}", daemon=True,
+                args=(child, self._events, shard, data_dir, manager_options, journal_options))
+            worker.start()
+            child.close()
+            self._conns.append(parent)
+            self._locks.append(threading.Lock())
+            self._workers.append(worker)
+
+        self._pump = None
+        if events:
+            self._pump = threading.Thread(target=self._pump_events, name="noq-shard-events",
+                                          daemon=True)
+            self._pump.start()
+
+    # --- plumbing ---
+
+    def _call(self, shard: int, method: str, *args, **kwargs):
+        """One request/response round trip to a shard."""
+        with self._locks[shard]:
+            self._conns[shard].send((method, args, kwargs))
+            ok, value = self._conns[shard].recv()
+        if not ok:
+            raise value
+        return value
+
+    def _call_all(self, method: str, *args, **kwargs) -> List:
+        """The same call on every shard, sent to all before waiting on any."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            for conn in self._conns:
+                conn.send((method, args, kwargs))
+            replies = [conn.recv() for conn in self._conns]
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+        for ok, value in replies:
+            if not ok:
+                raise value
+        return [value for _, value in replies]
+
+    def _pump_events(self) -> None:
+        while True:
+            item = self._events.get()
+            if item is None:
+                return
+            event, ticket = item
+            for listener in list(self.listeners):
+                listener(event, ticket)
+
+    def shard_for_office(self, office_id: str) -> int:
+        return self.ring.shard_for(office_id)
+
+    def shard_of_ticket(self, ticket_id: str) -> Optional[int]:
+        """O(1) - The shard that minted `ticket_id`, or None if it is not a sharded ID."""
+        if not ticket_id:
+            return None
+        try:
+            shard = decode_base32(ticket_id[0])
+        except ValueError:
+            return None
+        return shard if shard < self.shards else None
+
+    def close(self) -> None:
+        for shard, conn in enumerate(self._conns):
+            with self._locks[shard]:
+                try:
+                    conn.send(None)
+                except OSError:
+                    pass
+        for worker in self._workers:
+            worker.join(timeout=5)
+        if self._pump is not None:
+            self._events.put(None)
+            self._pump.join(timeout=5)
+
+    # --- QueueManager API ---
+
+    def issue_ticket(self, user_id: str, name: str, service: str,
+                     priority_level: int = 0, expected_minutes: int = 10,
+                     office_id: str = "default") -> Ticket:
+        return self._call(self.shard_for_office(office_id), 'issue_ticket', user_id, name,
+                          service, priority_level, expected_minutes, office_id)
+
+    def issue_tickets_bulk(self, requests: List[Dict]) -> List[Tuple[Ticket, int, int]]:
+        """
+        Per-shard bulk issue. Each shard's part is all-or-nothing on its own;
+        if one shard rejects its part, tickets already issued on the other
+        shards are cancelled again before the error is raised.
+        """
+        by_shard: Dict[int, List[int]] = {}
+        for i, req in enumerate(requests):
+            shard = self.shard_for_office(req.get('office_id', 'default'))
+            by_shard.setdefault(shard, []).append(i)
+
+        results: List = [None] * len(requests)
+        issued: List[Ticket] = []
+        try:
+            for shard, indexes in by_shard.items():
+                part = self._call(shard, 'issue_tickets_bulk', [requests[i] for i in indexes])
+                for i, entry in zip(indexes, part):
+                    results[i] = entry
+                    issued.append(entry[0])
+        except Exception:
+            for ticket in issued:
+                self.cancel_ticket(ticket.ticket_id)
+            raise
+        return results
+
+    def serve_next(self, office_id: str, service: str) -> Optional[Ticket]:
+        return self._call(self.shard_for_office(office_id), 'serve_next', office_id, service)
+
+    def cancel_ticket(self, ticket_id: str) -> Optional[Ticket]:
+        shard = self.shard_of_ticket(ticket_id)
+        if shard is None:
+            return None
+        return self._call(shard, 'cancel_ticket', ticket_id)
+
+    def get_position(self, ticket_id: str) -> Tuple[int, int]:
+        shard = self.shard_of_ticket(ticket_id)
+        if shard is None:
+            return -1, 0
+        return self._call(shard, 'get_position', ticket_id)
+
+    def get_positions(self, ticket_ids: List[str]) -> Dict[str, Tuple[int, int]]:
+        by_shard: Dict[int, List[str]] = {}
+        result: Dict[str, Tuple[int, int]] = {}
+        for tid in ticket_ids:
+            shard = self.shard_of_ticket(tid)
+            if shard is None:
+                result[tid] = (-1, 0)
+            else:
+                by_shard.setdefault(shard, []).append(tid)
+        for shard, ids in by_shard.items():
+            result.update(self._call(shard, 'get_positions', ids))
+        return result
+
+    def get_queue(self, office_id: str, service: str, limit: int = 50,
+                  cursor: Optional[str] = None) -> Tuple[List[Ticket], Optional[str]]:
+        return self._call(self.shard_for_office(office_id), 'get_queue', office_id, service,
+                          limit, cursor)
+
+    def get_queue_overview(self, office_id: Optional[str] = None) -> List[Dict]:
+        if office_id is not None:
+            return self._call(self.shard_for_office(office_id), 'get_queue_overview', office_id)
+        rows = [row for part in self._call_all('get_queue_overview') for row in part]
+        rows.sort(key=lambda row: row['office_id'])  # stable: services keep their order
+        return rows
+
+    def search(self, query: str, office_id: Optional[str] = None,
+               limit: int = 10) -> List[Tuple[Ticket, int, int]]:
+        if office_id is not None:
+            return self._call(self.shard_for_office(office_id), 'search', query, office_id, limit)
+        # Offices are disjoint: concatenate by office, as QueueManager orders them
+        results = [entry for part in self._call_all('search', query, None, limit) for entry in part]
+        results.sort(key=lambda entry: entry[0].office_id)  # stable within an office
+        return results[:limit]
+
+    def set_active_desks(self, office_id: str, service: str, desks: int) -> None:
+        self._call(self.shard_for_office(office_id), 'set_active_desks', office_id, service, desks)
+
+    def age_queues(self, now: Optional[float] = None) -> int:
+        return sum(self._call_all('age_queues', now))
+
+    def expire_due(self, now: Optional[float] = None) -> int:
+        return sum(self._call_all('expire_due', now))
+
+    def confirm_arrival(self, ticket_id: str) -> bool:
+        shard = self.shard_of_ticket(ticket_id)
+        if shard is None:
+            return False
+        return self._call(shard, 'confirm_arrival', ticket_id)
+
+    # --- merged read-only views for analytics.py ---
+
+    def _merged_stats(self) -> Dict:
+        merged = {'counter': 0, 'promoted_count': 0, 'served_count': {},
+                  'total_wait_time_sum': {}, 'wait_stats': {}}
+        for part in self._call_all('stats'):
+            merged['counter'] += part['counter']
+            merged['promoted_count'] += part['promoted_count']
+            for service, count in part['served_count'].items():
+                merged['served_count'][service] = merged['served_count'].get(service, 0) + count
+            for service, total in part['total_wait_time_sum'].items():
+                merged['total_wait_time_sum'][service] = \
+                    merged['total_wait_time_sum'].get(service, 0.0) + total
+            merged['wait_stats'].update(part['wait_stats'])  # offices are disjoint
+        return merged
+
+    @property
+    def counter(self) -> int:
+        return self._merged_stats()['counter']
+
+    @property
+    def promoted_count(self) -> int:
+        return self._merged_stats()['promoted_count']
+
+    @property
+    def served_count(self) -> Dict[str, int]:
+        return self._merged_stats()['served_count']
+
+    @property
+    def total_wait_time_sum(self) -> Dict[str, float]:
+        return self._merged_stats()['total_wait_time_sum']
+
+    @property
+    def wait_stats(self) -> Dict:
+        return self._merged_stats()['wait_stats']
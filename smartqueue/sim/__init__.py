@@ -0,0 +1,2 @@
+from .processes import PoissonArrivals, TraceArrivals, ExponentialService, EmpiricalService
+from .engine import Simulation, SimulationResult, sweep
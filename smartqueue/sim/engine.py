@@ -0,0 +1,192 @@
+# =============================================================================
+# engine.py — Discrete-event simulation of one office on a real QueueManager.
+#
+# Simulation drives issue_ticket / serve_next with simulated time: the
+# manager is built with a ManualClock (see utils.py), and the event loop
+# sets it to each event's time before calling in, so issue and serve times,
+# wait stats and estimators all see simulated seconds. A week of arrivals
+# runs as fast as the manager can take the calls.
+#
+#   - Arrivals and service durations are drawn up front, per service, by the
+#     processes in processes.py (one NumPy call each), then merged into one
+#     time-ordered stream.
+#   - Each service has its own pool of desks (`desks`: service -> count).
+#     An arrival that finds a free desk is served at once; a desk that
+#     finishes calls serve_next on its queue or goes idle. Completions are
+#     a heap of (finish time, service).
+#   - The office closes at the horizon: whoever is still waiting then is
+#     reported as unserved.
+#
+# sweep() runs copies of one Simulation with different desk counts on a
+# process pool, one run per process.
+# =============================================================================
+
+import heapq
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ..models import ServiceType
+from ..queues import QueueManager
+from ..utils import ManualClock
+
+SECONDS_PER_DAY = 86_400.0
+# Default start of simulated time: Monday 2024-01-01 00:00 UTC, so hourly
+# profiles of 168 entries line up with weekdays.
+DEFAULT_START = 1_704_067_200.0
+
+
+class SimulationResult:
+    """Per-service waits (minutes) of one run, plus what was left waiting."""
+
+    def __init__(self, desks: Dict[str, int], days: float, waits: Dict[str, np.ndarray],
+                 unserved: Dict[str, int], elapsed: float):
+        self.desks = desks
+        self.days = days
+        self.waits = waits
+        self.unserved = unserved
+        # Wall-clock seconds the run took
+        self.elapsed = elapsed
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        O(n log n) - served, unserved, mean, p50, p90, p99 and max wait
+        (minutes) per service, and over all services under 'all'.
+        """
+        report = {}
+        everyone = np.concatenate(list(self.waits.values())) if self.waits else np.empty(0)
+        for service, waits in [*self.waits.items(), ('all', everyone)]:
+            unserved = (sum(self.unserved.values()) if service == 'all'
+                        else self.unserved.get(service, 0))
+            entry = {'served': int(len(waits)), 'unserved': unserved}
+            if len(waits):
+                p50, p90, p99 = np.percentile(waits, [50, 90, 99])
+                entry.update({'mean': float(waits.mean()), 'p50': float(p50),
+                              'p90': float(p90), 'p99': float(p99), 'max': float(waits.max())})
+            report[service] = entry
+        return report
+
+
+class Simulation:
+    """
+    One office over `days` simulated days. `arrivals` and `service_times`
+    map a service to its processes; `desks` maps it to its desk count.
+    `priority_share` is the fraction of a service's arrivals issued at
+    priority level 1. `manager_options` are passed to QueueManager.
+    """
+
+    def __init__(self, arrivals: Dict[str, object], service_times: Dict[str, object],
+                 desks: Dict[str, int], days: float = 7.0, seed: int = 0,
+                 start: float = DEFAULT_START, priority_share: Optional[Dict[str, float]] = None,
+                 manager_options: Optional[Dict] = None):
+        for service in arrivals:
+            try:
+                ServiceType(service)
+            except ValueError:
+                raise ValueError(f"Invalid service type: {service}")
+            if service not in service_times:
+                raise ValueError(f"No service-time process for {service}")
+            if desks.get(service, 0) < 0:
+                raise ValueError(f"Invalid desk count for {service}: {desks[service]}")
+        if days <= 0:
+            raise ValueError(f"Invalid simulation length: {days} days")
+        self.arrivals = arrivals
+        self.service_times = service_times
+        self.desks = dict(desks)
+        self.days = days
+        self.seed = seed
+        self.start = start
+        self.priority_share = dict(priority_share or {})
+        self.manager_options = dict(manager_options or {})
+
+    def with_desks(self, desks: Dict[str, int]) -> "Simulation":
+        """A copy with other desk counts (same seed, so the same arrivals)."""
+        return Simulation(self.arrivals, self.service_times, desks, self.days, self.seed,
+                          self.start, self.priority_share, self.manager_options)
+
+    def _draw(self, rng: np.random.Generator, horizon: float):
+        """Merged arrival stream: (times, service index, priority, durations) lists."""
+        services = list(self.arrivals)
+        times, codes, priorities, durations = [], [], [], []
+        for code, service in enumerate(services):
+            arrived = self.arrivals[service].times(rng, horizon)
+            times.append(arrived)
+            codes.append(np.full(len(arrived), code, dtype=np.int64))
+            share = self.priority_share.get(service, 0.0)
+            priorities.append((rng.random(len(arrived)) < share).astype(np.int64))
+            durations.append(self.service_times[service].sample(rng, len(arrived)))
+        times = np.concatenate(times)
+        order = np.argsort(times, kind="stable")
+        return (services, times[order].tolist(), np.concatenate(codes)[order].tolist(),
+                np.concatenate(priorities)[order].tolist(),
+                np.concatenate(durations)[order].tolist())
+
+    def run(self) -> SimulationResult:
+        """O(n log n) for n arrivals - Run the office and collect waits."""
+        began = time.perf_counter()
+        rng = np.random.default_rng(self.seed)
+        horizon = self.days * SECONDS_PER_DAY
+        services, times, codes, priorities, durations = self._draw(rng, horizon)
+
+        clock = ManualClock(self.start)
+        manager = QueueManager(clock=clock, **self.manager_options)
+        office = "sim"
+        idle = [self.desks.get(service, 0) for service in services]
+        busy: List = []                       # (finish time, service index)
+        duration_of: Dict[str, float] = {}    # waiting ticket_id -> its service time
+        waits: List[List[float]] = [[] for _ in services]
+        start = self.start
+
+        def serve(code: int, now: float) -> None:
+            ticket = manager.serve_next(office, services[code])
+            if ticket is None:
+                idle[code] += 1
+                return
+            waits[code].append((now - ticket.issued_ts) / 60.0)
+            heapq.heappush(busy, (now + duration_of.pop(ticket.ticket_id), code))
+
+        for i, offset in enumerate(times):
+            now = start + offset
+            while busy and busy[0][0] <= now:
+                finished, code = heapq.heappop(busy)
+                clock.now = finished
+                serve(code, finished)
+            clock.now = now
+            code = codes[i]
+            ticket = manager.issue_ticket(str(i), "Sim", services[code], priorities[i],
+                                          office_id=office)
+            duration_of[ticket.ticket_id] = durations[i]
+            if idle[code]:
+                idle[code] -= 1
+                serve(code, now)
+
+        closing = start + horizon
+        while busy and busy[0][0] <= closing:
+            finished, code = heapq.heappop(busy)
+            clock.now = finished
+            serve(code, finished)
+
+        unserved = {service: manager.waiting_count.get((office, service), 0)
+                    for service in services}
+        return SimulationResult(self.desks, self.days,
+                                {service: np.asarray(waits[code])
+                                 for code, service in enumerate(services)},
+                                unserved, time.perf_counter() - began)
+
+
+def _run(simulation: Simulation) -> SimulationResult:
+    return simulation.run()
+
+
+def sweep(simulation: Simulation, desk_options: Iterable[Dict[str, int]],
+          workers: Optional[int] = None) -> List[SimulationResult]:
+    """
+    Run `simulation` once per desk configuration, in parallel on a process
+    pool of `workers` processes (default: one per CPU). Results come back
+    in the order of desk_options.
+    """
+    runs = [simulation.with_desks(desks) for desks in desk_options]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run, runs))
@@ -0,0 +1,93 @@
+# =============================================================================
+# processes.py — Arrival and service-time processes for the simulator.
+#
+# Every process draws a whole run's worth of values in one NumPy call, so
+# the event loop in engine.py only walks plain lists:
+#   - PoissonArrivals: homogeneous Poisson arrivals at rate_per_hour, or a
+#     non-homogeneous one shaped by an hourly profile (24 entries for a daily
+#     pattern, 168 for a weekly one), generated at the peak rate and thinned.
+#   - TraceArrivals: an empirical trace of arrival offsets (e.g. one recorded
+#     day), optionally tiled every `period` seconds over the horizon.
+#   - ExponentialService / EmpiricalService: service durations, either
+#     exponential around a mean or resampled from observed minutes.
+#
+# Times are seconds from the start of the simulation.
+# =============================================================================
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+SECONDS_PER_HOUR = 3600.0
+
+
+class PoissonArrivals:
+    """Poisson arrivals, optionally with an hour-by-hour rate profile."""
+
+    def __init__(self, rate_per_hour: float, profile: Optional[Sequence[float]] = None):
+        if rate_per_hour < 0:
+            raise ValueError(f"Invalid arrival rate: {rate_per_hour}")
+        self.rate_per_hour = rate_per_hour
+        self.profile = None if profile is None else np.asarray(profile, dtype=float)
+        if self.profile is not None and (not len(self.profile) or self.profile.min() < 0):
+            raise ValueError("Arrival profile needs non-negative hourly multipliers")
+
+    def times(self, rng: np.random.Generator, horizon: float) -> np.ndarray:
+        """O(n log n) - Sorted arrival times in [0, horizon)."""
+        peak = self.rate_per_hour * (1.0 if self.profile is None else self.profile.max())
+        if peak <= 0:
+            return np.empty(0)
+        # Given their count, Poisson arrival times are uniform order statistics.
+        count = rng.poisson(peak * horizon / SECONDS_PER_HOUR)
+        times = np.sort(rng.uniform(0.0, horizon, count))
+        if self.profile is not None:
+            hours = (times // SECONDS_PER_HOUR).astype(np.int64) % len(self.profile)
+            keep = rng.random(len(times)) * self.profile.max() < self.profile[hours]
+            times = times[keep]
+        return times
+
+
+class TraceArrivals:
+    """Arrivals replayed from recorded offsets (seconds), tiled every `period`."""
+
+    def __init__(self, offsets: Sequence[float], period: Optional[float] = None):
+        self.offsets = np.sort(np.asarray(offsets, dtype=float))
+        if period is not None and period <= 0:
+            raise ValueError(f"Invalid trace period: {period}")
+        if period is not None and len(self.offsets) and self.offsets[-1] >= period:
+            raise ValueError("Trace offsets must fall inside one period")
+        self.period = period
+
+    def times(self, rng: np.random.Generator, horizon: float) -> np.ndarray:
+        """O(n) - Sorted arrival times in [0, horizon)."""
+        offsets = self.offsets
+        if self.period is not None:
+            starts = np.arange(0.0, horizon, self.period)
+            offsets = (starts[:, None] + offsets[None, :]).ravel()
+        return offsets[(offsets >= 0) & (offsets < horizon)]
+
+
+class ExponentialService:
+    """Exponentially distributed service time around mean_minutes."""
+
+    def __init__(self, mean_minutes: float):
+        if mean_minutes <= 0:
+            raise ValueError(f"Invalid mean service time: {mean_minutes}")
+        self.mean_minutes = mean_minutes
+
+    def sample(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        """O(n) - `count` durations in seconds."""
+        return rng.exponential(self.mean_minutes * 60.0, count)
+
+
+class EmpiricalService:
+    """Service times resampled (with replacement) from observed minutes."""
+
+    def __init__(self, minutes: Sequence[float]):
+        self.minutes = np.asarray(minutes, dtype=float)
+        if not len(self.minutes) or self.minutes.min() < 0:
+            raise ValueError("Empirical service times need non-negative samples")
+
+    def sample(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        """O(n) - `count` durations in seconds."""
+        return rng.choice(self.minutes, count) * 60.0
@@ -0,0 +1,174 @@
+# =============================================================================
+# sketches.py — Constant-memory wait-time statistics per queue.
+#
+# QueueManager keeps one WaitStats per (office, service) and feeds it every
+# served ticket's wait from serve_next. Nothing per ticket is stored:
+#   - P2Quantile: the P² algorithm (Jain & Chlamtac, 1985). Five markers
+#     track one quantile with O(1) update and O(1) memory; WaitStats keeps
+#     one each for p50, p90 and p99.
+#   - RollingWindow: a fixed ring of time buckets (count, total, max). Old
+#     buckets are recycled in place when the clock wraps around, so the
+#     window "forgets" without any cleanup pass.
+#     A 60 x 1-minute ring answers the 15-minute and 1-hour windows; a
+#     96 x 15-minute ring answers the 24-hour window.
+#
+# Quantiles are estimates (exact for the first five samples); window edges
+# are rounded to the ring's bucket width.
+# =============================================================================
+
+from typing import Dict, List, Tuple
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile in O(1) time and memory."""
+
+    __slots__ = ("p", "count", "heights", "positions", "desired", "increments")
+
+    def __init__(self, p: float):
+        self.p = p
+        self.count = 0
+        self.heights: List[float] = []     # marker heights q0..q4
+        self.positions = [0, 1, 2, 3, 4]   # actual marker positions
+        self.desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self.increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, x: float) -> None:
+        """O(1) - Add one observation."""
+        self.count += 1
+        q = self.heights
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+
+        # Find the cell containing x, stretching the extremes if needed.
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+
+        n = self.positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Nudge the three middle markers toward their desired positions.
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                candidate = self._parabolic(i, step)
+                if q[i - 1] < candidate < q[i + 1]:
+                    q[i] = candidate
+                else:
+                    q[i] = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                n[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self) -> float:
+        """O(1) - Current estimate (0.0 before any observation)."""
+        if self.count == 0:
+            return 0.0
+        if self.count <= 5:
+            return self.heights[round(self.p * (self.count - 1))]
+        return self.heights[2]
+
+
+class RollingWindow:
+    """Ring of `buckets` time buckets, each `width` seconds wide."""
+
+    __slots__ = ("width", "stamps", "counts", "totals", "maxes")
+
+    def __init__(self, buckets: int, width: float):
+        self.width = width
+        self.stamps = [-1] * buckets       # absolute bucket number held in each slot
+        self.counts = [0] * buckets
+        self.totals = [0.0] * buckets
+        self.maxes = [0.0] * buckets
+
+    def add(self, value: float, now: float) -> None:
+        """O(1) - Record `value` at epoch time `now`."""
+        stamp = int(now // self.width)
+        i = stamp % len(self.stamps)
+        if self.stamps[i] != stamp:
+            # Slot still holds an older lap of the ring: recycle it.
+            self.stamps[i] = stamp
+            self.counts[i] = 0
+            self.totals[i] = 0.0
+            self.maxes[i] = 0.0
+        self.counts[i] += 1
+        self.totals[i] += value
+        if value > self.maxes[i]:
+            self.maxes[i] = value
+
+    def summary(self, span: float, now: float) -> Tuple[int, float, float]:
+        """O(span / width) - (count, total, max) over the last `span` seconds."""
+        current = int(now // self.width)
+        n = min(len(self.stamps), max(1, int(-(-span // self.width))))
+        count, total, peak = 0, 0.0, 0.0
+        for stamp in range(current - n + 1, current + 1):
+            i = stamp % len(self.stamps)
+            if self.stamps[i] == stamp:
+                count += self.counts[i]
+                total += self.totals[i]
+                peak = max(peak, self.maxes[i])
+        return count, total, peak
+
+
+class WaitStats:
+    """Quantile sketches and time-windowed rollups for one queue's waits."""
+
+    # name -> (which ring, span in seconds)
+    WINDOWS = {"15m": ("minutes", 15 * 60), "1h": ("minutes", 3600), "24h": ("quarters", 86400)}
+
+    __slots__ = ("count", "total", "quantiles", "minutes", "quarters")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.quantiles = [P2Quantile(p) for p in QUANTILES]
+        self.minutes = RollingWindow(60, 60.0)
+        self.quarters = RollingWindow(96, 900.0)
+
+    def add(self, wait_minutes: float, now: float) -> None:
+        """O(1) - Record one served ticket's wait, served at epoch `now`."""
+        self.count += 1
+        self.total += wait_minutes
+        for sketch in self.quantiles:
+            sketch.add(wait_minutes)
+        self.minutes.add(wait_minutes, now)
+        self.quarters.add(wait_minutes, now)
+
+    def summary(self, now: float) -> Dict:
+        """O(ring size) - All-time mean/percentiles plus the rolling windows."""
+        report = {
+            'served': self.count,
+            'avg_wait': self.total / self.count if self.count else 0.0,
+        }
+        for p, sketch in zip(QUANTILES, self.quantiles):
+            report[f"p{round(p * 100)}"] = sketch.value()
+
+        windows = {}
+        for name, (ring, span) in self.WINDOWS.items():
+            count, total, peak = getattr(self, ring).summary(span, now)
+            windows[name] = {
+                'served': count,
+                'avg_wait': total / count if count else 0.0,
+                'max_wait': peak,
+            }
+        report['windows'] = windows
+        return report
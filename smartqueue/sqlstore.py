@@ -0,0 +1,502 @@
+# =============================================================================
+# sqlstore.py — QueueManager API on an embedded SQLite database.
+#
+# QueueManager keeps every queue in one process's memory, so N web workers
+# (gunicorn -w N) would each see their own queues. SQLiteQueueManager stores
+# the queues in one SQLite file instead: every worker opens it and they all
+# see the same tickets. Like ShardedQueueManager it mirrors the QueueManager
+# API app.py uses, so the HTTP layer picks a storage backend by constructing
+# one or the other:
+#   - QueueManager        in-memory heap/deque (or buckets), one process
+#   - SQLiteQueueManager  shared file, any number of processes and threads
+#
+# Schema (created on first open):
+#     tickets  one row per ticket ever issued; seq is the rowid, so it is the
+#              global arrival order. A partial index over the WAITING rows on
+#              (office_id, service, priority DESC, seq) is the queue itself:
+#              its first entry is the next ticket to serve, and served rows
+#              drop out of it. priority is stored as the ticket's lane
+#              (QueueIndex.level_for), so priority <= 0 is all one FIFO lane
+#              as in memory. A partial unique index enforces one waiting
+#              ticket per (office, user, service).
+#     queues   live waiting_count / waiting_minutes and served totals per
+#              (office, service), kept by triggers on tickets, so the
+#              overview never counts rows.
+#     offices  per-office ID code and daily sequence, so IDs keep the
+#              SequentialIdGenerator format (see ids.py) across processes.
+#
+# Concurrency: WAL mode lets readers run alongside the single writer.
+# serve_next and cancel_ticket are one `UPDATE ... RETURNING` statement
+# each, i.e. one implicit transaction, so two desks can never get the same
+# ticket. Issues take BEGIN IMMEDIATE (write lock up front, no deadlocking
+# upgrade) around the uniqueness check, the ID counter and the insert.
+# Writers queue on SQLite's busy timeout. Each thread gets its own
+# connection (opened lazily, and again after a fork); SQL text is constant,
+# so the sqlite3 module's per-connection statement cache prepares each
+# statement once.
+#
+# Not carried over from QueueManager: the bucket engine and aging, expiry
+# timers, the journal (SQLite is the durable copy) and per-queue wait
+# sketches. Listeners only hear about changes made through this process's
+# manager; ETA is the estimator's view of the expected minutes ahead.
+# =============================================================================
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .estimators import ExpectedMinutesEstimator
+from .ids import DAY_EPOCH, DAY_WIDTH, OFFICE_WIDTH, SEQ_WIDTH, encode_base32
+from .index import MAX_PRIORITY_LEVEL, QueueIndex
+from .models import Ticket, ServiceType, SERVICE_CODES, STATUS_CODES
+from .utils import get_current_epoch
+
+SYNCHRONOUS = ("OFF", "NORMAL", "FULL")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    seq              INTEGER PRIMARY KEY,
+    ticket_id        TEXT NOT NULL UNIQUE,
+    user_id          TEXT NOT NULL,
+    name             TEXT NOT NULL,
+    service          TEXT NOT NULL,
+    office_id        TEXT NOT NULL,
+    issued_ts        REAL NOT NULL,
+    expected_minutes INTEGER NOT NULL,
+    priority         INTEGER NOT NULL,
+    status           TEXT NOT NULL,
+    served_ts        REAL NOT NULL DEFAULT 0.0
+);
+CREATE INDEX IF NOT EXISTS tickets_waiting
+    ON tickets (office_id, service, priority DESC, seq) WHERE status = 'WAITING';
+CREATE UNIQUE INDEX IF NOT EXISTS tickets_waiting_user
+    ON tickets (office_id, user_id, service) WHERE status = 'WAITING';
+
+CREATE TABLE IF NOT EXISTS queues (
+    office_id        TEXT NOT NULL,
+    service          TEXT NOT NULL,
+    waiting_count    INTEGER NOT NULL DEFAULT 0,
+    waiting_minutes  INTEGER NOT NULL DEFAULT 0,
+    served_count     INTEGER NOT NULL DEFAULT 0,
+    wait_minutes_sum REAL NOT NULL DEFAULT 0.0,
+    PRIMARY KEY (office_id, service)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS offices (
+    office_id        TEXT PRIMARY KEY,
+    code             INTEGER NOT NULL,
+    day              INTEGER NOT NULL,
+    next_seq         INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS ticket_issued AFTER INSERT ON tickets BEGIN
+    INSERT INTO queues (office_id, service, waiting_count, waiting_minutes)
+    VALUES (NEW.office_id, NEW.service, 1, NEW.expected_minutes)
+    ON CONFLICT (office_id, service) DO UPDATE SET
+        waiting_count = waiting_count + 1,
+        waiting_minutes = waiting_minutes + NEW.expected_minutes;
+END;
+
+CREATE TRIGGER IF NOT EXISTS ticket_left AFTER UPDATE OF status ON tickets
+WHEN OLD.status = 'WAITING' AND NEW.status != 'WAITING' BEGIN
+    UPDATE queues SET
+        waiting_count = waiting_count - 1,
+        waiting_minutes = waiting_minutes - OLD.expected_minutes,
+        served_count = served_count + (NEW.status = 'SERVED'),
+        wait_minutes_sum = wait_minutes_sum + CASE WHEN NEW.status = 'SERVED'
+            THEN (NEW.served_ts - NEW.issued_ts) / 60.0 ELSE 0.0 END
+    WHERE office_id = OLD.office_id AND service = OLD.service;
+END;
+"""
+
+# Column order of a Ticket row (see models.py F_*)
+_COLUMNS = ("ticket_id, user_id, name, service, office_id, issued_ts, expected_minutes, "
+            "priority, status, seq, served_ts")
+
+_GET_WAITING = f"SELECT {_COLUMNS} FROM tickets WHERE ticket_id = ? AND status = 'WAITING'"
+_GET_USER_TICKET = ("SELECT ticket_id FROM tickets WHERE office_id = ? AND user_id = ? "
+                    "AND service = ? AND status = 'WAITING'")
+_NEXT_OFFICE_SEQ = """
+INSERT INTO offices (office_id, code, day, next_seq)
+VALUES (?, (SELECT COUNT(*) FROM offices), ?, 1)
+ON CONFLICT (office_id) DO UPDATE SET
+    next_seq = CASE WHEN day < excluded.day THEN 1 ELSE next_seq + 1 END,
+    day = MAX(day, excluded.day)
+RETURNING code, day, next_seq - 1
+"""
+_INSERT = f"""
+INSERT INTO tickets (ticket_id, user_id, name, service, office_id, issued_ts,
+                     expected_minutes, priority, status)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'WAITING')
+RETURNING {_COLUMNS}
+"""
+_SERVE_NEXT = f"""
+UPDATE tickets SET status = 'SERVED', served_ts = ?
+WHERE seq = (SELECT seq FROM tickets
+             WHERE office_id = ? AND service = ? AND status = 'WAITING'
+             ORDER BY priority DESC, seq LIMIT 1)
+RETURNING {_COLUMNS}
+"""
+_PEEK_NEXT = f"""
+SELECT {_COLUMNS} FROM tickets
+WHERE office_id = ? AND service = ? AND status = 'WAITING'
+ORDER BY priority DESC, seq LIMIT 1
+"""
+_CANCEL = f"""
+UPDATE tickets SET status = 'CANCELLED' WHERE ticket_id = ? AND status = 'WAITING'
+RETURNING {_COLUMNS}
+"""
+# Two index range scans: higher levels, then earlier arrivals at the same level
+_AHEAD = """
+SELECT COUNT(*), COALESCE(SUM(expected_minutes), 0) FROM (
+    SELECT expected_minutes FROM tickets
+    WHERE office_id = ? AND service = ? AND status = 'WAITING' AND priority > ?
+    UNION ALL
+    SELECT expected_minutes FROM tickets
+    WHERE office_id = ? AND service = ? AND status = 'WAITING' AND priority = ? AND seq < ?)
+"""
+# A page after cursor (level, seq): the rest of that level, then lower levels
+_PAGE_SAME_LEVEL = f"""
+SELECT {_COLUMNS} FROM tickets
+WHERE office_id = ? AND service = ? AND status = 'WAITING' AND priority = ? AND seq > ?
+ORDER BY seq LIMIT ?
+"""
+_PAGE_LOWER_LEVELS = f"""
+SELECT {_COLUMNS} FROM tickets
+WHERE office_id = ? AND service = ? AND status = 'WAITING' AND priority < ?
+ORDER BY priority DESC, seq LIMIT ?
+"""
+_FIRST_PAGE = f"""
+SELECT {_COLUMNS} FROM tickets
+WHERE office_id = ? AND service = ? AND status = 'WAITING'
+ORDER BY priority DESC, seq LIMIT ?
+"""
+
+
+def _ticket(row) -> Ticket:
+    """O(1) - A detached Ticket from a tickets row."""
+    ticket = Ticket.__new__(Ticket)
+    ticket._store = None
+    ticket._handle = -1
+    ticket._row = [row[0], row[1], row[2], SERVICE_CODES[ServiceType(row[3])], row[4], row[5],
+                   row[6], row[7], STATUS_CODES[row[8]], row[9], row[10]]
+    return ticket
+
+
+class _WaitingTickets:
+    """Read-only stand-in for active_tickets_by_id: .get() reads the waiting row."""
+
+    def __init__(self, manager: "SQLiteQueueManager"):
+        self._manager = manager
+
+    def get(self, ticket_id: str, default=None) -> Optional[Ticket]:
+        row = self._manager._connection().execute(_GET_WAITING, (ticket_id,)).fetchone()
+        return default if row is None else _ticket(row)
+
+    def __getitem__(self, ticket_id: str) -> Ticket:
+        ticket = self.get(ticket_id)
+        if ticket is None:
+            raise KeyError(ticket_id)
+        return ticket
+
+    def __contains__(self, ticket_id: str) -> bool:
+        return self.get(ticket_id) is not None
+
+
+class SQLiteQueueManager:
+    """
+    QueueManager API over a SQLite database file shared by every process
+    that opens it. Call close() to close this process's connections.
+    """
+
+    def __init__(self, path: str, estimator=None, clock: Optional[Callable[[], float]] = None,
+                 timeout: float = 30.0, synchronous: str = "NORMAL"):
+        synchronous = synchronous.upper()
+        if synchronous not in SYNCHRONOUS:
+            raise ValueError(f"Invalid synchronous mode: {synchronous}")
+        self.path = path
+        self.timeout = timeout
+        self.synchronous = synchronous
+        self.estimator = estimator or ExpectedMinutesEstimator()
+        self.clock = clock or get_current_epoch
+        self.listeners: List[Callable[[str, Ticket], None]] = []
+        self.active_tickets_by_id = _WaitingTickets(self)
+        self.concurrency = "sqlite"
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+
+    # --- plumbing ---
+
+    def _connection(self) -> sqlite3.Connection:
+        """O(1) - This thread's connection, opened on first use (and again in a forked child)."""
+        local = self._local
+        conn = getattr(local, "conn", None)
+        if conn is None or local.pid != os.getpid():
+            # Autocommit: statements outside BEGIN are their own transaction.
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            local.conn = conn
+            local.pid = os.getpid()
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """One write transaction, holding the database write lock from the start."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _notify(self, event: str, ticket: Ticket) -> None:
+        for listener in self.listeners:
+            listener(event, ticket)
+
+    def close(self) -> None:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        pid = os.getpid()
+        for conn in connections:
+            conn.close()
+        if getattr(self._local, "pid", None) == pid:
+            self._local.conn = None
+
+    # --- QueueManager API ---
+
+    def _check_request(self, service: str, priority_level: int) -> str:
+        try:
+            service_enum = ServiceType(service)
+        except ValueError:
+            raise ValueError(f"Invalid service type: {service}")
+        if priority_level > MAX_PRIORITY_LEVEL:
+            raise ValueError(f"Invalid priority level: {priority_level}")
+        return service_enum.value
+
+    def _insert(self, conn: sqlite3.Connection, user_id: str, name: str, service: str,
+                priority_level: int, expected_minutes: int, office_id: str,
+                issued_ts: float) -> Ticket:
+        """O(log n) - Check the user's slot, mint the ID and insert. Caller holds the write lock."""
+        existing = conn.execute(_GET_USER_TICKET, (office_id, user_id, service)).fetchone()
+        if existing is not None:
+            raise ValueError(f"User {user_id} already has an active ticket: {existing[0]}")
+
+        # Times before the day epoch (e.g. a simulation clock at 0) share day 0.
+        day = max(int(issued_ts // 86400) - DAY_EPOCH, 0)
+        code, day, seq = conn.execute(_NEXT_OFFICE_SEQ, (office_id, day)).fetchall()[0]
+        if code >= 32 ** OFFICE_WIDTH:
+            raise ValueError(f"Too many offices for one database: {code}")
+        ticket_id = (f"{encode_base32(code, OFFICE_WIDTH)}{encode_base32(day, DAY_WIDTH)}-"
+                     f"{encode_base32(seq, SEQ_WIDTH)}")
+        row = conn.execute(_INSERT, (ticket_id, user_id, name, service, office_id, issued_ts,
+                                     expected_minutes,
+                                     QueueIndex.level_for(priority_level))).fetchall()[0]
+        return _ticket(row)
+
+    def issue_ticket(self, user_id: str, name: str, service: str,
+                     priority_level: int = 0, expected_minutes: int = 10,
+                     office_id: str = "default") -> Ticket:
+        """
+        O(log n) - Issue a ticket in one BEGIN IMMEDIATE transaction: user
+        slot check, office ID counter and insert (the triggers update the
+        queue's counters).
+        """
+        service = self._check_request(service, priority_level)
+        with self._write() as conn:
+            ticket = self._insert(conn, user_id, name, service, priority_level,
+                                  expected_minutes, office_id, self.clock())
+        self._notify("issue", ticket)
+        return ticket
+
+    def issue_tickets_bulk(self, requests: List[Dict]) -> List[Tuple[Ticket, int, int]]:
+        """
+        O(k log n) - Issue many tickets in one transaction: a bad entry (or a
+        user who already waits) raises ValueError and rolls back the lot.
+        Returns [(ticket, position, est_minutes)] in request order.
+        """
+        parsed = []
+        seen = set()
+        for req in requests:
+            user_id = req.get('user_id')
+            if not user_id:
+                raise ValueError("Every bulk request needs a user_id")
+            priority_level = int(req.get('priority_level', 0))
+            service = self._check_request(req.get('service', 'passport'), priority_level)
+            office_id = req.get('office_id', 'default')
+            if (office_id, user_id, service) in seen:
+                raise ValueError(f"User {user_id} appears twice in the batch for {service}")
+            seen.add((office_id, user_id, service))
+            parsed.append((user_id, req.get('name', 'Guest'), service, priority_level,
+                           int(req.get('expected_minutes', 10)), office_id))
+
+        issued_ts = self.clock()
+        with self._write() as conn:
+            tickets = [self._insert(conn, *fields, issued_ts) for fields in parsed]
+            results = [(ticket, *self._position(conn, ticket)) for ticket in tickets]
+        for ticket in tickets:
+            self._notify("issue", ticket)
+        return results
+
+    def serve_next(self, office_id: str, service: str) -> Optional[Ticket]:
+        """
+        O(log n) - Serve the head of the queue: one UPDATE ... RETURNING
+        picks it off the waiting index and marks it SERVED atomically.
+        """
+        try:
+            service = ServiceType(service).value
+        except ValueError:
+            return None
+        rows = self._connection().execute(_SERVE_NEXT, (self.clock(), office_id, service)).fetchall()
+        if not rows:
+            return None  # Queue empty
+        ticket = _ticket(rows[0])
+        self._notify("serve", ticket)
+        return ticket
+
+    def peek_next(self, office_id: str, service: str) -> Optional[Ticket]:
+        """O(log n) - The ticket serve_next would serve now, without serving it."""
+        row = self._connection().execute(_PEEK_NEXT, (office_id, service)).fetchone()
+        return None if row is None else _ticket(row)
+
+    def cancel_ticket(self, ticket_id: str) -> Optional[Ticket]:
+        """O(log n) - Cancel a waiting ticket. Returns it, or None if it was not waiting."""
+        rows = self._connection().execute(_CANCEL, (ticket_id,)).fetchall()
+        if not rows:
+            return None
+        ticket = _ticket(rows[0])
+        self._notify("cancel", ticket)
+        return ticket
+
+    def confirm_arrival(self, ticket_id: str) -> bool:
+        """No no-show timers in this backend: nobody is ever awaiting confirmation."""
+        return False
+
+    def expire_due(self, now: Optional[float] = None) -> int:
+        return 0
+
+    def age_queues(self, now: Optional[float] = None) -> int:
+        return 0
+
+    def _position(self, conn: sqlite3.Connection, ticket: Ticket) -> Tuple[int, int]:
+        """O(log n + k) - (position, estimated minutes) of a waiting ticket, k = tickets ahead."""
+        office_id, service = ticket.office_id, ticket.service.value
+        level = ticket.priority_level
+        ahead, ahead_minutes = conn.execute(
+            _AHEAD, (office_id, service, level, office_id, service, level, ticket.seq)).fetchone()
+        return ahead + 1, self.estimator.estimate((office_id, service), ahead, ahead_minutes)
+
+    def get_position(self, ticket_id: str) -> Tuple[int, int]:
+        """
+        O(log n + k) - Position and estimated wait, counting the k tickets
+        ahead over the waiting index. Returns (-1, 0) if not waiting.
+        """
+        conn = self._connection()
+        row = conn.execute(_GET_WAITING, (ticket_id,)).fetchone()
+        if row is None:
+            return -1, 0
+        return self._position(conn, _ticket(row))
+
+    def get_positions(self, ticket_ids: List[str]) -> Dict[str, Tuple[int, int]]:
+        """get_position for many tickets; unknown or served ids map to (-1, 0)."""
+        return {tid: self.get_position(tid) for tid in ticket_ids}
+
+    def get_queue(self, office_id: str, service: str, limit: int = 50,
+                  cursor: Optional[str] = None) -> Tuple[List[Ticket], Optional[str]]:
+        """
+        O(log n + limit) - One page of waiting tickets in serve order, read
+        straight off the waiting index. Same "level:seq" cursors as QueueManager.
+        """
+        try:
+            service = ServiceType(service).value
+        except ValueError:
+            raise ValueError(f"Invalid service type: {service}")
+        if limit < 1:
+            raise ValueError(f"Invalid limit: {limit}")
+
+        conn = self._connection()
+        if cursor:
+            try:
+                level, seq = (int(part) for part in cursor.split(":"))
+            except ValueError:
+                raise ValueError(f"Invalid cursor: {cursor}")
+            rows = conn.execute(_PAGE_SAME_LEVEL, (office_id, service, level, seq, limit + 1)).fetchall()
+            if len(rows) <= limit:
+                rows += conn.execute(_PAGE_LOWER_LEVELS,
+                                     (office_id, service, level, limit + 1 - len(rows))).fetchall()
+        else:
+            rows = conn.execute(_FIRST_PAGE, (office_id, service, limit + 1)).fetchall()
+
+        tickets = [_ticket(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = tickets[-1]
+            next_cursor = f"{last.priority_level}:{last.seq}"
+        return tickets, next_cursor
+
+    def get_queue_overview(self, office_id: Optional[str] = None) -> List[Dict]:
+        """
+        O(offices * services) - Waiting counts and expected minutes per queue,
+        from the trigger-maintained queues table.
+        """
+        conn = self._connection()
+        if office_id is None:
+            rows = conn.execute("SELECT office_id, service, waiting_count, waiting_minutes "
+                                "FROM queues").fetchall()
+        else:
+            rows = conn.execute("SELECT office_id, service, waiting_count, waiting_minutes "
+                                "FROM queues WHERE office_id = ?", (office_id,)).fetchall()
+        counts = {(office, service): (count, minutes) for office, service, count, minutes in rows}
+        offices = [office_id] if office_id is not None else sorted({office for office, _ in counts})
+
+        overview = []
+        for office in offices:
+            for service_enum in ServiceType:
+                count, minutes = counts.get((office, service_enum.value), (0, 0))
+                overview.append({
+                    'office_id': office,
+                    'service': service_enum.value,
+                    'waiting_count': count,
+                    'waiting_minutes': minutes,
+                })
+        return overview
+
+    def set_active_desks(self, office_id: str, service: str, desks: int) -> None:
+        """O(1) - Tell this process's estimator how many desks are serving a queue."""
+        self.estimator.set_desks((office_id, service), desks)
+
+    # --- read-only views for analytics.py and metrics.py ---
+
+    @property
+    def counter(self) -> int:
+        return self._connection().execute("SELECT COALESCE(MAX(seq), 0) FROM tickets").fetchone()[0]
+
+    promoted_count = 0
+
+    def _served_totals(self) -> List[Tuple[str, int, float]]:
+        return self._connection().execute(
+            "SELECT service, SUM(served_count), SUM(wait_minutes_sum) FROM queues "
+            "GROUP BY service HAVING SUM(served_count) > 0").fetchall()
+
+    @property
+    def served_count(self) -> Dict[str, int]:
+        return {service: count for service, count, _ in self._served_totals()}
+
+    @property
+    def total_wait_time_sum(self) -> Dict[str, float]:
+        return {service: total for service, _, total in self._served_totals()}
+
+    @property
+    def wait_stats(self) -> Dict:
+        return {}
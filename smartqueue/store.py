@@ -0,0 +1,102 @@
+# =============================================================================
+# store.py — Columnar storage for the waiting tickets of a QueueManager.
+#
+# A regional deployment holds on the order of a million waiting tickets, so
+# per-ticket objects dominate memory. TicketStore keeps every waiting ticket
+# as one row across parallel columns instead:
+#   - numbers in typed arrays (array module): float epochs for issue/serve
+#     time, ints for minutes/priority/seq, one-byte service and status codes
+#   - strings in plain lists: ticket id, user id, name, and the office id,
+#     interned so every ticket of an office shares one string object
+# A row is addressed by an integer handle (its slot). Freed slots go on a
+# free list and are reused, so the columns stay as long as the peak number
+# of waiting tickets.
+#
+# QueueManager.active_tickets_by_id maps ids to Ticket views on these rows
+# (see models.py). release() copies a row back into its view before freeing
+# the slot, which is what lets serve_next return a readable ticket.
+#
+# Not thread-safe on its own: QueueManager calls create/adopt/release under
+# its sequence lock.
+# =============================================================================
+
+from array import array
+from typing import Dict, List
+
+from .models import Ticket, F_OFFICE, STATUS_CODES
+
+_WAITING = STATUS_CODES["WAITING"]
+
+
+class TicketStore:
+    """Parallel columns, one row per waiting ticket, addressed by handle."""
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.user_ids: List[str] = []
+        self.names: List[str] = []
+        self.services = array("B")     # SERVICE_CODES
+        self.offices: List[str] = []    # interned office ids
+        self.issued = array("d")        # epoch seconds
+        self.minutes = array("i")       # expected_minutes
+        self.priorities = array("i")
+        self.statuses = array("B")      # STATUS_CODES
+        self.seqs = array("q")
+        self.served = array("d")        # epoch seconds, 0.0 = not served
+        self.free: List[int] = []
+        self._interned: Dict[str, str] = {}
+
+    @property
+    def columns(self):
+        """Columns in row order (see F_* in models.py)."""
+        return (self.ids, self.user_ids, self.names, self.services, self.offices,
+                self.issued, self.minutes, self.priorities, self.statuses,
+                self.seqs, self.served)
+
+    def __len__(self) -> int:
+        return len(self.ids) - len(self.free)
+
+    def intern(self, office_id: str) -> str:
+        """O(1) - The store's shared copy of an office id."""
+        return self._interned.setdefault(office_id, office_id)
+
+    def _put(self, row) -> int:
+        row[F_OFFICE] = self.intern(row[F_OFFICE])
+        if self.free:
+            handle = self.free.pop()
+            for column, value in zip(self.columns, row):
+                column[handle] = value
+        else:
+            handle = len(self.ids)
+            for column, value in zip(self.columns, row):
+                column.append(value)
+        return handle
+
+    def create(self, ticket_id: str, user_id: str, name: str, service_code: int,
+               office_id: str, issued_ts: float, expected_minutes: int,
+               priority_level: int, seq: int) -> Ticket:
+        """O(1) amortized - Store a new WAITING ticket and return its view."""
+        ticket = Ticket.__new__(Ticket)
+        ticket._store = self
+        ticket._row = None
+        ticket._handle = self._put([ticket_id, user_id, name, service_code, office_id,
+                                    issued_ts, expected_minutes, priority_level,
+                                    _WAITING, seq, 0.0])
+        return ticket
+
+    def adopt(self, ticket: Ticket) -> None:
+        """O(1) amortized - Move a detached ticket's row into the store."""
+        handle = self._put(ticket._row)
+        ticket._store = self
+        ticket._handle = handle
+        ticket._row = None  # last: the view reads the store from here on
+
+    def release(self, ticket: Ticket) -> None:
+        """O(1) - Detach a view (copying its row out) and free its slot."""
+        handle = ticket._handle
+        # Only _row changes: a concurrent reader either sees the copy or reads
+        # the still-intact slot and then notices the copy (see _field).
+        ticket._row = [column[handle] for column in self.columns]
+        # Drop the string references now rather than when the slot is reused.
+        self.ids[handle] = self.user_ids[handle] = self.names[handle] = None
+        self.free.append(handle)
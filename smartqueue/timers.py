@@ -0,0 +1,158 @@
+# =============================================================================
+# timers.py — Hierarchical timing wheel for ticket expiry.
+#
+# QueueManager arms one timer per ticket that can expire (a waiting ticket's
+# TTL, a called ticket's no-show grace) and disarms it when the ticket
+# leaves; most timers are disarmed long before they fire. TimingWheel makes
+# both O(1) and finds due timers without looking at the others:
+#   - Time is cut into ticks of `tick` seconds. Level 0 has 2**bits slots,
+#     one per tick; each level above has 2**bits slots spanning 2**bits
+#     slots of the level below (bits=6, levels=4, tick=1s: 64 s, 68 min,
+#     73 h, 194 days). A timer goes into the lowest level whose span covers
+#     its distance from now; one further out waits in the top level.
+#   - Each slot is a dict key -> expiry tick, and `_where` maps a key to its
+#     slot, so arm, re-arm and disarm are dict operations.
+#   - advance(now) walks the ticks up to now. Entering a new level-0 round
+#     empties the matching slot of level 1 into level 0 (and so on up,
+#     Linux-timer style), and every level-0 slot passed is due. Rounds with
+#     an empty level 0 are skipped whole, so catching up after an idle hour
+#     costs ~60 steps, not 3600.
+# A timer fires at the first tick at or after its deadline, never before.
+# The wheel has no lock: QueueManager drives it under its sequence lock.
+# =============================================================================
+
+import math
+from typing import Dict, Hashable, List, Tuple
+
+
+def parse_ttl(spec: str) -> Dict[str, float]:
+    """Per-service TTLs from "service:seconds,..." (e.g. NOQ_TTL="passport:7200,tax:3600")."""
+    ttl = {}
+    for rule in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            service, seconds = rule.split(":")
+            ttl[service.strip()] = float(seconds)
+        except ValueError:
+            raise ValueError(f"Invalid TTL rule: {rule}")
+    return ttl
+
+
+class TimingWheel:
+    """Keys armed with deadlines (epoch seconds); advance(now) returns the due ones."""
+
+    def __init__(self, start: float, tick: float = 1.0, bits: int = 6, levels: int = 4):
+        if tick <= 0 or not 1 <= bits <= 16 or levels < 1:
+            raise ValueError(f"Invalid timing wheel: tick={tick}, bits={bits}, levels={levels}")
+        self.tick = tick
+        self.bits = bits
+        self.levels = levels
+        self._mask = (1 << bits) - 1
+        self._span = 1 << (bits * levels)
+        # Next tick to process: every tick before it has been handled
+        self.current = math.floor(start / tick)
+        self._slots: List[List[Dict[Hashable, int]]] = [
+            [{} for _ in range(1 << bits)] for _ in range(levels)]
+        self._counts = [0] * levels
+        # key -> (level, slot index) of its timer
+        self._where: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._where
+
+    def arm(self, key: Hashable, deadline: float) -> None:
+        """O(1) - (Re-)arm `key` to fire at `deadline` (one already past: at the next tick)."""
+        if key in self._where:
+            self.disarm(key)
+        self._place(key, math.ceil(deadline / self.tick))
+
+    def disarm(self, key: Hashable) -> bool:
+        """O(1) - Drop `key`'s timer. Returns whether it was armed."""
+        where = self._where.pop(key, None)
+        if where is None:
+            return False
+        level, index = where
+        del self._slots[level][index][key]
+        self._counts[level] -= 1
+        return True
+
+    def reset(self, now: float) -> None:
+        """O(n) - Restart the wheel at `now` (e.g. its clock was replaced), keeping every timer."""
+        timers = [(key, self._slots[level][index][key])
+                  for key, (level, index) in self._where.items()]
+        self.current = math.floor(now / self.tick)
+        self._slots = [[{} for _ in range(1 << self.bits)] for _ in range(self.levels)]
+        self._counts = [0] * self.levels
+        self._where = {}
+        for key, expires in timers:
+            self._place(key, expires)
+
+    def _place(self, key: Hashable, expires: int) -> None:
+        delta = expires - self.current
+        if delta < 0:
+            expires, delta = self.current, 0
+        bits = self.bits
+        slot_tick = expires
+        if delta >= self._span:
+            # Beyond the top level: park at its far edge, re-placed on cascade
+            slot_tick = self.current + self._span - 1
+            level = self.levels - 1
+        else:
+            level = 0
+            while delta >= 1 << (bits * (level + 1)):
+                level += 1
+        index = (slot_tick >> (bits * level)) & self._mask
+        self._slots[level][index][key] = expires
+        self._counts[level] += 1
+        self._where[key] = (level, index)
+
+    def _cascade(self, tick: int) -> None:
+        """Move the level-1 (and up) slots that start at `tick` down a level."""
+        for level in range(1, self.levels):
+            index = (tick >> (self.bits * level)) & self._mask
+            slot = self._slots[level][index]
+            if slot:
+                self._slots[level][index] = {}
+                self._counts[level] -= len(slot)
+                for key, expires in slot.items():
+                    self._place(key, expires)
+            if index:
+                break
+
+    def advance(self, now: float) -> List[Hashable]:
+        """
+        O(ticks / 2**bits + due) amortized - Process every tick up to `now`
+        and return the keys whose timers fired (they are disarmed).
+        """
+        target = math.floor(now / self.tick)
+        due: List[Hashable] = []
+        mask = self._mask
+        level0 = self._slots[0]
+        while self.current <= target:
+            if not self._where:
+                self.current = target + 1
+                break
+            tick = self.current
+            if not tick & mask:
+                self._cascade(tick)
+            slot = level0[tick & mask]
+            if slot:
+                level0[tick & mask] = {}
+                self._counts[0] -= len(slot)
+                for key, expires in slot.items():
+                    del self._where[key]
+                    if expires <= tick:
+                        due.append(key)
+                    else:
+                        # Parked past the top level of a one-level wheel
+                        self.current = tick + 1
+                        self._place(key, expires)
+                        self.current = tick
+            if self._counts[0]:
+                self.current = tick + 1
+            else:
+                # Nothing left in level 0 until the next round's cascade
+                self.current = min(target, tick | mask) + 1
+        return due
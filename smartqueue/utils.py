@@ -1,3 +1,4 @@
+import time
 import uuid
 from datetime import datetime
 
@@ -8,3 +9,27 @@ def generate_id() -> str:
 def get_current_time() -> datetime:
     """O(1) - Get current timestamp."""
     return datetime.now()
+
+def get_current_epoch() -> float:
+    """O(1) - Get current time as epoch seconds (no datetime allocated)."""
+    return time.time()
+
+
+class ManualClock:
+    """
+    Clock for QueueManager(clock=...) that only moves when told to, e.g. in
+    simulations (see sim/) and tests. Calling it returns epoch seconds.
+    """
+
+    __slots__ = ("now",)
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> float:
+        """O(1) - Move forward by `seconds`; returns the new time."""
+        self.now += seconds
+        return self.now
@@ -6,12 +6,22 @@
 //   takeTicket()           → POST /api/ticket          (customer kiosk)
 //   checkStatus()          → GET  /api/status/:id      (customer kiosk)
 //   serveNext()            → POST /api/serve           (admin dashboard)
-//   refreshQueueOverview() → GET  /api/queue-overview  (admin dashboard)
+//   refreshQueueOverview() → GET  /api/queue-overview?office_id= (admin dashboard)
+//   watchTicket()          → GET  /api/stream/:id      (SSE, customer kiosk)
+//   watchQueueOverview()   → GET  /api/stream/office/:office_id (SSE, admin)
+//
+// The two watch* functions keep the page live over Server-Sent Events, so
+// clients no longer need to poll the status/overview endpoints. The admin
+// dashboard polls and streams the same office (DASHBOARD_OFFICE), so both
+// show the same rows.
 //
 // Page-specific listeners are attached in each template's <script> block;
 // DOMContentLoaded below provides a fallback if elements exist on the page.
 // =============================================================================
 
+// Office whose queues the admin dashboard lists and streams
+const DASHBOARD_OFFICE = 'default';
+
 document.addEventListener('DOMContentLoaded', () => {
     console.log("NoQ Loaded");
 
@@ -36,9 +46,42 @@ document.addEventListener('DOMContentLoaded', () => {
     if (refreshQueueBtn) {
         refreshQueueBtn.addEventListener('click', refreshQueueOverview);
         refreshQueueOverview();
+        watchQueueOverview(DASHBOARD_OFFICE);
     }
 });
 
+// One live stream per page element; opening a new one closes the old one.
+const streams = {};
+
+function openStream(name, url, onMessage) {
+    if (streams[name]) {
+        streams[name].close();
+    }
+    const source = new EventSource(url);
+    source.onmessage = (event) => onMessage(JSON.parse(event.data), source);
+    streams[name] = source;
+    return source;
+}
+
+function watchTicket(ticketId, posElementId, waitElementId) {
+    openStream(posElementId, `/api/stream/${ticketId}`, (data, source) => {
+        if (data.status !== 'WAITING') {
+            document.getElementById(posElementId).textContent = data.status === 'SERVED' ? 'Now serving' : data.status;
+            document.getElementById(waitElementId).textContent = 0;
+            source.close();
+            return;
+        }
+        document.getElementById(posElementId).textContent = data.position;
+        document.getElementById(waitElementId).textContent = data.wait_time;
+    });
+}
+
+function watchQueueOverview(officeId) {
+    openStream('queueOverview', `/api/stream/office/${encodeURIComponent(officeId)}`, (data) => {
+        renderQueueOverview(data.queues);
+    });
+}
+
 async function takeTicket() {
     const nameInput = document.getElementById('custName');
     const name = nameInput.value.trim() || "Guest";
@@ -67,6 +110,7 @@ async function takeTicket() {
         document.getElementById('displayTicketId').textContent = data.ticket_id;
         document.getElementById('displayPos').textContent = data.position;
         document.getElementById('displayWait').textContent = data.wait_time;
+        watchTicket(data.ticket_id, 'displayPos', 'displayWait');
 
         const result = document.getElementById('ticketResult');
         result.classList.remove('hidden');
@@ -103,6 +147,7 @@ async function checkStatus() {
 
         document.getElementById('statusPos').textContent = data.position;
         document.getElementById('statusWait').textContent = data.wait_time;
+        watchTicket(id, 'statusPos', 'statusWait');
 
         const result = document.getElementById('statusResult');
         result.classList.remove('hidden');
@@ -146,7 +191,7 @@ async function serveNext() {
 
 async function refreshQueueOverview() {
     try {
-        const res = await fetch('/api/queue-overview');
+        const res = await fetch(`/api/queue-overview?office_id=${encodeURIComponent(DASHBOARD_OFFICE)}`);
 
         if (!res.ok) {
             throw new Error(`HTTP error! status: ${res.status}`);
@@ -154,20 +199,7 @@ async function refreshQueueOverview() {
 
         const data = await res.json();
 
-        const list = document.getElementById('queueOverviewList');
-        if (!list) return;
-
-        list.innerHTML = "";
-
-        if (data.success && data.queues.length > 0) {
-            data.queues.forEach(q => {
-                const li = document.createElement('li');
-                li.innerHTML = `<span>${q.service.charAt(0).toUpperCase() + q.service.slice(1)}</span> <strong>${q.waiting_count} waiting</strong>`;
-                list.appendChild(li);
-            });
-        } else {
-            list.innerHTML = "<li>No customers currently waiting.</li>";
-        }
+        renderQueueOverview(data.success ? data.queues : []);
     } catch (e) {
         console.error("Error refreshing queue overview:", e);
 
@@ -176,4 +208,21 @@ async function refreshQueueOverview() {
             list.innerHTML = "<li>Error loading queue overview.</li>";
         }
     }
-}
\ No newline at end of file
+}
+
+function renderQueueOverview(queues) {
+    const list = document.getElementById('queueOverviewList');
+    if (!list) return;
+
+    list.innerHTML = "";
+
+    if (queues.length > 0) {
+        queues.forEach(q => {
+            const li = document.createElement('li');
+            li.innerHTML = `<span>${q.service.charAt(0).toUpperCase() + q.service.slice(1)}</span> <strong>${q.waiting_count} waiting</strong>`;
+            list.appendChild(li);
+        });
+    } else {
+        list.innerHTML = "<li>No customers currently waiting.</li>";
+    }
+}
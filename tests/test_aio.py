@@ -0,0 +1,158 @@
+import asyncio
+import json
+import shutil
+import tempfile
+import unittest
+
+from smartqueue.aio import QueueService
+from smartqueue.journal import recover
+from smartqueue.queues import QueueManager
+from smartqueue.utils import ManualClock
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestQueueService(unittest.TestCase):
+    def test_mutations_apply_in_order_in_batches(self):
+        async def scenario():
+            service = await QueueService(QueueManager()).start()
+            futures = [service.submit('issue_ticket', f"u{i}", "C", "tax") for i in range(5)]
+            futures.append(service.submit('issue_ticket', "u0", "C", "tax"))  # duplicate user
+            futures.append(service.submit('serve_next', "default", "tax"))
+            results = await asyncio.gather(*futures, return_exceptions=True)
+            await service.stop()
+            return service, results
+
+        service, results = run(scenario())
+        self.assertEqual([t.user_id for t in results[:5]], [f"u{i}" for i in range(5)])
+        self.assertIsInstance(results[5], ValueError)
+        self.assertEqual(results[6].ticket_id, results[0].ticket_id)
+        self.assertEqual(service.version, 1)  # everything queued landed in one batch
+
+    def test_overview_is_cached_until_the_next_write(self):
+        async def scenario():
+            service = await QueueService(QueueManager()).start()
+            first = service.get_queue_overview("default")
+            again = service.get_queue_overview("default")
+            await service.submit('issue_ticket', "u1", "C", "support")
+            after = service.get_queue_overview("default")
+            await service.stop()
+            return first, again, after
+
+        first, again, after = run(scenario())
+        self.assertIs(first, again)
+        waiting = {row['service']: row['waiting_count'] for row in after}
+        self.assertEqual(waiting['support'], 1)
+
+    def test_subscribers_are_woken_by_the_writer(self):
+        async def scenario():
+            service = await QueueService(QueueManager()).start()
+            ticket = await service.submit('issue_ticket', "u1", "C", "passport")
+            sub = service.feed.subscribe_ticket(ticket.ticket_id)
+            first = await sub.get(timeout=1)
+            waiter = asyncio.ensure_future(sub.get(timeout=1))
+            await service.submit('serve_next', "default", "passport")
+            served = await waiter
+            timed_out = await sub.get(timeout=0.01)
+            sub.close()
+            await service.stop()
+            return first, served, timed_out
+
+        first, served, timed_out = run(scenario())
+        self.assertEqual((first['status'], first['position']), ("WAITING", 1))
+        self.assertEqual(served['status'], "SERVED")
+        self.assertIsNone(timed_out)
+
+    def test_promotions_applied_by_reads_are_journaled_between_batches(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        clock = ManualClock(1000.0)
+        options = {'engine': "bucket", 'aging': {0: 60}}
+        manager, journal = recover(directory, concurrency='global', fsync="never",
+                                   clock=clock, **options)
+
+        async def scenario():
+            service = await QueueService(manager).start()
+            old = await service.submit('issue_ticket', "u0", "C", "tax")
+            await service.submit('issue_ticket', "u1", "C", "tax", priority_level=1)
+            clock.advance(61)
+            position = manager.get_position(old.ticket_id)  # promotes, on the loop
+            await service.submit('issue_ticket', "u2", "C", "tax")
+            await service.stop()
+            return position
+
+        self.assertEqual(run(scenario())[0], 2)  # behind the priority ticket
+        self.assertEqual(manager.promoted_count, 1)
+        journal.close()
+
+        recovered, journal = recover(directory, clock=clock, **options)
+        self.addCleanup(journal.close)
+        self.assertEqual(recovered.promoted_count, 1)
+        page = lambda m: [t.ticket_id for t in m.get_queue("default", "tax", limit=10)[0]]
+        self.assertEqual(page(recovered), page(manager))
+
+
+class TestAsgiApp(unittest.TestCase):
+    def call(self, method, path, body=None):
+        """Drive asgi.app with one request; returns (status, parsed JSON)."""
+        import asgi
+
+        async def scenario():
+            sent = []
+            payload = json.dumps(body).encode() if body is not None else b''
+            path_only, _, query = path.partition('?')
+            scope = {'type': 'http', 'method': method, 'path': path_only,
+                     'query_string': query.encode(), 'headers': []}
+
+            async def receive():
+                return {'type': 'http.request', 'body': payload, 'more_body': False}
+
+            async def send(message):
+                sent.append(message)
+
+            await asgi.app(scope, receive, send)
+            await asgi.service.stop()
+            asgi._started = None
+            return sent[0]['status'], json.loads(sent[1]['body'])
+
+        return run(scenario())
+
+    def test_same_contract_as_flask(self):
+        status, issued = self.call('POST', '/api/ticket', {'name': "Ann", 'service': "municipal"})
+        self.assertEqual((status, issued['success'], issued['position']), (200, True, 1))
+
+        status, found = self.call('GET', f"/api/status/{issued['ticket_id'].lower()}")
+        self.assertEqual((status, found['customer']), (200, "Ann"))
+
+        status, page = self.call('GET', '/api/queue?service=municipal&limit=5')
+        self.assertEqual([row['ticket_id'] for row in page['queue']], [issued['ticket_id']])
+
+        status, served = self.call('POST', '/api/serve', {'service': "municipal"})
+        self.assertEqual((status, served['ticket']['id']), (200, issued['ticket_id']))
+        self.assertEqual(self.call('POST', '/api/serve', {'service': "municipal"})[0], 404)
+        self.assertEqual(self.call('GET', f"/api/status/{issued['ticket_id']}")[0], 404)
+
+        self.assertEqual(self.call('POST', '/api/ticket', {'service': "nope"})[0], 400)
+        self.assertEqual(self.call('POST', '/api/desks', {'desks': 0})[0], 400)
+        self.assertEqual(self.call('GET', '/api/missing')[0], 404)
+
+    def test_cancel_and_batch_accept_typed_ids(self):
+        _, first = self.call('POST', '/api/ticket', {'service': "support"})
+        _, second = self.call('POST', '/api/ticket', {'service': "support"})
+        typed = lambda tid: tid.lower().replace("0", "o")
+
+        status, batch = self.call('POST', '/api/status/batch',
+                                  {'ticket_ids': [typed(second['ticket_id'])]})
+        self.assertEqual((status, batch['statuses'][0]['ticket_id']), (200, second['ticket_id']))
+        self.assertEqual(batch['statuses'][0]['status'], 'waiting')
+
+        status, cancelled = self.call('POST', '/api/cancel', {'ticket_id': typed(first['ticket_id'])})
+        self.assertEqual((status, cancelled['ticket']['id']), (200, first['ticket_id']))
+        self.assertEqual(self.call('POST', '/api/status/batch', {'ticket_ids': [5]})[0], 400)
+        self.assertEqual(self.call('POST', '/api/arrived', {'ticket_id': 5})[0], 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
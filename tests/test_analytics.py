@@ -0,0 +1,32 @@
+import unittest
+
+from smartqueue.analytics import rank_services_by_avg_wait, wait_time_report
+from smartqueue.queues import QueueManager
+
+
+class TestAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.manager = QueueManager()
+
+    def test_wait_time_report_per_queue(self):
+        """serve_next feeds per-(office, service) percentiles and windows."""
+        for i in range(6):
+            self.manager.issue_ticket(f"u{i}", "X", "passport")
+        self.manager.issue_ticket("n1", "Y", "tax", office_id="north")
+        for _ in range(6):
+            self.manager.serve_next("default", "passport")
+        self.manager.serve_next("north", "tax")
+
+        report = wait_time_report(self.manager)
+        self.assertEqual([(q['office_id'], q['service']) for q in report],
+                         [("default", "passport"), ("north", "tax")])
+        self.assertEqual(report[0]['served'], 6)
+        self.assertEqual(report[0]['windows']['15m']['served'], 6)
+        self.assertGreaterEqual(report[0]['p99'], report[0]['p50'])
+
+        self.assertEqual(len(wait_time_report(self.manager, "north")), 1)
+        self.assertEqual({s for s, _ in rank_services_by_avg_wait(self.manager)}, {"passport", "tax"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import json
+import unittest
+
+import app as server
+
+
+def typed(ticket_id):
+    """How a customer might type an ID off their screen: lower case, O for 0."""
+    return ticket_id.lower().replace("0", "o")
+
+
+class TestFlaskApi(unittest.TestCase):
+    def setUp(self):
+        self.client = server.app.test_client()
+
+    def _events(self, response):
+        """The JSON messages of a text/event-stream response, read as they arrive."""
+        for chunk in response.response:
+            chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if chunk.startswith("data: "):
+                yield json.loads(chunk[len("data: "):])
+
+    def _issue(self, service="tax"):
+        response = self.client.post('/api/ticket', json={'name': "Test", 'service': service})
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['ticket_id']
+
+    def test_cancel_accepts_typed_ids(self):
+        ticket_id = self._issue()
+        response = self.client.post('/api/cancel', json={'ticket_id': typed(ticket_id)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['ticket']['id'], ticket_id)
+        response = self.client.post('/api/cancel', json={'ticket_id': ticket_id})
+        self.assertEqual(response.status_code, 404)
+
+    def test_status_batch_accepts_typed_ids(self):
+        ticket_id = self._issue()
+        response = self.client.post('/api/status/batch', json={'ticket_ids': [typed(ticket_id)]})
+        self.assertEqual(response.status_code, 200)
+        status = response.get_json()['statuses'][0]
+        self.assertEqual(status['ticket_id'], ticket_id)
+        self.assertEqual(status['status'], 'waiting')
+        self.assertEqual(status['position'], server.manager.get_position(ticket_id)[0])
+
+    def test_arrived_rejects_non_string_ids(self):
+        for bad in (5, ["x"], {'id': "x"}):
+            response = self.client.post('/api/arrived', json={'ticket_id': bad})
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/arrived', json={'ticket_id': "nobody"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_ticket_stream_follows_the_ticket_until_served(self):
+        ticket_id = self._issue(service="municipal")
+        response = self.client.get(f'/api/stream/{typed(ticket_id)}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        events = self._events(response)
+        position = server.manager.get_position(ticket_id)[0]
+        self.assertEqual(next(events)['position'], position)
+
+        while server.manager.serve_next("default", "municipal").ticket_id != ticket_id:
+            pass
+        messages = list(events)  # the stream ends once the ticket is served
+        self.assertEqual(messages[-1]['status'], 'SERVED')
+        self.assertEqual(self.client.get(f'/api/stream/{ticket_id}').status_code, 404)
+
+    def test_office_stream_pushes_overview_changes(self):
+        response = self.client.get('/api/stream/office/sse-office')
+        events = self._events(response)
+        waiting = lambda message: {q['service']: q['waiting_count'] for q in message['queues']}
+        self.assertEqual(waiting(next(events))['tax'], 0)
+        server.manager.issue_ticket("sse-user", "S", "tax", office_id="sse-office")
+        self.assertEqual(waiting(next(events))['tax'], 1)
+        response.close()
+
+    def test_bulk_issue_and_batch_status_limits(self):
+        too_many = server.MAX_BATCH + 1
+        self.assertEqual(self.client.post('/api/tickets/bulk', json={'tickets': []}).status_code, 400)
+        self.assertEqual(self.client.post('/api/tickets/bulk',
+                                          json={'tickets': [{}] * too_many}).status_code, 400)
+        self.assertEqual(self.client.post('/api/status/batch', json={}).status_code, 400)
+        self.assertEqual(self.client.post('/api/status/batch',
+                                          json={'ticket_ids': ["x"] * too_many}).status_code, 400)
+
+        # One bad entry rejects the whole batch.
+        before = len(server.manager.active_tickets_by_id)
+        response = self.client.post('/api/tickets/bulk', json={'tickets': [
+            {'service': "tax", 'office_id': "bulk-office"}, {'service': "nope"}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(server.manager.active_tickets_by_id), before)
+
+    def test_bulk_issue_then_page_with_cursors(self):
+        tickets = [{'name': f"G{i}", 'service': "support", 'office_id': "page-office",
+                    'priority': i % 2} for i in range(7)]
+        response = self.client.post('/api/tickets/bulk', json={'tickets': tickets})
+        self.assertEqual(response.status_code, 200)
+        issued = response.get_json()['tickets']
+        self.assertEqual(sorted(t['position'] for t in issued), list(range(1, 8)))
+
+        rows, cursor = [], None
+        while True:
+            query = {'service': "support", 'office_id': "page-office", 'limit': 3}
+            if cursor:
+                query['cursor'] = cursor
+            page = self.client.get('/api/queue', query_string=query).get_json()
+            rows.extend(page['queue'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual([row['position'] for row in rows], list(range(1, 8)))
+        by_position = {t['position']: t['ticket_id'] for t in issued}
+        self.assertEqual([row['ticket_id'] for row in rows], [by_position[p] for p in range(1, 8)])
+
+        bad = self.client.get('/api/queue', query_string={'service': "support", 'cursor': "x"})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_status_answers_304_until_the_queue_changes(self):
+        ticket_id = self._issue(service="passport")
+        first = self.client.get(f'/api/status/{ticket_id}')
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers['ETag']
+
+        again = self.client.get(f'/api/status/{ticket_id}', headers={'If-None-Match': etag})
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.data, b'')
+        cached = self.client.get(f'/api/status/{ticket_id}')
+        self.assertEqual((cached.headers['ETag'], cached.get_json()), (etag, first.get_json()))
+
+        server.manager.issue_ticket("etag-user", "E", "passport")
+        changed = self.client.get(f'/api/status/{ticket_id}', headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+    def test_overview_answers_304_per_office(self):
+        url = '/api/queue-overview?office_id=etag-office'
+        first = self.client.get(url)
+        etag = first.headers['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+        # A change in another office leaves this office's version alone.
+        server.manager.issue_ticket("etag-user", "E", "tax", office_id="other-office")
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+        server.manager.issue_ticket("etag-user", "E", "tax", office_id="etag-office")
+        changed = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        waiting = {q['service']: q['waiting_count'] for q in changed.get_json()['queues']}
+        self.assertEqual(waiting['tax'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from smartqueue.archive import ServedArchive, read_offices, segment_paths
+from smartqueue.queues import QueueManager
+from smartqueue.utils import ManualClock
+
+try:
+    import numpy
+except ImportError:  # writing the archive needs only the standard library
+    numpy = None
+
+MONDAY_NINE = 1_704_067_200.0 + 9 * 3600  # 2024-01-01 09:00 UTC
+
+
+class ArchiveTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.clock = ManualClock(MONDAY_NINE)
+        self.manager = QueueManager(clock=self.clock)
+        self.archive = ServedArchive(self.directory, flush_every=1000).attach(self.manager)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def serve(self, service, wait_minutes, office_id="default", priority=0):
+        self.manager.issue_ticket("u", "Ann", service, priority, office_id=office_id)
+        self.clock.advance(wait_minutes * 60)
+        self.manager.serve_next(office_id, service)
+
+
+class TestServedArchive(ArchiveTestCase):
+    def test_segments_are_append_only(self):
+        self.serve("tax", 4)
+        first = self.archive.flush()
+        self.assertIsNone(self.archive.flush())  # nothing buffered
+        with open(first, "rb") as f:
+            written = f.read()
+        self.serve("tax", 6)
+        self.archive.close()
+        self.assertEqual(len(segment_paths(self.directory)), 2)
+        with open(first, "rb") as f:
+            self.assertEqual(f.read(), written)
+
+        # A reopened archive continues the numbering and the office codes.
+        reopened = ServedArchive(self.directory)
+        self.assertEqual(reopened.offices, ["default"])
+        reopened.append("north", 0, 0, MONDAY_NINE, MONDAY_NINE + 60)
+        self.assertTrue(reopened.flush().endswith("segment-00000003.col"))
+        self.assertEqual(read_offices(self.directory), ["default", "north"])
+
+    def test_flushes_every_n_rows(self):
+        archive = ServedArchive(os.path.join(self.directory, "small"), flush_every=2)
+        for _ in range(5):
+            archive.append("default", 0, 0, MONDAY_NINE, MONDAY_NINE + 60)
+        self.assertEqual(len(segment_paths(archive.directory)), 2)
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestArchiveReport(ArchiveTestCase):
+    def test_grouped_waits(self):
+        from smartqueue.analytics import archive_report
+        for minutes in (2, 4, 6):
+            self.serve("tax", minutes)
+        self.archive.flush()
+        self.serve("passport", 10, office_id="north")
+        self.serve("tax", 8, office_id="north")
+        self.archive.flush()
+
+        by_service = archive_report(self.directory, by=("service",))
+        self.assertEqual([entry['service'] for entry in by_service], ["passport", "tax"])
+        tax = by_service[1]
+        self.assertEqual((tax['served'], tax['avg_wait'], tax['max_wait']), (4, 5.0, 8.0))
+        self.assertEqual(tax['p50'], 4.0)
+
+        north = archive_report(self.directory, by=("office", "service"), office_id="north")
+        self.assertEqual([(entry['office_id'], entry['service'], entry['served']) for entry in north],
+                         [("north", "passport", 1), ("north", "tax", 1)])
+
+        by_hour = archive_report(self.directory, by=("weekday", "hour"), service="tax")
+        self.assertEqual([(entry['weekday'], entry['hour']) for entry in by_hour], [(0, 9)])
+        self.assertEqual(by_hour[0]['served'], 4)
+
+        self.assertEqual(archive_report(self.directory, by=(), until=MONDAY_NINE)[0:1], [])
+        self.assertEqual(archive_report(self.directory, by=())[0]['served'], 5)
+        self.assertEqual(archive_report(self.directory, office_id="nowhere"), [])
+        with self.assertRaises(ValueError):
+            archive_report(self.directory, by=("colour",))
+
+
+if __name__ == '__main__':
+    unittest.main()
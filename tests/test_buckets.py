@@ -0,0 +1,147 @@
+import shutil
+import tempfile
+import unittest
+
+from smartqueue.buckets import BucketQueue, parse_aging
+from smartqueue.journal import recover
+from smartqueue.queues import QueueManager
+from smartqueue.utils import ManualClock
+
+
+def serve_all(manager, service="passport", office_id="default"):
+    served = []
+    while True:
+        ticket = manager.serve_next(office_id, service)
+        if ticket is None:
+            return served
+        served.append(ticket.ticket_id)
+
+
+class TestBucketQueue(unittest.TestCase):
+    def test_pops_highest_level_first_and_fifo_within(self):
+        bucket = BucketQueue()
+        live = {"a", "b", "c", "d"}
+        for tid, level in [("a", 0), ("b", 3), ("c", 3), ("d", 1)]:
+            bucket.push(level, tid, 0.0)
+        live.discard("c")
+        popped = [bucket.pop(live) for _ in range(4)]
+        self.assertEqual(popped, [("b", 0), ("d", 1), ("a", 0), (None, 0)])
+        self.assertEqual(bucket.mask, 0)
+
+    def test_aging_cascades_from_due_time(self):
+        bucket = BucketQueue({0: 10, 1: 10})
+        live = {"a", "b"}
+        bucket.push(0, "a", 100.0)
+        bucket.push(0, "b", 105.0)
+        self.assertEqual(bucket.age(109.0, live), ([], 0))
+        # a was due at level 1 at 110 and at level 2 at 120; b only at level 1.
+        self.assertEqual(bucket.age(121.0, live), ([("a", 1), ("b", 1), ("a", 2)], 0))
+
+    def test_parse_aging(self):
+        self.assertEqual(parse_aging("0:1800, 1:3600"), {0: 1800.0, 1: 3600.0})
+        self.assertEqual(parse_aging(""), {})
+        with self.assertRaises(ValueError):
+            parse_aging("0=1800")
+
+
+class TestBucketEngine(unittest.TestCase):
+    def _fill(self, manager):
+        tickets = [manager.issue_ticket(f"u{i}", f"C{i}", "passport", priority_level=(i * 7) % 4)
+                   for i in range(40)]
+        manager.issue_tickets_bulk([{'user_id': f"b{i}", 'service': "passport",
+                                     'priority_level': i % 2} for i in range(10)])
+        for ticket in tickets[::5]:
+            manager.cancel_ticket(ticket.ticket_id)
+        return tickets
+
+    def test_same_order_as_heap_without_aging(self):
+        heap, bucket = QueueManager(), QueueManager(engine="bucket")
+        self._fill(heap)
+        self._fill(bucket)
+        self.assertIn(("default", "passport"), bucket.bucket_queues)
+        page = lambda m: [t.ticket_id for t in m.get_queue("default", "passport", limit=100)[0]]
+        self.assertEqual(page(bucket), page(heap))
+        self.assertEqual(serve_all(bucket), serve_all(heap))
+
+    def test_negative_priority_joins_the_normal_level(self):
+        heap, bucket = QueueManager(), QueueManager(engine="bucket")
+        for manager in (heap, bucket):
+            for i, priority in enumerate((0, -1, 2, -2, 0)):
+                manager.issue_ticket(f"u{i}", "C", "tax", priority_level=priority)
+        self.assertEqual(serve_all(bucket, "tax"), serve_all(heap, "tax"))
+
+    def test_aging_promotes_and_updates_positions(self):
+        manager = QueueManager(engine="bucket", aging={0: 60})
+        old = manager.issue_ticket("u1", "Old", "tax")
+        vip = manager.issue_ticket("u2", "Vip", "tax", priority_level=1)
+        self.assertEqual(manager.get_position(old.ticket_id)[0], 2)
+
+        events = []
+        manager.listeners.append(lambda event, ticket: events.append((event, ticket.ticket_id)))
+        self.assertEqual(manager.age_queues(now=old.issued_ts + 61), 1)
+        self.assertEqual(events, [("promote", old.ticket_id)])
+        self.assertEqual(old.priority_level, 1)
+        # Promoted tickets join the back of their new level.
+        self.assertEqual(manager.get_position(old.ticket_id)[0], 2)
+        self.assertEqual(manager.get_position(vip.ticket_id)[0], 1)
+
+        fresh = manager.issue_ticket("u3", "Fresh", "tax")
+        self.assertEqual(manager.get_position(fresh.ticket_id)[0], 3)
+        self.assertEqual(manager.promoted_count, 1)
+        self.assertEqual(manager.counter - manager.promoted_count, 3)
+        self.assertEqual(serve_all(manager, "tax"), [vip.ticket_id, old.ticket_id, fresh.ticket_id])
+
+    def test_engine_is_chosen_per_office(self):
+        manager = QueueManager(office_engines={'north': "bucket"})
+        manager.issue_ticket("u1", "A", "tax", office_id="north")
+        manager.issue_ticket("u1", "A", "tax", office_id="south")
+        self.assertEqual(list(manager.bucket_queues), [("north", "tax")])
+        with self.assertRaises(ValueError):
+            QueueManager(engine="skiplist")
+        with self.assertRaises(ValueError):
+            QueueManager(aging={0: 0})
+
+    def test_journal_replays_promotions(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        options = {'engine': "bucket", 'aging': {0: 30, 1: 30}}
+        manager, journal = recover(directory, fsync="never", **options)
+        tickets = self._fill(manager)
+        manager.age_queues(now=tickets[0].issued_ts + 45)
+        manager.serve_next("default", "passport")
+        manager.cancel_ticket(tickets[1].ticket_id)
+        manager.age_queues(now=tickets[0].issued_ts + 90)
+        journal.close()
+
+        recovered, journal = recover(directory, **options)
+        self.addCleanup(journal.close)
+        self.assertGreater(manager.promoted_count, 10)
+        self.assertEqual(recovered.promoted_count, manager.promoted_count)
+        self.assertEqual(recovered.counter, manager.counter)
+        self.assertEqual(serve_all(recovered), serve_all(manager))
+
+    def test_journal_recovers_snapshot_taken_during_aging(self):
+        """Snapshots due in the middle of a round of promotions still recover."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        clock = ManualClock(1000.0)
+        options = {'engine': "bucket", 'aging': {0: 60, 1: 60}}
+        manager, journal = recover(directory, fsync="never", snapshot_every=7,
+                                   clock=clock, **options)
+        for round_ in range(3):
+            for i in range(5):
+                manager.issue_ticket(f"u{round_}-{i}", "C", "passport", priority_level=i % 2)
+            clock.advance(61)
+            manager.serve_next("default", "passport")
+        journal.close()
+        self.assertGreater(manager.promoted_count, 7)
+
+        recovered, journal = recover(directory, clock=clock, **options)
+        self.addCleanup(journal.close)
+        self.assertEqual(recovered.promoted_count, manager.promoted_count)
+        self.assertEqual(recovered.counter, manager.counter)
+        self.assertEqual(serve_all(recovered), serve_all(manager))
+
+
+if __name__ == '__main__':
+    unittest.main()
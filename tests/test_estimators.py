@@ -0,0 +1,70 @@
+import unittest
+from datetime import datetime, timedelta
+
+from smartqueue.estimators import ExpectedMinutesEstimator, ServiceRateEstimator
+from smartqueue.models import Customer, ServiceType, Ticket
+from smartqueue.queues import QueueManager
+
+KEY = ("default", "passport")
+START = datetime(2026, 1, 5, 9, 0)
+T0 = START.timestamp()
+
+
+def _ticket(i, issued_at):
+    return Ticket(ticket_id=f"T{i}", customer=Customer(f"u{i}", f"C{i}"),
+                  service=ServiceType.PASSPORT, office_id="default",
+                  issued_at=issued_at, expected_minutes=10, seq=i)
+
+
+class TestEstimators(unittest.TestCase):
+    def test_default_sums_expected_minutes(self):
+        manager = QueueManager()
+        tickets = [manager.issue_ticket(f"u{i}", f"C{i}", "passport") for i in range(3)]
+        self.assertIsInstance(manager.estimator, ExpectedMinutesEstimator)
+        self.assertEqual(manager.get_position(tickets[2].ticket_id), (3, 20))
+
+    def test_learns_pace_and_divides_by_desks(self):
+        """A queue served every 4 minutes at one desk estimates 4 min per ticket."""
+        estimator = ServiceRateEstimator(alpha=0.5)
+        self.assertEqual(estimator.estimate(KEY, 3, 30), 30)  # no samples yet
+
+        for i in range(20):
+            estimator.on_issue(KEY, _ticket(i, START))
+        for i in range(10):
+            estimator.on_serve(KEY, None, T0 + 240 * (i + 1), 19 - i)
+        self.assertEqual(estimator.estimate(KEY, 5, 50), 20)
+
+        # Two desks serving the same pace each: serves arrive twice as fast.
+        estimator.set_desks(KEY, 2)
+        now = T0 + 40 * 60
+        for i in range(10):
+            now += 120
+            estimator.on_serve(KEY, None, now, 9 - i)
+        self.assertEqual(estimator.estimate(KEY, 5, 50), 10)
+
+    def test_idle_time_is_not_service_time(self):
+        """After the queue empties, the next gap starts at the next arrival."""
+        estimator = ServiceRateEstimator(alpha=1.0)
+        estimator.on_issue(KEY, _ticket(0, START))
+        estimator.on_serve(KEY, None, T0 + 5 * 60, 0)
+        estimator.on_issue(KEY, _ticket(1, START + timedelta(hours=2)))
+        estimator.on_serve(KEY, None, T0 + 123 * 60, 0)
+        self.assertEqual(estimator.service_minutes[KEY], 3.0)
+
+    def test_manager_feeds_estimator(self):
+        manager = QueueManager(estimator=ServiceRateEstimator(alpha=1.0))
+        for i in range(4):
+            manager._enqueue(_ticket(i, START))
+        served_ts = T0
+        for _ in range(2):
+            served_ts += 6 * 60
+            ticket = manager.active_tickets_by_id[manager._pop_next(KEY)]
+            manager._complete_serve(ticket, served_ts)
+
+        manager.set_active_desks("default", "passport", 3)
+        self.assertEqual(manager.get_position("T3"), (2, 2))
+        self.assertEqual(manager.get_positions(["T2", "T3"]), {"T2": (1, 0), "T3": (2, 2)})
+
+
+if __name__ == '__main__':
+    unittest.main()
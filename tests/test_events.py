@@ -0,0 +1,61 @@
+import unittest
+
+from smartqueue.events import ChangeFeed
+from smartqueue.queues import QueueManager
+
+
+class TestChangeFeed(unittest.TestCase):
+    def setUp(self):
+        self.manager = QueueManager()
+        self.feed = ChangeFeed(self.manager).attach()
+
+    def test_ticket_subscription_follows_position(self):
+        """Watchers of a ticket get its new position after each change, then its final status."""
+        t1 = self.manager.issue_ticket("u1", "A", "passport")
+        t2 = self.manager.issue_ticket("u2", "B", "passport")
+        phone = self.feed.subscribe_ticket(t2.ticket_id)
+        kiosk = self.feed.subscribe_ticket(t2.ticket_id)
+        self.assertEqual(phone.get(0)['position'], 2)
+        kiosk.get(0)
+
+        self.manager.serve_next("default", "passport")
+        self.assertEqual(phone.get(0)['position'], 1)
+        self.assertEqual(kiosk.get(0)['position'], 1)
+
+        self.manager.serve_next("default", "passport")
+        final = phone.get(0)
+        self.assertEqual((final['status'], final['position']), ("SERVED", -1))
+        phone.close()
+        kiosk.close()
+        self.assertFalse(self.feed._watched)
+        self.assertIsNone(self.feed.subscribe_ticket(t1.ticket_id))
+
+    def test_issue_behind_does_not_notify(self):
+        """A newcomer behind the watched ticket does not change its position."""
+        t1 = self.manager.issue_ticket("u1", "A", "tax")
+        sub = self.feed.subscribe_ticket(t1.ticket_id)
+        sub.get(0)
+
+        self.manager.issue_ticket("u2", "B", "tax")
+        self.assertIsNone(sub.get(0))
+
+        self.manager.issue_ticket("u3", "C", "tax", priority_level=5)
+        self.assertEqual(sub.get(0)['position'], 2)
+
+    def test_office_subscription_and_bounded_mailbox(self):
+        """Office watchers get fresh overviews; a slow client only keeps the newest."""
+        feed = ChangeFeed(self.manager, mailbox_size=2).attach()
+        sub = feed.subscribe_office("default")
+        for i in range(5):
+            self.manager.issue_ticket(f"u{i}", "X", "support")
+
+        def support_waiting(message):
+            return [q for q in message['queues'] if q['service'] == "support"][0]['waiting_count']
+
+        self.assertEqual(support_waiting(sub.get(0)), 4)
+        self.assertEqual(support_waiting(sub.get(0)), 5)
+        self.assertIsNone(sub.get(0))
+
+
+if __name__ == "__main__":
+    unittest.main()
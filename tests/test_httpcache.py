@@ -0,0 +1,55 @@
+import unittest
+
+from smartqueue.httpcache import BodyCache, make_etag
+from smartqueue.queues import QueueManager
+from smartqueue.utils import ManualClock
+
+
+class TestQueueVersions(unittest.TestCase):
+    def test_every_change_bumps_its_queue_only(self):
+        manager = QueueManager()
+        self.assertEqual(manager.queue_version("default", "tax"), 0)
+        ticket = manager.issue_ticket("u1", "Ann", "tax")
+        manager.issue_ticket("u2", "Bob", "tax")
+        manager.issue_ticket("u3", "Cy", "passport", office_id="north")
+        self.assertEqual(manager.queue_version("default", "tax"), 2)
+        self.assertEqual(manager.office_version("default"), 2)
+        self.assertEqual(manager.office_version(), 3)
+
+        before = manager.queue_version("default", "tax")
+        manager.get_position(ticket.ticket_id)
+        manager.get_queue("default", "tax")
+        self.assertEqual(manager.queue_version("default", "tax"), before)  # reads change nothing
+
+        for change in (lambda: manager.cancel_ticket(ticket.ticket_id),
+                       lambda: manager.serve_next("default", "tax"),
+                       lambda: manager.set_active_desks("default", "tax", 3)):
+            change()
+            self.assertGreater(manager.queue_version("default", "tax"), before)
+            before = manager.queue_version("default", "tax")
+        self.assertEqual(manager.queue_version("north", "passport"), 1)
+
+    def test_due_promotion_is_a_change(self):
+        clock = ManualClock(1_700_000_000.0)
+        manager = QueueManager(engine="bucket", aging={0: 60}, clock=clock)
+        manager.issue_ticket("u1", "Ann", "tax")
+        before = manager.queue_version("default", "tax")
+        clock.advance(61)
+        self.assertGreater(manager.queue_version("default", "tax"), before)
+
+
+class TestBodyCache(unittest.TestCase):
+    def test_least_recently_used_is_evicted(self):
+        cache = BodyCache(capacity=2)
+        cache.put(("status", "A", 1), b"a")
+        cache.put(("status", "B", 1), b"b")
+        self.assertEqual(cache.get(("status", "A", 1)), b"a")
+        cache.put(("status", "C", 1), b"c")
+        self.assertIsNone(cache.get(("status", "B", 1)))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertNotEqual(make_etag(1), make_etag(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from smartqueue.ids import (RandomIdGenerator, SequentialIdGenerator, decode_base32,
+                            encode_base32, normalize_id)
+from smartqueue.journal import recover
+from smartqueue.queues import QueueManager
+
+NOON = datetime(2026, 10, 17, 12, tzinfo=timezone.utc).timestamp()
+
+
+class TestIds(unittest.TestCase):
+    def test_base32_round_trip(self):
+        for value in (0, 31, 32, 1023, 123456789):
+            self.assertEqual(decode_base32(encode_base32(value, 4)), value)
+        self.assertEqual(encode_base32(5, 3), "005")
+        self.assertEqual(decode_base32("1o"), decode_base32("10"))
+        self.assertEqual(normalize_id(" 00o1bx-0a4l "), "0001BX-0A41")
+
+    def test_sequential_ids_sort_in_issue_order(self):
+        gen = SequentialIdGenerator()
+        north = [gen.next_id("north", NOON + i) for i in range(40)]
+        south = gen.next_id("south", NOON)
+        self.assertEqual(north, sorted(north))
+        self.assertEqual(len(set(north)), 40)
+        self.assertNotEqual(north[0][:3], south[:3])
+        # Next day: counter restarts under a new day prefix.
+        tomorrow = gen.next_id("north", NOON + 86400)
+        self.assertTrue(tomorrow.endswith("-0000"))
+        self.assertGreater(tomorrow, north[-1])
+
+    def test_shard_prefix(self):
+        self.assertTrue(SequentialIdGenerator(shard="k").next_id("north", NOON).startswith("K000"))
+
+    def test_observe_resumes_after_replayed_ids(self):
+        gen = SequentialIdGenerator()
+        ids = [gen.next_id("north", NOON) for _ in range(5)] + [gen.next_id("south", NOON)]
+        fresh = SequentialIdGenerator()
+        for tid in ids:
+            fresh.observe(tid, "south" if tid == ids[-1] else "north")
+        fresh.observe("A1B2C3D4", "north")  # random legacy ID: ignored
+        self.assertEqual(fresh.next_id("north", NOON), gen.next_id("north", NOON))
+        self.assertEqual(fresh.next_id("east", NOON), gen.next_id("east", NOON))
+
+    def test_recovered_manager_never_reissues_an_id(self):
+        directory = tempfile.mkdtemp()
+        try:
+            manager, journal = recover(directory, fsync="never")
+            issued = {manager.issue_ticket(f"u{i}", "C", "tax").ticket_id for i in range(10)}
+            journal.close()
+            recovered, journal = recover(directory)
+            issued.add(recovered.issue_ticket("u99", "C", "tax").ticket_id)
+            journal.close()
+            self.assertEqual(len(issued), 11)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_random_generator_still_pluggable(self):
+        manager = QueueManager(id_generator=RandomIdGenerator())
+        ticket = manager.issue_ticket("u1", "A", "passport")
+        self.assertEqual(len(ticket.ticket_id), 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from smartqueue.index import QueueIndex, LANE_COMPACT_MIN_DEAD
+
+
+class TestQueueIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = QueueIndex()
+
+    def test_higher_levels_are_ahead(self):
+        """Everyone in a higher priority lane counts as ahead of a lower lane."""
+        self.index.add("n1", 0, 1, 10)
+        self.index.add("p1", 5, 2, 15)
+        self.index.add("p2", 8, 3, 20)
+        self.index.add("n2", 0, 4, 10)
+
+        self.assertEqual(self.index.position("p2"), (0, 0))
+        self.assertEqual(self.index.position("p1"), (1, 20))
+        self.assertEqual(self.index.position("n1"), (2, 35))
+        self.assertEqual(self.index.position("n2"), (3, 45))
+
+    def test_remove_from_middle(self):
+        """Removing a ticket shifts only the tickets behind it."""
+        for i in range(5):
+            self.index.add(f"t{i}", 0, i, i + 1)
+        self.assertTrue(self.index.remove("t2"))
+        self.assertFalse(self.index.remove("t2"))
+
+        self.assertEqual(self.index.position("t1"), (1, 1))
+        self.assertEqual(self.index.position("t3"), (2, 3))
+        self.assertIsNone(self.index.position("t2"))
+
+    def test_lane_compacts_after_draining_head(self):
+        """A lane served from the front is rebuilt instead of growing forever."""
+        total = LANE_COMPACT_MIN_DEAD * 3
+        for i in range(total):
+            self.index.add(f"t{i}", 0, i, 1)
+        for i in range(total - 10):
+            self.index.remove(f"t{i}")
+
+        lane = self.index.lanes[0]
+        self.assertLess(len(lane.ids), LANE_COMPACT_MIN_DEAD * 2)
+        self.assertEqual(self.index.position(f"t{total - 1}"), (9, 9))
+
+
+if __name__ == "__main__":
+    unittest.main()
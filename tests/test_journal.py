@@ -0,0 +1,158 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from smartqueue.estimators import ServiceRateEstimator
+from smartqueue.events import ChangeFeed
+from smartqueue.journal import recover
+from smartqueue.utils import ManualClock
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _fill(self, manager):
+        tickets = [manager.issue_ticket(f"u{i}", f"C{i}", "passport", priority_level=i % 3)
+                   for i in range(30)]
+        manager.serve_next("default", "passport")
+        manager.cancel_ticket(tickets[10].ticket_id)
+        manager.serve_next("default", "passport")
+        return tickets
+
+    def _assert_same_state(self, recovered, original):
+        self.assertEqual(set(recovered.active_tickets_by_id), set(original.active_tickets_by_id))
+        self.assertEqual(recovered.served_count, original.served_count)
+        self.assertEqual(recovered.counter, original.counter)
+        for tid in original.active_tickets_by_id:
+            self.assertEqual(recovered.get_position(tid), original.get_position(tid))
+
+    def test_replay_journal_without_snapshot(self):
+        """Journal-only recovery rebuilds identical queues and positions."""
+        manager, journal = recover(self.directory, fsync="never")
+        self._fill(manager)
+        journal.close()
+
+        recovered, journal = recover(self.directory)
+        self._assert_same_state(recovered, manager)
+        journal.close()
+
+    def test_snapshot_plus_tail(self):
+        """A snapshot rolls the journal over; recovery replays only the tail."""
+        manager, journal = recover(self.directory, fsync="never", snapshot_every=25)
+        self._fill(manager)
+        manager.issue_ticket("late", "Late", "tax")
+        journal.close()
+
+        names = sorted(os.listdir(self.directory))
+        self.assertIn("snapshot-00000001.pkl", names)
+        self.assertNotIn("journal-00000000.log", names)
+
+        recovered, journal = recover(self.directory)
+        self._assert_same_state(recovered, manager)
+        # The recovered manager keeps serving in the original order.
+        self.assertEqual(recovered.serve_next("default", "passport").ticket_id,
+                         manager.serve_next("default", "passport").ticket_id)
+        journal.close()
+
+    def test_torn_tail_is_ignored(self):
+        """A partially written last record is dropped, not misread."""
+        manager, journal = recover(self.directory, fsync="never")
+        manager.issue_ticket("u1", "A", "passport")
+        manager.issue_ticket("u2", "B", "passport")
+        journal.close()
+
+        path = os.path.join(self.directory, "journal-00000000.log")
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 3)
+
+        recovered, journal = recover(self.directory)
+        self.assertEqual(len(recovered.active_tickets_by_id), 1)
+        recovered.issue_ticket("u3", "C", "passport")
+        journal.close()
+
+        recovered, journal = recover(self.directory)
+        self.assertEqual(len(recovered.active_tickets_by_id), 2)
+        journal.close()
+
+    def test_snapshot_waits_for_a_bulk_issue(self):
+        """A snapshot falling inside a bulk issue is taken after all its events."""
+        manager, journal = recover(self.directory, fsync="never", snapshot_every=3)
+        manager.issue_ticket("u0", "A", "passport")
+        manager.issue_tickets_bulk([{'user_id': f"b{i}", 'service': "passport"}
+                                    for i in range(4)])
+        journal.close()
+
+        recovered, journal = recover(self.directory)
+        self._assert_same_state(recovered, manager)
+        self.assertEqual(recovered.waiting_count[("default", "passport")], 5)
+        self.assertEqual(len(recovered.normal_queues[("default", "passport")]), 5)
+        journal.close()
+
+    def test_snapshot_waits_for_aging_promotions(self):
+        """A snapshot falling inside a round of promotions is taken after all of them."""
+        clock = ManualClock(1000.0)
+        options = {'engine': "bucket", 'aging': {0: 60}}
+        manager, journal = recover(self.directory, fsync="never", snapshot_every=4,
+                                   clock=clock, **options)
+        tickets = [manager.issue_ticket(f"u{i}", f"C{i}", "passport") for i in range(3)]
+        clock.advance(61)
+        manager.get_position(tickets[0].ticket_id)
+        self.assertEqual(manager.promoted_count, 3)
+        journal.close()
+
+        recovered, journal = recover(self.directory, clock=clock, **options)
+        self._assert_same_state(recovered, manager)
+        self.assertEqual(recovered.promoted_count, 3)
+        journal.close()
+
+    def test_snapshot_waits_for_promotions_reported_by_a_listener(self):
+        """A listener's read can age a queue mid-report; the snapshot waits for the outer report."""
+        clock = ManualClock(1000.0)
+        options = {'engine': "bucket", 'aging': {0: 60}}
+        manager, journal = recover(self.directory, fsync="never", snapshot_every=3,
+                                   clock=clock, **options)
+        feed = ChangeFeed(manager).attach()
+        first = manager.issue_ticket("u0", "A", "passport")
+        manager.issue_ticket("u1", "B", "passport")
+        subscription = feed.subscribe_ticket(first.ticket_id)
+        clock.advance(120)
+        # The feed reads positions on the first issue, promoting u0 and u1
+        # while the rest of the batch is still being reported.
+        manager.issue_tickets_bulk([{'user_id': f"b{i}", 'service': "passport"}
+                                    for i in range(3)])
+        subscription.close()
+        journal.close()
+
+        recovered, journal = recover(self.directory, clock=clock, **options)
+        self._assert_same_state(recovered, manager)
+        self.assertEqual(recovered.waiting_count[("default", "passport")], 5)
+        self.assertEqual(len(recovered.get_queue("default", "passport", limit=20)[0]), 5)
+        journal.close()
+
+    def test_desk_counts_are_journaled(self):
+        """Desk counts come back from the journal tail, not just from snapshots."""
+        manager, journal = recover(self.directory, fsync="never", snapshot_every=4,
+                                   estimator=ServiceRateEstimator())
+        manager.set_active_desks("default", "passport", 2)
+        for i in range(3):
+            manager.issue_ticket(f"u{i}", "A", "passport")
+        manager.set_active_desks("default", "passport", 3)  # after the snapshot
+        manager.set_active_desks("default", "tax", 4)       # queue not used yet
+        journal.close()
+        self.assertIn("snapshot-00000001.pkl", os.listdir(self.directory))
+
+        recovered, journal = recover(self.directory)
+        self.assertEqual(recovered.estimator.desks,
+                         {("default", "passport"): 3, ("default", "tax"): 4})
+        self.assertEqual(recovered.queue_version("default", "passport"),
+                         manager.queue_version("default", "passport"))
+        journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
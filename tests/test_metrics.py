@@ -0,0 +1,79 @@
+import pickle
+import unittest
+
+from smartqueue.metrics import Histogram, Metrics
+from smartqueue.queues import QueueManager
+
+
+class TestMetrics(unittest.TestCase):
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram()
+        for ns in (500, 3_000, 3_000, 2_000_000_000):
+            histogram.observe_ns(ns)
+        lines = dict(line.rsplit(" ", 1) for line in histogram.render("h", 'op="x"'))
+        self.assertEqual(lines['h_bucket{op="x",le="1.024e-06"}'], "1")
+        self.assertEqual(lines['h_bucket{op="x",le="4.096e-06"}'], "3")
+        self.assertEqual(lines['h_bucket{op="x",le="1.073741824"}'], "3")
+        self.assertEqual(lines['h_bucket{op="x",le="+Inf"}'], "4")
+        self.assertEqual(lines['h_count{op="x"}'], "4")
+
+    def test_instrumented_manager_reports_operations_and_gauges(self):
+        metrics = Metrics(sample_every=1)
+        manager = metrics.instrument(QueueManager())
+        for i in range(3):
+            manager.issue_ticket(f"u{i}", "C", "tax", priority_level=i)
+        manager.cancel_ticket(manager.issue_ticket("u9", "C", "tax").ticket_id)
+        manager.serve_next("default", "tax")
+        with self.assertRaises(ValueError):
+            manager.issue_ticket("u1", "C", "tax")  # failed calls are timed too
+
+        text = metrics.render(manager)
+        self.assertIn('noq_operation_seconds_count{operation="issue_ticket"} 5', text)
+        self.assertIn('noq_operation_seconds_count{operation="serve_next"} 1', text)
+        self.assertIn('noq_queue_depth{office="default",service="tax"} 2', text)
+        self.assertIn('noq_queue_tombstones{office="default",service="tax"} 1', text)
+        self.assertIn('noq_tickets_served_total{service="tax"} 1', text)
+
+    def test_bucket_queues_report_their_own_size(self):
+        metrics = Metrics()
+        manager = QueueManager(office_engines={'north': "bucket"})
+        for office in ("north", "south"):
+            for i in range(3):
+                manager.issue_ticket(f"u{i}", "C", "tax", priority_level=i % 2, office_id=office)
+        manager.cancel_ticket(manager.issue_ticket("u9", "C", "tax", office_id="north").ticket_id)
+
+        text = metrics.render(manager)
+        self.assertIn('noq_queue_bucket_entries{office="north",service="tax"} 4', text)
+        self.assertNotIn('noq_queue_heap_entries{office="north"', text)
+        self.assertNotIn('noq_queue_deque_entries{office="north"', text)
+        self.assertIn('noq_queue_heap_entries{office="south",service="tax"} 1', text)
+        self.assertNotIn('noq_queue_bucket_entries{office="south"', text)
+
+    def test_sampling_and_snapshots(self):
+        metrics = Metrics(sample_every=4)
+        manager = metrics.instrument(QueueManager())
+        for i in range(8):
+            manager.get_position(manager.issue_ticket(f"u{i}", "C", "support").ticket_id)
+        self.assertEqual(metrics.operations["issue_ticket"].histogram.count, 2)
+
+        # Snapshots never carry the timers; a restored manager runs untimed.
+        restored = pickle.loads(pickle.dumps(manager))
+        self.assertIsNone(restored.op_timers)
+        for i in range(8, 16):
+            restored.issue_ticket(f"u{i}", "C", "support")
+        self.assertEqual(metrics.operations["issue_ticket"].histogram.count, 2)
+
+    def test_requests_are_counted_per_endpoint(self):
+        metrics = Metrics()
+        metrics.observe_request("GET", "/api/status/<ticket_id>", 200, 40_000)
+        metrics.observe_request("GET", "/api/status/<ticket_id>", 200, 50_000)
+        metrics.observe_request("POST", "/api/serve", 400, 10_000)
+        text = metrics.render()
+        self.assertIn('noq_http_requests_total{method="GET",endpoint="/api/status/<ticket_id>",'
+                      'status="200"} 2', text)
+        self.assertIn('noq_http_request_seconds_count{endpoint="/api/serve"} 1', text)
+        self.assertNotIn("noq_queue_depth", text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,15 @@
 # AI-assisted: Test cases were scaffolded with GitHub Copilot. We described
 # the expected behaviors (FIFO ordering, priority skipping, position math)
 # and Copilot generated the initial test methods, which we then refined.
+import random
+import shutil
+import tempfile
 import unittest
-from smartqueue.queues import QueueManager
+from smartqueue.events import ChangeFeed
+from smartqueue.journal import recover
+from smartqueue.queues import QueueManager, COMPACT_MIN_TOMBSTONES
 from smartqueue.models import Ticket
+from smartqueue.utils import ManualClock
 
 class TestQueueManager(unittest.TestCase):
     def setUp(self):
@@ -74,5 +80,210 @@ class TestQueueManager(unittest.TestCase):
         self.assertEqual(pos, 3)
         self.assertEqual(wait, 25)
 
+    def test_position_matches_serve_order(self):
+        """Positions from the index agree with the order serve_next actually uses."""
+        rng = random.Random(7)
+        for i in range(300):
+            self.manager.issue_ticket(f"u{i}", f"C{i}", "tax",
+                                      priority_level=rng.choice([0, 0, 0, 2, 5]),
+                                      expected_minutes=rng.randint(1, 20))
+            if i % 4 == 3:
+                self.manager.serve_next("default", "tax")
+
+        reported = {tid: self.manager.get_position(tid)
+                    for tid in self.manager.active_tickets_by_id}
+
+        minutes_ahead = 0
+        rank = 1
+        while True:
+            ticket = self.manager.serve_next("default", "tax")
+            if ticket is None:
+                break
+            self.assertEqual(reported[ticket.ticket_id], (rank, minutes_ahead))
+            minutes_ahead += ticket.expected_minutes
+            rank += 1
+        self.assertEqual(rank - 1, len(reported))
+
+    def test_queue_overview_counters(self):
+        """Overview counters follow issue and serve without scanning tickets."""
+        self.manager.issue_ticket("u1", "A", "passport", expected_minutes=10)
+        self.manager.issue_ticket("u2", "B", "passport", priority_level=5, expected_minutes=15)
+        self.manager.issue_ticket("u3", "C", "tax", office_id="north", expected_minutes=5)
+        self.manager.serve_next("default", "passport")
+
+        default = {q['service']: q for q in self.manager.get_queue_overview("default")}
+        self.assertEqual(default['passport']['waiting_count'], 1)
+        self.assertEqual(default['passport']['waiting_minutes'], 10)
+        self.assertEqual(default['tax']['waiting_count'], 0)
+
+        everything = self.manager.get_queue_overview()
+        north_tax = [q for q in everything if q['office_id'] == "north" and q['service'] == "tax"]
+        self.assertEqual(north_tax[0]['waiting_count'], 1)
+        self.assertEqual({q['office_id'] for q in everything}, {"default", "north"})
+
+    def test_get_queue_pages_in_serve_order(self):
+        """Paging through get_queue visits every ticket in the order serve_next uses."""
+        rng = random.Random(3)
+        for i in range(120):
+            self.manager.issue_ticket(f"u{i}", f"C{i}", "support",
+                                      priority_level=rng.choice([0, 0, 1, 4]))
+
+        listed = []
+        cursor = None
+        while True:
+            page, cursor = self.manager.get_queue("default", "support", limit=25, cursor=cursor)
+            self.assertLessEqual(len(page), 25)
+            listed.extend(t.ticket_id for t in page)
+            if cursor is None:
+                break
+
+        served = []
+        while True:
+            ticket = self.manager.serve_next("default", "support")
+            if ticket is None:
+                break
+            served.append(ticket.ticket_id)
+        self.assertEqual(listed, served)
+
+    def test_get_queue_rejects_bad_input(self):
+        with self.assertRaises(ValueError):
+            self.manager.get_queue("default", "nope")
+        with self.assertRaises(ValueError):
+            self.manager.get_queue("default", "passport", cursor="garbage")
+        self.assertEqual(self.manager.get_queue("default", "passport"), ([], None))
+
+    def test_cancelled_ticket_is_not_served(self):
+        """A cancelled ticket is skipped by serve_next and frees the user's slot."""
+        t1 = self.manager.issue_ticket("u1", "A", "passport", priority_level=5)
+        t2 = self.manager.issue_ticket("u2", "B", "passport")
+        t3 = self.manager.issue_ticket("u3", "C", "passport")
+
+        cancelled = self.manager.cancel_ticket(t1.ticket_id)
+        self.assertEqual(cancelled.status, "CANCELLED")
+        self.assertIsNone(self.manager.cancel_ticket(t1.ticket_id))
+        self.assertEqual(self.manager.get_position(t1.ticket_id), (-1, 0))
+        self.assertEqual(self.manager.get_position(t3.ticket_id), (2, 10))
+
+        self.manager.cancel_ticket(t2.ticket_id)
+        self.assertEqual(self.manager.serve_next("default", "passport").ticket_id, t3.ticket_id)
+        self.assertEqual(self.manager.tombstones[("default", "passport")], 0)
+
+        # The user may take a new ticket after cancelling.
+        self.manager.issue_ticket("u1", "A", "passport")
+
+    def test_tombstones_trigger_compaction(self):
+        """Heavy cancellation compacts the heap and deque instead of piling up."""
+        total = COMPACT_MIN_TOMBSTONES * 4
+        tickets = [self.manager.issue_ticket(f"u{i}", "X", "tax", priority_level=i % 2)
+                   for i in range(total)]
+        for ticket in tickets[:-4]:
+            self.manager.cancel_ticket(ticket.ticket_id)
+
+        key = ("default", "tax")
+        stored = len(self.manager.priority_heaps[key]) + len(self.manager.normal_queues[key])
+        self.assertLess(stored, total // 2)
+        self.assertLess(self.manager.tombstones[key], COMPACT_MIN_TOMBSTONES)
+
+        served = [self.manager.serve_next("default", "tax").ticket_id for _ in range(4)]
+        self.assertEqual(sorted(served), sorted(t.ticket_id for t in tickets[-4:]))
+        self.assertIsNone(self.manager.serve_next("default", "tax"))
+        self.assertEqual(self.manager.tombstones[key], 0)
+
+    def test_bulk_issue_matches_single_issue(self):
+        """Bulk issuance orders tickets and reports positions like one-by-one issuance."""
+        self.manager.issue_ticket("early", "E", "passport", priority_level=3)
+        batch = [{'user_id': f"g{i}", 'name': f"G{i}", 'service': "passport",
+                  'priority_level': (i % 3) * 2, 'expected_minutes': 5}
+                 for i in range(40)]
+        results = self.manager.issue_tickets_bulk(batch)
+
+        self.assertEqual([t.customer.user_id for t, _, _ in results], [b['user_id'] for b in batch])
+        for ticket, position, wait in results:
+            self.assertEqual((position, wait), self.manager.get_position(ticket.ticket_id))
+
+        order, _ = self.manager.get_queue("default", "passport", limit=100)
+        for ticket in order:
+            self.assertEqual(self.manager.serve_next("default", "passport").ticket_id, ticket.ticket_id)
+
+    def test_bulk_issue_is_all_or_nothing(self):
+        self.manager.issue_ticket("u1", "A", "tax")
+        bad_batches = [
+            [{'user_id': "u2", 'service': "tax"}, {'user_id': "u1", 'service': "tax"}],
+            [{'user_id': "u2", 'service': "tax"}, {'user_id': "u2", 'service': "tax"}],
+            [{'user_id': "u2", 'service': "tax"}, {'user_id': "u3", 'service': "nope"}],
+        ]
+        for batch in bad_batches:
+            with self.assertRaises(ValueError):
+                self.manager.issue_tickets_bulk(batch)
+        self.assertEqual(len(self.manager.active_tickets_by_id), 1)
+        self.assertEqual(self.manager.waiting_count[("default", "tax")], 1)
+
+    def test_bulk_issue_recovers_from_snapshot_inside_batch(self):
+        """A journal snapshot due mid-batch (and promotions read with the positions) replay once."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        options = {'engine': "bucket", 'aging': {0: 60}}
+        manager, journal = recover(directory, fsync="never", snapshot_every=4, **options)
+        old = manager.issue_ticket("old", "O", "passport")
+        for i in range(2):
+            manager.issue_ticket(f"vip{i}", "V", "passport", priority_level=2)
+        batch = [{'user_id': f"g{i}", 'service': ("passport", "tax")[i % 2],
+                  'priority_level': i % 3} for i in range(3)]
+        # The first ticket is due for promotion by the time the batch is
+        # placed; the snapshot falls inside the batch, not on the promotion.
+        manager.clock = lambda: old.issued_ts + 61
+        manager.issue_tickets_bulk(batch)
+        self.assertEqual(manager.promoted_count, 1)
+        journal.close()
+
+        recovered, journal = recover(directory, **options)
+        self.addCleanup(journal.close)
+        self.assertEqual(set(recovered.active_tickets_by_id), set(manager.active_tickets_by_id))
+        self.assertEqual(recovered.waiting_count, manager.waiting_count)
+        for service in ("passport", "tax"):
+            page = lambda m: [t.ticket_id for t in m.get_queue("default", service, limit=20)[0]]
+            self.assertEqual(page(recovered), page(manager))
+
+    def test_bulk_issue_recovers_with_a_change_feed_reading_mid_batch(self):
+        """Subscribers' position reads age queues during the batch; recovery still replays it once."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        clock = ManualClock(1000.0)
+        options = {'engine': "bucket", 'aging': {0: 60}}
+        manager, journal = recover(directory, fsync="never", snapshot_every=4, clock=clock,
+                                   **options)
+        feed = ChangeFeed(manager).attach()
+        watched = [manager.issue_ticket(f"old-{service}", "O", service)
+                   for service in ("passport", "tax")]
+        subscriptions = [feed.subscribe_ticket(t.ticket_id) for t in watched]
+        clock.advance(120)
+        # Small enough that no second snapshot at the end of the batch covers it.
+        batch = [{'user_id': f"g{i}", 'service': ("passport", "tax")[i % 2]} for i in range(3)]
+        results = manager.issue_tickets_bulk(batch)
+        self.assertEqual(manager.promoted_count, 2)
+        for ticket, position, wait in results:
+            self.assertEqual((position, wait), manager.get_position(ticket.ticket_id))
+        for subscription in subscriptions:
+            subscription.close()
+        journal.close()
+
+        recovered, journal = recover(directory, clock=clock, **options)
+        self.addCleanup(journal.close)
+        self.assertEqual(recovered.waiting_count, manager.waiting_count)
+        self.assertEqual(recovered.promoted_count, 2)
+        for service in ("passport", "tax"):
+            page = lambda m: [t.ticket_id for t in m.get_queue("default", service, limit=20)[0]]
+            self.assertEqual(page(recovered), page(manager))
+
+    def test_get_positions_batch(self):
+        """Batch lookups agree with get_position, using both point and sweep strategies."""
+        tickets = [self.manager.issue_ticket(f"u{i}", "X", "support", priority_level=i % 4)
+                   for i in range(200)]
+        self.manager.cancel_ticket(tickets[7].ticket_id)
+        for ids in ([tickets[150].ticket_id, "missing"], [t.ticket_id for t in tickets]):
+            positions = self.manager.get_positions(ids)
+            for tid in ids:
+                self.assertEqual(positions[tid], self.manager.get_position(tid))
+
 if __name__ == "__main__":
     unittest.main()
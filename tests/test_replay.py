@@ -0,0 +1,120 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from smartqueue.cli import main
+from smartqueue.replay import Replayer, paced, parse_events, read_events, replay
+
+T0 = 1_700_000_000.0
+
+EVENTS = [
+    {"ts": T0, "op": "issue", "ticket_id": "A-1", "name": "Maria Garcia", "service": "tax"},
+    {"ts": T0 + 60, "op": "issue", "ticket_id": "A-2", "service": "tax", "priority": 2},
+    {"ts": T0 + 90, "op": "issue", "ticket_id": "A-3", "service": "tax"},
+    {"ts": T0 + 120, "op": "status", "ticket_id": "A-1"},
+    {"ts": T0 + 180, "op": "serve", "service": "tax", "ticket_id": "A-2"},
+    {"ts": T0 + 200, "op": "cancel", "ticket_id": "A-3"},
+    {"ts": T0 + 240, "op": "serve", "service": "tax", "ticket_id": "A-3"},
+    {"ts": T0 + 250, "op": "serve", "service": "tax"},
+    {"ts": T0 + 260, "op": "status", "ticket_id": "A-1"},
+    {"ts": T0 + 270, "op": "issue", "ticket_id": "A-4", "user_id": "u9", "service": "passport"},
+    {"ts": T0 + 280, "op": "issue", "ticket_id": "A-5", "user_id": "u9", "service": "passport"},
+]
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name: str, text: str) -> str:
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_applies_events_on_trace_time(self):
+        path = self.write("day.ndjson", "\n".join(json.dumps(e) for e in EVENTS) + "\n\n")
+        manager, stats = replay(path)
+
+        summary = {op: stats.ops[op].summary() for op in stats.ops}
+        self.assertEqual([summary["issue"][k] for k in ("count", "ok", "rejected")], [5, 4, 1])
+        # The third serve finds the tax queue empty; A-1 was served second
+        self.assertEqual([summary["serve"][k] for k in ("count", "ok", "missed")], [3, 2, 1])
+        self.assertEqual([summary["status"][k] for k in ("ok", "missed")], [1, 1])
+        self.assertEqual(summary["cancel"]["ok"], 1)
+        # The trace says A-3 was served second, the replay served A-1
+        self.assertEqual(stats.diverged, 1)
+        self.assertEqual(stats.events, len(EVENTS))
+        self.assertEqual(stats.trace_seconds, 280)
+        self.assertGreater(stats.ops_per_second, 0)
+        self.assertLessEqual(summary["issue"]["p50_us"], summary["issue"]["max_us"])
+
+        # Waits follow the trace clock: A-2 waited 2 minutes, A-1 four
+        self.assertAlmostEqual(manager.total_wait_time_sum["tax"], 2 + 4)
+        self.assertEqual([(q['service'], q['waiting_count']) for q in manager.get_queue_overview()
+                          if q['waiting_count']], [("passport", 1)])
+
+    def test_csv_matches_ndjson(self):
+        columns = ["ts", "op", "ticket_id", "user_id", "name", "service", "priority"]
+        lines = [",".join(columns)] + [",".join(str(e.get(c, "")) for c in columns) for e in EVENTS]
+        _, from_csv = replay(self.write("day.csv", "\n".join(lines) + "\n"))
+        _, from_json = replay(self.write("day.ndjson", "\n".join(json.dumps(e) for e in EVENTS)))
+        for op in from_csv.ops:
+            self.assertEqual([from_csv.ops[op].summary()[k] for k in ("count", "ok", "missed")],
+                             [from_json.ops[op].summary()[k] for k in ("count", "ok", "missed")])
+
+    def test_id_maps_hold_waiting_tickets_only(self):
+        replayer = Replayer()
+        events = [{"ts": T0 + i, "op": "serve" if i % 2 else "issue", "ticket_id": f"T{i // 2}"}
+                  for i in range(2000)]
+        replayer.run(parse_events(events))
+        self.assertEqual((replayer._replayed, replayer._traced), ({}, {}))
+        self.assertEqual(replayer.stats.diverged, 0)
+
+    def test_bad_traces(self):
+        with self.assertRaises(ValueError):
+            list(parse_events([{"ts": T0, "op": "renew"}]))
+        with self.assertRaises(ValueError):
+            list(parse_events([{"ts": T0, "op": "issue"}, {"ts": T0 - 1, "op": "issue"}]))
+        with self.assertRaises(ValueError):
+            list(parse_events([{"ts": T0, "op": "cancel"}]))
+        with self.assertRaises(ValueError):
+            list(read_events(self.write("bad.ndjson", '{"ts": 1, "op": "issue"}\n{oops\n')))
+        with self.assertRaises(ValueError):
+            list(read_events("day.xml", fmt="xml"))
+        with self.assertRaises(ValueError):
+            list(paced([], speed=0))
+
+    def test_paced_waits_for_scaled_trace_time(self):
+        wall = [0.0]
+        slept = []
+
+        def sleep(seconds):
+            slept.append(seconds)
+            wall[0] += seconds
+
+        events = [{"ts": T0 + offset} for offset in (0, 60, 60, 600)]
+        released = [round(wall[0], 6) for _ in paced(events, 60, sleep, lambda: wall[0])]
+        self.assertEqual(released, [0, 1, 1, 10])
+        self.assertEqual(len(slept), 2)
+
+    def test_cli_subcommand(self):
+        path = self.write("day.ndjson", "\n".join(json.dumps(e) for e in EVENTS))
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.assertEqual(main(["replay", path, "--engine", "bucket", "--speed", "1e6"]), 0)
+        report = out.getvalue()
+        self.assertIn("ops/sec", report)
+        self.assertIn("default/passport: 1 waiting", report)
+        self.assertIn("1 serves picked a different ticket", report)
+
+
+if __name__ == '__main__':
+    unittest.main()
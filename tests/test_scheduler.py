@@ -0,0 +1,70 @@
+import unittest
+
+from smartqueue.queues import QueueManager
+from smartqueue.scheduler import DeskScheduler
+
+
+class TestDeskScheduler(unittest.TestCase):
+    def setUp(self):
+        self.manager = QueueManager()
+        self.scheduler = DeskScheduler(self.manager).attach()
+
+    def issue(self, count, service, prefix=None, **kwargs):
+        return [self.manager.issue_ticket(f"{prefix or service}{i}", "C", service, **kwargs)
+                for i in range(count)]
+
+    def test_desk_serves_only_its_services(self):
+        self.issue(2, "tax")
+        self.issue(2, "passport")
+        self.scheduler.register_desk("d1", ["tax"])
+        served = [self.scheduler.serve_next_for_desk("d1") for _ in range(3)]
+        self.assertEqual([t and t.service.value for t in served], ["tax", "tax", None])
+        with self.assertRaises(ValueError):
+            self.scheduler.serve_next_for_desk("nope")
+        with self.assertRaises(ValueError):
+            self.scheduler.register_desk("d2", ["tax", "bakery"])
+
+    def test_longer_queue_gets_more_serves_but_none_starves(self):
+        self.issue(30, "tax")
+        self.issue(3, "support")
+        self.scheduler.register_desk("d1", ["tax", "support"])
+        served = [self.scheduler.serve_next_for_desk("d1").service.value for _ in range(12)]
+        self.assertIn("support", served[:8])
+        self.assertGreater(served.count("tax"), served.count("support"))
+        rest = []
+        while True:
+            ticket = self.scheduler.serve_next_for_desk("d1")
+            if ticket is None:
+                break
+            rest.append(ticket)
+        self.assertEqual(len(served) + len(rest), 33)
+
+    def test_oldest_head_goes_first_within_a_round(self):
+        first = self.issue(1, "municipal")[0]
+        self.issue(1, "passport")
+        self.scheduler.register_desk("d1", ["passport", "municipal"])
+        self.assertEqual(self.scheduler.serve_next_for_desk("d1").ticket_id, first.ticket_id)
+
+    def test_heads_follow_changes_made_elsewhere(self):
+        tickets = self.issue(3, "tax")
+        self.scheduler.register_desk("d1", ["tax"])
+        self.manager.serve_next("default", "tax")
+        self.manager.cancel_ticket(tickets[1].ticket_id)
+        self.assertEqual(self.scheduler.serve_next_for_desk("d1").ticket_id, tickets[2].ticket_id)
+        self.assertIsNone(self.scheduler.serve_next_for_desk("d1"))
+
+    def test_serve_many_opens_several_desks(self):
+        self.issue(2, "tax")
+        self.issue(1, "support")
+        self.scheduler.register_desk("a", ["tax"])
+        self.scheduler.register_desk("b", ["tax", "support"])
+        self.scheduler.register_desk("c", ["support"])
+        served = self.scheduler.serve_many(["a", "b", "c"])
+        self.assertEqual([desk for desk, _ in served], ["a", "b", "c"])
+        self.assertEqual(len({t.ticket_id for _, t in served if t}), sum(1 for _, t in served if t))
+        self.assertEqual(self.manager.waiting_count[("default", "tax")]
+                         + self.manager.waiting_count[("default", "support")], 3 - sum(1 for _, t in served if t))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import pickle
+import random
+import shutil
+import tempfile
+import unittest
+
+from smartqueue.journal import recover
+from smartqueue.queues import QueueManager
+from smartqueue.search import PrefixIndex, SearchIndex
+
+
+class TestPrefixIndex(unittest.TestCase):
+    def test_matches_a_sorted_list(self):
+        rng = random.Random(7)
+        index, expected = PrefixIndex(), set()
+        words = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 6))) for _ in range(3000)]
+        for i, word in enumerate(words):
+            index.add(word, f"t{i}")
+            expected.add((word, f"t{i}"))
+        for i in rng.sample(range(len(words)), 2000):
+            self.assertTrue(index.remove(words[i], f"t{i}"))
+            expected.discard((words[i], f"t{i}"))
+        self.assertFalse(index.remove("zzz", "t0"))
+
+        self.assertEqual(len(index), len({word for word, _ in expected}))
+        # Keys in order, ids under one key in insertion order
+        order = sorted(expected, key=lambda e: (e[0], int(e[1][1:])))
+        for prefix in ["", "a", "ab", "cab", "abcabc", "d"]:
+            self.assertEqual(list(index.scan(prefix)),
+                             [e for e in order if e[0].startswith(prefix)])
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.add("000ZW-0000", "Maria Garcia", "u-17")
+        self.index.add("000ZW-0001", "Luis García-Lopez", "gar-99")
+        self.index.add("000ZW-0002", "Ann Garner", "u-18")
+
+    def test_name_id_and_user_prefixes(self):
+        self.assertEqual(self.index.search("garc"), ["000ZW-0000", "000ZW-0001"])
+        self.assertEqual(self.index.search("GARCÍ"), ["000ZW-0001"])
+        self.assertEqual(self.index.search("gar"), ["000ZW-0000", "000ZW-0001", "000ZW-0002"])
+        self.assertEqual(self.index.search("gar", limit=2), ["000ZW-0000", "000ZW-0001"])
+        # Read out over the phone: no dash, O for 0, lower case
+        self.assertEqual(self.index.search("ooozwooo2"), ["000ZW-0002"])
+        self.assertEqual(self.index.search("u-1"), ["000ZW-0000", "000ZW-0002"])
+        # Every word must match the start of a name word
+        self.assertEqual(self.index.search("ann gar"), ["000ZW-0002"])
+        self.assertEqual(self.index.search("garcia maria"), ["000ZW-0000"])
+        self.assertEqual(self.index.search("maria lopez"), [])
+        self.assertEqual(self.index.search("  "), [])
+
+        self.assertTrue(self.index.remove("000ZW-0000"))
+        self.assertFalse(self.index.remove("000ZW-0000"))
+        self.assertEqual(self.index.search("garc"), ["000ZW-0001"])
+
+
+class TestManagerSearch(unittest.TestCase):
+    def test_follows_issue_serve_and_cancel(self):
+        manager = QueueManager(search=True)
+        first = manager.issue_ticket("u1", "Maria Garcia", "tax", office_id="north")
+        second = manager.issue_ticket("u2", "Pedro Garcia", "tax", office_id="north")
+        manager.issue_ticket("u3", "Rosa Garcia", "tax", priority_level=2, office_id="south")
+
+        found = manager.search("garcia", office_id="north")
+        self.assertEqual([(t.name, pos) for t, pos, _ in found],
+                         [("Maria Garcia", 1), ("Pedro Garcia", 2)])
+        self.assertEqual([t.office_id for t, _, _ in manager.search("garcia")],
+                         ["north", "north", "south"])
+        self.assertEqual(len(manager.search("garcia", limit=1)), 1)
+
+        manager.serve_next("north", "tax")
+        self.assertEqual([(t.ticket_id, pos) for t, pos, _ in manager.search("garcia", "north")],
+                         [(second.ticket_id, 1)])
+        manager.cancel_ticket(second.ticket_id)
+        self.assertEqual(manager.search("garcia", "north"), [])
+        self.assertEqual(manager.search(first.ticket_id), [])
+
+        with self.assertRaises(ValueError):
+            QueueManager().search("garcia")
+        # Snapshots carry the index
+        copy = pickle.loads(pickle.dumps(manager))
+        self.assertEqual([t.name for t, _, _ in copy.search("ros")], ["Rosa Garcia"])
+
+    def test_enabled_on_a_recovered_manager(self):
+        directory = tempfile.mkdtemp()
+        try:
+            manager, journal = recover(directory, fsync="never")
+            ticket = manager.issue_ticket("u1", "Maria Garcia", "passport")
+            journal.close()
+
+            manager, journal = recover(directory, search=True)
+            self.assertEqual([t.ticket_id for t, _, _ in manager.search("mar")], [ticket.ticket_id])
+            journal.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
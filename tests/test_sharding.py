@@ -0,0 +1,87 @@
+import shutil
+import tempfile
+import unittest
+
+from smartqueue.sharding import HashRing, ShardedQueueManager
+
+OFFICES = [f"office-{i}" for i in range(12)]
+
+
+class TestHashRing(unittest.TestCase):
+    def test_adding_a_shard_moves_few_offices(self):
+        offices = [f"office-{i}" for i in range(2000)]
+        three, four = HashRing(range(3)), HashRing(range(4))
+        moved = sum(three.shard_for(o) != four.shard_for(o) for o in offices)
+        self.assertLess(moved, len(offices) * 0.4)  # ideal: 1/4
+        # Every office that moved went to the new shard.
+        self.assertTrue(all(four.shard_for(o) == 3 for o in offices
+                            if three.shard_for(o) != four.shard_for(o)))
+
+
+class TestShardedQueueManager(unittest.TestCase):
+    def setUp(self):
+        self.router = ShardedQueueManager(3, events=False)
+
+    def tearDown(self):
+        self.router.close()
+
+    def test_ids_route_to_the_owning_shard(self):
+        tickets = [self.router.issue_ticket(f"u{i}", "C", "passport", office_id=office)
+                   for i, office in enumerate(OFFICES)]
+        for office, ticket in zip(OFFICES, tickets):
+            self.assertEqual(self.router.shard_of_ticket(ticket.ticket_id),
+                             self.router.shard_for_office(office))
+            self.assertEqual(self.router.get_position(ticket.ticket_id), (1, 0))
+        self.assertEqual(len({t.ticket_id for t in tickets}), len(tickets))
+        self.assertEqual(self.router.get_position("nonsense"), (-1, 0))
+
+    def test_serve_cancel_and_overview(self):
+        first = self.router.issue_ticket("u1", "A", "tax", office_id="north")
+        second = self.router.issue_ticket("u2", "B", "tax", office_id="north")
+        self.router.issue_ticket("u3", "C", "tax", office_id="south")
+
+        served = self.router.serve_next("north", "tax")
+        self.assertEqual((served.ticket_id, served.status, served.customer.name),
+                         (first.ticket_id, "SERVED", "A"))
+        self.assertEqual(self.router.cancel_ticket(second.ticket_id).status, "CANCELLED")
+        self.assertIsNone(self.router.active_tickets_by_id.get(second.ticket_id))
+
+        overview = {(row['office_id'], row['service']): row['waiting_count']
+                    for row in self.router.get_queue_overview()}
+        self.assertEqual((overview[("north", "tax")], overview[("south", "tax")]), (0, 1))
+        self.assertEqual(self.router.served_count, {"tax": 1})
+        self.assertEqual(self.router.counter, 3)
+
+    def test_bulk_spanning_shards_is_all_or_nothing(self):
+        self.router.issue_ticket("taken", "T", "passport", office_id=OFFICES[0])
+        batch = [{'user_id': f"b{i}", 'office_id': office} for i, office in enumerate(OFFICES)]
+        batch.append({'user_id': "taken", 'office_id': OFFICES[0]})
+        with self.assertRaises(ValueError):
+            self.router.issue_tickets_bulk(batch)
+        waiting = sum(row['waiting_count'] for row in self.router.get_queue_overview())
+        self.assertEqual(waiting, 1)
+
+        results = self.router.issue_tickets_bulk(batch[:-1])
+        self.assertEqual([t.office_id for t, _, _ in results], OFFICES)
+
+
+class TestShardedDurability(unittest.TestCase):
+    def test_each_shard_recovers_its_offices(self):
+        directory = tempfile.mkdtemp()
+        try:
+            router = ShardedQueueManager(2, data_dir=directory, events=False, fsync="never")
+            ids = [router.issue_ticket(f"u{i}", "C", "support", office_id=office).ticket_id
+                   for i, office in enumerate(OFFICES)]
+            router.close()
+
+            router = ShardedQueueManager(2, data_dir=directory, events=False)
+            try:
+                self.assertEqual([router.get_position(tid)[0] for tid in ids], [1] * len(ids))
+            finally:
+                router.close()
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from smartqueue.analytics import wait_time_report
+from smartqueue.queues import QueueManager
+from smartqueue.utils import ManualClock
+
+try:
+    import numpy
+except ImportError:  # the simulator is optional; the clock is not
+    numpy = None
+
+
+class TestInjectedClock(unittest.TestCase):
+    def test_manager_reads_time_from_its_clock(self):
+        clock = ManualClock(1_700_000_000.0)
+        manager = QueueManager(clock=clock)
+        ticket = manager.issue_ticket("u1", "Ann", "tax")
+        clock.advance(600)
+        manager.serve_next("default", "tax")
+        self.assertEqual(ticket.issued_ts, 1_700_000_000.0)
+        self.assertEqual(ticket.served_ts, 1_700_000_600.0)
+        self.assertEqual(wait_time_report(manager)[0]['p50'], 10.0)
+
+    def test_ids_before_the_id_epoch(self):
+        manager = QueueManager(clock=ManualClock(0.0))
+        self.assertTrue(manager.issue_ticket("u1", "Ann", "tax").ticket_id.endswith("000-0000"))
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestSimulation(unittest.TestCase):
+    def test_single_desk_trace_gives_exact_waits(self):
+        from smartqueue.sim import EmpiricalService, Simulation, TraceArrivals
+        # Three customers a minute apart, five minutes each, one desk.
+        sim = Simulation({'tax': TraceArrivals([0, 60, 120])}, {'tax': EmpiricalService([5])},
+                         {'tax': 1}, days=1)
+        summary = sim.run().summary()['tax']
+        self.assertEqual((summary['served'], summary['unserved']), (3, 0))
+        self.assertEqual((summary['p50'], summary['max']), (4.0, 8.0))
+
+        closed = sim.with_desks({'tax': 0}).run().summary()['tax']
+        self.assertEqual((closed['served'], closed['unserved']), (0, 3))
+
+    def test_poisson_week_and_sweep(self):
+        from smartqueue.sim import ExponentialService, PoissonArrivals, Simulation, sweep
+        office_hours = ([0] * 8 + [1] * 9 + [0] * 7) * 5 + [0] * 48
+        sim = Simulation({'passport': PoissonArrivals(30, office_hours)},
+                         {'passport': ExponentialService(8)}, {'passport': 4}, days=7, seed=3)
+        result = sim.run()
+        served = result.summary()['passport']['served']
+        self.assertAlmostEqual(served, 30 * 9 * 5, delta=150)
+
+        results = sweep(sim, [{'passport': 4}, {'passport': 8}], workers=2)
+        self.assertEqual(results[0].summary(), result.summary())  # same seed, same run
+        self.assertLess(results[1].summary()['passport']['p90'],
+                        results[0].summary()['passport']['p90'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import random
+import unittest
+
+from smartqueue.sketches import P2Quantile, RollingWindow, WaitStats
+
+
+class TestSketches(unittest.TestCase):
+    def test_p2_tracks_quantiles(self):
+        """P² estimates land close to the exact quantiles of a skewed stream."""
+        rng = random.Random(5)
+        data = [rng.expovariate(1 / 12) for _ in range(20000)]
+        ordered = sorted(data)
+        for p in (0.5, 0.9, 0.99):
+            sketch = P2Quantile(p)
+            for x in data:
+                sketch.add(x)
+            exact = ordered[int(p * (len(ordered) - 1))]
+            self.assertAlmostEqual(sketch.value(), exact, delta=exact * 0.05)
+
+    def test_p2_small_samples_are_exact(self):
+        sketch = P2Quantile(0.5)
+        self.assertEqual(sketch.value(), 0.0)
+        for x in (9, 1, 5):
+            sketch.add(x)
+        self.assertEqual(sketch.value(), 5)
+
+    def test_rolling_window_forgets(self):
+        """Buckets older than the window, or overwritten by a later lap, drop out."""
+        window = RollingWindow(60, 60.0)
+        window.add(10.0, now=0)
+        window.add(20.0, now=30 * 60)
+        self.assertEqual(window.summary(15 * 60, now=30 * 60), (1, 20.0, 20.0))
+        self.assertEqual(window.summary(3600, now=30 * 60), (2, 30.0, 20.0))
+        # One full lap later the first bucket's slot is recycled.
+        window.add(5.0, now=3600)
+        self.assertEqual(window.summary(3600, now=3600), (2, 25.0, 20.0))
+
+    def test_wait_stats_summary(self):
+        stats = WaitStats()
+        for i in range(100):
+            stats.add(float(i), now=1000.0 + i)
+        summary = stats.summary(now=1100.0)
+        self.assertEqual(summary['served'], 100)
+        self.assertAlmostEqual(summary['avg_wait'], 49.5)
+        self.assertEqual(summary['windows']['15m']['served'], 100)
+        self.assertEqual(summary['windows']['24h']['max_wait'], 99.0)
+        self.assertLess(summary['p50'], summary['p90'])
+
+
+if __name__ == "__main__":
+    unittest.main()
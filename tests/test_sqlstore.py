@@ -0,0 +1,130 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+from smartqueue.queues import QueueManager
+from smartqueue.sqlstore import SQLiteQueueManager
+from smartqueue.utils import ManualClock
+
+START = 1_704_067_200.0  # 2024-01-01 00:00 UTC
+
+
+def _serve_all(path, office_id, service, results):
+    manager = SQLiteQueueManager(path)
+    served = []
+    while True:
+        ticket = manager.serve_next(office_id, service)
+        if ticket is None:
+            break
+        served.append(ticket.ticket_id)
+    manager.close()
+    results.put(served)
+
+
+class SQLiteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "noq.db")
+        self.clock = ManualClock(START)
+        self.manager = SQLiteQueueManager(self.path, clock=self.clock)
+
+    def tearDown(self):
+        self.manager.close()
+        shutil.rmtree(self.directory)
+
+
+class TestSQLiteQueueManager(SQLiteTestCase):
+    def test_same_order_and_ids_as_the_memory_backend(self):
+        memory = QueueManager(clock=self.clock)
+        plan = [("u1", 0), ("u2", 3), ("u3", 0), ("u4", 3), ("u5", 7), ("u6", 0)]
+        for backend in (memory, self.manager):
+            for user, priority in plan:
+                backend.issue_ticket(user, user.upper(), "tax", priority, office_id="north")
+
+        def waiting(backend):
+            return [(t.ticket_id, t.priority_level)
+                    for t in backend.get_queue("north", "tax", limit=10)[0]]
+        self.assertEqual(waiting(self.manager), waiting(memory))
+        for ticket_id, _ in waiting(memory):
+            self.assertEqual(self.manager.get_position(ticket_id), memory.get_position(ticket_id))
+
+        self.clock.advance(120)
+        for _ in range(3):
+            ours, theirs = self.manager.serve_next("north", "tax"), memory.serve_next("north", "tax")
+            self.assertEqual((ours.ticket_id, ours.status, ours.served_ts),
+                             (theirs.ticket_id, theirs.status, theirs.served_ts))
+        self.assertEqual(self.manager.get_queue_overview("north"), memory.get_queue_overview("north"))
+        self.assertEqual(self.manager.served_count, {"tax": 3})
+        self.assertEqual(self.manager.total_wait_time_sum, {"tax": 6.0})
+
+    def test_negative_priorities_queue_as_normal(self):
+        """priority <= 0 is one FIFO lane in both backends, not ranked by value."""
+        memory = QueueManager(clock=self.clock)
+        plan = [("u1", 0), ("u2", -1), ("u3", 2), ("u4", 0), ("u5", -3)]
+        for backend in (memory, self.manager):
+            for user, priority in plan:
+                backend.issue_ticket(user, user.upper(), "tax", priority)
+
+        def waiting(backend):
+            return [t.ticket_id for t in backend.get_queue("default", "tax", limit=10)[0]]
+        self.assertEqual(waiting(self.manager), waiting(memory))
+        for ticket_id in waiting(memory):
+            self.assertEqual(self.manager.get_position(ticket_id), memory.get_position(ticket_id))
+        served = [self.manager.serve_next("default", "tax").ticket_id for _ in plan]
+        self.assertEqual(served, waiting(memory))
+
+    def test_user_slots_cancel_and_paging(self):
+        first = self.manager.issue_ticket("u1", "Ann", "passport")
+        with self.assertRaises(ValueError):
+            self.manager.issue_ticket("u1", "Ann", "passport")
+        with self.assertRaises(ValueError):
+            self.manager.issue_ticket("u9", "Bo", "fishing")
+
+        self.assertEqual(self.manager.cancel_ticket(first.ticket_id).status, "CANCELLED")
+        self.assertIsNone(self.manager.cancel_ticket(first.ticket_id))
+        self.assertIsNone(self.manager.active_tickets_by_id.get(first.ticket_id))
+        self.assertEqual(self.manager.get_position(first.ticket_id), (-1, 0))
+        again = self.manager.issue_ticket("u1", "Ann", "passport")  # slot is free again
+        self.assertEqual(self.manager.active_tickets_by_id[again.ticket_id].name, "Ann")
+
+        for i, priority in enumerate([0, 2, 0, 2, 5]):
+            self.manager.issue_ticket(f"p{i}", "P", "passport", priority)
+        pages, cursor = [], None
+        while True:
+            page, cursor = self.manager.get_queue("default", "passport", limit=2, cursor=cursor)
+            pages.append([t.priority_level for t in page])
+            if cursor is None:
+                break
+        self.assertEqual(pages, [[5, 2], [2, 0], [0, 0]])
+
+    def test_bulk_is_all_or_nothing(self):
+        self.manager.issue_ticket("taken", "T", "support")
+        batch = [{'user_id': f"b{i}", 'service': "support"} for i in range(3)]
+        with self.assertRaises(ValueError):
+            self.manager.issue_tickets_bulk(batch + [{'user_id': "taken", 'service': "support"}])
+        self.assertEqual(self.manager.get_queue_overview("default")[2]['waiting_count'], 1)
+
+        results = self.manager.issue_tickets_bulk(batch)
+        self.assertEqual([position for _, position, _ in results], [2, 3, 4])
+
+    def test_state_is_shared_between_processes(self):
+        ids = {self.manager.issue_ticket(f"u{i}", "C", "municipal").ticket_id for i in range(200)}
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        workers = [context.Process(target=_serve_all,
+                                   args=(self.path, "default", "municipal", results))
+                   for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        served = [tid for _ in workers for tid in results.get(timeout=30)]
+        for worker in workers:
+            worker.join()
+        # Every ticket served exactly once across the desks
+        self.assertEqual(sorted(served), sorted(ids))
+        self.assertEqual(self.manager.get_queue_overview("default")[3]['waiting_count'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
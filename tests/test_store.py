@@ -0,0 +1,58 @@
+import pickle
+import unittest
+from datetime import datetime
+
+from smartqueue.models import Customer, ServiceType, Ticket
+from smartqueue.queues import QueueManager
+from smartqueue.store import TicketStore
+
+
+class TestTicketStore(unittest.TestCase):
+    def test_served_ticket_survives_slot_reuse(self):
+        """A served ticket keeps its own fields after the store reuses its row."""
+        manager = QueueManager()
+        first = manager.issue_ticket("u1", "Alice", "tax", priority_level=2, office_id="north")
+        served = manager.serve_next("north", "tax")
+        self.assertIs(served, first)
+        second = manager.issue_ticket("u2", "Bob", "passport")
+
+        self.assertEqual(len(manager.store), 1)
+        self.assertEqual(second._handle, 0)  # slot reused
+        self.assertEqual((served.customer.name, served.service, served.office_id),
+                         ("Alice", ServiceType.TAX, "north"))
+        self.assertEqual(served.status, "SERVED")
+        self.assertIsNotNone(served.served_at)
+        self.assertEqual((second.name, second.status), ("Bob", "WAITING"))
+
+    def test_office_ids_are_interned(self):
+        manager = QueueManager()
+        a = manager.issue_ticket("u1", "A", "passport", office_id="".join(["no", "rth"]))
+        b = manager.issue_ticket("u2", "B", "tax", office_id="".join(["nor", "th"]))
+        self.assertIs(a.office_id, b.office_id)
+
+    def test_adopt_detached_ticket(self):
+        store = TicketStore()
+        issued = datetime(2026, 3, 1, 10, 30)
+        ticket = Ticket(ticket_id="T1", customer=Customer("u1", "Ann"), service=ServiceType.SUPPORT,
+                        office_id="east", issued_at=issued, expected_minutes=7, seq=4)
+        store.adopt(ticket)
+        self.assertIsNone(ticket._row)
+        self.assertEqual(ticket.issued_at, issued)
+        self.assertEqual((ticket.expected_minutes, ticket.seq, ticket.customer), (7, 4, Customer("u1", "Ann")))
+
+        ticket.status = "CANCELLED"
+        store.release(ticket)
+        self.assertEqual(ticket.status, "CANCELLED")
+        self.assertEqual(store.free, [0])
+
+    def test_pickle_keeps_views_bound(self):
+        manager = QueueManager()
+        ticket = manager.issue_ticket("u1", "A", "passport")
+        restored = pickle.loads(pickle.dumps(manager))
+        view = restored.active_tickets_by_id[ticket.ticket_id]
+        self.assertIs(view._store, restored.store)
+        self.assertEqual(view.name, "A")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import math
+import random
+import shutil
+import tempfile
+import unittest
+
+from smartqueue.journal import recover
+from smartqueue.queues import QueueManager
+from smartqueue.timers import TimingWheel, parse_ttl
+from smartqueue.utils import ManualClock
+
+START = 1_700_000_000.0
+
+
+class TestTimingWheel(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(3)
+        # Small wheels so timers cross every level and the overflow park
+        wheel = TimingWheel(START, tick=1.0, bits=3, levels=3)
+        now, armed = START, {}
+        for _ in range(5000):
+            roll = rng.random()
+            if roll < 0.5:
+                key = rng.randrange(300)
+                deadline = now + rng.choice([rng.uniform(-5, 10), rng.uniform(0, 2000)])
+                wheel.arm(key, deadline)
+                armed[key] = max(math.ceil(deadline), wheel.current)
+            elif roll < 0.6:
+                key = rng.randrange(300)
+                self.assertEqual(wheel.disarm(key), armed.pop(key, None) is not None)
+            else:
+                now += rng.choice([0.4, 3, 70, 900])
+                due = wheel.advance(now)
+                self.assertEqual(sorted(due), sorted(k for k, e in armed.items() if e <= now))
+                for key in due:
+                    del armed[key]
+            self.assertEqual(len(wheel), len(armed))
+
+    def test_never_fires_early(self):
+        wheel = TimingWheel(START)
+        wheel.arm("a", START + 90.5)
+        self.assertEqual(wheel.advance(START + 90), [])
+        self.assertEqual(wheel.advance(START + 3600 * 24), ["a"])
+        self.assertEqual(parse_ttl("passport:7200, tax:60"), {"passport": 7200.0, "tax": 60.0})
+        with self.assertRaises(ValueError):
+            parse_ttl("passport")
+
+
+class TestExpiry(unittest.TestCase):
+    def setUp(self):
+        self.clock = ManualClock(START)
+        self.manager = QueueManager(ttl={"tax": 600}, no_show_grace=120, clock=self.clock)
+        self.events = []
+        self.manager.listeners.append(lambda event, ticket: self.events.append((event, ticket.ticket_id)))
+
+    def test_waiting_ticket_expires_and_frees_its_slot(self):
+        first = self.manager.issue_ticket("u1", "Ann", "tax")
+        self.clock.advance(300)
+        second = self.manager.issue_ticket("u2", "Bob", "tax")
+        passport = self.manager.issue_ticket("u3", "Cy", "passport")  # no TTL
+        self.clock.advance(301)
+        self.assertEqual(self.manager.get_position(second.ticket_id)[0], 2)  # reads do not expire
+
+        self.assertEqual(self.manager.expire_due(), 1)
+        self.assertEqual(first.status, "EXPIRED")
+        self.assertEqual(self.manager.get_position(second.ticket_id)[0], 1)
+        self.assertIn(("expire", first.ticket_id), self.events)
+        self.manager.issue_ticket("u1", "Ann", "tax")  # slot released
+        self.assertEqual(self.manager.expired_count[("default", "tax")], 1)
+
+        self.clock.advance(3600)
+        self.manager.serve_next("default", "passport")  # mutations advance the wheel
+        self.assertEqual(second.status, "EXPIRED")
+        self.assertEqual(passport.status, "SERVED")
+
+    def test_no_show_unless_confirmed(self):
+        for user in ("u1", "u2"):
+            self.manager.issue_ticket(user, "Ann", "passport")
+        shown = self.manager.serve_next("default", "passport")
+        absent = self.manager.serve_next("default", "passport")
+        self.assertTrue(self.manager.confirm_arrival(shown.ticket_id))
+        self.assertFalse(self.manager.confirm_arrival(shown.ticket_id))
+        self.clock.advance(119)
+        self.assertEqual(self.manager.expire_due(), 0)
+        self.clock.advance(1)
+        self.assertEqual(self.manager.expire_due(), 1)
+        self.assertEqual((shown.status, absent.status), ("SERVED", "NO_SHOW"))
+        self.assertEqual(self.manager.no_show_count[("default", "passport")], 1)
+        self.assertFalse(self.manager.confirm_arrival(absent.ticket_id))
+
+    def test_expiry_is_journaled(self):
+        directory = tempfile.mkdtemp()
+        try:
+            manager, journal = recover(directory, ttl={"tax": 600}, clock=self.clock)
+            gone = manager.issue_ticket("u1", "Ann", "tax")
+            self.clock.advance(601)
+            kept = manager.issue_ticket("u2", "Bob", "tax")
+            journal.close()
+
+            recovered, journal = recover(directory, ttl={"tax": 600}, clock=self.clock)
+            journal.close()
+            self.assertNotIn(gone.ticket_id, recovered.active_tickets_by_id)
+            self.assertEqual(recovered.get_position(kept.ticket_id)[0], 1)
+            self.assertIn(kept.ticket_id, recovered.timers)  # re-armed on replay
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()